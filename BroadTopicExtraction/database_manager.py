@@ -22,12 +22,34 @@ try:
 except ImportError:
     raise ImportError("无法导入config.py配置文件")
 
+# 排名快照表：每次采集时记录新上榜或排名变化的新闻，用于日内排名趋势查询
+RANK_SNAPSHOT_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS `daily_news_rank_snapshot` (
+        `id` bigint NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+        `news_id` varchar(128) NOT NULL COMMENT '新闻唯一ID',
+        `source_platform` varchar(32) NOT NULL COMMENT '新闻源平台',
+        `rank_position` int DEFAULT NULL COMMENT '快照时的排名位置',
+        `crawl_date` date NOT NULL COMMENT '爬取日期',
+        `snapshot_ts` bigint NOT NULL COMMENT '快照时间戳',
+        PRIMARY KEY (`id`),
+        KEY `idx_rank_snapshot_ts` (`snapshot_ts`, `source_platform`),
+        KEY `idx_rank_snapshot_news_ts` (`news_id`, `source_platform`, `snapshot_ts`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='热榜排名快照表'
+"""
+
 class DatabaseManager:
     """数据库管理器"""
     
-    def __init__(self):
-        """初始化数据库管理器"""
+    def __init__(self, record_rank_snapshots: bool = True):
+        """
+        初始化数据库管理器
+        
+        Args:
+            record_rank_snapshots: 保存新闻时是否记录排名快照（daily_news_rank_snapshot）
+        """
         self.connection = None
+        self.record_rank_snapshots = record_rank_snapshots
+        self._rank_snapshot_table_ready = False
         self.connect()
     
     def connect(self):
@@ -62,68 +84,168 @@ class DatabaseManager:
     
     # ==================== 新闻数据操作 ====================
     
-    def save_daily_news(self, news_data: List[Dict], crawl_date: date = None) -> int:
+    def save_daily_news(self, news_data: List[Dict], crawl_date: date = None, record_snapshot: bool = None) -> int:
         """
-        保存每日新闻数据，如果当天已有数据则覆盖
+        保存每日新闻数据，按 (news_id, source_platform, crawl_date) 批量增量更新
+        
+        只有标题/链接/排名发生变化的记录才会更新 last_modify_ts，高频采集时不会反复改写整张表；
+        当天早些时候上榜、之后掉出榜单的新闻会保留
         
         Args:
             news_data: 新闻数据列表
             crawl_date: 爬取日期，默认为今天
+            record_snapshot: 是否记录排名快照，None表示使用初始化时的设置
         
         Returns:
             保存的新闻数量
         """
         if not crawl_date:
             crawl_date = date.today()
+        if record_snapshot is None:
+            record_snapshot = self.record_rank_snapshots
         
         current_timestamp = int(datetime.now().timestamp())
         
+        rows = []
+        seen = set()
+        for news_item in news_data:
+            # 简化的新闻ID生成
+            news_id = f"{news_item.get('source', 'unknown')}_{news_item.get('id', news_item.get('rank', 0))}"
+            source_platform = news_item.get('source', 'unknown')
+            if (news_id, source_platform) in seen:
+                continue
+            seen.add((news_id, source_platform))
+            rows.append((
+                news_id,
+                source_platform,
+                news_item.get('title', ''),
+                news_item.get('url', ''),
+                crawl_date,
+                news_item.get('rank', None),
+                current_timestamp,
+                current_timestamp
+            ))
+        if not rows:
+            return 0
+        
         try:
             cursor = self.connection.cursor()
             
-            # 先删除当天所有的新闻记录（覆盖模式）
-            delete_query = "DELETE FROM daily_news WHERE crawl_date = %s"
-            deleted_count = cursor.execute(delete_query, (crawl_date,))
-            if deleted_count > 0:
-                print(f"覆盖模式：删除了当天已有的 {deleted_count} 条新闻记录")
-            
-            # 批量插入新记录
-            saved_count = 0
-            for news_item in news_data:
-                try:
-                    # 简化的新闻ID生成
-                    news_id = f"{news_item.get('source', 'unknown')}_{news_item.get('id', news_item.get('rank', 0))}"
-                    
-                    # 插入新记录
-                    insert_query = """
-                        INSERT INTO daily_news (
-                            news_id, source_platform, title, url, crawl_date, 
-                            rank_position, add_ts, last_modify_ts
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(insert_query, (
-                        news_id,
-                        news_item.get('source', 'unknown'),
-                        news_item.get('title', ''),
-                        news_item.get('url', ''),
-                        crawl_date,
-                        news_item.get('rank', None),
-                        current_timestamp,
-                        current_timestamp
-                    ))
-                    saved_count += 1
-                    
-                except Exception as e:
-                    print(f"保存单条新闻失败: {e}")
-                    continue
+            previous_ranks = {}
+            if record_snapshot:
+                cursor.execute(
+                    "SELECT news_id, source_platform, rank_position FROM daily_news WHERE crawl_date = %s",
+                    (crawl_date,)
+                )
+                previous_ranks = {
+                    (row['news_id'], row['source_platform']): row['rank_position'] for row in cursor.fetchall()
+                }
             
+            # last_modify_ts 必须放在最前面：ON DUPLICATE KEY UPDATE 按顺序赋值，后面的比较需要看到旧值
+            upsert_query = """
+                INSERT INTO daily_news (
+                    news_id, source_platform, title, url, crawl_date,
+                    rank_position, add_ts, last_modify_ts
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    last_modify_ts = IF(
+                        title <=> VALUES(title) AND url <=> VALUES(url) AND rank_position <=> VALUES(rank_position),
+                        last_modify_ts, VALUES(last_modify_ts)
+                    ),
+                    title = VALUES(title),
+                    url = VALUES(url),
+                    rank_position = VALUES(rank_position)
+            """
+            cursor.executemany(upsert_query, rows)
+            saved_count = len(rows)
             print(f"成功保存 {saved_count} 条新闻记录")
+            
+            if record_snapshot:
+                # 只记录新上榜或排名变化的新闻
+                snapshots = [
+                    (row[0], row[1], row[5], crawl_date, current_timestamp)
+                    for row in rows
+                    if (row[0], row[1]) not in previous_ranks or previous_ranks[(row[0], row[1])] != row[5]
+                ]
+                self._save_rank_snapshots(cursor, snapshots)
+            
             return saved_count
             
         except Exception as e:
             print(f"保存新闻数据失败: {e}")
             return 0
     
+    def _save_rank_snapshots(self, cursor, snapshots: List[tuple]):
+        """写入排名快照，表不存在时自动创建"""
+        if not snapshots:
+            return
+        if not self._rank_snapshot_table_ready:
+            cursor.execute(RANK_SNAPSHOT_TABLE_DDL)
+            self._rank_snapshot_table_ready = True
+        cursor.executemany(
+            """
+                INSERT INTO daily_news_rank_snapshot (
+                    news_id, source_platform, rank_position, crawl_date, snapshot_ts
+                ) VALUES (%s, %s, %s, %s, %s)
+            """,
+            snapshots
+        )
+        print(f"记录了 {len(snapshots)} 条排名变化")
+    
+    def get_rank_movers(self, window_seconds: int = 3600, limit: int = 20,
+                        source_platform: Optional[str] = None) -> List[Dict]:
+        """
+        查询最近一段时间内排名上升最多的新闻
+        
+        Args:
+            window_seconds: 时间窗口（秒），默认最近一小时
+            limit: 返回数量
+            source_platform: 只查询指定新闻源，None表示全部
+        
+        Returns:
+            新闻列表，包含窗口内最早/最新排名和上升名次 rank_change
+        """
+        since_ts = int(datetime.now().timestamp()) - window_seconds
+        platform_filter = "AND s.source_platform = %s" if source_platform else ""
+        params = [since_ts, since_ts]
+        if source_platform:
+            params.append(source_platform)
+        params.append(limit)
+        # 窗口起点的排名取窗口前最后一次快照（没有则取窗口内第一次），与当前排名比较
+        query = f"""
+            SELECT
+                s.news_id,
+                s.source_platform,
+                (
+                    SELECT p.rank_position FROM daily_news_rank_snapshot p
+                    WHERE p.news_id = s.news_id AND p.source_platform = s.source_platform
+                      AND p.snapshot_ts <= %s
+                    ORDER BY p.snapshot_ts DESC LIMIT 1
+                ) AS rank_before,
+                MIN(s.snapshot_ts) AS first_change_ts,
+                dn.rank_position AS rank_now,
+                dn.title,
+                dn.url
+            FROM daily_news_rank_snapshot s
+            JOIN daily_news dn
+              ON dn.news_id = s.news_id AND dn.source_platform = s.source_platform AND dn.crawl_date = s.crawl_date
+            WHERE s.snapshot_ts > %s {platform_filter}
+            GROUP BY s.news_id, s.source_platform, dn.rank_position, dn.title, dn.url
+            HAVING rank_before IS NULL OR rank_before > rank_now
+            ORDER BY COALESCE(rank_before, 1000) - rank_now DESC
+            LIMIT %s
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            for result in results:
+                result['rank_change'] = (result['rank_before'] - result['rank_now']) if result['rank_before'] else None
+            return results
+        except Exception as e:
+            print(f"获取排名变化失败: {e}")
+            return []
+    
     def get_daily_news(self, crawl_date: date = None) -> List[Dict]:
         """
         获取每日新闻数据
@@ -7,11 +7,15 @@ BroadTopicExtraction模块 - 新闻获取和收集
 
 import sys
 import asyncio
+import hashlib
+import random
+import time
 import httpx
 import json
 from datetime import datetime, date
 from pathlib import Path
 from typing import List, Dict, Optional
+from urllib.parse import urlsplit
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -42,13 +46,67 @@ SOURCE_NAMES = {
     "kuaishou": "快手热榜"
 }
 
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# 并发与限速配置
+MAX_CONCURRENCY = 6          # 同时进行的请求数
+HOST_RATE_PER_SECOND = 2.0   # 每个host每秒允许的请求数
+HOST_BURST = 4               # 每个host允许的突发请求数
+MAX_RETRIES = 3              # 超时/连接错误/429/5xx 的重试次数
+RETRY_BASE_DELAY = 1.0       # 重试退避基数（秒），实际等待为 [0, base * 2^n] 内的随机值
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """令牌桶限速器，按固定速率补充令牌，允许一定突发"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """获取一个令牌，不足时等待"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 class NewsCollector:
     """新闻收集器 - 整合API调用和数据库存储"""
     
-    def __init__(self):
-        """初始化新闻收集器"""
-        self.db_manager = DatabaseManager()
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, host_rate: float = HOST_RATE_PER_SECOND,
+                 host_burst: int = HOST_BURST, max_retries: int = MAX_RETRIES, db_manager: Optional[DatabaseManager] = None):
+        """
+        初始化新闻收集器
+
+        Args:
+            max_concurrency: 同时进行的请求数
+            host_rate: 每个host每秒允许的请求数
+            host_burst: 每个host允许的突发请求数
+            max_retries: 失败重试次数
+            db_manager: 数据库管理器，None表示新建
+        """
+        self.db_manager = db_manager or DatabaseManager()
         self.supported_sources = list(SOURCE_NAMES.keys())
+        self.max_concurrency = max_concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.max_retries = max_retries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        # 条件请求缓存: source -> {"etag", "last_modified", "digest", "data"}
+        self._source_cache: Dict[str, Dict] = {}
     
     def close(self):
         """关闭资源"""
@@ -65,69 +123,125 @@ class NewsCollector:
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
         self.close()
+
+    async def aclose(self):
+        """关闭共享的HTTP客户端"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """所有新闻源共用一个长连接客户端"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                headers=DEFAULT_HEADERS,
+                limits=httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency),
+            )
+        return self._client
+
+    def _get_host_bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        bucket = self._host_buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(self.host_rate, self.host_burst)
+            self._host_buckets[host] = bucket
+        return bucket
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """指数退避 + 随机抖动，服务端返回 Retry-After 时优先使用"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        return random.uniform(0, RETRY_BASE_DELAY * (2 ** attempt))
     
     # ==================== 新闻API调用 ====================
     
     async def fetch_news(self, source: str) -> dict:
-        """从指定源获取最新新闻"""
+        """
+        从指定源获取最新新闻
+
+        携带上次响应的 ETag / Last-Modified 发起条件请求，源未更新时返回 status 为 not_modified，
+        data 为上次的数据；超时、连接错误、429、5xx 按抖动退避重试
+        """
         url = f"{BASE_URL}/api/s?id={source}&latest"
-        headers = {
-            "Accept": "application/json",
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        }
-        
+        cached = self._source_cache.get(source)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        client = self._get_client()
+        bucket = self._get_host_bucket(url)
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                
-                # 解析JSON响应
-                data = json.loads(response.text)
-                return {
-                    "source": source,
-                    "status": "success",
-                    "data": data,
-                    "timestamp": datetime.now().isoformat()
-                }
-        except httpx.TimeoutException:
-            return {
-                "source": source,
-                "status": "timeout",
-                "error": "请求超时",
-                "timestamp": datetime.now().isoformat()
+            for attempt in range(self.max_retries + 1):
+                await bucket.acquire()
+                try:
+                    response = await client.get(url, headers=headers)
+                except (httpx.TimeoutException, httpx.TransportError):
+                    if attempt >= self.max_retries:
+                        raise
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    await asyncio.sleep(self._retry_delay(attempt, response))
+                    continue
+                break
+
+            if response.status_code == 304 and cached:
+                return self._build_result(source, "not_modified", data=cached["data"])
+            response.raise_for_status()
+
+            # 解析JSON响应；没有 ETag 的源用内容摘要判断是否有更新
+            data = json.loads(response.text)
+            items = data.get("items", data) if isinstance(data, dict) else data
+            digest = hashlib.md5(json.dumps(items, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+            unchanged = bool(cached) and cached.get("digest") == digest
+            self._source_cache[source] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "digest": digest,
+                "data": data,
             }
+            return self._build_result(source, "not_modified" if unchanged else "success", data=data)
+        except httpx.TimeoutException:
+            return self._build_result(source, "timeout", error="请求超时")
         except httpx.HTTPStatusError as e:
-            return {
-                "source": source,
-                "status": "http_error",
-                "error": f"HTTP错误: {e.response.status_code}",
-                "timestamp": datetime.now().isoformat()
-            }
+            return self._build_result(source, "http_error", error=f"HTTP错误: {e.response.status_code}")
         except Exception as e:
-            return {
-                "source": source,
-                "status": "error",
-                "error": f"未知错误: {str(e)}",
-                "timestamp": datetime.now().isoformat()
-            }
-    
+            return self._build_result(source, "error", error=f"未知错误: {str(e)}")
+
+    @staticmethod
+    def _build_result(source: str, status: str, data: Optional[dict] = None, error: Optional[str] = None) -> dict:
+        result = {"source": source, "status": status, "timestamp": datetime.now().isoformat()}
+        if data is not None:
+            result["data"] = data
+        if error is not None:
+            result["error"] = error
+        return result
+
     async def get_popular_news(self, sources: List[str] = None) -> List[dict]:
-        """获取热门新闻"""
+        """并发获取热门新闻，结果顺序与 sources 一致"""
         if sources is None:
             sources = list(SOURCE_NAMES.keys())
         
         print(f"正在获取 {len(sources)} 个新闻源的最新内容...")
         print("=" * 80)
-        
-        results = []
-        for source in sources:
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch_one(source: str) -> dict:
+            async with semaphore:
+                result = await self.fetch_news(source)
             source_name = SOURCE_NAMES.get(source, source)
-            print(f"正在获取 {source_name} 的新闻...")
-            result = await self.fetch_news(source)
-            results.append(result)
-            
-            if result["status"] == "success":
+            if result["status"] == "not_modified":
+                print(f"- {source_name}: 无更新")
+            elif result["status"] == "success":
                 data = result["data"]
                 if 'items' in data and isinstance(data['items'], list):
                     count = len(data['items'])
@@ -136,11 +250,9 @@ class NewsCollector:
                     print(f"✓ {source_name}: 获取成功")
             else:
                 print(f"✗ {source_name}: {result.get('error', '获取失败')}")
-            
-            # 避免请求过快
-            await asyncio.sleep(0.5)
-        
-        return results
+            return result
+
+        return list(await asyncio.gather(*[fetch_one(source) for source in sources]))
     
     # ==================== 数据处理和存储 ====================
     
@@ -174,8 +286,13 @@ class NewsCollector:
             # 处理结果
             processed_data = self._process_news_results(results)
             
+            # 所有源都没有更新时跳过写库（日内轮询时的常见情况）
+            if processed_data['successful_sources'] and \
+                    processed_data['unchanged_sources'] == processed_data['successful_sources']:
+                print("所有新闻源均无更新，跳过保存")
+                processed_data['saved_count'] = 0
             # 保存到数据库（覆盖模式）
-            if processed_data['news_list']:
+            elif processed_data['news_list']:
                 saved_count = self.db_manager.save_daily_news(
                     processed_data['news_list'], 
                     date.today()
@@ -200,14 +317,18 @@ class NewsCollector:
         """处理新闻获取结果"""
         news_list = []
         successful_sources = 0
+        unchanged_sources = 0
         total_news = 0
         
         for result in results:
             source = result['source']
             status = result['status']
             
-            if status == 'success':
+            # 未更新的源沿用上次的数据，当天覆盖保存时不会丢失
+            if status in ('success', 'not_modified'):
                 successful_sources += 1
+                if status == 'not_modified':
+                    unchanged_sources += 1
                 data = result['data']
                 
                 if 'items' in data and isinstance(data['items'], list):
@@ -224,6 +345,7 @@ class NewsCollector:
             'success': True,
             'news_list': news_list,
             'successful_sources': successful_sources,
+            'unchanged_sources': unchanged_sources,
             'total_sources': len(results),
             'total_news': total_news,
             'collection_time': datetime.now().isoformat()
@@ -269,6 +391,7 @@ class NewsCollector:
         
         print(f"总新闻源: {data['total_sources']}")
         print(f"成功源数: {data['successful_sources']}")
+        print(f"无更新源: {data.get('unchanged_sources', 0)}")
         print(f"总新闻数: {data['total_news']}")
         
         if 'saved_count' in data:
@@ -276,6 +399,25 @@ class NewsCollector:
         
         print("=" * 50)
     
+    async def poll_and_save_news(self, interval_seconds: float = 300, sources: Optional[List[str]] = None,
+                                 rounds: Optional[int] = None) -> None:
+        """
+        日内轮询：每隔 interval_seconds 收集一次，依靠条件请求跳过未更新的源
+
+        Args:
+            interval_seconds: 轮询间隔（秒）
+            sources: 指定的新闻源列表，None表示使用所有支持的源
+            rounds: 轮询次数，None表示一直运行
+        """
+        count = 0
+        while rounds is None or count < rounds:
+            started = time.monotonic()
+            await self.collect_and_save_news(sources)
+            count += 1
+            if rounds is not None and count >= rounds:
+                break
+            await asyncio.sleep(max(0.0, interval_seconds - (time.monotonic() - started)))
+
     def get_today_news(self) -> List[Dict]:
         """获取今天的新闻"""
         try:
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DatabaseManager 单元测试：用假的连接/游标记录执行的SQL，不连接 MySQL
+运行：在项目根目录执行 python -m pytest BroadTopicExtraction/test
+"""
+
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from BroadTopicExtraction.database_manager import DatabaseManager
+
+CRAWL_DATE = date(2024, 6, 1)
+
+
+class FakeCursor:
+    """记录 execute/executemany 调用，fetchall 依次返回预设结果"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.executed.append((" ".join(query.split()), params))
+
+    def executemany(self, query, rows):
+        self.connection.executemany_calls.append((" ".join(query.split()), list(rows)))
+
+    def fetchall(self):
+        return self.connection.results.pop(0) if self.connection.results else []
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.executed = []
+        self.executemany_calls = []
+        self.results = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class TestDatabaseManager(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = FakeConnection()
+        with patch.object(DatabaseManager, "connect", lambda manager: setattr(manager, "connection", self.connection)):
+            self.db = DatabaseManager()
+
+    @staticmethod
+    def _news(news_id, rank, source="weibo"):
+        return {"id": news_id, "title": f"标题{news_id}", "url": f"https://{news_id}", "source": source, "rank": rank}
+
+    def test_save_daily_news_batches_rows(self):
+        news = [self._news("a", 1), self._news("b", 2), self._news("a", 3), self._news("c", 1, source="zhihu")]
+        saved = self.db.save_daily_news(news, CRAWL_DATE, record_snapshot=False)
+
+        self.assertEqual(saved, 3)
+        self.assertEqual(self.connection.executed, [])
+        (query, rows), = self.connection.executemany_calls
+        self.assertTrue(query.startswith("INSERT INTO daily_news"))
+        self.assertIn("ON DUPLICATE KEY UPDATE last_modify_ts = IF(", query)
+        # 同一条新闻重复出现时只保留第一次
+        self.assertEqual([(row[0], row[1], row[5]) for row in rows],
+                         [("weibo_a", "weibo", 1), ("weibo_b", "weibo", 2), ("zhihu_c", "zhihu", 1)])
+        self.assertTrue(all(row[4] == CRAWL_DATE for row in rows))
+
+    def test_save_daily_news_records_rank_changes_only(self):
+        self.connection.results = [[
+            {"news_id": "weibo_a", "source_platform": "weibo", "rank_position": 1},
+            {"news_id": "weibo_b", "source_platform": "weibo", "rank_position": 5},
+        ]]
+        news = [self._news("a", 1), self._news("b", 2), self._news("c", 3)]
+        self.assertEqual(self.db.save_daily_news(news, CRAWL_DATE), 3)
+
+        select_query, select_params = self.connection.executed[0]
+        self.assertTrue(select_query.startswith("SELECT news_id, source_platform, rank_position FROM daily_news"))
+        self.assertEqual(select_params, (CRAWL_DATE,))
+        self.assertTrue(self.connection.executed[1][0].startswith("CREATE TABLE IF NOT EXISTS `daily_news_rank_snapshot`"))
+        upsert, snapshot = self.connection.executemany_calls
+        self.assertTrue(snapshot[0].startswith("INSERT INTO daily_news_rank_snapshot"))
+        self.assertEqual([row[:4] for row in snapshot[1]],
+                         [("weibo_b", "weibo", 2, CRAWL_DATE), ("weibo_c", "weibo", 3, CRAWL_DATE)])
+
+        # 建表只执行一次
+        self.connection.results = [[]]
+        self.db.save_daily_news([self._news("d", 4)], CRAWL_DATE)
+        self.assertEqual(sum("CREATE TABLE" in query for query, _ in self.connection.executed), 1)
+
+    def test_save_daily_news_without_rows(self):
+        self.assertEqual(self.db.save_daily_news([], CRAWL_DATE), 0)
+        self.assertEqual((self.connection.executed, self.connection.executemany_calls), ([], []))
+
+    def test_get_rank_movers(self):
+        self.connection.results = [[
+            {"news_id": "weibo_a", "source_platform": "weibo", "rank_before": 9, "rank_now": 2},
+            {"news_id": "weibo_b", "source_platform": "weibo", "rank_before": None, "rank_now": 5},
+        ]]
+        with patch("BroadTopicExtraction.database_manager.datetime") as mock_datetime:
+            mock_datetime.now.return_value.timestamp.return_value = 10000
+            movers = self.db.get_rank_movers(window_seconds=600, limit=5, source_platform="weibo")
+
+        self.assertEqual([mover["rank_change"] for mover in movers], [7, None])
+        query, params = self.connection.executed[0]
+        self.assertIn("AND s.source_platform = %s", query)
+        self.assertEqual(params, [9400, 9400, "weibo", 5])
+
+        self.connection.results = [[]]
+        self.assertEqual(self.db.get_rank_movers(window_seconds=600, limit=5), [])
+        query, params = self.connection.executed[1]
+        self.assertNotIn("AND s.source_platform = %s", query)
+        self.assertEqual(len(params), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
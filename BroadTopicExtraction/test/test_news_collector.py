@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NewsCollector 单元测试：用 httpx.MockTransport 模拟新闻API，不访问网络、不连接数据库
+运行：在项目根目录执行 python -m pytest BroadTopicExtraction/test
+"""
+
+import json
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import MagicMock, patch
+
+import httpx
+
+from BroadTopicExtraction.get_today_news import NewsCollector
+
+ITEMS = {"items": [{"id": "a", "title": "新闻A", "url": "https://a"}, {"id": "b", "title": "新闻B", "url": "https://b"}]}
+
+
+class FakeNewsApi:
+    """按顺序返回预设响应，并记录每次请求的请求头"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.responses.pop(0)
+
+
+class TestNewsCollector(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.db_manager = MagicMock()
+        self.db_manager.save_daily_news.return_value = 2
+        self.collector = NewsCollector(host_rate=1000, host_burst=1000, db_manager=self.db_manager)
+
+    def _use_api(self, responses) -> FakeNewsApi:
+        api = FakeNewsApi(responses)
+        self.collector._client = httpx.AsyncClient(transport=httpx.MockTransport(api))
+        return api
+
+    async def test_not_modified_with_etag(self):
+        api = self._use_api([
+            httpx.Response(200, json=ITEMS, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}),
+            httpx.Response(304),
+        ])
+        first = await self.collector.fetch_news("weibo")
+        second = await self.collector.fetch_news("weibo")
+
+        self.assertEqual(first["status"], "success")
+        self.assertEqual(second["status"], "not_modified")
+        self.assertEqual(second["data"], ITEMS)
+        self.assertNotIn("If-None-Match", api.requests[0].headers)
+        self.assertEqual(api.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(api.requests[1].headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+
+    async def test_unchanged_body_without_etag(self):
+        changed = {"items": ITEMS["items"][::-1]}
+        self._use_api([httpx.Response(200, json=ITEMS), httpx.Response(200, json=ITEMS), httpx.Response(200, json=changed)])
+        statuses = [(await self.collector.fetch_news("zhihu"))["status"] for _ in range(3)]
+        self.assertEqual(statuses, ["success", "not_modified", "success"])
+
+    async def test_retry_on_server_error(self):
+        api = self._use_api([httpx.Response(503), httpx.Response(429, headers={"Retry-After": "0"}),
+                             httpx.Response(200, json=ITEMS)])
+        with patch.object(NewsCollector, "_retry_delay", return_value=0):
+            result = await self.collector.fetch_news("weibo")
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(len(api.requests), 3)
+
+    async def test_gives_up_after_max_retries(self):
+        self.collector.max_retries = 1
+        self._use_api([httpx.Response(503), httpx.Response(503)])
+        with patch.object(NewsCollector, "_retry_delay", return_value=0):
+            result = await self.collector.fetch_news("weibo")
+        self.assertEqual((result["status"], result["error"]), ("http_error", "HTTP错误: 503"))
+
+    async def test_collect_skips_save_when_nothing_changed(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers.get("If-None-Match"):
+                return httpx.Response(304)
+            return httpx.Response(200, content=json.dumps(ITEMS), headers={"ETag": '"v1"'})
+
+        self.collector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        first = await self.collector.collect_and_save_news(["weibo", "zhihu"])
+        second = await self.collector.collect_and_save_news(["weibo", "zhihu"])
+
+        self.db_manager.save_daily_news.assert_called_once()
+        saved_news = self.db_manager.save_daily_news.call_args[0][0]
+        self.assertEqual([news["id"] for news in saved_news], ["weibo_a", "weibo_b", "zhihu_a", "zhihu_b"])
+        self.assertEqual(first["saved_count"], 2)
+        self.assertEqual((second["unchanged_sources"], second["saved_count"]), (2, 0))
+
+    async def test_results_keep_source_order(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            source = request.url.params["id"]
+            if source == "douyin":
+                return httpx.Response(404)
+            return httpx.Response(200, json={"items": [{"id": source, "title": source}]})
+
+        self.collector._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        results = await self.collector.get_popular_news(["zhihu", "douyin", "weibo"])
+        self.assertEqual([(r["source"], r["status"]) for r in results],
+                         [("zhihu", "success"), ("douyin", "http_error"), ("weibo", "success")])
+
+    async def asyncTearDown(self):
+        await self.collector.aclose()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,7 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步Aiomysql的增删改查封装
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Sequence, Union
 
 import aiomysql
 
@@ -105,3 +105,87 @@ class AsyncMysqlDB:
             async with conn.cursor() as cur:
                 rows = await cur.execute(sql, args)
                 return rows
+
+    async def insert_many(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        多行插入，所有记录的字段需要一致
+        :param table_name: 表名
+        :param items: 记录列表
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join([f'`{field}`' for field in fields])
+        row_placeholder = '(%s)' % ','.join(['%s'] * len(fields))
+        sql = "INSERT INTO %s (%s) VALUES %s" % (table_name, fieldstr, ','.join([row_placeholder] * len(items)))
+        values = [item.get(field) for item in items for field in fields]
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                return await cur.execute(sql, values)
+
+    async def upsert_many(self, table_name: str, items: List[Dict[str, Any]], conflict_field: str,
+                          update_exclude: Sequence[str] = ()) -> int:
+        """
+        多行 INSERT ... ON DUPLICATE KEY UPDATE，要求 conflict_field 上存在唯一索引
+        :param table_name: 表名
+        :param items: 记录列表（字段需要一致）
+        :param conflict_field: 唯一键字段
+        :param update_exclude: 冲突时不更新的字段，例如 add_ts
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join([f'`{field}`' for field in fields])
+        row_placeholder = '(%s)' % ','.join(['%s'] * len(fields))
+        update_fields = [f for f in fields if f != conflict_field and f not in update_exclude]
+        update_str = ','.join([f'`{f}`=VALUES(`{f}`)' for f in update_fields]) or f'`{conflict_field}`=`{conflict_field}`'
+        sql = "INSERT INTO %s (%s) VALUES %s ON DUPLICATE KEY UPDATE %s" % (
+            table_name, fieldstr, ','.join([row_placeholder] * len(items)), update_str,
+        )
+        values = [item.get(field) for item in items for field in fields]
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                return await cur.execute(sql, values)
+
+    async def update_many(self, table_name: str, items: List[Dict[str, Any]], field_where: str) -> int:
+        """
+        按 field_where 批量更新多条记录（字段需要一致），共用一个连接
+        :param table_name: 表名
+        :param items: 记录列表，需包含 field_where 字段
+        :param field_where: where 条件字段
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = [f for f in items[0].keys() if f != field_where]
+        if not fields:
+            return 0
+        upsets = ','.join([f'`{f}`=%s' for f in fields])
+        sql = "UPDATE %s SET %s WHERE `%s`=%%s" % (table_name, upsets, field_where)
+        values = [[item.get(f) for f in fields] + [item.get(field_where)] for item in items]
+        async with self.__pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                return await cur.executemany(sql, values)
+
+    async def has_unique_index(self, table_name: str, column_name: str) -> bool:
+        """
+        判断某列上是否存在单列唯一索引（决定能否使用 ON DUPLICATE KEY UPDATE）
+        :param table_name: 表名
+        :param column_name: 列名
+        :return:
+        """
+        row = await self.get_first(
+            """
+            SELECT index_name
+            FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND non_unique = 0
+            GROUP BY index_name
+            HAVING COUNT(*) = 1 AND MAX(column_name) = %s
+            LIMIT 1
+            """,
+            table_name,
+            column_name,
+        )
+        return bool(row)
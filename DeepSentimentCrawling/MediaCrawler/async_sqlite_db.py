@@ -13,14 +13,121 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/4/6 14:21
 # @Desc    : 异步SQLite的增删改查封装
-from typing import Any, Dict, List, Union
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
 
 import aiosqlite
 
+# 打开连接后执行的 PRAGMA：WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 下不再每次提交都 fsync，
+# cache_size 为负数表示以 KB 为单位的页缓存大小
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
 
 class AsyncSqliteDB:
+    """
+    持有一个长连接，所有语句复用同一个连接（sqlite3 会按连接缓存预编译语句）。
+    写语句通过写锁串行执行；transaction() 内的多条写语句只在退出时提交一次。
+    """
+
     def __init__(self, db_path: str) -> None:
         self.__db_path = db_path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tx_task: Optional[asyncio.Task] = None
+
+    def _ensure_locks(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._connect_lock = asyncio.Lock()
+            self._write_lock = asyncio.Lock()
+            self._lock_loop = loop
+
+    async def _get_conn(self) -> aiosqlite.Connection:
+        """
+        获取(必要时创建)长连接
+        :return:
+        """
+        self._ensure_locks()
+        if self._conn is not None:
+            return self._conn
+        async with self._connect_lock:
+            if self._conn is None:
+                conn = aiosqlite.connect(self.__db_path, cached_statements=256)
+                # 连接线程设为守护线程，忘记 close 时也不会阻塞进程退出
+                conn.daemon = True
+                await conn
+                conn.row_factory = aiosqlite.Row
+                for pragma in SQLITE_PRAGMAS:
+                    cursor = await conn.execute(pragma)
+                    await cursor.close()
+                self._conn = conn
+        return self._conn
+
+    @asynccontextmanager
+    async def _writing(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        写语句的执行上下文：在当前任务的 transaction() 内时直接复用事务，否则持写锁执行并立即提交
+        """
+        conn = await self._get_conn()
+        if self._tx_task is not None and self._tx_task is asyncio.current_task():
+            yield conn
+            return
+        async with self._write_lock:
+            try:
+                yield conn
+            except BaseException:
+                await conn.rollback()
+                raise
+            await conn.commit()
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator["AsyncSqliteDB"]:
+        """
+        批量写入事务：块内的 item_to_table / update_table / insert_many 等写操作合并为一次提交，异常时回滚
+        用法：
+            async with db.transaction():
+                await db.insert_many(...)
+                await db.update_many(...)
+        :return:
+        """
+        if self._tx_task is not None and self._tx_task is asyncio.current_task():
+            # 嵌套事务并入外层事务
+            yield self
+            return
+        conn = await self._get_conn()
+        async with self._write_lock:
+            self._tx_task = asyncio.current_task()
+            try:
+                yield self
+            except BaseException:
+                await conn.rollback()
+                raise
+            else:
+                await conn.commit()
+            finally:
+                self._tx_task = None
+
+    async def close(self) -> None:
+        """
+        提交未完成的写入并关闭长连接
+        :return:
+        """
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            await conn.commit()
+        finally:
+            await conn.close()
 
     async def query(self, sql: str, *args: Union[str, int]) -> List[Dict[str, Any]]:
         """
@@ -29,11 +136,10 @@ class AsyncSqliteDB:
         :param args: sql中传递动态参数列表
         :return:
         """
-        async with aiosqlite.connect(self.__db_path) as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute(sql, args) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows] if rows else []
+        conn = await self._get_conn()
+        async with conn.execute(sql, args) as cursor:
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows] if rows else []
 
     async def get_first(self, sql: str, *args: Union[str, int]) -> Union[Dict[str, Any], None]:
         """
@@ -42,11 +148,10 @@ class AsyncSqliteDB:
         :param args:sql中传递动态参数列表
         :return:
         """
-        async with aiosqlite.connect(self.__db_path) as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute(sql, args) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+        conn = await self._get_conn()
+        async with conn.execute(sql, args) as cursor:
+            row = await cursor.fetchone()
+            return dict(row) if row else None
 
     async def item_to_table(self, table_name: str, item: Dict[str, Any]) -> int:
         """
@@ -60,9 +165,8 @@ class AsyncSqliteDB:
         fieldstr = ','.join(fields)
         valstr = ','.join(['?'] * len(item))
         sql = f"INSERT INTO {table_name} ({fieldstr}) VALUES({valstr})"
-        async with aiosqlite.connect(self.__db_path) as conn:
+        async with self._writing() as conn:
             async with conn.execute(sql, values) as cursor:
-                await conn.commit()
                 return cursor.lastrowid
 
     async def update_table(self, table_name: str, updates: Dict[str, Any], field_where: str,
@@ -83,9 +187,8 @@ class AsyncSqliteDB:
         upsets_str = ','.join(upsets)
         values.append(value_where)
         sql = f'UPDATE {table_name} SET {upsets_str} WHERE {field_where}=?'
-        async with aiosqlite.connect(self.__db_path) as conn:
+        async with self._writing() as conn:
             async with conn.execute(sql, values) as cursor:
-                await conn.commit()
                 return cursor.rowcount
 
     async def execute(self, sql: str, *args: Union[str, int]) -> int:
@@ -95,9 +198,8 @@ class AsyncSqliteDB:
         :param args:
         :return:
         """
-        async with aiosqlite.connect(self.__db_path) as conn:
+        async with self._writing() as conn:
             async with conn.execute(sql, args) as cursor:
-                await conn.commit()
                 return cursor.rowcount
 
     async def executescript(self, sql_script: str) -> None:
@@ -106,6 +208,84 @@ class AsyncSqliteDB:
         :param sql_script: SQL脚本内容
         :return:
         """
-        async with aiosqlite.connect(self.__db_path) as conn:
+        async with self._writing() as conn:
             await conn.executescript(sql_script)
-            await conn.commit()
\ No newline at end of file
+
+    async def insert_many(self, table_name: str, items: List[Dict[str, Any]]) -> int:
+        """
+        多行插入，所有记录的字段需要一致
+        :param table_name: 表名
+        :param items: 记录列表
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join(fields)
+        valstr = ','.join(['?'] * len(fields))
+        sql = f"INSERT INTO {table_name} ({fieldstr}) VALUES({valstr})"
+        values = [[item.get(field) for field in fields] for item in items]
+        async with self._writing() as conn:
+            async with conn.executemany(sql, values) as cursor:
+                return cursor.rowcount
+
+    async def upsert_many(self, table_name: str, items: List[Dict[str, Any]], conflict_field: str,
+                          update_exclude: Sequence[str] = ()) -> int:
+        """
+        多行 INSERT ... ON CONFLICT DO UPDATE，要求 conflict_field 上存在唯一索引
+        :param table_name: 表名
+        :param items: 记录列表（字段需要一致）
+        :param conflict_field: 唯一键字段
+        :param update_exclude: 冲突时不更新的字段，例如 add_ts
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = list(items[0].keys())
+        fieldstr = ','.join(fields)
+        valstr = ','.join(['?'] * len(fields))
+        update_fields = [f for f in fields if f != conflict_field and f not in update_exclude]
+        if update_fields:
+            conflict_action = "DO UPDATE SET " + ','.join([f'{f}=excluded.{f}' for f in update_fields])
+        else:
+            conflict_action = "DO NOTHING"
+        sql = f"INSERT INTO {table_name} ({fieldstr}) VALUES({valstr}) ON CONFLICT({conflict_field}) {conflict_action}"
+        values = [[item.get(field) for field in fields] for item in items]
+        async with self._writing() as conn:
+            async with conn.executemany(sql, values) as cursor:
+                return cursor.rowcount
+
+    async def update_many(self, table_name: str, items: List[Dict[str, Any]], field_where: str) -> int:
+        """
+        按 field_where 批量更新多条记录（字段需要一致），在一个事务中提交
+        :param table_name: 表名
+        :param items: 记录列表，需包含 field_where 字段
+        :param field_where: where 条件字段
+        :return: 影响行数
+        """
+        if not items:
+            return 0
+        fields = [f for f in items[0].keys() if f != field_where]
+        if not fields:
+            return 0
+        upsets_str = ','.join([f'{f}=?' for f in fields])
+        sql = f'UPDATE {table_name} SET {upsets_str} WHERE {field_where}=?'
+        values = [[item.get(f) for f in fields] + [item.get(field_where)] for item in items]
+        async with self._writing() as conn:
+            async with conn.executemany(sql, values) as cursor:
+                return cursor.rowcount
+
+    async def has_unique_index(self, table_name: str, column_name: str) -> bool:
+        """
+        判断某列上是否存在单列唯一索引（决定能否使用 ON CONFLICT DO UPDATE）
+        :param table_name: 表名
+        :param column_name: 列名
+        :return:
+        """
+        for index in await self.query(f"PRAGMA index_list({table_name})"):
+            if not index.get("unique"):
+                continue
+            columns = await self.query(f"PRAGMA index_info({index['name']})")
+            if len(columns) == 1 and columns[0].get("name") == column_name:
+                return True
+        return False
@@ -8,13 +8,36 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
 
-from playwright.async_api import BrowserContext, BrowserType, Playwright
+import httpx
+from playwright.async_api import BrowserContext, BrowserType, Playwright, async_playwright
+
+import config
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
+from tools import utils
+from tools.browser_pool import BrowserSession, get_browser_session_pool
+from tools.http_pool import HttpClientPool
+from tools.rate_limiter import AdaptiveRateLimiter, get_rate_limiter_metrics, is_http_failure
+from tools.session_params import SessionParamCache
 
 
 class AbstractCrawler(ABC):
+    # 从浏览器会话池租用的会话，不为 None 时浏览器由会话池关闭
+    browser_session: Optional[BrowserSession] = None
+    # 账号标识，多账号时区分浏览器会话
+    account: str = ""
+
+    @property
+    def proxy_lease_key(self) -> str:
+        """
+        代理池租用标识，同一平台同一账号固定使用同一个代理IP
+        """
+        return f"{config.PLATFORM}:{self.account}"
 
     @abstractmethod
     async def start(self):
@@ -54,6 +77,54 @@ class AbstractCrawler(ABC):
         # 默认实现：回退到标准模式
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
+    @asynccontextmanager
+    async def browser_session_scope(
+        self,
+        setup: Callable[[Playwright, Optional[Dict]], Awaitable[None]],
+        playwright_proxy: Optional[Dict] = None,
+    ) -> AsyncIterator[None]:
+        """
+        准备好已打开首页的浏览器，退出时停止 playwright；
+        开启 ENABLE_BROWSER_SESSION_POOL 时从会话池租用已有会话，只有首次或会话不可用时才执行 setup
+        :param setup: 启动浏览器并打开首页的回调，需设置 self.browser_context 和 self.context_page
+        :param playwright_proxy: playwright代理配置，变化后会重新启动浏览器
+        :return:
+        """
+        if not config.ENABLE_BROWSER_SESSION_POOL:
+            async with async_playwright() as playwright:
+                await setup(playwright, playwright_proxy)
+                yield
+            return
+
+        async def launch(playwright: Playwright):
+            await setup(playwright, playwright_proxy)
+            return self.browser_context, self.context_page, getattr(self, "cdp_manager", None)
+
+        fingerprint = f"cdp={config.ENABLE_CDP_MODE}|proxy={(playwright_proxy or {}).get('server', '')}"
+        async with get_browser_session_pool().lease(
+            config.PLATFORM, self.account, launch, fingerprint=fingerprint,
+        ) as session:
+            self.browser_session = session
+            self.browser_context = session.browser_context
+            self.context_page = session.context_page
+            if session.cdp_manager is not None:
+                self.cdp_manager = session.cdp_manager
+            yield
+
+    async def close_browser(self) -> None:
+        """
+        关闭浏览器；浏览器会话由会话池持有时不关闭
+        :return:
+        """
+        if self.browser_session is not None:
+            return
+        if getattr(self, "cdp_manager", None):
+            # 如果使用CDP模式，需要特殊处理
+            await self.cdp_manager.cleanup()
+            self.cdp_manager = None
+        elif getattr(self, "browser_context", None) is not None:
+            await self.browser_context.close()
+
 
 class AbstractLogin(ABC):
 
@@ -108,6 +179,102 @@ class AbstractStoreVideo(ABC):
 
 
 class AbstractApiClient(ABC):
+    _http_pool: Optional[HttpClientPool] = None
+    _session_params: Optional[SessionParamCache] = None
+    # 平台名，设置后该平台所有客户端的请求共享 PLATFORM_REQUEST_BUDGET 预算，并按 平台/账号/代理 自适应限速
+    platform: Optional[str] = None
+    # 账号标识，多账号时区分限速器
+    account: str = ""
+    # 代理池和当前租用的代理，设置后请求结果同时反馈给代理池（连续失败过多的 IP 会被剔除）
+    ip_pool: Optional[ProxyIpPool] = None
+    ip_proxy_info: Optional[IpInfoModel] = None
+
+    @property
+    def http_pool(self) -> HttpClientPool:
+        """
+        当前客户端共享的 httpx 连接池（首次访问时创建）
+        """
+        if self._http_pool is None:
+            self._http_pool = HttpClientPool(platform=self.platform, account=self.account)
+        return self._http_pool
+
+    @property
+    def session_params(self) -> SessionParamCache:
+        """
+        当前客户端的会话参数缓存（签名密钥、公共参数等，首次访问时创建）
+        """
+        if self._session_params is None:
+            self._session_params = SessionParamCache()
+        return self._session_params
+
+    @property
+    def rate_limiter(self) -> Optional[AdaptiveRateLimiter]:
+        """
+        当前客户端（平台/账号/代理）的自适应限速器，未开启限速时为 None
+        """
+        return self.http_pool.rate_limiter(getattr(self, "proxy", None))
+
+    def use_ip_proxy(self, ip_pool: ProxyIpPool, ip_proxy_info: IpInfoModel) -> None:
+        """
+        记录客户端使用的代理池和代理，之后的请求结果通过 report_proxy 反馈给代理池
+        :param ip_pool: 代理池
+        :param ip_proxy_info: 当前租用的代理
+        :return:
+        """
+        self.ip_pool = ip_pool
+        self.ip_proxy_info = ip_proxy_info
+
+    def report_proxy(self, ok: bool) -> None:
+        """
+        把一次请求结果反馈给代理池，没有使用代理池时什么也不做
+        :param ok: 请求是否成功
+        :return:
+        """
+        if self.ip_pool is not None and self.ip_proxy_info is not None:
+            self.ip_pool.report(self.ip_proxy_info, ok)
+
+    def report_response(self, response: httpx.Response, ok: bool, blocked: bool = False,
+                        proxy: Optional[str] = None) -> None:
+        """
+        平台客户端解析接口返回后上报请求结果：HTTP 200 但接口报错（DataFetchError）或返回风控内容时限速器降速，
+        解析成功时才按成功提速。传输层已按失败处理过的响应（风控状态码/页面、5xx）不重复上报给限速器；
+        使用代理池时只把成功、风控和 5xx 反馈给代理池，笔记已删除等接口业务错误与代理无关，不计入代理失败
+        :param response: 原始响应
+        :param ok: 接口是否返回了正常数据
+        :param blocked: 失败是否由风控引起
+        :param proxy: 发送请求使用的代理，默认 self.proxy
+        :return:
+        """
+        http_failure = is_http_failure(response.status_code, response.content, response.headers.get("content-type", ""))
+        if proxy is None and (ok or blocked or http_failure):
+            self.report_proxy(ok and not blocked and not http_failure)
+        limiter = self.http_pool.rate_limiter(proxy if proxy is not None else getattr(self, "proxy", None))
+        if limiter is None or http_failure:
+            return
+        if ok:
+            limiter.on_success()
+        elif blocked:
+            limiter.on_block()
+        else:
+            limiter.on_failure()
+
+    async def crawl_sleep(self, crawl_interval: float) -> None:
+        """
+        分页请求之间的等待：开启自适应限速时请求间隔由限速器控制，这里不再固定等待
+        :param crawl_interval: 未开启限速时的等待秒数
+        :return:
+        """
+        if self.rate_limiter is None:
+            await asyncio.sleep(crawl_interval)
+
+    async def close(self) -> None:
+        """
+        释放连接池持有的连接
+        """
+        if self._http_pool is not None:
+            if self.platform and config.ENABLE_ADAPTIVE_RATE_LIMIT:
+                utils.logger.info(f"[{self.__class__.__name__}.close] rate limiter metrics: {get_rate_limiter_metrics(self.platform)}")
+            await self._http_pool.aclose()
 
     @abstractmethod
     async def request(self, method, url, **kwargs):
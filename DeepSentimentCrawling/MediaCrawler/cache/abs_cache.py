@@ -16,7 +16,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Sequence, Tuple
 
 
 class AbstractCache(ABC):
@@ -51,3 +51,48 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+    # 以下是异步接口，默认直接调用同步方法；网络缓存（AsyncRedisCache）重写这些方法，不阻塞事件循环
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        异步获取键的值
+        :param key: 键
+        :return:
+        """
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        异步设置键的值
+        :param key: 键
+        :param value: 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        self.set(key, value, expire_time)
+
+    async def akeys(self, pattern: str) -> List[str]:
+        """
+        异步获取所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        return self.keys(pattern)
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """
+        批量获取多个键的值，顺序与 keys 一致，不存在的键为 None
+        :param keys: 键列表
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
+    async def aset_many(self, items: Sequence[Tuple[str, Any, int]]) -> None:
+        """
+        批量设置键的值
+        :param items: (键, 值, 过期时间) 列表
+        :return:
+        """
+        for key, value, expire_time in items:
+            self.set(key, value, expire_time)
@@ -0,0 +1,235 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 异步 RedisCache 实现
+#
+# RedisCache 在异步爬虫中使用同步客户端，每次调用都阻塞事件循环；keys 用的是会阻塞 redis 的 KEYS，值用 pickle 序列化。
+# AsyncRedisCache 基于 redis.asyncio：
+#   - akeys 用 SCAN 分批遍历，amget 按批 MGET，aset_many 用 pipeline 一次往返写入
+#   - 值用 JSON（默认）或 msgpack 序列化，不执行反序列化出的代码，多个爬虫进程之间可以安全共享代理 IP 等状态
+#   - 同步的 get/set/keys 使用同样的序列化格式，供不在事件循环中的代码使用
+# 格式不一致（例如切换了序列化方式）的旧值按未命中处理。
+
+import asyncio
+import json
+import weakref
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+from cache.abs_cache import AbstractCache
+from tools import utils
+
+# 单次 SCAN/MGET/pipeline 处理的 key 数量
+REDIS_BATCH_SIZE = 500
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _msgpack_dumps(value: Any) -> bytes:
+    import msgpack
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data: bytes) -> Any:
+    import msgpack
+    return msgpack.unpackb(data, raw=False)
+
+
+SERIALIZERS: Dict[str, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    "json": (_json_dumps, _json_loads),
+    "msgpack": (_msgpack_dumps, _msgpack_loads),
+}
+
+
+class AsyncRedisCache(AbstractCache):
+
+    def __init__(self, serializer: Optional[str] = None, batch_size: int = REDIS_BATCH_SIZE) -> None:
+        """
+        :param serializer: 序列化格式 json | msgpack，默认 config.REDIS_CACHE_SERIALIZER
+        :param batch_size: 单次 SCAN/MGET/pipeline 处理的 key 数量
+        """
+        serializer = serializer or config.REDIS_CACHE_SERIALIZER
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown redis cache serializer: {serializer}")
+        self.serializer = serializer
+        self._dumps, self._loads = SERIALIZERS[serializer]
+        self.batch_size = max(1, batch_size)
+        self._client = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sync_client = None
+        _ALL_REDIS_CACHES.add(self)
+
+    @staticmethod
+    def _connect_kwargs() -> Dict[str, Any]:
+        return {
+            "host": config.REDIS_DB_HOST,
+            "port": config.REDIS_DB_PORT,
+            "db": config.REDIS_DB_NUM,
+            "password": config.REDIS_DB_PWD,
+        }
+
+    def _get_client(self):
+        """
+        当前事件循环的异步客户端，连接池绑定在创建它的事件循环上
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            from redis import asyncio as aioredis
+
+            self._client = aioredis.Redis(**self._connect_kwargs())
+            self._client_loop = loop
+        return self._client
+
+    def _get_sync_client(self):
+        if self._sync_client is None:
+            from redis import Redis
+
+            self._sync_client = Redis(**self._connect_kwargs())
+        return self._sync_client
+
+    def _decode(self, key: str, data: Optional[bytes]) -> Optional[Any]:
+        if data is None:
+            return None
+        try:
+            return self._loads(data)
+        except Exception as e:
+            utils.logger.warning(f"[AsyncRedisCache] decode {key} with {self.serializer} failed, treat as miss: {e}")
+            return None
+
+    @staticmethod
+    def _expire(expire_time: Optional[int]) -> Optional[int]:
+        # redis 的 ex 必须为正数，0 或 None 表示不过期
+        return int(expire_time) if expire_time and expire_time > 0 else None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        return self._decode(key, await self._get_client().get(key))
+
+    async def aset(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._get_client().set(key, self._dumps(value), ex=self._expire(expire_time))
+
+    async def akeys(self, pattern: str) -> List[str]:
+        """
+        用 SCAN 分批获取所有符合pattern的key（SCAN 可能返回重复的 key，这里已去重）
+        :param pattern:
+        :return:
+        """
+        keys: Dict[str, None] = {}
+        async for key in self._get_client().scan_iter(match=pattern, count=self.batch_size):
+            keys[key.decode() if isinstance(key, bytes) else key] = None
+        return list(keys)
+
+    async def amget(self, keys: Sequence[str]) -> List[Optional[Any]]:
+        """
+        按批 MGET，顺序与 keys 一致，不存在或已过期的键为 None
+        :param keys:
+        :return:
+        """
+        client = self._get_client()
+        values: List[Optional[Any]] = []
+        for start in range(0, len(keys), self.batch_size):
+            chunk = keys[start:start + self.batch_size]
+            values.extend(self._decode(key, data) for key, data in zip(chunk, await client.mget(chunk)))
+        return values
+
+    async def aset_many(self, items: Sequence[Tuple[str, Any, int]]) -> None:
+        """
+        用 pipeline 批量写入
+        :param items: (键, 值, 过期时间) 列表
+        :return:
+        """
+        client = self._get_client()
+        for start in range(0, len(items), self.batch_size):
+            async with client.pipeline(transaction=False) as pipe:
+                for key, value, expire_time in items[start:start + self.batch_size]:
+                    pipe.set(key, self._dumps(value), ex=self._expire(expire_time))
+                await pipe.execute()
+
+    async def aitems(self, pattern: str) -> List[Tuple[str, Any]]:
+        """
+        SCAN + MGET 获取所有符合pattern的键值对，跳过在两步之间过期的键
+        :param pattern:
+        :return:
+        """
+        keys = await self.akeys(pattern)
+        values = await self.amget(keys)
+        return [(key, value) for key, value in zip(keys, values) if value is not None]
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        同步获取，会阻塞事件循环，异步代码中请使用 aget
+        :param key:
+        :return:
+        """
+        return self._decode(key, self._get_sync_client().get(key))
+
+    def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        同步设置，会阻塞事件循环，异步代码中请使用 aset
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        self._get_sync_client().set(key, self._dumps(value), ex=self._expire(expire_time))
+
+    def keys(self, pattern: str) -> List[str]:
+        """
+        同步 SCAN，会阻塞事件循环，异步代码中请使用 akeys
+        :param pattern:
+        :return:
+        """
+        scanned = self._get_sync_client().scan_iter(match=pattern, count=self.batch_size)
+        return list(dict.fromkeys(key.decode() if isinstance(key, bytes) else key for key in scanned))
+
+    async def aclose(self) -> None:
+        """
+        关闭连接池
+        :return:
+        """
+        client, self._client = self._client, None
+        loop, self._client_loop = self._client_loop, None
+        if client is not None and loop is asyncio.get_running_loop():
+            await client.close()
+        sync_client, self._sync_client = self._sync_client, None
+        if sync_client is not None:
+            sync_client.close()
+
+
+_ALL_REDIS_CACHES: "weakref.WeakSet[AsyncRedisCache]" = weakref.WeakSet()
+
+
+async def shutdown_all_redis_caches() -> None:
+    """
+    关闭所有 AsyncRedisCache 的连接池
+    """
+    for cache in list(_ALL_REDIS_CACHES):
+        try:
+            await cache.aclose()
+        except Exception:
+            pass
@@ -14,25 +14,70 @@
 # @Name    : 程序员阿江-Relakkes
 # @Time    : 2024/6/2 11:05
 # @Desc    : 本地缓存
+#
+# 原来的实现没有容量上限，定时清理每次遍历全部 key，keys(pattern) 把 * 去掉后对全部 key 做子串匹配。
+# 现在：
+#   - OrderedDict 按最近使用顺序保存，超过 max_entries / max_bytes 时淘汰最久未使用的 key（LRU）；
+#     单条就超过 max_bytes 的值不缓存，也不为它淘汰其他 key
+#   - 过期时间放在小根堆里，定时清理只弹出已过期的 key，开销与过期数量成正比；重新 set 留下的旧记录在弹出时跳过
+#   - 有序 key 列表作为前缀索引，keys("kuaidaili_*") 二分定位到前缀区间，其他模式按 glob 规则匹配（与 redis 一致）；
+#     set/删除是热路径，只做 O(1) 标记，索引在新增 key 后的第一次 keys() 时整体重建，已删除的 key 查询时跳过
+#   - stats() 返回命中、未命中、淘汰、过期次数
 
 import asyncio
+import bisect
+import fnmatch
+import heapq
+import sys
 import time
 import weakref
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
+import config
 from cache.abs_cache import AbstractCache
+from tools import utils
+
+_GLOB_CHARS = "*?["
+
+
+class _CacheEntry:
+    __slots__ = ("value", "expire_at", "size")
+
+    def __init__(self, value: Any, expire_at: float, size: int) -> None:
+        self.value = value
+        self.expire_at = expire_at
+        self.size = size
+
+
+def _estimate_size(key: str, value: Any) -> int:
+    """
+    估算一条缓存占用的字节数（key 和 value 的浅层大小），只用于 max_bytes 限制
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
 
 
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
         """
         初始化本地缓存
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_entries: 最多保存的 key 数量，默认 LOCAL_CACHE_MAX_ENTRIES，0 表示不限
+        :param max_bytes: 最多占用的字节数（估算），默认 LOCAL_CACHE_MAX_BYTES，0 表示不限
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_entries = config.LOCAL_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._max_bytes = config.LOCAL_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self._cache_container: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        # (过期时间, key) 小根堆
+        self._expire_heap: List[Tuple[float, str]] = []
+        # 有序的 key 列表，用于前缀查询；可能含已删除的 key，新增 key 后需重建
+        self._sorted_keys: List[str] = []
+        self._sorted_keys_stale = False
+        self._bytes = 0
+        self._stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "rejections": 0}
         self._cron_task: Optional[asyncio.Task] = None
         _ALL_LOCAL_CACHES.add(self)
         # 开启定时清理任务（仅在事件循环运行时）
@@ -80,49 +125,110 @@ class ExpiringLocalCache(AbstractCache):
         except Exception:
             pass
 
+    def _remove(self, key: str) -> _CacheEntry:
+        entry = self._cache_container.pop(key)
+        self._bytes -= entry.size
+        # 已删除的 key 留在索引里，失效记录过多时下次查询重建
+        if len(self._sorted_keys) > 2 * len(self._cache_container) + 64:
+            self._sorted_keys = []
+            self._sorted_keys_stale = True
+        return entry
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        entry = self._cache_container.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
             return None
 
         # 如果键已过期，则删除键并返回None
-        if expire_time < time.time():
-            del self._cache_container[key]
+        if entry.expire_at < time.time():
+            self._remove(key)
+            self._stats["expirations"] += 1
+            self._stats["misses"] += 1
             return None
 
-        return value
+        self._cache_container.move_to_end(key)
+        self._stats["hits"] += 1
+        return entry.value
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
         """
-        将键的值设置到缓存中
+        将键的值设置到缓存中，超过容量时淘汰最久未使用的键；单条超过 max_bytes 的值不缓存（旧值同时删除）
         :param key:
         :param value:
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        if key in self._cache_container:
+            self._remove(key)
+        else:
+            self._sorted_keys_stale = True
+        size = _estimate_size(key, value)
+        if self._max_bytes and size > self._max_bytes:
+            self._stats["rejections"] += 1
+            utils.logger.warning(
+                f"[ExpiringLocalCache.set] skip caching {key}: {size} bytes exceeds max_bytes {self._max_bytes}"
+            )
+            return
+        entry = _CacheEntry(value, time.time() + expire_time, size)
+        self._cache_container[key] = entry
+        self._bytes += entry.size
+        heapq.heappush(self._expire_heap, (entry.expire_at, key))
+        self._evict_over_limit()
+        self._compact_heap()
         if self._cron_task is None:
             self._schedule_clear_if_running()
 
+    def _evict_over_limit(self) -> None:
+        while self._cache_container and (
+            (self._max_entries and len(self._cache_container) > self._max_entries)
+            or (self._max_bytes and self._bytes > self._max_bytes)
+        ):
+            self._remove(next(iter(self._cache_container)))
+            self._stats["evictions"] += 1
+
+    def _compact_heap(self) -> None:
+        # 同一个 key 反复 set 或被淘汰后，堆里会留下失效记录，数量明显多于有效 key 时重建
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 64:
+            self._expire_heap = [(entry.expire_at, key) for key, entry in self._cache_container.items()]
+            heapq.heapify(self._expire_heap)
+
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key（glob 规则，与 redis 一致），"前缀*" 形式的模式走前缀索引。
+        注意：原来的实现把 * 去掉后做子串匹配，现在按 glob 匹配，例如 "kuaidaili" 只匹配同名 key，
+        需要子串匹配时写成 "*kuaidaili*"
         :param pattern: 匹配模式
         :return:
         """
-        if pattern == '*':
-            return list(self._cache_container.keys())
+        if self._sorted_keys_stale:
+            self._sorted_keys = sorted(self._cache_container)
+            self._sorted_keys_stale = False
+        now = time.time()
+        prefix = pattern[:-1] if pattern.endswith("*") else None
+        if prefix is not None and not any(ch in prefix for ch in _GLOB_CHARS):
+            start = bisect.bisect_left(self._sorted_keys, prefix)
+            candidates = []
+            for key in self._sorted_keys[start:]:
+                if not key.startswith(prefix):
+                    break
+                candidates.append(key)
+        else:
+            candidates = [key for key in self._sorted_keys if fnmatch.fnmatchcase(key, pattern)]
+        live = self._cache_container
+        return [key for key in candidates if key in live and live[key].expire_at >= now]
 
-        # 本地缓存通配符暂时将*替换为空
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
-
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def stats(self) -> Dict[str, int]:
+        """
+        命中/未命中/淘汰/过期次数，以及当前的 key 数量和估算字节数
+        :return:
+        """
+        return {**self._stats, "entries": len(self._cache_container), "bytes": self._bytes}
 
     def _schedule_clear_if_running(self):
         """
@@ -139,12 +245,19 @@ class ExpiringLocalCache(AbstractCache):
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        从过期堆中弹出已过期的键并删除
         :return:
         """
-        for key, (value, expire_time) in list(self._cache_container.items()):
-            if expire_time < time.time():
-                del self._cache_container[key]
+        now = time.time()
+        heap = self._expire_heap
+        while heap and heap[0][0] < now:
+            expire_at, key = heapq.heappop(heap)
+            entry = self._cache_container.get(key)
+            # 键已被删除或重新 set 过，这条记录已失效
+            if entry is None or entry.expire_at != expire_at:
+                continue
+            self._remove(key)
+            self._stats["expirations"] += 1
 
     async def _start_clear_cron(self):
         """
@@ -20,8 +20,8 @@ from typing import Any, List
 
 from redis import Redis
 
+import config
 from cache.abs_cache import AbstractCache
-from config import db_config
 
 
 class RedisCache(AbstractCache):
@@ -37,10 +37,10 @@ class RedisCache(AbstractCache):
         :return:
         """
         return Redis(
-            host=db_config.REDIS_DB_HOST,
-            port=db_config.REDIS_DB_PORT,
-            db=db_config.REDIS_DB_NUM,
-            password=db_config.REDIS_DB_PWD,
+            host=config.REDIS_DB_HOST,
+            port=config.REDIS_DB_PORT,
+            db=config.REDIS_DB_NUM,
+            password=config.REDIS_DB_PWD,
         )
 
     def get(self, key: str) -> Any:
@@ -66,9 +66,9 @@ class RedisCache(AbstractCache):
 
     def keys(self, pattern: str) -> List[str]:
         """
-        获取所有符合pattern的key
+        获取所有符合pattern的key，用 SCAN 分批遍历，不会像 KEYS 一样阻塞 redis
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        return list(dict.fromkeys(key.decode() for key in self._redis_client.scan_iter(match=pattern, count=500)))
 
 
 if __name__ == '__main__':
@@ -12,4 +12,42 @@
 from .base_config import *
 from .db_config import *
 from .tieba_config import *
-from .youtube_config import *
\ No newline at end of file
+from .youtube_config import *
+
+# ==================== 按任务隔离的配置覆盖 ====================
+# 同一进程内并发运行多个平台爬虫时，每个 asyncio 任务通过 use_context_overrides 持有自己的一份配置覆盖，
+# 任务内读取 config.X 优先取覆盖值，任务内对 config.X 的赋值也只写入自己的覆盖，不影响其他任务
+import sys as _sys
+import types as _types
+from contextvars import ContextVar as _ContextVar
+from typing import Any as _Any, Dict as _Dict, Optional as _Optional
+
+_config_overrides_var: _ContextVar[_Optional[_Dict[str, _Any]]] = _ContextVar("config_overrides", default=None)
+
+
+def use_context_overrides(overrides: _Dict[str, _Any]) -> None:
+    """
+    为当前上下文(asyncio 任务)设置配置覆盖，应在任务协程内调用
+    :param overrides: 配置名 -> 覆盖值，例如 {"PLATFORM": "dy", "KEYWORDS": "a,b"}
+    :return:
+    """
+    _config_overrides_var.set(dict(overrides))
+
+
+class _ContextConfigModule(_types.ModuleType):
+
+    def __getattribute__(self, name: str) -> _Any:
+        overrides = _config_overrides_var.get()
+        if overrides is not None and name in overrides:
+            return overrides[name]
+        return super().__getattribute__(name)
+
+    def __setattr__(self, name: str, value: _Any) -> None:
+        overrides = _config_overrides_var.get()
+        if overrides is not None and name.isupper():
+            overrides[name] = value
+        else:
+            super().__setattr__(name, value)
+
+
+_sys.modules[__name__].__class__ = _ContextConfigModule
@@ -23,6 +23,27 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# 代理池后台校验的间隔（秒）
+IP_PROXY_VALIDATE_INTERVAL = 30
+
+# 后台同时校验的 IP 数量
+IP_PROXY_VALIDATE_CONCURRENCY = 8
+
+# 单次校验的超时时间（秒）
+IP_PROXY_VALIDATE_TIMEOUT = 10
+
+# 校验结果的有效期（秒），超过后重新校验
+IP_PROXY_REVALIDATE_SECONDS = 120
+
+# IP 剩余有效期少于该秒数时提前向代理商补充新 IP，租用中的 IP 换到新 IP 上
+IP_PROXY_PREFETCH_BEFORE_EXPIRE = 60
+
+# 连续失败（校验或爬虫反馈）达到该次数的 IP 从代理池剔除
+IP_PROXY_MAX_FAILURES = 2
+
+# 代理商返回的 IP 缓存在哪里：memory（进程内） | async_redis（多个爬虫进程共享，减少重复提取）
+IP_PROXY_CACHE_TYPE = "memory"
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -62,6 +83,19 @@ AUTO_CLOSE_BROWSER = True
 # 数据保存类型选项配置,支持四种类型：csv、db、json、sqlite, 最好保存到DB，有排重的功能。
 SAVE_DATA_OPTION = "db"  # csv or db or json or sqlite
 
+# db/sqlite 模式下评论等高频数据的批量写入配置：攒够条数或超过间隔秒数即批量 upsert 一次
+STORE_BATCH_SIZE = 100
+STORE_FLUSH_INTERVAL = 5
+
+# 启动时自动迁移已有数据库的平台数据表（db_migration.py）：自然键去重后加唯一索引、计数字段转整数、
+# 加关键词+发布时间组合索引。已迁移的表会跳过；大表首次迁移耗时较长，可设为 False 后手动执行 python db_migration.py
+DB_AUTO_MIGRATE_SCHEMA = True
+
+# json 模式下以 JSON Lines(.jsonl) 追加写入，单个文件超过该大小(MB)后切分新文件
+JSONL_ROTATE_MAX_MB = 100
+# 程序结束时是否将 .jsonl 额外导出为原来的 JSON 数组格式(.json)
+JSONL_EXPORT_JSON_ON_CLOSE = True
+
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
 
@@ -74,9 +108,119 @@ CRAWLER_MAX_NOTES_COUNT = 5
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# ==================== HTTP 连接池配置 ====================
+# 同一个爬虫的所有 API 请求共享长连接池，避免每次请求重新 DNS + TCP + TLS 握手
+# 连接池最大连接数
+HTTP_MAX_CONNECTIONS = 100
+# 保持空闲(keep-alive)的最大连接数
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+# 单个 host 同时在途的最大连接数
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+# 空闲连接保活时间（秒）
+HTTP_KEEPALIVE_EXPIRY = 30
+# 是否启用 HTTP/2（需要安装 h2 包，未安装时自动回退 HTTP/1.1）
+ENABLE_HTTP2 = True
+
+# ==================== 多平台并发运行配置（crawler_runner.py） ====================
+# 同一进程内同时运行的平台爬虫任务数上限
+MULTI_PLATFORM_MAX_CONCURRENCY = 4
+# 单个平台同时运行的任务数上限，未配置的平台使用默认值
+# 同一平台的任务共用登录态和浏览器用户目录，默认不并发
+PLATFORM_MAX_CONCURRENCY = {}
+DEFAULT_PLATFORM_MAX_CONCURRENCY = 1
+
+# ==================== 定时任务配置（scheduler.py） ====================
+# 同时运行的定时任务数上限，单个平台的并发仍受 PLATFORM_MAX_CONCURRENCY 限制
+SCHEDULE_MAX_CONCURRENCY = 2
+# 定时任务列表，每项为 model.m_crawl_job.ScheduledJobConfig 的字段，例如：
+# {"name": "dy-creators", "platform": "dy", "crawler_type": "creator", "interval_seconds": 1800, "jitter_seconds": 120,
+#  "extra_config": {"DY_CREATOR_ID_LIST": ["..."]}}
+# {"name": "yt-creators", "platform": "yt", "crawler_type": "creator", "cron": "0 */3 * * *"}
+# 为空时按 scheduler.PLATFORMS_TO_CRAWL 每个平台一个创作者任务，间隔为环境变量 SCHEDULE_INTERVAL
+SCHEDULE_JOBS = []
+
+# ==================== 关键词搜索调度配置（tools/keyword_scheduler.py） ====================
+# 同一平台同时搜索的关键词数
+SEARCH_KEYWORD_CONCURRENCY = 3
+# 翻页流水线深度：请求下一页搜索结果时，后台最多同时处理（详情/评论）的页数
+SEARCH_PAGE_PIPELINE_DEPTH = 1
+# 单个平台同时在途的 API 请求数上限，该平台所有关键词、所有任务共享；未配置的平台使用默认值
+PLATFORM_REQUEST_BUDGET = {}
+DEFAULT_PLATFORM_REQUEST_BUDGET = 8
+
+# ==================== 评论抓取流水线配置（tools/comment_pipeline.py） ====================
+# 已抓取、等待入库的评论页数上限，超过后翻页请求等待入库完成
+COMMENT_PIPELINE_QUEUE_SIZE = 4
+# 单个帖子同时抓取子评论的一级评论数
+SUB_COMMENT_CONCURRENCY = 4
+
+# ==================== 自适应限速配置（tools/rate_limiter.py） ====================
+# 开启后同一 平台/账号/代理 的请求由限速器控制间隔：请求正常时逐步提速，出错或命中风控时成倍降速，
+# 分页之间原有的固定 sleep(crawl_interval) 不再执行
+ENABLE_ADAPTIVE_RATE_LIMIT = True
+# 请求间隔上下限与初始值（秒）
+RATE_LIMIT_MIN_INTERVAL = 0.2
+RATE_LIMIT_MAX_INTERVAL = 10.0
+RATE_LIMIT_INITIAL_INTERVAL = 1.0
+# 每次成功请求后速率增加量（次/秒）
+RATE_LIMIT_INCREASE_STEP = 0.05
+# 出错后速率乘以该系数
+RATE_LIMIT_DECREASE_FACTOR = 0.5
+# 命中风控（403/429、验证码、WAF 等）后暂停的秒数
+RATE_LIMIT_BLOCK_COOLDOWN = 20.0
+# 请求间隔的随机抖动比例
+RATE_LIMIT_JITTER = 0.2
+# 按平台覆盖上述参数，例如 {"ks": {"min_interval": 1.0}}，键为 AdaptiveRateLimiter 的参数名
+PLATFORM_RATE_LIMIT = {}
+
+# ==================== 会话参数缓存配置（tools/session_params.py） ====================
+# 从浏览器读取的签名密钥/公共参数（B 站 wbi key、抖音 webid/msToken、小红书 b1）的缓存时间（秒），
+# 签名失败或 cookie 更新时提前失效
+SESSION_PARAM_TTL = 600
+
+# ==================== 浏览器会话池配置（tools/browser_pool.py） ====================
+# 开启后爬虫结束时不关闭浏览器，按 平台/账号 保留已登录的浏览器上下文，下一次运行直接复用，
+# 省去启动浏览器、注入反检测脚本、打开首页和登录的时间；定时任务(scheduler.py)默认开启
+ENABLE_BROWSER_SESSION_POOL = False
+# 会话最长存活时间（秒），超过后关闭重新启动
+BROWSER_SESSION_MAX_AGE = 6 * 3600
+# 会话空闲超过该时间（秒）后关闭，应大于定时任务的间隔
+BROWSER_SESSION_IDLE_TIMEOUT = 2 * 3600
+# 同一个页面被复用的次数上限，超过后新开页面替换，避免页面内存持续增长
+BROWSER_SESSION_PAGE_MAX_USES = 10
+# 复用时距上次使用超过该时间（秒）则重新打开首页，让站点刷新 cookie
+BROWSER_SESSION_REFRESH_INTERVAL = 300
+# 复用前健康检查的超时时间（秒）
+BROWSER_SESSION_HEALTH_CHECK_TIMEOUT = 10
+
+# ==================== 创作者增量爬取配置（store/creator_index.py） ====================
+# 开启后创作者模式按每个创作者已爬取的内容 ID 和已完整爬取的发布时间范围跳过旧内容并提前停止翻页，
+# db/sqlite 存储时索引保存在 creator_crawl_index 表，其他存储方式只在进程内有效（定时任务中跨周期生效）
+ENABLE_CREATOR_INCREMENTAL_CRAWL = True
+# 已爬取过但发布时间在该时间（秒）内的内容仍然重新抓取，用于刷新点赞/评论数
+CREATOR_REFRESH_RECENT_SECONDS = 3 * 86400
+# 连续遇到多少条已爬取的旧内容后停止翻页，需要大于置顶内容数（抖音最多置顶 3 条）
+CREATOR_INCREMENTAL_STOP_AFTER_KNOWN = 5
+# 每个创作者保留的已爬取内容 ID 数量上限（保留发布时间最新的）
+CREATOR_INDEX_MAX_IDS = 500
+
+# ==================== 签名服务配置（tools/sign_service.py） ====================
+# 每个 JS 签名脚本常驻的 node 进程数（抖音 a_bogus、知乎 x-zse-96）
+SIGN_JS_POOL_SIZE = 2
+# 单次签名超时时间（秒）
+SIGN_TIMEOUT = 10
+
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = True
 
+# 媒体文件流式下载：边下载边写入磁盘（.part 临时文件，支持 Range 断点续传）
+# 同时下载的媒体文件数上限
+MEDIA_DOWNLOAD_CONCURRENCY = 4
+# 每次读取写入的块大小（字节），单个文件占用的内存与视频大小无关
+MEDIA_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# 下载中断后续传的重试次数
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
 # ==================== ASR（音频转写）配置 ====================
 # ASR 设备：auto | cpu | mps | cuda
 # - 在 macOS 上使用 mps 可能出现显存/统一内存不足（MPS OOM），可改为 cpu 规避
@@ -89,6 +233,20 @@ ASR_BATCH_SIZE_S = 20
 # - 例如 120 表示每 2 分钟一段，可显著降低峰值内存
 ASR_SPLIT_SECONDS = 0
 
+# 启用转写流水线的平台（dy 抖音视频、bili B站视频、yt YouTube 字幕缺失时的音频回退）
+ASR_ENABLED_PLATFORMS = ["dy", "bili", "yt"]
+# 转写工作进程数，每个进程各加载一份模型
+ASR_WORKER_PROCESSES = 1
+# 排队和转写中的任务数上限，超过后下载协程等待，避免视频堆积在磁盘
+ASR_MAX_PENDING_JOBS = 8
+# 未完成转写任务的记录文件，程序中断后重启时可继续转写
+ASR_JOURNAL_PATH = "data/asr/pending_jobs.json"
+# 启动时是否恢复上次未完成的转写任务
+ASR_RESUME_PENDING_JOBS = True
+# 单个转写任务最多尝试的次数，仍失败时移入失败任务文件，不再自动重试（媒体文件保留）
+ASR_MAX_ATTEMPTS = 3
+ASR_DEAD_LETTER_PATH = "data/asr/failed_jobs.json"
+
 # 是否开启爬评论模式, 默认开启爬评论
 ENABLE_GET_COMMENTS = True
 
@@ -12,11 +12,12 @@
 import os
 
 # mysql config - 使用MindSpider的数据库配置
-MYSQL_DB_PWD = "mindspider_pass"
-MYSQL_DB_USER = "root"
-MYSQL_DB_HOST = "127.0.0.1"
-MYSQL_DB_PORT = 3306
-MYSQL_DB_NAME = "mindspider"
+# 可通过环境变量覆盖（DeepSentimentCrawling/platform_crawler.py 运行爬虫时即通过环境变量传入）
+MYSQL_DB_PWD = os.getenv("MYSQL_DB_PWD", "mindspider_pass")
+MYSQL_DB_USER = os.getenv("MYSQL_DB_USER", "root")
+MYSQL_DB_HOST = os.getenv("MYSQL_DB_HOST", "127.0.0.1")
+MYSQL_DB_PORT = int(os.getenv("MYSQL_DB_PORT", 3306))
+MYSQL_DB_NAME = os.getenv("MYSQL_DB_NAME", "mindspider")
 
 
 # redis config
@@ -25,9 +26,17 @@ REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
 REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
 REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 
+# async redis 缓存的序列化格式：json | msgpack（需要安装 msgpack）
+REDIS_CACHE_SERIALIZER = os.getenv("REDIS_CACHE_SERIALIZER", "json")
+
 # cache type
 CACHE_TYPE_REDIS = "redis"
+CACHE_TYPE_ASYNC_REDIS = "async_redis"
 CACHE_TYPE_MEMORY = "memory"
 
+# 本地缓存容量上限，超过时淘汰最久未使用的键，0 表示不限
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 100000))
+LOCAL_CACHE_MAX_BYTES = int(os.getenv("LOCAL_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
 # sqlite config
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schema", "sqlite_tables.db")
\ No newline at end of file
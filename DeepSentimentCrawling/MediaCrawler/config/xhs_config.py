@@ -26,3 +26,7 @@ XHS_CREATOR_ID_LIST = [
     "63e36c9a000000002703502b",
     # ........................
 ]
+
+# 签名页面池的页面数（tools/sign_page_pool.py），0 表示与 MAX_CONCURRENCY_NUM 一致（最多 4 个）；
+# 并发请求分散到多个已登录页面上签名，额外页面在第一次签名时打开
+XHS_SIGN_PAGE_POOL_SIZE = 0
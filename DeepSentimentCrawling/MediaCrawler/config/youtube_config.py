@@ -36,6 +36,18 @@ YOUTUBE_SKIP_MEMBERS_ONLY = True
 # creator 模式下，最多扫描多少个频道视频条目（用于在大量 members-only 时仍能抓到普通视频）
 YOUTUBE_CREATOR_FETCH_LIMIT = 200
 
+# 跳过会员视频时同时探测（完整解析）的视频数，拿到足够的可访问视频后取消其余探测
+YOUTUBE_PROBE_CONCURRENCY = 4
+
+# 会员视频/不可用视频的探测结果缓存文件，有效期内不再重复探测
+YOUTUBE_PROBE_CACHE_PATH = "data/youtube/probe_cache.json"
+
+# 会员视频的缓存时间（秒）
+YOUTUBE_PROBE_CACHE_TTL = 7 * 86400
+
+# 不可用视频（私享、已删除、未首播等）的缓存时间（秒），网络错误等暂时性失败不缓存
+YOUTUBE_PROBE_UNAVAILABLE_TTL = 6 * 3600
+
 # 可选：yt-dlp remote components（用于解决 YouTube 的 JS challenge / EJS）
 # 设为空表示不启用；推荐值：["ejs:github"]
 YOUTUBE_REMOTE_COMPONENTS = ["ejs:github"]
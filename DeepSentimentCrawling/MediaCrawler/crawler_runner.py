@@ -0,0 +1,233 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 在同一个事件循环内并发运行多个平台爬虫
+
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import config
+import db
+from base.base_crawler import AbstractCrawler
+from cache.async_redis_cache import shutdown_all_redis_caches
+from cache.local_cache import shutdown_all_local_caches
+from main import CrawlerFactory
+from model.m_crawl_job import CrawlJobConfig, CrawlJobResult
+from proxy.proxy_ip_pool import shutdown_ip_pools
+from store.batch_writer import flush_all_batch_writers, use_job_batch_writers
+from store.jsonl_writer import close_all_jsonl_writers
+from tools import utils
+from tools.browser_pool import shutdown_browser_session_pool
+from tools.crawl_stats import CrawlStatsLogHandler, new_crawl_stats
+from tools.http_pool import shutdown_all_http_pools
+from tools.sign_service import shutdown_sign_service
+from tools.transcription_pool import drain_transcription_jobs, resume_transcription_jobs, shutdown_transcription_pool
+
+
+class MultiPlatformRunner:
+    """
+    每个平台任务运行在独立的 asyncio 任务中，持有自己的配置覆盖、浏览器和数据库连接；
+    总并发受 max_concurrency 限制，单个平台的并发受 platform_concurrency 限制。
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, platform_concurrency: Optional[Dict[str, int]] = None) -> None:
+        self.max_concurrency = max_concurrency or config.MULTI_PLATFORM_MAX_CONCURRENCY
+        self.platform_concurrency = dict(config.PLATFORM_MAX_CONCURRENCY)
+        self.platform_concurrency.update(platform_concurrency or {})
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._platform_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def run(self, jobs: List[CrawlJobConfig]) -> List[CrawlJobResult]:
+        """
+        并发运行全部任务，返回与 jobs 顺序一致的结果
+        :param jobs:
+        :return:
+        """
+        stats_handler = CrawlStatsLogHandler()
+        utils.logger.addHandler(stats_handler)
+        try:
+            # gather 会把每个协程包装成独立任务，各自拷贝一份上下文，配置覆盖和数据库连接互不影响
+            return list(await asyncio.gather(*[self.run_job(job, index) for index, job in enumerate(jobs)]))
+        finally:
+            utils.logger.removeHandler(stats_handler)
+            await self.shutdown_shared_resources(jobs)
+
+    def _semaphores(self, platform: str) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        platform_semaphore = self._platform_semaphores.get(platform)
+        if platform_semaphore is None:
+            platform_semaphore = self._platform_semaphores[platform] = asyncio.Semaphore(
+                self.platform_concurrency.get(platform, config.DEFAULT_PLATFORM_MAX_CONCURRENCY)
+            )
+        return self._global_semaphore, platform_semaphore
+
+    async def run_job(self, job: CrawlJobConfig, index: int = 0) -> CrawlJobResult:
+        """
+        运行单个任务，受总并发和平台并发限制；应在独立的 asyncio 任务中调用，配置覆盖只作用于该任务
+        :param job: 任务配置
+        :param index: 任务序号，用于分配独立的 CDP 端口
+        :return:
+        """
+        global_semaphore, platform_semaphore = self._semaphores(job.platform)
+        async with global_semaphore, platform_semaphore:
+            overrides = job.to_config_overrides()
+            # 每个任务使用独立的 CDP 端口，避免连接到其他平台启动的浏览器
+            overrides.setdefault("CDP_DEBUG_PORT", config.CDP_DEBUG_PORT + index * 10)
+            config.use_context_overrides(overrides)
+            use_job_batch_writers()
+            stats = new_crawl_stats()
+
+            start_time = datetime.now()
+            result = CrawlJobResult(
+                platform=job.platform,
+                keywords_count=len([k for k in job.keywords.split(",") if k.strip()]),
+                start_time=start_time.isoformat(),
+            )
+            utils.logger.info(f"[MultiPlatformRunner] start {job.platform}, keywords: {job.keywords}")
+            crawler: Optional[AbstractCrawler] = None
+            try:
+                if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+                    await db.init_db()
+                crawler = CrawlerFactory.create_crawler(platform=job.platform)
+                await resume_transcription_jobs(job.platform)
+                await crawler.start()
+                result.success = True
+            except Exception as e:
+                utils.logger.error(f"[MultiPlatformRunner] {job.platform} crawl failed: {e}")
+                result.error = str(e)
+            finally:
+                await self._cleanup_job(job, crawler)
+
+            end_time = datetime.now()
+            result.end_time = end_time.isoformat()
+            result.duration_seconds = (end_time - start_time).total_seconds()
+            result.notes_count = stats["notes_count"]
+            result.comments_count = stats["comments_count"]
+            result.errors_count = stats["errors_count"]
+            utils.logger.info(
+                f"[MultiPlatformRunner] {job.platform} finished, success: {result.success}, "
+                f"notes: {result.notes_count}, comments: {result.comments_count}, duration: {result.duration_seconds:.1f}s"
+            )
+            return result
+
+    @staticmethod
+    async def _cleanup_job(job: CrawlJobConfig, crawler: Optional[AbstractCrawler]) -> None:
+        if crawler and hasattr(crawler, "close"):
+            try:
+                await crawler.close()
+            except Exception as e:
+                utils.logger.warning(f"[MultiPlatformRunner] {job.platform} close crawler error: {e}")
+        try:
+            await drain_transcription_jobs()
+        except Exception as e:
+            utils.logger.warning(f"[MultiPlatformRunner] {job.platform} wait transcription jobs error: {e}")
+        if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+            try:
+                await flush_all_batch_writers()
+                await db.close()
+            except Exception as e:
+                utils.logger.warning(f"[MultiPlatformRunner] {job.platform} close db error: {e}")
+
+    @staticmethod
+    async def shutdown_shared_resources(jobs: List[CrawlJobConfig]) -> None:
+        """
+        关闭进程内共享的资源（jsonl 文件、缓存、连接池、浏览器会话池、签名服务、转写进程池），全部任务结束后调用
+        :param jobs:
+        :return:
+        """
+        if any((job.save_data_option or config.SAVE_DATA_OPTION) == "json" for job in jobs):
+            try:
+                await close_all_jsonl_writers()
+            except Exception:
+                pass
+        try:
+            await shutdown_all_local_caches()
+        except Exception:
+            pass
+        try:
+            await shutdown_all_redis_caches()
+        except Exception:
+            pass
+        try:
+            await shutdown_all_http_pools()
+        except Exception:
+            pass
+        try:
+            await shutdown_ip_pools()
+        except Exception:
+            pass
+        try:
+            await shutdown_browser_session_pool()
+        except Exception:
+            pass
+        try:
+            await shutdown_sign_service()
+        except Exception:
+            pass
+        try:
+            await shutdown_transcription_pool()
+        except Exception:
+            pass
+
+
+async def run_multi_platform(jobs: List[CrawlJobConfig], max_concurrency: Optional[int] = None) -> List[CrawlJobResult]:
+    """
+    并发运行多个平台爬取任务
+    :param jobs: 每个平台一个任务配置
+    :param max_concurrency: 同时运行的任务数上限
+    :return:
+    """
+    return await MultiPlatformRunner(max_concurrency=max_concurrency).run(jobs)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Run several platform crawlers concurrently / 并发运行多个平台爬虫')
+    parser.add_argument('--platforms', type=str, required=True, help='Comma separated platforms / 以英文逗号分隔的平台列表')
+    parser.add_argument('--keywords', type=str, default=config.KEYWORDS, help='Comma separated keywords / 关键词')
+    parser.add_argument('--lt', type=str, choices=["qrcode", "phone", "cookie"], default=config.LOGIN_TYPE,
+                        help='Login type / 登录方式')
+    parser.add_argument('--type', type=str, choices=["search", "detail", "creator"], default="search",
+                        help='Crawler type / 爬取类型')
+    parser.add_argument('--save_data_option', type=str, choices=['csv', 'db', 'json', 'sqlite'],
+                        default=config.SAVE_DATA_OPTION, help='Where to save the data / 数据保存方式')
+    parser.add_argument('--max_concurrency', type=int, default=None,
+                        help='Max concurrent platforms / 同时运行的平台数上限')
+    parser.add_argument('--result_file', type=str, default="",
+                        help='Write structured results as json to this file / 结构化结果输出文件')
+    args = parser.parse_args()
+
+    jobs = [
+        CrawlJobConfig(
+            platform=platform.strip(),
+            keywords=args.keywords,
+            login_type=args.lt,
+            crawler_type=args.type,
+            save_data_option=args.save_data_option,
+        )
+        for platform in args.platforms.split(",") if platform.strip()
+    ]
+    results = await run_multi_platform(jobs, max_concurrency=args.max_concurrency)
+    results_json = json.dumps([result.model_dump() for result in results], ensure_ascii=False, indent=2)
+    if args.result_file:
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            f.write(results_json)
+    print(results_json)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -14,7 +14,8 @@
 # @Time    : 2024/4/6 14:54
 # @Desc    : mediacrawler db 管理
 import asyncio
-from typing import Dict
+import os
+from typing import Dict, Optional, Set, Tuple
 from urllib.parse import urlparse
 
 import aiofiles
@@ -23,14 +24,16 @@ import aiomysql
 import config
 from async_db import AsyncMysqlDB
 from async_sqlite_db import AsyncSqliteDB
+from db_migration import migrate_platform_tables
 from tools import utils
 from var import db_conn_pool_var, media_crawler_db_var
 
 
-async def _ensure_mysql_column(table_name: str, column_name: str, ddl: str) -> None:
+async def _ensure_mysql_column(table_name: str, column_name: str, ddl: str) -> bool:
     """
     Ensure a MySQL column exists; if missing, run the provided ALTER DDL.
     This is a non-destructive, best-effort migration for existing databases.
+    Returns False if the column is still missing afterwards.
     """
     async_db_obj: AsyncMysqlDB = media_crawler_db_var.get()
     table_exists = await async_db_obj.get_first(
@@ -44,61 +47,119 @@ async def _ensure_mysql_column(table_name: str, column_name: str, ddl: str) -> N
         table_name,
     )
     if not table_exists:
-        return
-    # Check table/column existence via information_schema
-    exists = await async_db_obj.get_first(
-        """
-        SELECT 1
-        FROM information_schema.columns
-        WHERE table_schema = %s AND table_name = %s AND column_name = %s
-        LIMIT 1
-        """,
-        config.MYSQL_DB_NAME,
-        table_name,
-        column_name,
-    )
-    if exists:
-        return
+        return True
+
+    async def column_exists() -> bool:
+        # Check table/column existence via information_schema
+        return bool(await async_db_obj.get_first(
+            """
+            SELECT 1
+            FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = %s AND column_name = %s
+            LIMIT 1
+            """,
+            config.MYSQL_DB_NAME,
+            table_name,
+            column_name,
+        ))
+
+    if await column_exists():
+        return True
     try:
         await async_db_obj.execute(ddl)
         utils.logger.info(f"[init_db] applied mysql migration: {table_name}.{column_name}")
+        return True
     except Exception as e:
         # Duplicate column / race conditions are safe to ignore; other errors should be visible.
+        if await column_exists():
+            return True
         utils.logger.warning(f"[init_db] mysql migration failed for {table_name}.{column_name}: {e}")
+        return False
 
 
-async def ensure_mysql_schema_migrations() -> None:
+async def ensure_mysql_schema_migrations() -> bool:
     """
     Apply small, backward-compatible migrations for existing MySQL databases.
+    Returns whether every migration succeeded.
     """
     if config.SAVE_DATA_OPTION == "sqlite":
-        return
+        return True
+    success = True
 
     # douyin_aweme_comment: keep in sync with store.douyin.update_dy_aweme_comment
-    await _ensure_mysql_column(
+    success &= await _ensure_mysql_column(
         "douyin_aweme_comment",
         "parent_comment_id",
         "ALTER TABLE douyin_aweme_comment "
         "ADD COLUMN `parent_comment_id` VARCHAR(64) NOT NULL DEFAULT '0' COMMENT '父评论ID';",
     )
-    await _ensure_mysql_column(
+    success &= await _ensure_mysql_column(
         "douyin_aweme_comment",
         "like_count",
         "ALTER TABLE douyin_aweme_comment "
         "ADD COLUMN `like_count` VARCHAR(255) NOT NULL DEFAULT '0' COMMENT '点赞数';",
     )
-    await _ensure_mysql_column(
+    success &= await _ensure_mysql_column(
         "douyin_aweme_comment",
         "pictures",
         "ALTER TABLE douyin_aweme_comment "
         "ADD COLUMN `pictures` VARCHAR(500) NOT NULL DEFAULT '' COMMENT '评论图片列表';",
     )
-    await _ensure_mysql_column(
+    success &= await _ensure_mysql_column(
         "douyin_aweme",
         "transcription",
         "ALTER TABLE douyin_aweme "
         "ADD COLUMN `transcription` LONGTEXT COMMENT '视频转写文本';",
     )
+    success &= await _ensure_mysql_column(
+        "bilibili_video",
+        "transcription",
+        "ALTER TABLE bilibili_video "
+        "ADD COLUMN `transcription` LONGTEXT COMMENT '视频转写文本';",
+    )
+    if config.DB_AUTO_MIGRATE_SCHEMA:
+        # 自然键唯一索引、计数字段 BIGINT、关键词+发布时间组合索引
+        success &= await migrate_platform_tables("mysql")
+    return success
+
+
+# 本进程已完成结构迁移的数据库，(类型, 地址)；调度器并发运行的多个任务各自调用 init_db，迁移只执行一次
+_MIGRATED_SCHEMAS: Set[Tuple[str, str]] = set()
+_migration_lock: Optional[asyncio.Lock] = None
+_migration_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_migration_lock() -> asyncio.Lock:
+    global _migration_lock, _migration_lock_loop
+    loop = asyncio.get_running_loop()
+    if _migration_lock is None or _migration_lock_loop is not loop:
+        _migration_lock = asyncio.Lock()
+        _migration_lock_loop = loop
+    return _migration_lock
+
+
+async def migrate_schema_once() -> None:
+    """
+    对当前数据库执行结构迁移，同一进程内每个数据库只执行一次；
+    并发调用时后来者等待第一次迁移完成，迁移失败时下次调用会重试
+    Returns:
+
+    """
+    if config.SAVE_DATA_OPTION == "sqlite":
+        target = ("sqlite", os.path.abspath(config.SQLITE_DB_PATH))
+    else:
+        target = ("mysql", f"{config.MYSQL_DB_HOST}:{config.MYSQL_DB_PORT}/{config.MYSQL_DB_NAME}")
+    if target in _MIGRATED_SCHEMAS:
+        return
+    async with _get_migration_lock():
+        if target in _MIGRATED_SCHEMAS:
+            return
+        if target[0] == "sqlite":
+            success = await migrate_platform_tables("sqlite") if config.DB_AUTO_MIGRATE_SCHEMA else True
+        else:
+            success = await ensure_mysql_schema_migrations()
+        if success:
+            _MIGRATED_SCHEMAS.add(target)
 
 
 async def init_mediacrawler_db():
@@ -143,10 +204,11 @@ async def init_db():
     utils.logger.info("[init_db] start init mediacrawler db connect object")
     if config.SAVE_DATA_OPTION == "sqlite":
         await init_sqlite_db()
+        await migrate_schema_once()
         utils.logger.info("[init_db] end init sqlite db connect object")
     else:
         await init_mediacrawler_db()
-        await ensure_mysql_schema_migrations()
+        await migrate_schema_once()
         utils.logger.info("[init_db] end init mysql db connect object")
 
 
@@ -158,8 +220,10 @@ async def close():
     """
     utils.logger.info("[close] close mediacrawler db connection")
     if config.SAVE_DATA_OPTION == "sqlite":
-        # SQLite数据库连接会在AsyncSqliteDB对象销毁时自动关闭
-        utils.logger.info("[close] sqlite db connection will be closed automatically")
+        async_db_obj = media_crawler_db_var.get(None)
+        if isinstance(async_db_obj, AsyncSqliteDB):
+            await async_db_obj.close()
+            utils.logger.info("[close] sqlite db connection closed")
     else:
         # MySQL连接池关闭
         db_pool: aiomysql.Pool = db_conn_pool_var.get()
@@ -183,12 +247,13 @@ async def init_table_schema(db_type: str = None):
     # 如果没有指定数据库类型，则使用配置文件中的设置
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
+    # 重建表结构后，下次 init_db 需要重新检查迁移
+    _MIGRATED_SCHEMAS.clear()
     
     if db_type == "sqlite":
         utils.logger.info("[init_table_schema] begin init sqlite table schema ...")
         
         # 检查并删除可能存在的损坏数据库文件
-        import os
         if os.path.exists(config.SQLITE_DB_PATH):
             try:
                 # 尝试删除现有的数据库文件
@@ -204,6 +269,10 @@ async def init_table_schema(db_type: str = None):
                 except Exception as rename_e:
                     utils.logger.error(f"[init_table_schema] failed to rename existing sqlite db file: {rename_e}")
                     raise rename_e
+        # WAL 模式遗留的 -wal/-shm 文件必须随数据库文件一起清理
+        for suffix in ("-wal", "-shm"):
+            if os.path.exists(config.SQLITE_DB_PATH + suffix):
+                os.remove(config.SQLITE_DB_PATH + suffix)
         
         await init_sqlite_db()
         async_db_obj: AsyncSqliteDB = media_crawler_db_var.get()
@@ -211,6 +280,7 @@ async def init_table_schema(db_type: str = None):
             schema_sql = await f.read()
             await async_db_obj.executescript(schema_sql)
             utils.logger.info("[init_table_schema] sqlite table schema init successful")
+        await async_db_obj.close()
     elif db_type == "mysql":
         utils.logger.info("[init_table_schema] begin init mysql table schema ...")
         await init_mediacrawler_db()
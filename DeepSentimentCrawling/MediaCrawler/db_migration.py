@@ -0,0 +1,387 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 平台数据表结构迁移：自然键唯一索引、计数字段转 BIGINT、关键词+发布时间组合索引
+#
+# 老版本的表结构中 aweme_id / note_id / comment_id 等自然键只有普通索引，点赞数等计数字段是 varchar，
+# 存储时只能先查后写，按点赞数排序也需要 CAST 而用不上索引。
+# 本模块对已有数据库做幂等迁移（已迁移的表会直接跳过），可随 db.init_db 自动执行，也可单独运行：
+#   python db_migration.py
+import asyncio
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import config
+from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
+from tools import utils
+from tools.crawler_util import parse_count
+from var import media_crawler_db_var
+
+# 表 -> 自然键字段，迁移后该字段上有唯一索引，BatchUpsertWriter 可直接单语句 upsert
+NATURAL_KEYS: Dict[str, str] = {
+    "bilibili_video": "video_id",
+    "bilibili_video_comment": "comment_id",
+    "douyin_aweme": "aweme_id",
+    "douyin_aweme_comment": "comment_id",
+    "kuaishou_video": "video_id",
+    "kuaishou_video_comment": "comment_id",
+    "weibo_note": "note_id",
+    "weibo_note_comment": "comment_id",
+    "xhs_note": "note_id",
+    "xhs_note_comment": "comment_id",
+    "tieba_note": "note_id",
+    "tieba_comment": "comment_id",
+    "zhihu_content": "content_id",
+    "zhihu_comment": "comment_id",
+}
+
+# 表 -> 需要转换为整数的计数字段
+COUNTER_COLUMNS: Dict[str, List[str]] = {
+    "bilibili_video": [
+        "liked_count", "disliked_count", "video_play_count", "video_favorite_count",
+        "video_share_count", "video_coin_count", "video_danmaku", "video_comment",
+    ],
+    "bilibili_video_comment": ["sub_comment_count", "like_count"],
+    "douyin_aweme": ["liked_count", "comment_count", "share_count", "collected_count"],
+    "douyin_aweme_comment": ["sub_comment_count", "like_count"],
+    "kuaishou_video": ["liked_count", "viewd_count"],
+    "kuaishou_video_comment": ["sub_comment_count"],
+    "weibo_note": ["liked_count", "comments_count", "shared_count"],
+    "weibo_note_comment": ["comment_like_count", "sub_comment_count"],
+    "xhs_note": ["liked_count", "collected_count", "comment_count", "share_count"],
+    "xhs_note_comment": ["like_count"],
+}
+
+# 表 -> (索引名, 字段)，用于按搜索关键词 + 发布时间筛选的分析查询
+ANALYSIS_INDEXES: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {
+    "bilibili_video": [("idx_bilibili_video_keyword_time", ("source_keyword", "create_time"))],
+    "douyin_aweme": [("idx_douyin_aweme_keyword_time", ("source_keyword", "create_time"))],
+    "kuaishou_video": [("idx_kuaishou_video_keyword_time", ("source_keyword", "create_time"))],
+    "weibo_note": [("idx_weibo_note_keyword_time", ("source_keyword", "create_time"))],
+    "xhs_note": [("idx_xhs_note_keyword_time", ("source_keyword", "time"))],
+    "tieba_note": [("idx_tieba_note_keyword_time", ("source_keyword", "publish_time"))],
+    "zhihu_content": [("idx_zhihu_content_keyword_time", ("source_keyword", "created_time"))],
+    "youtube_video": [("idx_youtube_video_keyword_time", ("source_keyword", "publish_time"))],
+}
+
+# 去重、计数转换每批处理的行数，避免长时间锁表
+MIGRATION_BATCH_SIZE = 1000
+_DIGITS_REGEXP = "^[0-9]+$"
+
+
+def normalize_counter_fields(table_name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将记录中的计数字段转换为整数（"1.2万" -> 12000），原地修改并返回
+    :param table_name: 表名
+    :param item: 待写入的记录
+    :return:
+    """
+    for column in COUNTER_COLUMNS.get(table_name, ()):
+        if column in item:
+            item[column] = parse_count(item[column])
+    return item
+
+
+async def _normalize_counter_values(async_db_obj: Union[AsyncMysqlDB, AsyncSqliteDB], table_name: str,
+                                    columns: List[str]) -> int:
+    """
+    按 id 分批把计数字段里的非纯数字内容（"1.2万"、"10+"、"None" 等）转换为整数
+    :return: 转换的行数
+    """
+    if isinstance(async_db_obj, AsyncMysqlDB):
+        placeholder = "%s"
+        not_digits = " OR ".join([f"`{c}` NOT REGEXP '{_DIGITS_REGEXP}'" for c in columns])
+    else:
+        placeholder = "?"
+        # sqlite 没有内置 REGEXP，GLOB '*[^0-9]*' 匹配含非数字字符的值；空字符串单独判断
+        not_digits = " OR ".join([f"({c} GLOB '*[^0-9]*' OR {c} = '')" for c in columns])
+    column_str = ",".join(columns)
+    converted = 0
+    last_id = 0
+    while True:
+        rows = await async_db_obj.query(
+            f"SELECT id,{column_str} FROM {table_name} WHERE id > {placeholder} AND ({not_digits}) "
+            f"ORDER BY id LIMIT {MIGRATION_BATCH_SIZE}",
+            last_id,
+        )
+        if not rows:
+            return converted
+        items = [{column: parse_count(row[column]) for column in columns} for row in rows]
+        for item, row in zip(items, rows):
+            item["id"] = row["id"]
+        await async_db_obj.update_many(table_name, items, "id")
+        converted += len(rows)
+        last_id = rows[-1]["id"]
+
+
+# ==================== MySQL ====================
+
+async def _mysql_columns(async_db_obj: AsyncMysqlDB, table_name: str) -> Dict[str, Dict[str, Any]]:
+    rows = await async_db_obj.query(
+        """
+        SELECT column_name AS name, data_type AS data_type, is_nullable AS is_nullable, column_comment AS comment
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        table_name,
+    )
+    return {row["name"]: row for row in rows}
+
+
+async def _mysql_indexes(async_db_obj: AsyncMysqlDB, table_name: str) -> Dict[str, Tuple[bool, List[str]]]:
+    """
+    :return: 索引名 -> (是否唯一, 按顺序的字段列表)
+    """
+    rows = await async_db_obj.query(
+        """
+        SELECT index_name AS name, non_unique AS non_unique, column_name AS column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s
+        ORDER BY index_name, seq_in_index
+        """,
+        table_name,
+    )
+    indexes: Dict[str, Tuple[bool, List[str]]] = {}
+    for row in rows:
+        unique, columns = indexes.setdefault(row["name"], (not int(row["non_unique"]), []))
+        columns.append(row["column_name"])
+    return indexes
+
+
+async def _mysql_dedupe(async_db_obj: AsyncMysqlDB, table_name: str, key_field: str) -> int:
+    """
+    分批删除自然键重复的行，每个键只保留 id 最大（最近写入）的一行
+    :return: 删除的行数
+    """
+    deleted = 0
+    while True:
+        rows = await async_db_obj.query(
+            f"SELECT `{key_field}` AS k, MAX(id) AS keep_id FROM `{table_name}` "
+            f"GROUP BY `{key_field}` HAVING COUNT(*) > 1 LIMIT {MIGRATION_BATCH_SIZE}"
+        )
+        if not rows:
+            return deleted
+        keys = [row["k"] for row in rows]
+        keep_ids = [row["keep_id"] for row in rows]
+        deleted += await async_db_obj.execute(
+            f"DELETE FROM `{table_name}` WHERE `{key_field}` IN ({','.join(['%s'] * len(keys))}) "
+            f"AND id NOT IN ({','.join(['%s'] * len(keep_ids))})",
+            *keys, *keep_ids,
+        )
+
+
+async def _mysql_ensure_natural_key(async_db_obj: AsyncMysqlDB, table_name: str, key_field: str) -> bool:
+    if await async_db_obj.has_unique_index(table_name, key_field):
+        return True
+    indexes = await _mysql_indexes(async_db_obj, table_name)
+    # 沿用原来普通索引的名字，与 schema/tables.sql 保持一致
+    old_index = next((name for name, (unique, columns) in indexes.items()
+                      if not unique and columns == [key_field]), None)
+    index_name = old_index or f"uk_{table_name}_{key_field}"
+    drop_str = f"DROP INDEX `{old_index}`, " if old_index else ""
+    for attempt in range(3):
+        deleted = await _mysql_dedupe(async_db_obj, table_name, key_field)
+        if deleted:
+            utils.logger.info(f"[db_migration] {table_name}: removed {deleted} duplicate rows on {key_field}")
+        try:
+            await async_db_obj.execute(
+                f"ALTER TABLE `{table_name}` {drop_str}ADD UNIQUE KEY `{index_name}` (`{key_field}`), "
+                f"ALGORITHM=INPLACE, LOCK=NONE"
+            )
+            utils.logger.info(f"[db_migration] {table_name}: added unique key {index_name}({key_field})")
+            return True
+        except Exception as e:
+            # 去重和加索引之间爬虫可能又写入了重复行，重新去重后再试
+            if attempt == 2:
+                utils.logger.warning(f"[db_migration] {table_name}: add unique key on {key_field} failed: {e}")
+    return False
+
+
+async def _mysql_ensure_counter_columns(async_db_obj: AsyncMysqlDB, table_name: str, columns: List[str]) -> bool:
+    table_columns = await _mysql_columns(async_db_obj, table_name)
+    pending = [c for c in columns if c in table_columns and table_columns[c]["data_type"].lower() in ("varchar", "char", "text")]
+    if not pending:
+        return True
+    converted = await _normalize_counter_values(async_db_obj, table_name, pending)
+    modify_parts = []
+    comments = []
+    for column in pending:
+        info = table_columns[column]
+        null_str = "DEFAULT NULL" if info["is_nullable"] == "YES" else "NOT NULL DEFAULT 0"
+        modify_parts.append(f"MODIFY COLUMN `{column}` BIGINT {null_str} COMMENT %s")
+        comments.append(info["comment"] or "")
+    # 修改列类型需要重建表(COPY)，所有字段合并为一条 ALTER 只重建一次；期间允许读
+    try:
+        await async_db_obj.execute(
+            f"ALTER TABLE `{table_name}` {', '.join(modify_parts)}, LOCK=SHARED", *comments
+        )
+        utils.logger.info(f"[db_migration] {table_name}: converted {pending} to BIGINT ({converted} rows normalized)")
+        return True
+    except Exception as e:
+        utils.logger.warning(f"[db_migration] {table_name}: convert counter columns failed: {e}")
+        return False
+
+
+async def _mysql_ensure_analysis_indexes(async_db_obj: AsyncMysqlDB, table_name: str,
+                                         indexes: List[Tuple[str, Tuple[str, ...]]]) -> bool:
+    existing = await _mysql_indexes(async_db_obj, table_name)
+    table_columns = await _mysql_columns(async_db_obj, table_name)
+    success = True
+    for index_name, columns in indexes:
+        if index_name in existing or not all(c in table_columns for c in columns):
+            continue
+        try:
+            await async_db_obj.execute(
+                f"ALTER TABLE `{table_name}` ADD INDEX `{index_name}` ({','.join(f'`{c}`' for c in columns)}), "
+                f"ALGORITHM=INPLACE, LOCK=NONE"
+            )
+            utils.logger.info(f"[db_migration] {table_name}: added index {index_name}{columns}")
+        except Exception as e:
+            utils.logger.warning(f"[db_migration] {table_name}: add index {index_name} failed: {e}")
+            success = False
+    return success
+
+
+async def migrate_mysql_platform_tables() -> bool:
+    """
+    迁移 MySQL 平台数据表：去重后加自然键唯一索引、计数字段转 BIGINT、加关键词+发布时间组合索引
+    单张表迁移失败不影响其他表
+    :return: 是否全部迁移成功
+    """
+    async_db_obj: AsyncMysqlDB = media_crawler_db_var.get()
+    rows = await async_db_obj.query(
+        "SELECT table_name AS name FROM information_schema.tables WHERE table_schema = DATABASE()"
+    )
+    tables = {row["name"] for row in rows}
+    success = True
+    for table_name, key_field in NATURAL_KEYS.items():
+        if table_name in tables:
+            success &= await _mysql_ensure_natural_key(async_db_obj, table_name, key_field)
+    for table_name, columns in COUNTER_COLUMNS.items():
+        if table_name in tables:
+            success &= await _mysql_ensure_counter_columns(async_db_obj, table_name, columns)
+    for table_name, indexes in ANALYSIS_INDEXES.items():
+        if table_name in tables:
+            success &= await _mysql_ensure_analysis_indexes(async_db_obj, table_name, indexes)
+    return success
+
+
+# ==================== SQLite ====================
+
+async def _sqlite_indexes(async_db_obj: AsyncSqliteDB, table_name: str) -> Dict[str, Tuple[bool, List[str]]]:
+    indexes: Dict[str, Tuple[bool, List[str]]] = {}
+    for index in await async_db_obj.query(f"PRAGMA index_list({table_name})"):
+        columns = await async_db_obj.query(f"PRAGMA index_info({index['name']})")
+        indexes[index["name"]] = (bool(index["unique"]), [c["name"] for c in columns])
+    return indexes
+
+
+async def _sqlite_ensure_natural_key(async_db_obj: AsyncSqliteDB, table_name: str, key_field: str) -> None:
+    if await async_db_obj.has_unique_index(table_name, key_field):
+        return
+    indexes = await _sqlite_indexes(async_db_obj, table_name)
+    old_index = next((name for name, (unique, columns) in indexes.items()
+                      if not unique and columns == [key_field]), None)
+    index_name = old_index or f"uk_{table_name}_{key_field}"
+    async with async_db_obj.transaction():
+        deleted = await async_db_obj.execute(
+            f"DELETE FROM {table_name} WHERE id NOT IN (SELECT MAX(id) FROM {table_name} GROUP BY {key_field})"
+        )
+        if old_index:
+            await async_db_obj.execute(f"DROP INDEX {old_index}")
+        await async_db_obj.execute(f"CREATE UNIQUE INDEX {index_name} ON {table_name}({key_field})")
+    utils.logger.info(f"[db_migration] {table_name}: removed {deleted} duplicate rows, added unique index {index_name}({key_field})")
+
+
+async def _sqlite_ensure_counter_columns(async_db_obj: AsyncSqliteDB, table_name: str, columns: List[str]) -> None:
+    """
+    sqlite 不支持修改列类型，按新的列类型重建表：新建表 -> 复制数据 -> 删除旧表 -> 重命名 -> 重建索引
+    """
+    table_columns = {row["name"]: row for row in await async_db_obj.query(f"PRAGMA table_info({table_name})")}
+    pending = [c for c in columns if c in table_columns and table_columns[c]["type"].upper() != "INTEGER"]
+    if not pending:
+        return
+    converted = await _normalize_counter_values(async_db_obj, table_name, pending)
+    table_sql = (await async_db_obj.get_first(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", table_name
+    ))["sql"]
+    index_sqls = [row["sql"] for row in await async_db_obj.query(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", table_name
+    )]
+    tmp_table = f"{table_name}__migrating"
+    new_sql = re.sub(rf"^CREATE TABLE\s+[\"`]?{table_name}[\"`]?", f"CREATE TABLE {tmp_table}", table_sql, count=1)
+    for column in pending:
+        new_sql = re.sub(rf"(\b{column}\s+)TEXT(\s+NOT NULL)?(\s+DEFAULT\s+)'?(\w+)'?",
+                         lambda m: f"{m.group(1)}INTEGER{m.group(2) or ''}{m.group(3)}{m.group(4)}", new_sql)
+        new_sql = re.sub(rf"(\b{column}\s+)TEXT\b", r"\1INTEGER", new_sql)
+    # 上次迁移中断时可能留下临时表
+    await async_db_obj.execute(f"DROP TABLE IF EXISTS {tmp_table}")
+    async with async_db_obj.transaction():
+        await async_db_obj.execute(new_sql)
+        await async_db_obj.execute(f"INSERT INTO {tmp_table} SELECT * FROM {table_name}")
+        await async_db_obj.execute(f"DROP TABLE {table_name}")
+        await async_db_obj.execute(f"ALTER TABLE {tmp_table} RENAME TO {table_name}")
+        for index_sql in index_sqls:
+            await async_db_obj.execute(index_sql)
+    utils.logger.info(f"[db_migration] {table_name}: converted {pending} to INTEGER ({converted} rows normalized)")
+
+
+async def migrate_sqlite_platform_tables() -> None:
+    """
+    迁移 SQLite 平台数据表：去重后加自然键唯一索引、计数字段转 INTEGER、加关键词+发布时间组合索引
+    """
+    async_db_obj: AsyncSqliteDB = media_crawler_db_var.get()
+    rows = await async_db_obj.query("SELECT name FROM sqlite_master WHERE type = 'table'")
+    tables = {row["name"] for row in rows}
+    for table_name, columns in COUNTER_COLUMNS.items():
+        if table_name in tables:
+            await _sqlite_ensure_counter_columns(async_db_obj, table_name, columns)
+    for table_name, key_field in NATURAL_KEYS.items():
+        if table_name in tables:
+            await _sqlite_ensure_natural_key(async_db_obj, table_name, key_field)
+    for table_name, indexes in ANALYSIS_INDEXES.items():
+        if table_name not in tables:
+            continue
+        table_columns = {row["name"] for row in await async_db_obj.query(f"PRAGMA table_info({table_name})")}
+        for index_name, columns in indexes:
+            if all(c in table_columns for c in columns):
+                await async_db_obj.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}({','.join(columns)})")
+
+
+async def migrate_platform_tables(db_type: Optional[str] = None) -> bool:
+    """
+    按数据库类型执行平台数据表迁移，调用前需已初始化 media_crawler_db_var
+    :param db_type: sqlite 或 mysql，默认使用配置
+    :return: 是否全部迁移成功，失败时调用方可在下次启动时重试
+    """
+    db_type = db_type or config.SAVE_DATA_OPTION
+    try:
+        if db_type == "sqlite":
+            await migrate_sqlite_platform_tables()
+            return True
+        return await migrate_mysql_platform_tables()
+    except Exception as e:
+        utils.logger.error(f"[db_migration] migrate platform tables failed: {e}")
+        return False
+
+
+async def main():
+    import db
+
+    await db.init_db()
+    await migrate_platform_tables()
+    await db.close()
+
+
+if __name__ == '__main__':
+    asyncio.get_event_loop().run_until_complete(main())
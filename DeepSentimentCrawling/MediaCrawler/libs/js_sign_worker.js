@@ -0,0 +1,50 @@
+// 常驻 Node 签名进程，供 tools/sign_service.py 使用，仅供学习交流使用
+// 启动：node js_sign_worker.js <script.js>
+// 加载签名脚本后逐行读取 JSON 请求，按 id 返回结果：
+//   {"id": 1, "fn": "get_sign", "args": [...]}             -> {"id": 1, "result": ...}
+//   {"id": 2, "fn": "get_sign", "batch": [[...], [...]]}    -> {"id": 2, "results": [...]}
+//   出错时                                                  -> {"id": n, "error": "..."}
+
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+// 签名脚本里的 console 输出不能混进协议输出
+console.log = console.info = console.warn = console.debug = (...args) => process.stderr.write(args.join(' ') + '\n');
+
+globalThis.require = require;
+const source = fs.readFileSync(process.argv[2], 'utf-8').replace(/^\uFEFF/, '');
+vm.runInThisContext(source, {filename: process.argv[2]});
+
+function call(fn, args) {
+    const func = globalThis[fn];
+    if (typeof func !== 'function') {
+        throw new Error(`function ${fn} not found`);
+    }
+    return func.apply(null, args);
+}
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line.trim()) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        return;
+    }
+    let response;
+    try {
+        if (request.batch) {
+            response = {id: request.id, results: request.batch.map((args) => call(request.fn, args))};
+        } else {
+            response = {id: request.id, result: call(request.fn, request.args || [])};
+        }
+    } catch (e) {
+        response = {id: request.id, error: String(e && e.stack || e)};
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+rl.on('close', () => process.exit(0));
@@ -10,8 +10,9 @@
 
 
 import asyncio
+import importlib
 import sys
-from typing import Optional
+from typing import Dict, Optional, Type, Union
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -20,41 +21,58 @@ import cmd_arg
 import config
 import db
 from base.base_crawler import AbstractCrawler
+from cache.async_redis_cache import shutdown_all_redis_caches
 from cache.local_cache import shutdown_all_local_caches
-from media_platform.bilibili import BilibiliCrawler
-from media_platform.douyin import DouYinCrawler
-from media_platform.kuaishou import KuaishouCrawler
-from media_platform.tieba import TieBaCrawler
-from media_platform.weibo import WeiboCrawler
-from media_platform.xhs import XiaoHongShuCrawler
-from media_platform.zhihu import ZhihuCrawler
-from media_platform.xueqiu import XueqiuCrawler
-from media_platform.reddit import RedditCrawler
-from media_platform.youtube import YouTubeCrawler
+from proxy.proxy_ip_pool import shutdown_ip_pools
+from store.batch_writer import flush_all_batch_writers
+from store.jsonl_writer import close_all_jsonl_writers
+from tools.browser_pool import shutdown_browser_session_pool
+from tools.http_pool import shutdown_all_http_pools
+from tools.sign_service import shutdown_sign_service
+from tools.transcription_pool import drain_transcription_jobs, resume_transcription_jobs, shutdown_transcription_pool
 
 
 class CrawlerFactory:
-    CRAWLERS = {
-        "xhs": XiaoHongShuCrawler,
-        "dy": DouYinCrawler,
-        "ks": KuaishouCrawler,
-        "bili": BilibiliCrawler,
-        "wb": WeiboCrawler,
-        "tieba": TieBaCrawler,
-        "zhihu": ZhihuCrawler,
-        "xueqiu": XueqiuCrawler,
-        "reddit": RedditCrawler,
-        "yt": YouTubeCrawler,
+    # 平台 -> "模块:类名"，创建时才导入对应平台的模块，启动时不会加载其他平台的依赖
+    CRAWLERS: Dict[str, Union[str, Type[AbstractCrawler]]] = {
+        "xhs": "media_platform.xhs:XiaoHongShuCrawler",
+        "dy": "media_platform.douyin:DouYinCrawler",
+        "ks": "media_platform.kuaishou:KuaishouCrawler",
+        "bili": "media_platform.bilibili:BilibiliCrawler",
+        "wb": "media_platform.weibo:WeiboCrawler",
+        "tieba": "media_platform.tieba:TieBaCrawler",
+        "zhihu": "media_platform.zhihu:ZhihuCrawler",
+        "xueqiu": "media_platform.xueqiu:XueqiuCrawler",
+        "reddit": "media_platform.reddit:RedditCrawler",
+        "yt": "media_platform.youtube:YouTubeCrawler",
     }
 
     @staticmethod
-    def create_crawler(platform: str) -> AbstractCrawler:
+    def register(platform: str, crawler: Union[str, Type[AbstractCrawler]]) -> None:
+        """
+        注册平台爬虫
+        :param platform: 平台名
+        :param crawler: 爬虫类，或 "模块:类名" 形式的导入路径
+        :return:
+        """
+        CrawlerFactory.CRAWLERS[platform] = crawler
+
+    @staticmethod
+    def get_crawler_class(platform: str) -> Type[AbstractCrawler]:
         crawler_class = CrawlerFactory.CRAWLERS.get(platform)
         if not crawler_class:
             raise ValueError(
                 "Invalid Media Platform Currently only supported xhs or dy or ks or bili ..."
             )
-        return crawler_class()
+        if isinstance(crawler_class, str):
+            module_name, _, class_name = crawler_class.partition(":")
+            crawler_class = getattr(importlib.import_module(module_name), class_name)
+            CrawlerFactory.CRAWLERS[platform] = crawler_class
+        return crawler_class
+
+    @staticmethod
+    def create_crawler(platform: str) -> AbstractCrawler:
+        return CrawlerFactory.get_crawler_class(platform)()
 
 
 crawler: Optional[AbstractCrawler] = None
@@ -72,6 +90,7 @@ async def main():
         await db.init_db()
 
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
+    await resume_transcription_jobs(config.PLATFORM)
     await crawler.start()
 
 
@@ -81,15 +100,52 @@ async def async_cleanup() -> None:
             await crawler.close()
         except Exception:
             pass
+    try:
+        await drain_transcription_jobs()
+    except Exception:
+        pass
     if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
+        try:
+            await flush_all_batch_writers()
+        except Exception:
+            pass
         try:
             await db.close()
         except Exception:
             pass
+    if config.SAVE_DATA_OPTION == "json":
+        try:
+            await close_all_jsonl_writers()
+        except Exception:
+            pass
     try:
         await shutdown_all_local_caches()
     except Exception:
         pass
+    try:
+        await shutdown_all_redis_caches()
+    except Exception:
+        pass
+    try:
+        await shutdown_all_http_pools()
+    except Exception:
+        pass
+    try:
+        await shutdown_ip_pools()
+    except Exception:
+        pass
+    try:
+        await shutdown_browser_session_pool()
+    except Exception:
+        pass
+    try:
+        await shutdown_sign_service()
+    except Exception:
+        pass
+    try:
+        await shutdown_transcription_pool()
+    except Exception:
+        pass
 
 
 if __name__ == "__main__":
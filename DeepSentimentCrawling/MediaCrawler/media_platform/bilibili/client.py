@@ -12,7 +12,6 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 18:44
 # @Desc    : bilibili 请求客户端
-import asyncio
 import json
 import random
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
@@ -24,6 +23,7 @@ from playwright.async_api import BrowserContext, Page
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
 
 from .exception import DataFetchError
 from .field import CommentOrderType, SearchOrderType
@@ -31,6 +31,9 @@ from .help import BilibiliSign
 
 
 class BilibiliClient(AbstractApiClient):
+    platform = "bili"
+    # wbi 签名校验失败时返回的错误码，收到后重新获取 img_key/sub_key
+    WBI_SIGN_ERROR_CODES = (-352, -403)
 
     def __init__(
         self,
@@ -49,16 +52,25 @@ class BilibiliClient(AbstractApiClient):
         self.cookie_dict = cookie_dict
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        try:
+            response = await self.http_pool.request(method, url, proxy=self.proxy, timeout=self.timeout, **kwargs)
+        except httpx.TransportError:
+            # 网络错误/代理不可用，反馈给代理池
+            self.report_proxy(False)
+            raise
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             utils.logger.error(f"[BilibiliClient.request] Failed to decode JSON from response. status_code: {response.status_code}, response_text: {response.text}")
+            self.report_response(response, ok=False)
             raise DataFetchError(f"Failed to decode JSON, content: {response.text}")
         if data.get("code") != 0:
+            if data.get("code") in self.WBI_SIGN_ERROR_CODES:
+                self.session_params.invalidate("wbi_sign")
+            self.report_response(response, ok=False)
             raise DataFetchError(data.get("message", "unkonw error"))
         else:
+            self.report_response(response, ok=True)
             return data.get("data", {})
 
     async def pre_request_data(self, req_data: Dict) -> Dict:
@@ -71,8 +83,16 @@ class BilibiliClient(AbstractApiClient):
         """
         if not req_data:
             return {}
+        signer: BilibiliSign = await self.session_params.get("wbi_sign", self._load_wbi_signer)
+        return signer.sign(req_data)
+
+    async def _load_wbi_signer(self) -> BilibiliSign:
+        """
+        读取最新的 wbi key 并创建签名器（盐在创建时预先计算），结果由 session_params 缓存
+        :return:
+        """
         img_key, sub_key = await self.get_wbi_keys()
-        return BilibiliSign(img_key, sub_key).sign(req_data)
+        return BilibiliSign(img_key, sub_key)
 
     async def get_wbi_keys(self) -> Tuple[str, str]:
         """
@@ -129,6 +149,7 @@ class BilibiliClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.session_params.invalidate()
 
     async def search_video_by_keyword(
         self,
@@ -201,18 +222,17 @@ class BilibiliClient(AbstractApiClient):
         return await self.get(uri, params, enable_params_sign=True)
 
     async def get_video_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+        try:
+            response = await self.http_pool.request("GET", url, proxy=self.proxy, timeout=self.timeout, headers=self.headers)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[BilibiliClient.get_video_media] request {url} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[BilibiliClient.get_video_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def get_video_comments(
         self,
@@ -252,55 +272,57 @@ class BilibiliClient(AbstractApiClient):
         is_end = False
         next_page = 0
         max_retries = 3
-        while not is_end and len(result) < max_count:
-            comments_res = None
-            for attempt in range(max_retries):
-                try:
-                    comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
-                    break  # Success
-                except DataFetchError as e:
-                    if attempt < max_retries - 1:
-                        delay = 5 * (2**attempt) + random.uniform(0, 1)
-                        utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Retrying video_id {video_id} in {delay:.2f}s... (Attempt {attempt + 1}/{max_retries})")
-                        await asyncio.sleep(delay)
-                    else:
-                        utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e}")
-                        is_end = True
-                        break
-            if not comments_res:
-                break
-
-            cursor_info: Dict = comments_res.get("cursor")
-            if not cursor_info:
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Could not find 'cursor' in response for video_id: {video_id}. Skipping.")
-                break
-
-            comment_list: List[Dict] = comments_res.get("replies", [])
-
-            # 检查 is_end 和 next 是否存在
-            if "is_end" not in cursor_info or "next" not in cursor_info:
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' or 'next' not in cursor for video_id: {video_id}. Assuming end of comments.")
-                is_end = True
-            else:
-                is_end = cursor_info.get("is_end")
-                next_page = cursor_info.get("next")
-
-            if not isinstance(is_end, bool):
-                utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' is not a boolean for video_id: {video_id}. Assuming end of comments.")
-                is_end = True
-            if is_fetch_sub_comments:
-                for comment in comment_list:
-                    comment_id = comment['rpid']
-                    if (comment.get("rcount", 0) > 0):
-                        {await self.get_video_all_level_two_comments(video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval, callback)}
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
-                result.extend(comment_list)
-                continue
+        # 翻页请求与评论入库并行，子评论按一级评论并发抓取
+        async with CommentPipeline(callback) as pipeline:
+            while not is_end and len(result) < max_count:
+                comments_res = None
+                for attempt in range(max_retries):
+                    try:
+                        comments_res = await self.get_video_comments(video_id, CommentOrderType.DEFAULT, next_page)
+                        break  # Success
+                    except DataFetchError as e:
+                        if attempt < max_retries - 1:
+                            delay = 5 * (2**attempt) + random.uniform(0, 1)
+                            utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Retrying video_id {video_id} (Attempt {attempt + 1}/{max_retries}), err: {e}")
+                            # 开启自适应限速时 request() 已让限速器降速，否则按指数退避等待
+                            await self.crawl_sleep(delay)
+                        else:
+                            utils.logger.error(f"[BilibiliClient.get_video_all_comments] Max retries reached for video_id: {video_id}. Skipping comments. Error: {e}")
+                            is_end = True
+                            break
+                if not comments_res:
+                    break
+
+                cursor_info: Dict = comments_res.get("cursor")
+                if not cursor_info:
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] Could not find 'cursor' in response for video_id: {video_id}. Skipping.")
+                    break
+
+                comment_list: List[Dict] = comments_res.get("replies", [])
+
+                # 检查 is_end 和 next 是否存在
+                if "is_end" not in cursor_info or "next" not in cursor_info:
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' or 'next' not in cursor for video_id: {video_id}. Assuming end of comments.")
+                    is_end = True
+                else:
+                    is_end = cursor_info.get("is_end")
+                    next_page = cursor_info.get("next")
+
+                if not isinstance(is_end, bool):
+                    utils.logger.warning(f"[BilibiliClient.get_video_all_comments] 'is_end' is not a boolean for video_id: {video_id}. Assuming end of comments.")
+                    is_end = True
+                if is_fetch_sub_comments:
+                    for comment in comment_list:
+                        comment_id = comment['rpid']
+                        if (comment.get("rcount", 0) > 0):
+                            pipeline.spawn(self.get_video_all_level_two_comments(video_id, comment_id, CommentOrderType.DEFAULT, 10, crawl_interval, pipeline.put))
+                if len(result) + len(comment_list) > max_count:
+                    comment_list = comment_list[:max_count - len(result)]
+                await pipeline.put(video_id, comment_list)
+                await self.crawl_sleep(crawl_interval)
+                if not is_fetch_sub_comments:
+                    result.extend(comment_list)
+                    continue
         return result
 
     async def get_video_all_level_two_comments(
@@ -329,7 +351,7 @@ class BilibiliClient(AbstractApiClient):
             comment_list: List[Dict] = result.get("replies", [])
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(video_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
             if (int(result["page"]["count"]) <= pn * ps):
                 break
 
@@ -479,7 +501,7 @@ class BilibiliClient(AbstractApiClient):
                 fans_list = fans_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, fans_list)
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
             if not fans_list:
                 break
             result.extend(fans_list)
@@ -513,7 +535,7 @@ class BilibiliClient(AbstractApiClient):
                 followings_list = followings_list[:max_count - len(result)]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(creator_info, followings_list)
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
             if not followings_list:
                 break
             result.extend(followings_list)
@@ -548,6 +570,6 @@ class BilibiliClient(AbstractApiClient):
                 dynamics_list = dynamics_list[:max_count - len(result)]
             if callback:
                 await callback(creator_info, dynamics_list)
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
             result.extend(dynamics_list)
         return result
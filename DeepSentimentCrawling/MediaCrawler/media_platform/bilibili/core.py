@@ -19,14 +19,12 @@ import random
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-import pandas as pd
 
 from playwright.async_api import (
     BrowserContext,
     BrowserType,
     Page,
     Playwright,
-    async_playwright,
 )
 from playwright._impl._errors import TargetClosedError
 
@@ -34,9 +32,11 @@ import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import bilibili as bilibili_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import crawler_type_var
 
 from .client import BilibiliClient
 from .exception import DataFetchError
@@ -59,31 +59,14 @@ class BilibiliCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[BilibiliCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[BilibiliCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=config.HEADLESS)
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url)
-
+        async with self.browser_session_scope(self.setup_browser, playwright_proxy_format):
             # Create a client to interact with the xiaohongshu website.
             self.bili_client = await self.create_bilibili_client(httpx_proxy_format)
+            if config.ENABLE_IP_PROXY:
+                self.bili_client.use_ip_proxy(ip_proxy_pool, ip_proxy_info)
             if not await self.bili_client.pong():
                 login_obj = BilibiliLogin(
                     login_type=config.LOGIN_TYPE,
@@ -111,6 +94,32 @@ class BilibiliCrawler(AbstractCrawler):
                 pass
             utils.logger.info("[BilibiliCrawler.start] Bilibili Crawler finished ...")
 
+    async def setup_browser(self, playwright: Playwright, playwright_proxy_format: Optional[Dict]) -> None:
+        """
+        启动浏览器、注入反检测脚本并打开首页
+        :param playwright: playwright实例
+        :param playwright_proxy_format: playwright代理配置
+        :return:
+        """
+        # 根据配置选择启动模式
+        if config.ENABLE_CDP_MODE:
+            utils.logger.info("[BilibiliCrawler] 使用CDP模式启动浏览器")
+            self.browser_context = await self.launch_browser_with_cdp(
+                playwright,
+                playwright_proxy_format,
+                self.user_agent,
+                headless=config.CDP_HEADLESS,
+            )
+        else:
+            utils.logger.info("[BilibiliCrawler] 使用标准模式启动浏览器")
+            # Launch a browser context.
+            chromium = playwright.chromium
+            self.browser_context = await self.launch_browser(chromium, None, self.user_agent, headless=config.HEADLESS)
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        await self.browser_context.add_init_script(path="libs/stealth.min.js")
+        self.context_page = await self.browser_context.new_page()
+        await self.context_page.goto(self.index_url)
+
     async def search(self):
         """
         search bilibili video
@@ -167,11 +176,19 @@ class BilibiliCrawler(AbstractCrawler):
         bili_limit_count = 20  # bilibili limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < bili_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = bili_limit_count
+        await KeywordScheduler("bili").run(split_keywords(), self.search_keyword)
+
+    async def search_keyword(self, keyword: str):
+        """
+        search one keyword in normal mode, the next page is requested while the previous page's videos and comments are being fetched
+        :param keyword:
+        :return:
+        """
+        bili_limit_count = 20  # bilibili limit page fixed value
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
-            page = 1
+        utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Current search keyword: {keyword}")
+        page = 1
+        async with PagePipeline() as pipeline:
             while (page - start_page + 1) * bili_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] Skip page: {page}")
@@ -179,7 +196,6 @@ class BilibiliCrawler(AbstractCrawler):
                     continue
 
                 utils.logger.info(f"[BilibiliCrawler.search_by_keywords] search bilibili keyword: {keyword}, page: {page}")
-                video_id_list: List[str] = []
                 videos_res = await self.bili_client.search_video_by_keyword(
                     keyword=keyword,
                     page=page,
@@ -194,21 +210,30 @@ class BilibiliCrawler(AbstractCrawler):
                     utils.logger.info(f"[BilibiliCrawler.search_by_keywords] No more videos for '{keyword}', moving to next keyword.")
                     break
 
-                semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
-                task_list = []
-                try:
-                    task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
-                except Exception as e:
-                    utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
-                video_items = await asyncio.gather(*task_list)
-                for video_item in video_items:
-                    if video_item:
-                        video_id_list.append(video_item.get("View").get("aid"))
-                        await bilibili_store.update_bilibili_video(video_item)
-                        await bilibili_store.update_up_info(video_item)
-                        await self.get_bilibili_video(video_item, semaphore)
+                await pipeline.submit(self.process_search_page(video_list))
                 page += 1
-                await self.batch_get_video_comments(video_id_list)
+
+    async def process_search_page(self, video_list: List[Dict]):
+        """
+        get video detail, media and comments of one search result page
+        :param video_list:
+        :return:
+        """
+        video_id_list: List[str] = []
+        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        task_list = []
+        try:
+            task_list = [self.get_video_info_task(aid=video_item.get("aid"), bvid="", semaphore=semaphore) for video_item in video_list]
+        except Exception as e:
+            utils.logger.warning(f"[BilibiliCrawler.search_by_keywords] error in the task list. The video for this page will not be included. {e}")
+        video_items = await asyncio.gather(*task_list)
+        for video_item in video_items:
+            if video_item:
+                video_id_list.append(video_item.get("View").get("aid"))
+                await bilibili_store.update_bilibili_video(video_item)
+                await bilibili_store.update_up_info(video_item)
+                await self.get_bilibili_video(video_item, semaphore)
+        await self.batch_get_video_comments(video_id_list)
 
     async def search_by_keywords_in_time_range(self, daily_limit: bool):
         """
@@ -216,15 +241,22 @@ class BilibiliCrawler(AbstractCrawler):
         :param daily_limit: if True, strictly limit the number of notes per day and total.
         """
         utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Begin search with daily_limit={daily_limit}")
-        bili_limit_count = 20
-        start_page = config.START_PAGE
+        await KeywordScheduler("bili").run(
+            split_keywords(), lambda keyword: self.search_keyword_in_time_range(keyword, daily_limit)
+        )
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
-            total_notes_crawled_for_keyword = 0
+    async def search_keyword_in_time_range(self, keyword: str, daily_limit: bool):
+        """
+        Search one keyword in a given time range, comments are fetched in the background while searching the next page.
+        :param keyword:
+        :param daily_limit: if True, strictly limit the number of notes per day and total.
+        """
+        bili_limit_count = 20
+        utils.logger.info(f"[BilibiliCrawler.search_by_keywords_in_time_range] Current search keyword: {keyword}")
+        total_notes_crawled_for_keyword = 0
 
-            for day in pd.date_range(start=config.START_DAY, end=config.END_DAY, freq="D"):
+        async with PagePipeline() as pipeline:
+            for day in utils.iter_days(config.START_DAY, config.END_DAY):
                 if (daily_limit and total_notes_crawled_for_keyword >= config.CRAWLER_MAX_NOTES_COUNT):
                     utils.logger.info(f"[BilibiliCrawler.search] Reached CRAWLER_MAX_NOTES_COUNT limit for keyword '{keyword}', skipping remaining days.")
                     break
@@ -284,7 +316,7 @@ class BilibiliCrawler(AbstractCrawler):
                                 await self.get_bilibili_video(video_item, semaphore)
 
                         page += 1
-                        await self.batch_get_video_comments(video_id_list)
+                        await pipeline.submit(self.batch_get_video_comments(video_id_list))
 
                     except Exception as e:
                         utils.logger.error(f"[BilibiliCrawler.search] Error searching on {day.ctime()}: {e}")
@@ -318,7 +350,7 @@ class BilibiliCrawler(AbstractCrawler):
         async with semaphore:
             try:
                 utils.logger.info(f"[BilibiliCrawler.get_comments] begin get video_id: {video_id} comments ...")
-                await asyncio.sleep(random.uniform(0.5, 1.5))
+                await self.bili_client.crawl_sleep(random.uniform(0.5, 1.5))
                 await self.bili_client.get_video_all_comments(
                     video_id=video_id,
                     crawl_interval=random.random(),
@@ -341,18 +373,29 @@ class BilibiliCrawler(AbstractCrawler):
         """
         ps = 30
         pn = 1
-        while True:
-            result = await self.bili_client.get_creator_videos(creator_id, pn, ps)
-            video_bvids_list = [video["bvid"] for video in result["list"]["vlist"]]
-            await self.get_specified_videos(video_bvids_list)
-            if int(result["page"]["count"]) <= pn * ps:
-                break
-            await asyncio.sleep(random.random())
-            pn += 1
+        # 跳过已爬取的旧视频，遇到足够多旧视频后停止翻页
+        creator_index = await load_creator_index("bili", creator_id)
+        try:
+            while True:
+                result = await self.bili_client.get_creator_videos(creator_id, pn, ps)
+                vlist = creator_index.filter_page(
+                    result["list"]["vlist"], lambda video: video.get("bvid"), lambda video: video.get("created"),
+                    has_more=int(result["page"]["count"]) > pn * ps,
+                )
+                video_bvids_list = [video["bvid"] for video in vlist]
+                await self.get_specified_videos(video_bvids_list, creator_index=creator_index)
+                if creator_index.stopped or int(result["page"]["count"]) <= pn * ps:
+                    break
+                await asyncio.sleep(random.random())
+                pn += 1
+        finally:
+            await creator_index.save()
 
-    async def get_specified_videos(self, bvids_list: List[str]):
+    async def get_specified_videos(self, bvids_list: List[str], creator_index: Optional[CreatorCrawlIndex] = None):
         """
         get specified videos info
+        :param bvids_list:
+        :param creator_index: 创作者模式下保存成功后记录到增量爬取索引
         :return:
         """
         semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
@@ -367,6 +410,8 @@ class BilibiliCrawler(AbstractCrawler):
                     video_aids_list.append(video_aid)
                 await bilibili_store.update_bilibili_video(video_detail)
                 await bilibili_store.update_up_info(video_detail)
+                if creator_index:
+                    creator_index.record(video_item_view.get("bvid"), video_item_view.get("pubdate"))
                 await self.get_bilibili_video(video_detail, semaphore)
         await self.batch_get_video_comments(video_aids_list)
 
@@ -501,13 +546,12 @@ class BilibiliCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
+        # 释放 API 客户端的长连接池
+        if getattr(self, "bili_client", None) is not None:
+            utils.logger.info(f"[BilibiliCrawler.close] http pool stats: {self.bili_client.http_pool.stats()}")
+            await self.bili_client.close()
         try:
-            # 如果使用CDP模式，需要特殊处理
-            if self.cdp_manager:
-                await self.cdp_manager.cleanup()
-                self.cdp_manager = None
-            elif self.browser_context:
-                await self.browser_context.close()
+            await self.close_browser()
             utils.logger.info("[BilibiliCrawler.close] Browser context closed ...")
         except TargetClosedError:
             utils.logger.warning("[BilibiliCrawler.close] Browser context was already closed.")
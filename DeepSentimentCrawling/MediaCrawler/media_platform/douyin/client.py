@@ -8,17 +8,18 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
-import asyncio
 import copy
 import json
 import urllib.parse
-from typing import Any, Callable, Dict, Union, Optional
+from typing import Any, Callable, Dict, List, Union, Optional
 
 import httpx
 from playwright.async_api import BrowserContext
 
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
+from tools.media_downloader import MediaDownloadBlocked, download_to_file, write_bytes_to_file
 from var import request_keyword_var
 
 from .exception import *
@@ -27,6 +28,7 @@ from .help import *
 
 
 class DouYinClient(AbstractApiClient):
+    platform = "dy"
 
     def __init__(
         self,
@@ -55,8 +57,23 @@ class DouYinClient(AbstractApiClient):
         if not params:
             return
         headers = headers or self.headers
+        common_params = await self.session_params.get("common_params", self._load_common_params)
+        params.update(common_params)
+        query_string = urllib.parse.urlencode(params)
+
+        # 20240927 a-bogus更新（JS版本）
+        post_data = {}
+        if request_method == "POST":
+            post_data = params
+        a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
+        params["a_bogus"] = a_bogus
+
+    async def _load_common_params(self) -> Dict:
+        """
+        请求公共参数，webid 与 msToken 在一个会话内保持不变，结果由 session_params 缓存
+        """
         local_storage: Dict = await self.playwright_page.evaluate("() => window.localStorage")  # type: ignore
-        common_params = {
+        return {
             "device_platform": "webapp",
             "aid": "6383",
             "channel": "channel_pc_web",
@@ -84,26 +101,26 @@ class DouYinClient(AbstractApiClient):
             "webid": get_web_id(),
             "msToken": local_storage.get("xmst"),
         }
-        params.update(common_params)
-        query_string = urllib.parse.urlencode(params)
-
-        # 20240927 a-bogus更新（JS版本）
-        post_data = {}
-        if request_method == "POST":
-            post_data = params
-        a_bogus = await get_a_bogus(uri, query_string, post_data, headers["User-Agent"], self.playwright_page)
-        params["a_bogus"] = a_bogus
 
     async def request(self, method, url, **kwargs):
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        try:
+            response = await self.http_pool.request(method, url, proxy=self.proxy, timeout=self.timeout, **kwargs)
+        except httpx.TransportError:
+            # 网络错误/代理不可用，反馈给代理池
+            self.report_proxy(False)
+            raise
         try:
             if response.text == "" or response.text == "blocked":
                 utils.logger.error(f"request params incrr, response.text: {response.text}")
+                # 签名参数被拒，下次请求重新读取 webid/msToken
+                self.session_params.invalidate("common_params")
                 raise Exception("account blocked")
-            return response.json()
+            data = response.json()
         except Exception as e:
+            self.report_response(response, ok=False)
             raise DataFetchError(f"{e}, {response.text}")
+        self.report_response(response, ok=True)
+        return data
 
     async def get(self, uri: str, params: Optional[Dict] = None, headers: Optional[Dict] = None):
         """
@@ -130,6 +147,7 @@ class DouYinClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.session_params.invalidate()
 
     async def search_info_by_keyword(
         self,
@@ -235,43 +253,63 @@ class DouYinClient(AbstractApiClient):
         result = []
         comments_has_more = 1
         comments_cursor = 0
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
-            comments_has_more = comments_res.get("has_more", 0)
-            comments_cursor = comments_res.get("cursor", 0)
-            comments = comments_res.get("comments", [])
-            if not comments:
-                continue
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            result.extend(comments)
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(aweme_id, comments)
+        # 评论入库与翻页并行，同一页的子评论按一级评论并发抓取，抓完后计入 max_count 再翻下一页
+        async with CommentPipeline(callback) as pipeline:
+            while comments_has_more and len(result) + await pipeline.spawned_count() < max_count:
+                comments_res = await self.get_aweme_comments(aweme_id, comments_cursor)
+                comments_has_more = comments_res.get("has_more", 0)
+                comments_cursor = comments_res.get("cursor", 0)
+                comments = comments_res.get("comments", [])
+                if not comments:
+                    continue
+                if len(result) + len(comments) > max_count:
+                    comments = comments[:max_count - len(result)]
+                result.extend(comments)
+                await pipeline.put(aweme_id, comments)
+
+                await self.crawl_sleep(crawl_interval)
+                if not is_fetch_sub_comments:
+                    continue
+                # 获取二级评论
+                for comment in comments:
+                    if comment.get("reply_comment_total") > 0:
+                        pipeline.spawn(self.get_aweme_all_sub_comments(
+                            aweme_id, comment.get("cid"), crawl_interval, pipeline.put
+                        ))
+        for sub_comments in pipeline.spawned_results():
+            result.extend(sub_comments)
+        return result
+
+    async def get_aweme_all_sub_comments(
+        self,
+        aweme_id: str,
+        comment_id: str,
+        crawl_interval: float = 1.0,
+        callback: Optional[Callable] = None,
+    ) -> List[Dict]:
+        """
+        获取一条一级评论下的所有二级评论
+        :param aweme_id: 帖子ID
+        :param comment_id: 一级评论ID
+        :param crawl_interval: 抓取间隔
+        :param callback: 回调函数，用于处理抓取到的评论
+        :return: 二级评论列表
+        """
+        result = []
+        sub_comments_has_more = 1
+        sub_comments_cursor = 0
+        while sub_comments_has_more:
+            sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
+            sub_comments_has_more = sub_comments_res.get("has_more", 0)
+            sub_comments_cursor = sub_comments_res.get("cursor", 0)
+            sub_comments = sub_comments_res.get("comments", [])
 
-            await asyncio.sleep(crawl_interval)
-            if not is_fetch_sub_comments:
+            if not sub_comments:
                 continue
-            # 获取二级评论
-            for comment in comments:
-                reply_comment_total = comment.get("reply_comment_total")
-
-                if reply_comment_total > 0:
-                    comment_id = comment.get("cid")
-                    sub_comments_has_more = 1
-                    sub_comments_cursor = 0
-
-                    while sub_comments_has_more:
-                        sub_comments_res = await self.get_sub_comments(aweme_id, comment_id, sub_comments_cursor)
-                        sub_comments_has_more = sub_comments_res.get("has_more", 0)
-                        sub_comments_cursor = sub_comments_res.get("cursor", 0)
-                        sub_comments = sub_comments_res.get("comments", [])
-
-                        if not sub_comments:
-                            continue
-                        result.extend(sub_comments)
-                        if callback:  # 如果有回调函数，就执行回调函数
-                            await callback(aweme_id, sub_comments)
-                        await asyncio.sleep(crawl_interval)
+            result.extend(sub_comments)
+            if callback:  # 如果有回调函数，就执行回调函数
+                await callback(aweme_id, sub_comments)
+            await self.crawl_sleep(crawl_interval)
         return result
 
     async def get_user_info(self, sec_user_id: str):
@@ -311,9 +349,59 @@ class DouYinClient(AbstractApiClient):
             result.extend(aweme_list)
         return result
 
+    def _media_headers(self) -> Dict[str, str]:
+        """
+        直接下载媒体文件时复用浏览器的 Cookie / User-Agent
+        """
+        return {
+            "User-Agent": self.headers.get("User-Agent", ""),
+            "Cookie": self.headers.get("Cookie", ""),
+            "Referer": "https://www.douyin.com/",
+            "Accept": "*/*",
+        }
+
     async def get_aweme_media(self, url: str) -> Union[bytes, None]:
+        """
+        获取图片等小媒体文件：先通过连接池直接请求，被 WAF 拦截时回退到浏览器内下载
+        """
+        try:
+            response = await self.http_pool.request(
+                "GET", url, proxy=self.proxy, timeout=self.timeout, headers=self._media_headers(), follow_redirects=True
+            )
+            if response.status_code == 200 and not response.headers.get("content-type", "").startswith("text/html"):
+                return response.content
+            utils.logger.info(f"[DouYinClient.get_aweme_media] direct request blocked, status: {response.status_code}")
+        except httpx.HTTPError as e:
+            utils.logger.warning(f"[DouYinClient.get_aweme_media] direct request {url} failed: {e!r}")
         return await self._request_media_via_evaluate(url)
 
+    async def download_aweme_media(self, url: str, save_path: str) -> bool:
+        """
+        流式下载视频到磁盘，内存占用与视频大小无关，支持断点续传；
+        仅在被 WAF 拦截时回退到浏览器内下载
+        Args:
+            url: 媒体地址
+            save_path: 保存路径
+
+        Returns:
+            是否下载成功
+        """
+        try:
+            await download_to_file(
+                self.http_pool, url, save_path, headers=self._media_headers(), proxy=self.proxy, timeout=self.timeout
+            )
+            return True
+        except MediaDownloadBlocked as e:
+            utils.logger.info(f"[DouYinClient.download_aweme_media] direct download blocked ({e}), fallback to browser")
+        except Exception as e:
+            utils.logger.error(f"[DouYinClient.download_aweme_media] download {url} failed: {e!r}")
+            return False
+        content = await self._request_media_via_evaluate(url)
+        if content is None:
+            return False
+        await write_bytes_to_file(save_path, content)
+        return True
+
     async def _request_media_via_evaluate(self, url: str) -> Optional[bytes]:
         """
         Fetch media (video/image) using the browser context to bypass WAF/Login checks.
@@ -16,13 +16,11 @@ import time
 from asyncio import Task
 from typing import Any, Dict, List, Optional, Tuple
 
-import httpx
 from playwright.async_api import (
     BrowserContext,
     BrowserType,
     Page,
     Playwright,
-    async_playwright,
 )
 from playwright_stealth import Stealth
 
@@ -30,9 +28,11 @@ import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import douyin as douyin_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import crawler_type_var
 
 from .client import DouYinClient
 from .exception import DataFetchError
@@ -54,37 +54,13 @@ class DouYinCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[DouYinCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    None,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[DouYinCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium,
-                    playwright_proxy_format,
-                    user_agent=None,
-                    headless=config.HEADLESS,
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            # await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            stealth = Stealth()
-            await stealth.apply_stealth_async(self.browser_context)
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.index_url, timeout=120000)
-
+        async with self.browser_session_scope(self.setup_browser, playwright_proxy_format):
             self.dy_client = await self.create_douyin_client(httpx_proxy_format)
+            if config.ENABLE_IP_PROXY:
+                self.dy_client.use_ip_proxy(ip_proxy_pool, ip_proxy_info)
             if not await self.dy_client.pong(browser_context=self.browser_context):
                 login_obj = DouYinLogin(
                     login_type=config.LOGIN_TYPE,
@@ -108,18 +84,57 @@ class DouYinCrawler(AbstractCrawler):
 
             utils.logger.info("[DouYinCrawler.start] Douyin Crawler finished ...")
 
+    async def setup_browser(self, playwright: Playwright, playwright_proxy_format: Optional[Dict]) -> None:
+        """
+        启动浏览器、注入反检测脚本并打开首页
+        :param playwright: playwright实例
+        :param playwright_proxy_format: playwright代理配置
+        :return:
+        """
+        # 根据配置选择启动模式
+        if config.ENABLE_CDP_MODE:
+            utils.logger.info("[DouYinCrawler] 使用CDP模式启动浏览器")
+            self.browser_context = await self.launch_browser_with_cdp(
+                playwright,
+                playwright_proxy_format,
+                None,
+                headless=config.CDP_HEADLESS,
+            )
+        else:
+            utils.logger.info("[DouYinCrawler] 使用标准模式启动浏览器")
+            # Launch a browser context.
+            chromium = playwright.chromium
+            self.browser_context = await self.launch_browser(
+                chromium,
+                playwright_proxy_format,
+                user_agent=None,
+                headless=config.HEADLESS,
+            )
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        # await self.browser_context.add_init_script(path="libs/stealth.min.js")
+        stealth = Stealth()
+        await stealth.apply_stealth_async(self.browser_context)
+        self.context_page = await self.browser_context.new_page()
+        await self.context_page.goto(self.index_url, timeout=120000)
+
     async def search(self) -> None:
         utils.logger.info("[DouYinCrawler.search] Begin search douyin keywords")
         dy_limit_count = 10  # douyin limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < dy_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = dy_limit_count
+        await KeywordScheduler("dy").run(split_keywords(), self.search_keyword)
+
+    async def search_keyword(self, keyword: str) -> None:
+        """
+        搜索单个关键词：翻页请求与上一页的视频存储/评论抓取并行
+        """
+        dy_limit_count = 10  # douyin limit page fixed value
         start_page = config.START_PAGE  # start page number
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
-            aweme_list: List[str] = []
-            page = 0
-            dy_search_id = ""
+        utils.logger.info(f"[DouYinCrawler.search] Current keyword: {keyword}")
+        aweme_list: List[str] = []
+        page = 0
+        dy_search_id = ""
+        async with PagePipeline() as pipeline:
             while (page - start_page + 1) * dy_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[DouYinCrawler.search] Skip {page}")
@@ -145,16 +160,25 @@ class DouYinCrawler(AbstractCrawler):
                     utils.logger.error(f"[DouYinCrawler.search] search douyin keyword: {keyword} failed，账号也许被风控了。")
                     break
                 dy_search_id = posts_res.get("extra", {}).get("logid", "")
+                aweme_infos: List[Dict] = []
                 for post_item in posts_res.get("data"):
                     try:
                         aweme_info: Dict = (post_item.get("aweme_info") or post_item.get("aweme_mix_info", {}).get("mix_items")[0])
                     except TypeError:
                         continue
-                    aweme_list.append(aweme_info.get("aweme_id", ""))
-                    await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
-                    await self.get_aweme_media(aweme_item=aweme_info)
-            utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
-            await self.batch_get_note_comments(aweme_list)
+                    aweme_infos.append(aweme_info)
+                aweme_list.extend(aweme_info.get("aweme_id", "") for aweme_info in aweme_infos)
+                await pipeline.submit(self.process_search_page(aweme_infos))
+        utils.logger.info(f"[DouYinCrawler.search] keyword:{keyword}, aweme_list:{aweme_list}")
+
+    async def process_search_page(self, aweme_infos: List[Dict]) -> None:
+        """
+        存储一页搜索结果并抓取其媒体与评论
+        """
+        for aweme_info in aweme_infos:
+            await douyin_store.update_douyin_aweme(aweme_item=aweme_info)
+            await self.get_aweme_media(aweme_item=aweme_info)
+        await self.batch_get_note_comments([aweme_info.get("aweme_id", "") for aweme_info in aweme_infos])
 
     async def get_specified_awemes(self):
         """Get the information and comments of the specified post"""
@@ -238,57 +262,40 @@ class DouYinCrawler(AbstractCrawler):
                     await self.fetch_one_video_from_creator_page(creator_page_url=creator)
                     continue
 
+            creator_index = await load_creator_index("dy", sec_user_id)
             try:
                 creator_info: Dict = await self.dy_client.get_user_info(sec_user_id)
                 if creator_info:
                     await douyin_store.save_creator(sec_user_id, creator=creator_info)
 
-                # Get latest videos with one-by-one duplicate checking
+                # Get new (and recently published) videos, stop after several already crawled videos (pinned videos come first)
                 max_count = int(config.CRAWLER_MAX_NOTES_COUNT or 10)
                 aweme_list: List[Dict] = []
                 max_cursor = ""
-                stop_crawling = False
-                
-                while len(aweme_list) < max_count and not stop_crawling:
+
+                while len(aweme_list) < max_count:
                     aweme_post_res = await self.dy_client.get_user_aweme_posts(sec_user_id, max_cursor=max_cursor)
                     batch = aweme_post_res.get("aweme_list", [])
                     if not batch:
                         break
-                    
-                    # Check duplicates one by one for immediate early stopping
-                    for video in batch:
-                        aweme_id = video.get('aweme_id')
-                        if not aweme_id:
-                            continue
-                        
-                        # Check if this single video exists in DB
-                        existing = await douyin_store.get_existing_aweme_ids([aweme_id])
-                        
-                        if existing:
-                            # Found a duplicate! Stop immediately
-                            utils.logger.info(f"[DouYinCrawler] Encountered existing video {aweme_id} in DB. Stopping for creator {sec_user_id}")
-                            stop_crawling = True
-                            break
-                        
-                        # New video, add to list
-                        aweme_list.append(video)
-                        utils.logger.info(f"[DouYinCrawler] Found new video {aweme_id} ({len(aweme_list)}/{max_count})")
-                        
-                        if len(aweme_list) >= max_count:
-                            stop_crawling = True
-                            break
-                    
-                    if stop_crawling:
-                        break
-                        
-                    # Continue to next page if needed
-                    if not aweme_post_res.get("has_more"):
+
+                    # 第一次使用增量索引时，内容表中已有的视频视为已爬取
+                    await creator_index.seed_existing(
+                        [video.get("aweme_id") for video in batch], douyin_store.get_existing_aweme_ids
+                    )
+                    batch = creator_index.filter_page(
+                        batch, lambda video: video.get("aweme_id"), lambda video: video.get("create_time"),
+                        has_more=bool(aweme_post_res.get("has_more")),
+                    )
+                    aweme_list.extend(video for video in batch[:max_count - len(aweme_list)] if video.get("aweme_id"))
+
+                    if creator_index.stopped or not aweme_post_res.get("has_more"):
                         break
                     max_cursor = aweme_post_res.get("max_cursor", "")
-                
+
                 if aweme_list:
-                    utils.logger.info(f"[DouYinCrawler] Processing {len(aweme_list)} new videos for creator {sec_user_id}")
-                    await self.fetch_creator_video_detail(aweme_list)
+                    utils.logger.info(f"[DouYinCrawler] Processing {len(aweme_list)} new/recent videos for creator {sec_user_id}")
+                    await self.fetch_creator_video_detail(aweme_list, creator_index=creator_index)
                 else:
                     utils.logger.info(f"[DouYinCrawler] No new videos found for creator {sec_user_id}")
 
@@ -299,31 +306,34 @@ class DouYinCrawler(AbstractCrawler):
                     f"fallback to browser extraction. err={ex}"
                 )
                 await self.fetch_one_video_from_creator_page(creator_page_url=f"{self.index_url}/user/{sec_user_id}")
+            finally:
+                await creator_index.save()
 
     async def _resolve_url_to_sec_uid(self, url: str) -> Optional[str]:
         """
         Resolve a Douyin short link or profile URL to a sec_user_id.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                res = await client.get(url, follow_redirects=True, headers={"User-Agent": utils.get_mobile_user_agent()})
-                long_url = str(res.url)
-                
-                # Check for user profile sec_uid in URL params
-                # Example: ...?sec_uid=MS4wLjABAAAA...
-                match = re.search(r'sec_uid=([A-Za-z0-9_-]+)', long_url)
-                if match:
-                    return match.group(1)
-                
-                # Check if it's a video link, maybe we can get author ID?
-                # Usually video links don't have sec_uid in URL, but the page content does.
-                # For now, only support profile links that have sec_uid in URL.
-                return None
+            res = await self.dy_client.http_pool.request(
+                "GET", url, follow_redirects=True, headers={"User-Agent": utils.get_mobile_user_agent()}
+            )
+            long_url = str(res.url)
+
+            # Check for user profile sec_uid in URL params
+            # Example: ...?sec_uid=MS4wLjABAAAA...
+            match = re.search(r'sec_uid=([A-Za-z0-9_-]+)', long_url)
+            if match:
+                return match.group(1)
+
+            # Check if it's a video link, maybe we can get author ID?
+            # Usually video links don't have sec_uid in URL, but the page content does.
+            # For now, only support profile links that have sec_uid in URL.
+            return None
         except Exception as e:
             utils.logger.error(f"[DouYinCrawler] Error resolving URL {url}: {e}")
             return None
 
-    async def fetch_creator_video_detail(self, video_list: List[Dict]):
+    async def fetch_creator_video_detail(self, video_list: List[Dict], creator_index: Optional[CreatorCrawlIndex] = None):
         """
         Concurrently obtain the specified post list and save the data
         """
@@ -334,6 +344,8 @@ class DouYinCrawler(AbstractCrawler):
         for aweme_item in note_details:
             if aweme_item is not None:
                 await douyin_store.update_douyin_aweme(aweme_item=aweme_item)
+                if creator_index:
+                    creator_index.record(aweme_item.get("aweme_id"), aweme_item.get("create_time"))
                 await self.get_aweme_media(aweme_item=aweme_item)
 
     async def fetch_one_video_from_creator_page(self, creator_page_url: str) -> None:
@@ -581,12 +593,11 @@ class DouYinCrawler(AbstractCrawler):
 
     async def close(self) -> None:
         """Close browser context"""
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
+        # 释放 API 客户端的长连接池
+        if getattr(self, "dy_client", None) is not None:
+            utils.logger.info(f"[DouYinCrawler.close] http pool stats: {self.dy_client.http_pool.stats()}")
+            await self.dy_client.close()
+        await self.close_browser()
         utils.logger.info("[DouYinCrawler.close] Browser context closed ...")
 
     async def get_aweme_media(self, aweme_item: Dict):
@@ -652,10 +663,10 @@ class DouYinCrawler(AbstractCrawler):
 
         if not video_download_url:
             return
-        content = await self.dy_client.get_aweme_media(video_download_url)
+        title = aweme_item.get("desc", "")
+        save_file_name = douyin_store.get_dy_aweme_video_path(aweme_id, title)
+        downloaded = await self.dy_client.download_aweme_media(video_download_url, save_file_name)
         await asyncio.sleep(random.random())
-        if content is None:
+        if not downloaded:
             return
-        extension_file_name = f"video.mp4"
-        title = aweme_item.get("desc", "")
-        await douyin_store.update_dy_aweme_video(aweme_id, content, extension_file_name, title)
+        await douyin_store.update_dy_aweme_video_file(aweme_id, save_file_name)
@@ -18,9 +18,10 @@
 import random
 from pathlib import Path
 
-import execjs
 from playwright.async_api import Page
 
+from tools.sign_service import get_sign_service
+
 def _find_repo_file(relative_path: str) -> Path:
     """
     Resolve repo-relative files (like `libs/douyin.js`) regardless of current working directory.
@@ -35,7 +36,19 @@ def _find_repo_file(relative_path: str) -> Path:
 
 
 _DOUYIN_JS_PATH = _find_repo_file("libs/douyin.js")
-douyin_sign_obj = execjs.compile(_DOUYIN_JS_PATH.read_text(encoding="utf-8-sig"))
+_douyin_sign_obj = None
+
+
+def get_douyin_sign_obj():
+    """
+    同步调用 douyin.js 的 execjs 运行时，第一次使用时才编译
+    """
+    global _douyin_sign_obj
+    if _douyin_sign_obj is None:
+        import execjs
+        _douyin_sign_obj = execjs.compile(_DOUYIN_JS_PATH.read_text(encoding="utf-8-sig"))
+    return _douyin_sign_obj
+
 
 def get_web_id():
     """
@@ -62,8 +75,10 @@ def get_web_id():
 async def get_a_bogus(url: str, params: str, post_data: dict, user_agent: str, page: Page = None):
     """
     获取 a_bogus 参数, 目前不支持post请求类型的签名
+    签名在常驻的 JS 运行时中执行，不阻塞事件循环
     """
-    return get_a_bogus_from_js(url, params, user_agent)
+    sign_js_name = "sign_reply" if "/reply" in url else "sign_datail"
+    return await get_sign_service().sign(f"douyin.{sign_js_name}", params, user_agent)
 
 def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     """
@@ -79,7 +94,7 @@ def get_a_bogus_from_js(url: str, params: str, user_agent: str):
     sign_js_name = "sign_datail"
     if "/reply" in url:
         sign_js_name = "sign_reply"
-    return douyin_sign_obj.call(sign_js_name, params, user_agent)
+    return get_douyin_sign_obj().call(sign_js_name, params, user_agent)
 
 
 
@@ -10,7 +10,6 @@
 
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional
 from urllib.parse import urlencode
@@ -21,12 +20,15 @@ from playwright.async_api import BrowserContext, Page
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
 
 from .exception import DataFetchError
 from .graphql import KuaiShouGraphQL
 
 
 class KuaiShouClient(AbstractApiClient):
+    platform = "ks"
+
     def __init__(
         self,
         timeout=10,
@@ -45,12 +47,22 @@ class KuaiShouClient(AbstractApiClient):
         self.graphql = KuaiShouGraphQL()
 
     async def request(self, method, url, **kwargs) -> Any:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
-        data: Dict = response.json()
+        try:
+            response = await self.http_pool.request(method, url, proxy=self.proxy, timeout=self.timeout, **kwargs)
+        except httpx.TransportError:
+            # 网络错误/代理不可用，反馈给代理池
+            self.report_proxy(False)
+            raise
+        try:
+            data: Dict = response.json()
+        except json.JSONDecodeError:
+            self.report_response(response, ok=False)
+            raise DataFetchError(f"json decode error, res:{response.text}")
         if data.get("errors"):
+            self.report_response(response, ok=False)
             raise DataFetchError(data.get("errors", "unkonw error"))
         else:
+            self.report_response(response, ok=True)
             return data.get("data", {})
 
     async def get(self, uri: str, params=None) -> Dict:
@@ -196,20 +208,25 @@ class KuaiShouClient(AbstractApiClient):
         result = []
         pcursor = ""
 
-        while pcursor != "no_more" and len(result) < max_count:
-            comments_res = await self.get_video_comments(photo_id, pcursor)
-            vision_commen_list = comments_res.get("visionCommentList", {})
-            pcursor = vision_commen_list.get("pcursor", "")
-            comments = vision_commen_list.get("rootComments", [])
-            if len(result) + len(comments) > max_count:
-                comments = comments[: max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(photo_id, comments)
-            result.extend(comments)
-            await asyncio.sleep(crawl_interval)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments, photo_id, crawl_interval, callback
-            )
+        # 评论入库与翻页并行，同一页的子评论按一级评论并发抓取，抓完后计入 max_count 再翻下一页
+        async with CommentPipeline(callback) as pipeline:
+            while pcursor != "no_more" and len(result) + await pipeline.spawned_count() < max_count:
+                comments_res = await self.get_video_comments(photo_id, pcursor)
+                vision_commen_list = comments_res.get("visionCommentList", {})
+                pcursor = vision_commen_list.get("pcursor", "")
+                comments = vision_commen_list.get("rootComments", [])
+                if len(result) + len(comments) > max_count:
+                    comments = comments[: max_count - len(result)]
+                await pipeline.put(photo_id, comments)
+                result.extend(comments)
+                await self.crawl_sleep(crawl_interval)
+                if not config.ENABLE_GET_SUB_COMMENTS:
+                    continue
+                for comment in comments:
+                    pipeline.spawn(self.get_comments_all_sub_comments(
+                        [comment], photo_id, crawl_interval, pipeline.put
+                    ))
+        for sub_comments in pipeline.spawned_results():
             result.extend(sub_comments)
         return result
 
@@ -259,7 +276,7 @@ class KuaiShouClient(AbstractApiClient):
                 comments = vision_sub_comment_list.get("subComments", {})
                 if callback:
                     await callback(photo_id, comments)
-                await asyncio.sleep(crawl_interval)
+                await self.crawl_sleep(crawl_interval)
                 result.extend(comments)
         return result
 
@@ -277,6 +294,8 @@ class KuaiShouClient(AbstractApiClient):
         user_id: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        page_filter: Optional[Callable[..., List]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
@@ -284,6 +303,8 @@ class KuaiShouClient(AbstractApiClient):
             user_id: 用户ID
             crawl_interval: 爬取一次的延迟单位（秒）
             callback: 一次分页爬取结束后的更新回调函数
+            page_filter: 过滤每页视频的函数 page_filter(videos, has_more=...)，增量爬取时跳过已爬取的旧视频
+            should_stop: 返回 True 时停止翻页（增量爬取遇到足够多旧视频）
         Returns:
 
         """
@@ -305,9 +326,13 @@ class KuaiShouClient(AbstractApiClient):
             utils.logger.info(
                 f"[KuaiShouClient.get_all_videos_by_creator] got user_id:{user_id} videos len : {len(videos)}"
             )
+            if page_filter:
+                videos = page_filter(videos, has_more=pcursor != "no_more")
 
             if callback:
                 await callback(videos)
-            await asyncio.sleep(crawl_interval)
             result.extend(videos)
+            if should_stop and should_stop():
+                break
+            await self.crawl_sleep(crawl_interval)
         return result
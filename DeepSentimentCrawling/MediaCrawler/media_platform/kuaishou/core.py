@@ -10,9 +10,9 @@
 
 
 import asyncio
+import functools
 import os
 import random
-import time
 from asyncio import Task
 from typing import Dict, List, Optional, Tuple
 
@@ -21,16 +21,17 @@ from playwright.async_api import (
     BrowserType,
     Page,
     Playwright,
-    async_playwright,
 )
 
 import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import kuaishou as kuaishou_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import comment_tasks_var, crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import comment_tasks_var, crawler_type_var
 
 from .client import KuaiShouClient
 from .exception import DataFetchError
@@ -54,35 +55,16 @@ class KuaishouCrawler(AbstractCrawler):
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(
                 ip_proxy_info
             )
 
-        async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[KuaishouCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[KuaishouCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
-                )
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(f"{self.index_url}?isHome=1")
-
+        async with self.browser_session_scope(self.setup_browser, playwright_proxy_format):
             # Create a client to interact with the kuaishou website.
             self.ks_client = await self.create_ks_client(httpx_proxy_format)
+            if config.ENABLE_IP_PROXY:
+                self.ks_client.use_ip_proxy(ip_proxy_pool, ip_proxy_info)
             if not await self.ks_client.pong():
                 login_obj = KuaishouLogin(
                     login_type=config.LOGIN_TYPE,
@@ -111,19 +93,55 @@ class KuaishouCrawler(AbstractCrawler):
 
             utils.logger.info("[KuaishouCrawler.start] Kuaishou Crawler finished ...")
 
+    async def setup_browser(self, playwright: Playwright, playwright_proxy_format: Optional[Dict]) -> None:
+        """
+        启动浏览器、注入反检测脚本并打开首页
+        :param playwright: playwright实例
+        :param playwright_proxy_format: playwright代理配置
+        :return:
+        """
+        # 根据配置选择启动模式
+        if config.ENABLE_CDP_MODE:
+            utils.logger.info("[KuaishouCrawler] 使用CDP模式启动浏览器")
+            self.browser_context = await self.launch_browser_with_cdp(
+                playwright,
+                playwright_proxy_format,
+                self.user_agent,
+                headless=config.CDP_HEADLESS,
+            )
+        else:
+            utils.logger.info("[KuaishouCrawler] 使用标准模式启动浏览器")
+            # Launch a browser context.
+            chromium = playwright.chromium
+            self.browser_context = await self.launch_browser(
+                chromium, None, self.user_agent, headless=config.HEADLESS
+            )
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        await self.browser_context.add_init_script(path="libs/stealth.min.js")
+        self.context_page = await self.browser_context.new_page()
+        await self.context_page.goto(f"{self.index_url}?isHome=1")
+
     async def search(self):
         utils.logger.info("[KuaishouCrawler.search] Begin search kuaishou keywords")
         ks_limit_count = 20  # kuaishou limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < ks_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = ks_limit_count
+        await KeywordScheduler("ks").run(split_keywords(), self.search_keyword)
+
+    async def search_keyword(self, keyword: str):
+        """
+        search one keyword, the next page is requested while the previous page's comments are being fetched
+        :param keyword:
+        :return:
+        """
+        ks_limit_count = 20  # kuaishou limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            search_session_id = ""
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[KuaishouCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
+        search_session_id = ""
+        utils.logger.info(
+            f"[KuaishouCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        async with PagePipeline() as pipeline:
             while (
                 page - start_page + 1
             ) * ks_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -159,7 +177,7 @@ class KuaishouCrawler(AbstractCrawler):
 
                 # batch fetch video comments
                 page += 1
-                await self.batch_get_video_comments(video_id_list)
+                await pipeline.submit(self.batch_get_video_comments(video_id_list))
 
     async def get_specified_videos(self):
         """Get the information and comments of the specified post"""
@@ -248,12 +266,18 @@ class KuaishouCrawler(AbstractCrawler):
                 utils.logger.error(
                     f"[KuaishouCrawler.get_comments] may be been blocked, err:{e}"
                 )
-                # use time.sleeep block main coroutine instead of asyncio.sleep and cacel running comment task
-                # maybe kuaishou block our request, we will take a nap and update the cookie again
-                current_running_tasks = comment_tasks_var.get()
-                for task in current_running_tasks:
-                    task.cancel()
-                time.sleep(20)
+                # maybe kuaishou block our request: cancel the other running comment tasks,
+                # cool down without blocking the event loop, then update the cookie again
+                rate_limiter = self.ks_client.rate_limiter
+                current_task = asyncio.current_task()
+                for task in comment_tasks_var.get():
+                    if task is not current_task:
+                        task.cancel()
+                if rate_limiter is not None:
+                    rate_limiter.on_block()
+                    await rate_limiter.acquire()
+                else:
+                    await asyncio.sleep(config.RATE_LIMIT_BLOCK_COOLDOWN)
                 await self.context_page.goto(f"{self.index_url}?isHome=1")
                 await self.ks_client.update_cookies(
                     browser_context=self.browser_context
@@ -358,19 +382,29 @@ class KuaishouCrawler(AbstractCrawler):
             if createor_info:
                 await kuaishou_store.save_creator(user_id, creator=createor_info)
 
-            # Get all video information of the creator
-            all_video_list = await self.ks_client.get_all_videos_by_creator(
-                user_id=user_id,
-                crawl_interval=random.random(),
-                callback=self.fetch_creator_video_detail,
-            )
+            # Get new (and recently published) videos of the creator, stop at already crawled videos
+            creator_index = await load_creator_index("ks", user_id)
+            try:
+                all_video_list = await self.ks_client.get_all_videos_by_creator(
+                    user_id=user_id,
+                    crawl_interval=random.random(),
+                    callback=functools.partial(self.fetch_creator_video_detail, creator_index=creator_index),
+                    page_filter=functools.partial(
+                        creator_index.filter_page,
+                        get_id=lambda video: video.get("photo", {}).get("id"),
+                        get_time=lambda video: video.get("photo", {}).get("timestamp"),
+                    ),
+                    should_stop=lambda: creator_index.stopped,
+                )
+            finally:
+                await creator_index.save()
 
             video_ids = [
                 video_item.get("photo", {}).get("id") for video_item in all_video_list
             ]
             await self.batch_get_video_comments(video_ids)
 
-    async def fetch_creator_video_detail(self, video_list: List[Dict]):
+    async def fetch_creator_video_detail(self, video_list: List[Dict], creator_index: Optional[CreatorCrawlIndex] = None):
         """
         Concurrently obtain the specified post list and save the data
         """
@@ -384,13 +418,15 @@ class KuaishouCrawler(AbstractCrawler):
         for video_detail in video_details:
             if video_detail is not None:
                 await kuaishou_store.update_kuaishou_video(video_detail)
+                if creator_index:
+                    photo_info = video_detail.get("photo", {})
+                    creator_index.record(photo_info.get("id"), photo_info.get("timestamp"))
 
     async def close(self):
         """Close browser context"""
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
+        # 释放 API 客户端的长连接池
+        if getattr(self, "ks_client", None) is not None:
+            utils.logger.info(f"[KuaishouCrawler.close] http pool stats: {self.ks_client.http_pool.stats()}")
+            await self.ks_client.close()
+        await self.close_browser()
         utils.logger.info("[KuaishouCrawler.close] Browser context closed ...")
@@ -22,20 +22,24 @@ from base.base_crawler import AbstractApiClient
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import ProxyIpPool
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
 
 from .field import SearchNoteType, SearchSortType
 from .help import TieBaExtractor
 
 
 class BaiduTieBaClient(AbstractApiClient):
+    platform = "tieba"
 
     def __init__(
         self,
         timeout=10,
         ip_pool=None,
         default_ip_proxy=None,
+        proxy_lease_key: str = "",
     ):
         self.ip_pool: Optional[ProxyIpPool] = ip_pool
+        self.proxy_lease_key = proxy_lease_key
         self.timeout = timeout
         self.headers = {
             "User-Agent": utils.get_user_agent(),
@@ -60,12 +64,12 @@ class BaiduTieBaClient(AbstractApiClient):
 
         """
         actual_proxy = proxy if proxy else self.default_ip_proxy
-        async with httpx.AsyncClient(proxy=actual_proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, headers=self.headers, **kwargs)
+        response = await self.http_pool.request(method, url, proxy=actual_proxy, timeout=self.timeout, headers=self.headers, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
             utils.logger.error(f"Request failed, response: {response.text}")
+            self.report_response(response, ok=False, proxy=actual_proxy)
             raise Exception(f"Request failed, method: {method}, url: {url}, status code: {response.status_code}")
 
         if response.text == "" or response.text == "blocked":
@@ -73,9 +77,16 @@ class BaiduTieBaClient(AbstractApiClient):
             raise Exception("account blocked")
 
         if return_ori_content:
+            self.report_response(response, ok=True, proxy=actual_proxy)
             return response.text
 
-        return response.json()
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            self.report_response(response, ok=False, proxy=actual_proxy)
+            raise
+        self.report_response(response, ok=True, proxy=actual_proxy)
+        return data
 
     async def get(self, uri: str, params=None, return_ori_content=False, **kwargs) -> Any:
         """
@@ -97,7 +108,8 @@ class BaiduTieBaClient(AbstractApiClient):
             return res
         except RetryError as e:
             if self.ip_pool:
-                proxie_model = await self.ip_pool.get_proxy()
+                # 当前代理被封，记一次失败并换一个评分最高的代理
+                proxie_model = await self.ip_pool.get_proxy(lease_key=self.proxy_lease_key, rotate=True)
                 _, proxy = utils.format_proxy_info(proxie_model)
                 res = await self.request(method="GET", url=f"{self._host}{final_uri}", return_ori_content=return_ori_content, proxy=proxy, **kwargs)
                 self.default_ip_proxy = proxy
@@ -215,23 +227,27 @@ class BaiduTieBaClient(AbstractApiClient):
         uri = f"/p/{note_detail.note_id}"
         result: List[TiebaComment] = []
         current_page = 1
-        while note_detail.total_replay_page >= current_page and len(result) < max_count:
-            params = {
-                "pn": current_page,
-            }
-            page_content = await self.get(uri, params=params, return_ori_content=True)
-            comments = self._page_extractor.extract_tieba_note_parment_comments(page_content, note_id=note_detail.note_id)
-            if not comments:
-                break
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            if callback:
-                await callback(note_detail.note_id, comments)
-            result.extend(comments)
-            # 获取所有子评论
-            await self.get_comments_all_sub_comments(comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
-            current_page += 1
+        # 翻页请求与评论入库并行，子评论按一级评论并发抓取
+        async with CommentPipeline(callback) as pipeline:
+            while note_detail.total_replay_page >= current_page and len(result) < max_count:
+                params = {
+                    "pn": current_page,
+                }
+                page_content = await self.get(uri, params=params, return_ori_content=True)
+                comments = self._page_extractor.extract_tieba_note_parment_comments(page_content, note_id=note_detail.note_id)
+                if not comments:
+                    break
+                if len(result) + len(comments) > max_count:
+                    comments = comments[:max_count - len(result)]
+                await pipeline.put(note_detail.note_id, comments)
+                result.extend(comments)
+                # 获取所有子评论
+                for comment in comments:
+                    pipeline.spawn(self.get_comments_all_sub_comments(
+                        [comment], crawl_interval=crawl_interval, callback=pipeline.put
+                    ))
+                await self.crawl_sleep(crawl_interval)
+                current_page += 1
         return result
 
     async def get_comments_all_sub_comments(
@@ -280,7 +296,7 @@ class BaiduTieBaClient(AbstractApiClient):
                 if callback:
                     await callback(parment_comment.note_id, sub_comments)
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
+                await self.crawl_sleep(crawl_interval)
                 current_page += 1
         return all_sub_comments
 
@@ -336,6 +352,8 @@ class BaiduTieBaClient(AbstractApiClient):
         callback: Optional[Callable] = None,
         max_note_count: int = 0,
         creator_page_html_content: str = None,
+        page_filter: Optional[Callable[..., List]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
     ) -> List[TiebaNote]:
         """
         根据创作者用户名获取创作者所有帖子
@@ -345,6 +363,8 @@ class BaiduTieBaClient(AbstractApiClient):
             callback: 一次笔记爬取结束后的回调函数，是一个awaitable类型的函数
             max_note_count: 帖子最大获取数量，如果为0则获取所有
             creator_page_html_content: 创作者主页HTML内容
+            page_filter: 过滤每页帖子ID的函数 page_filter(thread_ids, has_more=...)，增量爬取时只获取新帖子和近期帖子的详情
+            should_stop: 返回 True 时停止翻页（增量爬取遇到足够多旧帖子）
 
         Returns:
 
@@ -354,6 +374,8 @@ class BaiduTieBaClient(AbstractApiClient):
         if creator_page_html_content:
             thread_id_list = (self._page_extractor.extract_tieba_thread_id_list_from_creator_page(creator_page_html_content))
             utils.logger.info(f"[BaiduTieBaClient.get_all_notes_by_creator] got user_name:{user_name} thread_id_list len : {len(thread_id_list)}")
+            if page_filter:
+                thread_id_list = page_filter(thread_id_list, has_more=True)
             note_detail_task = [self.get_note_by_id(thread_id) for thread_id in thread_id_list]
             notes = await asyncio.gather(*note_detail_task)
             if callback:
@@ -365,6 +387,8 @@ class BaiduTieBaClient(AbstractApiClient):
         page_per_count = 20
         total_get_count = 0
         while notes_has_more == 1 and (max_note_count == 0 or total_get_count < max_note_count):
+            if should_stop and should_stop():
+                break
             notes_res = await self.get_notes_by_creator(user_name, page_number)
             if not notes_res or notes_res.get("no") != 0:
                 utils.logger.error(f"[WeiboClient.get_notes_by_creator] got user_name:{user_name} notes failed, notes_res: {notes_res}")
@@ -373,12 +397,15 @@ class BaiduTieBaClient(AbstractApiClient):
             notes_has_more = notes_data.get("has_more")
             notes = notes_data["thread_list"]
             utils.logger.info(f"[WeiboClient.get_all_notes_by_creator] got user_name:{user_name} notes len : {len(notes)}")
+            thread_id_list = [note["thread_id"] for note in notes]
+            if page_filter:
+                thread_id_list = page_filter(thread_id_list, has_more=notes_has_more == 1)
 
-            note_detail_task = [self.get_note_by_id(note['thread_id']) for note in notes]
+            note_detail_task = [self.get_note_by_id(thread_id) for thread_id in thread_id_list]
             notes = await asyncio.gather(*note_detail_task)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
             result.extend(notes)
             page_number += 1
             total_get_count += page_per_count
@@ -10,6 +10,7 @@
 
 
 import asyncio
+import functools
 import os
 import random
 from asyncio import Task
@@ -28,9 +29,11 @@ from base.base_crawler import AbstractCrawler
 from model.m_baidu_tieba import TiebaCreator, TiebaNote
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import tieba as tieba_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import crawler_type_var
 
 from .client import BaiduTieBaClient
 from .field import SearchNoteType, SearchSortType
@@ -64,7 +67,7 @@ class TieBaCrawler(AbstractCrawler):
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
             )
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             _, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
             utils.logger.info(
                 f"[BaiduTieBaCrawler.start] Init default ip proxy, value: {httpx_proxy_format}"
@@ -74,6 +77,7 @@ class TieBaCrawler(AbstractCrawler):
         self.tieba_client = BaiduTieBaClient(
             ip_pool=ip_proxy_pool,
             default_ip_proxy=httpx_proxy_format,
+            proxy_lease_key=self.proxy_lease_key,
         )
         crawler_type_var.set(config.CRAWLER_TYPE)
         if config.CRAWLER_TYPE == "search":
@@ -103,13 +107,24 @@ class TieBaCrawler(AbstractCrawler):
         tieba_limit_count = 10  # tieba limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < tieba_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = tieba_limit_count
+        await KeywordScheduler("tieba").run(split_keywords(), self.search_keyword)
+
+    async def search_keyword(self, keyword: str) -> None:
+        """
+        Search one keyword, the next page is requested while the previous page's notes and comments are being fetched
+        Args:
+            keyword:
+
+        Returns:
+
+        """
+        tieba_limit_count = 10  # tieba limit page fixed value
         start_page = config.START_PAGE
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(
-                f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
-            )
-            page = 1
+        utils.logger.info(
+            f"[BaiduTieBaCrawler.search] Current search keyword: {keyword}"
+        )
+        page = 1
+        async with PagePipeline() as pipeline:
             while (
                 page - start_page + 1
             ) * tieba_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
@@ -138,8 +153,10 @@ class TieBaCrawler(AbstractCrawler):
                     utils.logger.info(
                         f"[BaiduTieBaCrawler.search] Note list len: {len(notes_list)}"
                     )
-                    await self.get_specified_notes(
-                        note_id_list=[note_detail.note_id for note_detail in notes_list]
+                    await pipeline.submit(
+                        self.get_specified_notes(
+                            note_id_list=[note_detail.note_id for note_detail in notes_list]
+                        )
                     )
                     page += 1
                 except Exception as ex:
@@ -309,16 +326,22 @@ class TieBaCrawler(AbstractCrawler):
 
                 await tieba_store.save_creator(user_info=creator_info)
 
-                # Get all note information of the creator
-                all_notes_list = (
-                    await self.tieba_client.get_all_notes_by_creator_user_name(
-                        user_name=creator_info.user_name,
-                        crawl_interval=0,
-                        callback=tieba_store.batch_update_tieba_notes,
-                        max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
-                        creator_page_html_content=creator_page_html_content,
+                # Get new (and recently published) notes of the creator, stop at already crawled notes
+                creator_index = await load_creator_index("tieba", creator_info.user_name)
+                try:
+                    all_notes_list = (
+                        await self.tieba_client.get_all_notes_by_creator_user_name(
+                            user_name=creator_info.user_name,
+                            crawl_interval=0,
+                            callback=functools.partial(self.save_creator_notes, creator_index=creator_index),
+                            max_note_count=config.CRAWLER_MAX_NOTES_COUNT,
+                            creator_page_html_content=creator_page_html_content,
+                            page_filter=functools.partial(creator_index.filter_page, get_id=lambda thread_id: thread_id),
+                            should_stop=lambda: creator_index.stopped,
+                        )
                     )
-                )
+                finally:
+                    await creator_index.save()
 
                 await self.batch_get_note_comments(all_notes_list)
 
@@ -327,6 +350,18 @@ class TieBaCrawler(AbstractCrawler):
                     f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_url:{creator_url}"
                 )
 
+    @staticmethod
+    async def save_creator_notes(note_list: List[TiebaNote], creator_index: Optional[CreatorCrawlIndex] = None):
+        """
+        Save creator notes and record them in the creator crawl index
+        """
+        await tieba_store.batch_update_tieba_notes(note_list)
+        if creator_index:
+            for note_item in note_list:
+                # publish_time 形如 2024-01-02 10:00
+                publish_time = utils.get_unix_time_from_time_str(f"{note_item.publish_time}:00") if note_item.publish_time else 0
+                creator_index.record(note_item.note_id, publish_time)
+
     async def launch_browser(
         self,
         chromium: BrowserType,
@@ -409,6 +444,10 @@ class TieBaCrawler(AbstractCrawler):
         Returns:
 
         """
+        # 释放 API 客户端的长连接池
+        if getattr(self, "tieba_client", None) is not None:
+            utils.logger.info(f"[BaiduTieBaCrawler.close] http pool stats: {self.tieba_client.http_pool.stats()}")
+            await self.tieba_client.close()
         # 如果使用CDP模式，需要特殊处理
         if self.cdp_manager:
             await self.cdp_manager.cleanup()
@@ -13,7 +13,6 @@
 # @Time    : 2023/12/23 15:40
 # @Desc    : 微博爬虫 API 请求 client
 
-import asyncio
 import copy
 import json
 import re
@@ -25,13 +24,16 @@ from httpx import Response
 from playwright.async_api import BrowserContext, Page
 
 import config
+from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
 
 from .exception import DataFetchError
 from .field import SearchType
 
 
-class WeiboClient:
+class WeiboClient(AbstractApiClient):
+    platform = "wb"
 
     def __init__(
         self,
@@ -52,26 +54,35 @@ class WeiboClient:
 
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy, verify=False) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        try:
+            response = await self.http_pool.request(method, url, proxy=self.proxy, verify=False, timeout=self.timeout, **kwargs)
+        except httpx.TransportError:
+            # 网络错误/代理不可用，反馈给代理池
+            self.report_proxy(False)
+            raise
 
         if enable_return_response:
+            self.report_response(response, ok=response.status_code < 400)
             return response
 
         try:
             data: Dict = response.json()
         except json.JSONDecodeError:
             utils.logger.error(f"[WeiboClient.request] json decode error, url:{url}, res:{response.text}")
+            self.report_response(response, ok=False)
             raise DataFetchError(f"json decode error, res:{response.text}")
 
         ok_code = data.get("ok")
         if ok_code == 0:  # response error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+            self.report_response(response, ok=False)
             raise DataFetchError(data.get("msg", "response error"))
         elif ok_code != 1:  # unknown error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+            self.report_response(response, ok=False)
             raise DataFetchError(data.get("msg", "unknown error"))
         else:  # response right
+            self.report_response(response, ok=True)
             return data.get("data", {})
 
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
@@ -171,20 +182,21 @@ class WeiboClient:
         is_end = False
         max_id = -1
         max_id_type = 0
-        while not is_end and len(result) < max_count:
-            comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
-            max_id: int = comments_res.get("max_id")
-            max_id_type: int = comments_res.get("max_id_type")
-            comment_list: List[Dict] = comments_res.get("data", [])
-            is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
-            if callback:  # 如果有回调函数，就执行回调函数
-                await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comment_list)
-            sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
-            result.extend(sub_comment_result)
+        # 翻页请求与评论入库并行（微博子评论随一级评论返回，无需额外请求）
+        async with CommentPipeline(callback) as pipeline:
+            while not is_end and len(result) < max_count:
+                comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
+                max_id: int = comments_res.get("max_id")
+                max_id_type: int = comments_res.get("max_id_type")
+                comment_list: List[Dict] = comments_res.get("data", [])
+                is_end = max_id == 0
+                if len(result) + len(comment_list) > max_count:
+                    comment_list = comment_list[:max_count - len(result)]
+                await pipeline.put(note_id, comment_list)
+                await self.crawl_sleep(crawl_interval)
+                result.extend(comment_list)
+                sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, pipeline.put)
+                result.extend(sub_comment_result)
         return result
 
     @staticmethod
@@ -222,20 +234,19 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        response = await self.http_pool.request("GET", url, proxy=self.proxy, timeout=self.timeout, headers=self.headers)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
     async def get_note_image(self, image_url: str) -> bytes:
         image_url = image_url[8:]  # 去掉 https://
@@ -252,18 +263,17 @@ class WeiboClient:
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
         final_uri = (f"{self._image_agent_host}"
                      f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+        try:
+            response = await self.http_pool.request("GET", final_uri, proxy=self.proxy, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")    # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
@@ -348,6 +358,8 @@ class WeiboClient:
         container_id: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        page_filter: Optional[Callable[..., List]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
@@ -356,6 +368,8 @@ class WeiboClient:
             container_id:
             crawl_interval:
             callback:
+            page_filter: 过滤每页微博的函数 page_filter(notes, has_more=...)，增量爬取时跳过已爬取的旧微博
+            should_stop: 返回 True 时停止翻页（增量爬取遇到足够多旧微博）
 
         Returns:
 
@@ -377,10 +391,14 @@ class WeiboClient:
             notes = notes_res["cards"]
             utils.logger.info(f"[WeiboClient.get_all_notes_by_creator] got user_id:{creator_id} notes len : {len(notes)}")
             notes = [note for note in notes if note.get("card_type") == 9]
+            crawler_total_count += 10
+            notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
+            if page_filter:
+                notes = page_filter(notes, has_more=notes_has_more)
             if callback:
                 await callback(notes)
-            await asyncio.sleep(crawl_interval)
             result.extend(notes)
-            crawler_total_count += 10
-            notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
+            if should_stop and should_stop():
+                break
+            await self.crawl_sleep(crawl_interval)
         return result
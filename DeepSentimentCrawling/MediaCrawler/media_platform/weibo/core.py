@@ -14,6 +14,7 @@
 # @Desc    : 微博爬虫主流程代码
 
 import asyncio
+import functools
 import os
 import random
 from asyncio import Task
@@ -24,21 +25,22 @@ from playwright.async_api import (
     BrowserType,
     Page,
     Playwright,
-    async_playwright,
 )
 
 import config
 from base.base_crawler import AbstractCrawler
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
-from var import crawler_type_var, source_keyword_var
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import crawler_type_var
 
 from .client import WeiboClient
 from .exception import DataFetchError
 from .field import SearchType
-from .help import filter_search_result_card
+from .help import filter_search_result_card, get_note_publish_time
 from .login import WeiboLogin
 
 
@@ -59,31 +61,14 @@ class WeiboCrawler(AbstractCrawler):
         playwright_proxy_format, httpx_proxy_format = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
+            ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             playwright_proxy_format, httpx_proxy_format = utils.format_proxy_info(ip_proxy_info)
 
-        async with async_playwright() as playwright:
-            # 根据配置选择启动模式
-            if config.ENABLE_CDP_MODE:
-                utils.logger.info("[WeiboCrawler] 使用CDP模式启动浏览器")
-                self.browser_context = await self.launch_browser_with_cdp(
-                    playwright,
-                    playwright_proxy_format,
-                    self.mobile_user_agent,
-                    headless=config.CDP_HEADLESS,
-                )
-            else:
-                utils.logger.info("[WeiboCrawler] 使用标准模式启动浏览器")
-                # Launch a browser context.
-                chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.mobile_user_agent, headless=config.HEADLESS)
-            # stealth.min.js is a js script to prevent the website from detecting the crawler.
-            await self.browser_context.add_init_script(path="libs/stealth.min.js")
-            self.context_page = await self.browser_context.new_page()
-            await self.context_page.goto(self.mobile_index_url)
-
+        async with self.browser_session_scope(self.setup_browser, playwright_proxy_format):
             # Create a client to interact with the xiaohongshu website.
             self.wb_client = await self.create_weibo_client(httpx_proxy_format)
+            if config.ENABLE_IP_PROXY:
+                self.wb_client.use_ip_proxy(ip_proxy_pool, ip_proxy_info)
             if not await self.wb_client.pong():
                 login_obj = WeiboLogin(
                     login_type=config.LOGIN_TYPE,
@@ -114,6 +99,32 @@ class WeiboCrawler(AbstractCrawler):
                 pass
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
+    async def setup_browser(self, playwright: Playwright, playwright_proxy_format: Optional[Dict]) -> None:
+        """
+        启动浏览器、注入反检测脚本并打开首页
+        :param playwright: playwright实例
+        :param playwright_proxy_format: playwright代理配置
+        :return:
+        """
+        # 根据配置选择启动模式
+        if config.ENABLE_CDP_MODE:
+            utils.logger.info("[WeiboCrawler] 使用CDP模式启动浏览器")
+            self.browser_context = await self.launch_browser_with_cdp(
+                playwright,
+                playwright_proxy_format,
+                self.mobile_user_agent,
+                headless=config.CDP_HEADLESS,
+            )
+        else:
+            utils.logger.info("[WeiboCrawler] 使用标准模式启动浏览器")
+            # Launch a browser context.
+            chromium = playwright.chromium
+            self.browser_context = await self.launch_browser(chromium, None, self.mobile_user_agent, headless=config.HEADLESS)
+        # stealth.min.js is a js script to prevent the website from detecting the crawler.
+        await self.browser_context.add_init_script(path="libs/stealth.min.js")
+        self.context_page = await self.browser_context.new_page()
+        await self.context_page.goto(self.mobile_index_url)
+
     async def search(self):
         """
         search weibo note with keywords
@@ -123,7 +134,6 @@ class WeiboCrawler(AbstractCrawler):
         weibo_limit_count = 10  # weibo limit page fixed value
         if config.CRAWLER_MAX_NOTES_COUNT < weibo_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
-        start_page = config.START_PAGE
 
         # Set the search type based on the configuration for weibo
         if config.WEIBO_SEARCH_TYPE == "default":
@@ -138,10 +148,20 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
-        for keyword in config.KEYWORDS.split(","):
-            source_keyword_var.set(keyword)
-            utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
-            page = 1
+        await KeywordScheduler("wb").run(split_keywords(), lambda keyword: self.search_keyword(keyword, search_type))
+
+    async def search_keyword(self, keyword: str, search_type: SearchType):
+        """
+        search one keyword, the next page is requested while the previous page's notes and comments are being fetched
+        :param keyword:
+        :param search_type:
+        :return:
+        """
+        weibo_limit_count = 10  # weibo limit page fixed value
+        start_page = config.START_PAGE
+        utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
+        page = 1
+        async with PagePipeline() as pipeline:
             while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
                 if page < start_page:
                     utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
@@ -154,19 +174,26 @@ class WeiboCrawler(AbstractCrawler):
                     utils.logger.error(f"[WeiboCrawler.search] search keyword:{keyword} page:{page} error: {e}")
                     page += 1
                     continue
-                
-                note_id_list: List[str] = []
-                note_list = filter_search_result_card(search_res.get("cards"))
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
 
+                note_list = filter_search_result_card(search_res.get("cards"))
+                await pipeline.submit(self.process_search_page(note_list))
                 page += 1
-                await self.batch_get_notes_comments(note_id_list)
+
+    async def process_search_page(self, note_list: List[Dict]):
+        """
+        store notes of one search result page and fetch their images and comments
+        :param note_list:
+        :return:
+        """
+        note_id_list: List[str] = []
+        for note_item in note_list:
+            if note_item:
+                mblog: Dict = note_item.get("mblog")
+                if mblog:
+                    note_id_list.append(mblog.get("id"))
+                    await weibo_store.update_weibo_note(note_item)
+                    await self.get_note_images(mblog)
+        await self.batch_get_notes_comments(note_id_list)
 
     async def get_specified_notes(self):
         """
@@ -277,13 +304,23 @@ class WeiboCrawler(AbstractCrawler):
                     raise DataFetchError("Get creator info error")
                 await weibo_store.save_creator(user_id, user_info=createor_info)
 
-                # Get all note information of the creator
-                all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
-                    creator_id=user_id,
-                    container_id=createor_info_res.get("lfid_container_id"),
-                    crawl_interval=0,
-                    callback=weibo_store.batch_update_weibo_notes,
-                )
+                # Get new (and recently published) notes of the creator, stop at already crawled notes
+                creator_index = await load_creator_index("wb", user_id)
+                try:
+                    all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
+                        creator_id=user_id,
+                        container_id=createor_info_res.get("lfid_container_id"),
+                        crawl_interval=0,
+                        callback=functools.partial(self.save_creator_notes, creator_index=creator_index),
+                        page_filter=functools.partial(
+                            creator_index.filter_page,
+                            get_id=lambda note: note.get("mblog", {}).get("id"),
+                            get_time=get_note_publish_time,
+                        ),
+                        should_stop=lambda: creator_index.stopped,
+                    )
+                finally:
+                    await creator_index.save()
 
                 note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if note_item.get("mblog", {}).get("id")]
                 await self.batch_get_notes_comments(note_ids)
@@ -291,6 +328,16 @@ class WeiboCrawler(AbstractCrawler):
             else:
                 utils.logger.error(f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_id:{user_id}")
 
+    @staticmethod
+    async def save_creator_notes(note_list: List[Dict], creator_index: Optional[CreatorCrawlIndex] = None):
+        """
+        Save a page of creator notes and record them in the creator crawl index
+        """
+        await weibo_store.batch_update_weibo_notes(note_list)
+        if creator_index:
+            for note_item in note_list:
+                creator_index.record(note_item.get("mblog", {}).get("id"), get_note_publish_time(note_item))
+
     async def create_weibo_client(self, httpx_proxy: Optional[str]) -> WeiboClient:
         """Create xhs client"""
         utils.logger.info("[WeiboCrawler.create_weibo_client] Begin create weibo API client ...")
@@ -370,10 +417,9 @@ class WeiboCrawler(AbstractCrawler):
 
     async def close(self):
         """Close browser context"""
-        # 如果使用CDP模式，需要特殊处理
-        if self.cdp_manager:
-            await self.cdp_manager.cleanup()
-            self.cdp_manager = None
-        else:
-            await self.browser_context.close()
+        # 释放 API 客户端的长连接池
+        if getattr(self, "wb_client", None) is not None:
+            utils.logger.info(f"[WeiboCrawler.close] http pool stats: {self.wb_client.http_pool.stats()}")
+            await self.wb_client.close()
+        await self.close_browser()
         utils.logger.info("[WeiboCrawler.close] Browser context closed ...")
@@ -16,6 +16,8 @@
 
 from typing import Dict, List
 
+from tools import utils
+
 
 def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
     """
@@ -34,3 +36,18 @@ def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
                     note_list.append(card_group_item)
 
     return note_list
+
+
+def get_note_publish_time(note_item: Dict) -> int:
+    """
+    微博卡片的发布时间（秒级时间戳），无法解析时返回 0
+    :param note_item: card_type 为 9 的卡片
+    :return:
+    """
+    created_at = note_item.get("mblog", {}).get("created_at")
+    if not created_at:
+        return 0
+    try:
+        return utils.rfc2822_to_timestamp(created_at)
+    except ValueError:
+        return 0
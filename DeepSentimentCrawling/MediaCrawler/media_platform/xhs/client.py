@@ -8,7 +8,6 @@
 # 详细许可条款请参阅项目根目录下的LICENSE文件。
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
-import asyncio
 import json
 import re
 from typing import Any, Callable, Dict, List, Optional, Union
@@ -21,14 +20,18 @@ from tenacity import retry, stop_after_attempt, wait_fixed, retry_if_result
 import config
 from base.base_crawler import AbstractApiClient
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
+from tools.sign_page_pool import SignPagePool
+from tools.sign_service import get_sign_service
 from html import unescape
 
 from .exception import DataFetchError, IPBlockError
 from .field import SearchNoteType, SearchSortType
-from .help import get_search_id, sign
+from .help import get_search_id
 
 
 class XiaoHongShuClient(AbstractApiClient):
+    platform = "xhs"
 
     def __init__(
         self,
@@ -50,10 +53,16 @@ class XiaoHongShuClient(AbstractApiClient):
         self.NOTE_ABNORMAL_CODE = -510001
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
+        # 签名页面池：并发请求分散到多个已登录页面上签名
+        self.sign_pages = SignPagePool(
+            playwright_page,
+            size=config.XHS_SIGN_PAGE_POOL_SIZE or min(config.MAX_CONCURRENCY_NUM, 4),
+            ready_expression="() => typeof window._webmsxyw === 'function'",
+        )
 
     async def _pre_headers(self, url: str, data=None) -> Dict:
         """
-        请求头参数签名
+        请求头参数签名，每个请求返回独立的请求头，不修改共享的 self.headers
         Args:
             url:
             data:
@@ -61,23 +70,35 @@ class XiaoHongShuClient(AbstractApiClient):
         Returns:
 
         """
-        encrypt_params = await self.playwright_page.evaluate("([url, data]) => window._webmsxyw(url,data)", [url, data])
-        local_storage = await self.playwright_page.evaluate("() => window.localStorage")
-        signs = sign(
-            a1=self.cookie_dict.get("a1", ""),
-            b1=local_storage.get("b1", ""),
-            x_s=encrypt_params.get("X-s", ""),
-            x_t=str(encrypt_params.get("X-t", "")),
+        encrypt_params = await self.sign_pages.evaluate("([url, data]) => window._webmsxyw(url,data)", [url, data])
+        b1 = await self.session_params.get("b1", self._load_b1)
+        signs = await get_sign_service().sign(
+            "xhs.sign",
+            self.cookie_dict.get("a1", ""),
+            b1,
+            encrypt_params.get("X-s", ""),
+            str(encrypt_params.get("X-t", "")),
         )
 
-        headers = {
+        return {
+            **self.headers,
             "X-S": signs["x-s"],
             "X-T": signs["x-t"],
             "x-S-Common": signs["x-s-common"],
             "X-B3-Traceid": signs["x-b3-traceid"],
         }
-        self.headers.update(headers)
-        return self.headers
+
+    async def _load_b1(self) -> str:
+        """
+        读取 localStorage 中的 b1 设备指纹，结果由 session_params 缓存
+        """
+        local_storage = await self.sign_pages.evaluate("() => window.localStorage")
+        return local_storage.get("b1", "")
+
+    async def close(self) -> None:
+        utils.logger.info(f"[XiaoHongShuClient.close] sign pages stats: {self.sign_pages.stats()}")
+        await self.sign_pages.close()
+        await super().close()
 
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
@@ -93,8 +114,12 @@ class XiaoHongShuClient(AbstractApiClient):
         """
         # return response.text
         return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        try:
+            response = await self.http_pool.request(method, url, proxy=self.proxy, timeout=self.timeout, **kwargs)
+        except httpx.TransportError:
+            # 网络错误/代理不可用，反馈给代理池
+            self.report_proxy(False)
+            raise
 
         if response.status_code == 471 or response.status_code == 461:
             # someday someone maybe will bypass captcha
@@ -102,16 +127,26 @@ class XiaoHongShuClient(AbstractApiClient):
             verify_uuid = response.headers["Verifyuuid"]
             msg = f"出现验证码，请求失败，Verifytype: {verify_type}，Verifyuuid: {verify_uuid}, Response: {response}"
             utils.logger.error(msg)
+            self.session_params.invalidate("b1")
+            self.report_response(response, ok=False, blocked=True)
             raise Exception(msg)
 
         if return_response:
+            self.report_response(response, ok=response.status_code < 400)
             return response.text
-        data: Dict = response.json()
+        try:
+            data: Dict = response.json()
+        except json.JSONDecodeError:
+            self.report_response(response, ok=False)
+            raise
         if data["success"]:
+            self.report_response(response, ok=True)
             return data.get("data", data.get("success", {}))
         elif data["code"] == self.IP_ERROR_CODE:
+            self.report_response(response, ok=False, blocked=True)
             raise IPBlockError(self.IP_ERROR_STR)
         else:
+            self.report_response(response, ok=False)
             raise DataFetchError(data.get("msg", None))
 
     async def get(self, uri: str, params=None) -> Dict:
@@ -151,18 +186,17 @@ class XiaoHongShuClient(AbstractApiClient):
         )
 
     async def get_note_media(self, url: str) -> Union[bytes, None]:
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", url, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+        try:
+            response = await self.http_pool.request("GET", url, proxy=self.proxy, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.reason_phrase == "OK":
+                utils.logger.error(f"[XiaoHongShuClient.get_note_media] request {url} err, res:{response.text}")
                 return None
+            else:
+                return response.content
+        except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
+            utils.logger.error(f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")  # 保留原始异常类型名称，以便开发者调试
+            return None
 
     async def pong(self) -> bool:
         """
@@ -194,6 +228,7 @@ class XiaoHongShuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        self.session_params.invalidate()
 
     async def get_note_by_keyword(
         self,
@@ -344,26 +379,31 @@ class XiaoHongShuClient(AbstractApiClient):
         result = []
         comments_has_more = True
         comments_cursor = ""
-        while comments_has_more and len(result) < max_count:
-            comments_res = await self.get_note_comments(note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor)
-            comments_has_more = comments_res.get("has_more", False)
-            comments_cursor = comments_res.get("cursor", "")
-            if "comments" not in comments_res:
-                utils.logger.info(f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}")
-                break
-            comments = comments_res["comments"]
-            if len(result) + len(comments) > max_count:
-                comments = comments[:max_count - len(result)]
-            if callback:
-                await callback(note_id, comments)
-            await asyncio.sleep(crawl_interval)
-            result.extend(comments)
-            sub_comments = await self.get_comments_all_sub_comments(
-                comments=comments,
-                xsec_token=xsec_token,
-                crawl_interval=crawl_interval,
-                callback=callback,
-            )
+        # 评论入库与翻页并行，同一页的子评论按一级评论并发抓取，抓完后计入 max_count 再翻下一页
+        async with CommentPipeline(callback) as pipeline:
+            while comments_has_more and len(result) + await pipeline.spawned_count() < max_count:
+                comments_res = await self.get_note_comments(note_id=note_id, xsec_token=xsec_token, cursor=comments_cursor)
+                comments_has_more = comments_res.get("has_more", False)
+                comments_cursor = comments_res.get("cursor", "")
+                if "comments" not in comments_res:
+                    utils.logger.info(f"[XiaoHongShuClient.get_note_all_comments] No 'comments' key found in response: {comments_res}")
+                    break
+                comments = comments_res["comments"]
+                if len(result) + len(comments) > max_count:
+                    comments = comments[:max_count - len(result)]
+                await pipeline.put(note_id, comments)
+                await self.crawl_sleep(crawl_interval)
+                result.extend(comments)
+                if not config.ENABLE_GET_SUB_COMMENTS:
+                    continue
+                for comment in comments:
+                    pipeline.spawn(self.get_comments_all_sub_comments(
+                        comments=[comment],
+                        xsec_token=xsec_token,
+                        crawl_interval=crawl_interval,
+                        callback=pipeline.put,
+                    ))
+        for sub_comments in pipeline.spawned_results():
             result.extend(sub_comments)
         return result
 
@@ -423,7 +463,7 @@ class XiaoHongShuClient(AbstractApiClient):
                 comments = comments_res["comments"]
                 if callback:
                     await callback(note_id, comments)
-                await asyncio.sleep(crawl_interval)
+                await self.crawl_sleep(crawl_interval)
                 result.extend(comments)
         return result
 
@@ -475,6 +515,8 @@ class XiaoHongShuClient(AbstractApiClient):
         user_id: str,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        page_filter: Optional[Callable[..., List]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
@@ -482,6 +524,8 @@ class XiaoHongShuClient(AbstractApiClient):
             user_id: 用户ID
             crawl_interval: 爬取一次的延迟单位（秒）
             callback: 一次分页爬取结束后的更新回调函数
+            page_filter: 过滤每页帖子的函数 page_filter(notes, has_more=...)，增量爬取时跳过已爬取的旧帖子
+            should_stop: 返回 True 时停止翻页（增量爬取遇到足够多旧帖子）
 
         Returns:
 
@@ -503,6 +547,8 @@ class XiaoHongShuClient(AbstractApiClient):
 
             notes = notes_res["notes"]
             utils.logger.info(f"[XiaoHongShuClient.get_all_notes_by_creator] got user_id:{user_id} notes len : {len(notes)}")
+            if page_filter:
+                notes = page_filter(notes, has_more=notes_has_more)
 
             remaining = config.CRAWLER_MAX_NOTES_COUNT - len(result)
             if remaining <= 0:
@@ -513,7 +559,9 @@ class XiaoHongShuClient(AbstractApiClient):
                 await callback(notes_to_add)
 
             result.extend(notes_to_add)
-            await asyncio.sleep(crawl_interval)
+            if should_stop and should_stop():
+                break
+            await self.crawl_sleep(crawl_interval)
 
         utils.logger.info(f"[XiaoHongShuClient.get_all_notes_by_creator] Finished getting notes for user {user_id}, total: {len(result)}")
         return result
@@ -6,10 +6,14 @@ from urllib.parse import urlencode
 
 from playwright.async_api import BrowserContext, Page, Response
 
+from base.base_crawler import AbstractApiClient
 from tools import utils
 from .exception import DataFetchError
 
-class XueqiuClient:
+class XueqiuClient(AbstractApiClient):
+    # Requests run inside the browser page to reuse its WAF cookies; the pool supplies the shared rate limiter
+    platform = "xueqiu"
+
     def __init__(
         self,
         timeout=30,
@@ -26,6 +30,14 @@ class XueqiuClient:
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
 
+    async def request(self, method, url, **kwargs) -> Dict:
+        """
+        Send a GET request through the browser page, see _request_via_evaluate.
+        """
+        if method.upper() != "GET":
+            raise DataFetchError(f"Unsupported method for browser fetch: {method}")
+        return await self._request_via_evaluate(url)
+
     async def update_cookies(self, browser_context: BrowserContext):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.headers["Cookie"] = cookie_str
@@ -70,7 +82,7 @@ class XueqiuClient:
         uri = "/statuses/show.json"
         params = {"id": note_id}
         url = f"{self._host}{uri}?{urlencode(params)}"
-        return await self._request_via_evaluate(url)
+        return await self.request("GET", url)
 
     async def get_note_comments(self, note_id: str, page: int = 1, count: int = 20) -> Dict:
         """
@@ -87,7 +99,7 @@ class XueqiuClient:
             "asc": "false"
         }
         url = f"{self._host}{uri}?{urlencode(params)}"
-        return await self._request_via_evaluate(url)
+        return await self.request("GET", url)
 
     async def _intercept_response(self, url_substring: str, trigger_action: Callable) -> Dict:
         """
@@ -101,6 +113,8 @@ class XueqiuClient:
         max_retries = 3
         for attempt in range(max_retries):
             try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
                 # Setup the listener BEFORE the action
                 async with self.playwright_page.expect_response(response_predicate, timeout=self.timeout * 1000) as response_info:
                     await trigger_action()
@@ -112,16 +126,27 @@ class XueqiuClient:
                     raise DataFetchError("Empty response body")
                     
                 try:
-                    return json.loads(text)
+                    data = json.loads(text)
                 except json.JSONDecodeError:
                     if "aliyun_waf" in text:
                         raise DataFetchError("Triggered Aliyun WAF")
                     raise DataFetchError(f"JSON decode error. Content preview: {text[:100]}")
+                if self.rate_limiter is not None:
+                    self.rate_limiter.on_success()
+                return data
                 
             except Exception as e:
                 utils.logger.warning(f"[XueqiuClient] Interception attempt {attempt+1}/{max_retries} failed: {e}")
+                rate_limiter = self.rate_limiter
+                if rate_limiter is not None:
+                    if "WAF" in str(e):
+                        rate_limiter.on_block()
+                    else:
+                        rate_limiter.on_failure()
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(random.uniform(2, 4))
+                    # With the rate limiter the next attempt waits for its slot instead
+                    if rate_limiter is None:
+                        await asyncio.sleep(random.uniform(2, 4))
                     # Refresh page or take a step back? trigger_action usually includes navigation, so retrying it is enough.
                 else:
                     utils.logger.error(f"[XueqiuClient] All interception attempts failed for {url_substring}")
@@ -133,8 +158,12 @@ class XueqiuClient:
         Less safe than interception but useful for sub-requests (like comments) 
         once the page is loaded and WAF trust is established.
         """
-        # Add random delay before request
-        await asyncio.sleep(random.uniform(0.5, 1.5))
+        # Wait for the rate limiter slot (or a random delay when adaptive rate limit is off)
+        rate_limiter = self.rate_limiter
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        else:
+            await asyncio.sleep(random.uniform(0.5, 1.5))
         
         utils.logger.info(f"[XueqiuClient] Fetching via browser: {url}")
         result = await self.playwright_page.evaluate(
@@ -151,13 +180,22 @@ class XueqiuClient:
             """,
             url
         )
+        # Blocks and 5xx are counted here; whether a 200 is a success depends on the body
+        counted = rate_limiter is not None and rate_limiter.on_http_response(result['status'] or 500, result['text'])
         
         if result['status'] != 200:
+             if rate_limiter is not None and not counted:
+                 rate_limiter.on_failure()
              raise DataFetchError(f"Browser fetch failed: {result['text'][:100]}")
              
         try:
-            return json.loads(result['text'])
+            data = json.loads(result['text'])
         except:
+            if rate_limiter is not None and not counted:
+                rate_limiter.on_failure()
             if "aliyun_waf" in result['text']:
                 raise DataFetchError("Triggered WAF")
             raise DataFetchError("JSON decode error")
+        if rate_limiter is not None:
+            rate_limiter.on_success()
+        return data
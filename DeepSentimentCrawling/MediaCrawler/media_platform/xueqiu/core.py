@@ -12,6 +12,7 @@ from proxy.proxy_ip_pool import create_ip_pool, IpInfoModel
 from store import xueqiu as xueqiu_store
 from tools import utils
 from tools.cdp_browser import CDPBrowserManager
+from tools.keyword_scheduler import KeywordScheduler, split_keywords
 from var import crawler_type_var
 
 from .client import XueqiuClient
@@ -35,7 +36,7 @@ class XueqiuCrawler(AbstractCrawler):
         playwright_proxy, httpx_proxy = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
-            ip_proxy_info = await ip_proxy_pool.get_proxy()
+            ip_proxy_info = await ip_proxy_pool.get_proxy(lease_key=self.proxy_lease_key)
             playwright_proxy, httpx_proxy = utils.format_proxy_info(ip_proxy_info)
 
         async with async_playwright() as playwright:
@@ -80,32 +81,35 @@ class XueqiuCrawler(AbstractCrawler):
 
     async def search(self):
         utils.logger.info("[XueqiuCrawler.search] Begin search keywords")
-        for keyword in config.KEYWORDS.split(","):
-            utils.logger.info(f"[XueqiuCrawler.search] Current keyword: {keyword}")
-            try:
-                # Page 1
-                search_res = await self.xq_client.get_note_by_keyword(keyword, page=1)
+        # 雪球通过同一个浏览器页面跳转到搜索页并拦截接口响应，页面跳转不能并发，关键词按顺序执行
+        await KeywordScheduler("xueqiu", max_concurrency=1).run(split_keywords(), self.search_keyword)
+
+    async def search_keyword(self, keyword: str):
+        utils.logger.info(f"[XueqiuCrawler.search] Current keyword: {keyword}")
+        try:
+            # Page 1
+            search_res = await self.xq_client.get_note_by_keyword(keyword, page=1)
+            
+            # Check for list
+            notes = search_res.get("list", [])
+            if not notes:
+                utils.logger.info(f"[XueqiuCrawler.search] No results for {keyword}")
+                return
+            
+            for note in notes:
+                note_id = str(note.get("id"))
+                utils.logger.info(f"[XueqiuCrawler] Found note: {note_id} - {note.get('title', 'No Title')}")
                 
-                # Check for list
-                notes = search_res.get("list", [])
-                if not notes:
-                    utils.logger.info(f"[XueqiuCrawler.search] No results for {keyword}")
-                    continue
+                # Store note
+                await xueqiu_store.update_xueqiu_note(note)
+                self.total_notes_crawled += 1
                 
-                for note in notes:
-                    note_id = str(note.get("id"))
-                    utils.logger.info(f"[XueqiuCrawler] Found note: {note_id} - {note.get('title', 'No Title')}")
-                    
-                    # Store note
-                    await xueqiu_store.update_xueqiu_note(note)
-                    self.total_notes_crawled += 1
+                # Get comments
+                if config.ENABLE_GET_COMMENTS:
+                    await self.get_note_comments(note_id)
                     
-                    # Get comments
-                    if config.ENABLE_GET_COMMENTS:
-                        await self.get_note_comments(note_id)
-                        
-            except Exception as e:
-                utils.logger.error(f"[XueqiuCrawler.search] Error: {e}")
+        except Exception as e:
+            utils.logger.error(f"[XueqiuCrawler.search] Error: {e}")
 
     async def get_note_comments(self, note_id: str):
         try:
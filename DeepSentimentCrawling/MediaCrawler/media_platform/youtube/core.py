@@ -13,19 +13,29 @@ from __future__ import annotations
 import asyncio
 import os
 import tempfile
+import time
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlsplit, urlunsplit
 
-import httpx
-
 import config
 from base.base_crawler import AbstractCrawler
 from store import youtube as youtube_store
+from store.creator_index import CreatorCrawlIndex, load_creator_index
 from tools import utils
-from tools.transcriber import VideoTranscriber
+from tools.http_pool import HttpClientPool
+from tools.transcription_pool import TranscriptionJob, submit_transcription
 from tools.youtube_transcript import extract_youtube_video_id
 from var import crawler_type_var, source_keyword_var
 
+from .probe import (
+    PROBE_ERROR,
+    PROBE_MEMBERS_ONLY,
+    PROBE_UNAVAILABLE,
+    ProbeResult,
+    get_probe_cache,
+    run_ordered_probes,
+)
+
 try:
     from yt_dlp import YoutubeDL
 except Exception:  # pragma: no cover
@@ -82,6 +92,17 @@ def _looks_like_members_only(text: str) -> bool:
     )
 
 
+def _looks_like_unavailable(text: str) -> bool:
+    lowered = (text or "").lower()
+    return (
+        "video unavailable" in lowered
+        or "private video" in lowered
+        or "has been removed" in lowered
+        or "premieres in" in lowered
+        or "live event will begin" in lowered
+    )
+
+
 def _extract_video_id_from_entry(entry: Dict) -> str:
     vid = str(entry.get("id") or "").strip()
     if vid:
@@ -137,6 +158,17 @@ class YouTubeCrawler(AbstractCrawler):
     - detail: 根据配置 YT_SPECIFIED_ID_LIST 抓取字幕
     """
 
+    _http_pool: Optional[HttpClientPool] = None
+
+    @property
+    def http_pool(self) -> HttpClientPool:
+        """
+        字幕文件下载共享的 httpx 连接池（首次访问时创建）
+        """
+        if self._http_pool is None:
+            self._http_pool = HttpClientPool()
+        return self._http_pool
+
     async def start(self) -> None:
         crawler_type_var.set(config.CRAWLER_TYPE)
 
@@ -217,7 +249,6 @@ class YouTubeCrawler(AbstractCrawler):
             
             entries = (info or {}).get("entries") or []
             
-            # Duplicate Detection
             candidate_ids = []
             valid_entries = []
             for entry in entries:
@@ -227,53 +258,25 @@ class YouTubeCrawler(AbstractCrawler):
                     continue
                 candidate_ids.append(vid)
                 valid_entries.append(entry)
-            
-            existing_ids = set(await youtube_store.get_existing_video_ids(candidate_ids))
-            utils.logger.info(f"[YouTubeCrawler] Found {len(valid_entries)} entries. {len(existing_ids)} exist in DB.")
-            
-            processed_count = 0
-            for entry in valid_entries:
-                vid = _extract_video_id_from_entry(entry)
-                if vid in existing_ids:
-                    utils.logger.info(f"[YouTubeCrawler] Encountered existing video: {vid}. Stopping for this creator.")
-                    break
-
-                if skip_members_only:
-                    capture_logger = _CapturingYtDlpLogger()
-                    try:
-                        # Fetch per-video info to detect members-only/private videos and avoid storing them.
-                        full = await asyncio.to_thread(
-                            self._ytdlp_extract,
-                            f"https://www.youtube.com/watch?v={vid}",
-                            download=False,
-                            ignoreerrors=False,
-                            logger=capture_logger,
-                        )
-                    except Exception as e:
-                        joined = "\n".join(capture_logger.errors + capture_logger.warnings + [str(e)])
-                        if _looks_like_members_only(joined):
-                            utils.logger.info(f"[YouTubeCrawler.get_creator_videos] skip members-only: {vid}")
-                            continue
-                        utils.logger.warning(f"[YouTubeCrawler.get_creator_videos] skip unavailable video: {vid} ({e})")
-                        continue
 
-                    if not full:
-                        joined = "\n".join(capture_logger.errors + capture_logger.warnings)
-                        if _looks_like_members_only(joined):
-                            utils.logger.info(f"[YouTubeCrawler.get_creator_videos] skip members-only: {vid}")
-                        continue
-                    if self._is_members_only_video(full):
-                        utils.logger.info(f"[YouTubeCrawler.get_creator_videos] skip members-only: {vid}")
-                        continue
-
-                    await self._handle_video_entry(full)
-                    processed_count += 1
-                else:
-                    await self._handle_video_entry(entry)
-                    processed_count += 1
-                
-                if processed_count >= max_count:
-                    break
+            # 跳过已爬取的旧视频（近期视频重新抓取以刷新播放量），连续遇到足够多旧视频后停止
+            creator_index = await load_creator_index("yt", creator_url)
+            try:
+                # 第一次使用增量索引时，内容表中已有的视频视为已爬取
+                await creator_index.seed_existing(candidate_ids, youtube_store.get_existing_video_ids)
+                # 返回的条目少于 fetch_limit 时说明已扫描到频道最早的视频
+                crawl_entries = creator_index.filter_page(
+                    valid_entries, _extract_video_id_from_entry, lambda entry: entry.get("timestamp"),
+                    has_more=len(entries) >= fetch_limit,
+                )
+                utils.logger.info(
+                    f"[YouTubeCrawler] Found {len(valid_entries)} entries, {len(crawl_entries)} new or recent."
+                )
+                processed_count = await self._crawl_creator_entries(
+                    crawl_entries, max_count, skip_members_only, creator_index
+                )
+            finally:
+                await creator_index.save()
 
             if processed_count < max_count:
                 utils.logger.info(
@@ -281,6 +284,99 @@ class YouTubeCrawler(AbstractCrawler):
                     f"(playlist scanned up to {fetch_limit})"
                 )
 
+    async def _crawl_creator_entries(
+        self,
+        entries: List[Dict],
+        max_count: int,
+        skip_members_only: bool,
+        creator_index: CreatorCrawlIndex,
+    ) -> int:
+        """
+        抓取创作者的视频并记录到增量爬取索引，返回保存的视频数；
+        跳过会员视频时先并发探测，按原顺序保存可访问的视频，够 max_count 个后不再发起新的探测
+        """
+        processed_count = 0
+        if not skip_members_only:
+            for entry in entries[:max_count]:
+                await self._handle_video_entry(entry)
+                creator_index.record(_extract_video_id_from_entry(entry), entry.get("timestamp"))
+                processed_count += 1
+            return processed_count
+
+        probe_cache = get_probe_cache()
+
+        async def probe(vid: str) -> ProbeResult:
+            cached = probe_cache.get(vid)
+            if cached is not None:
+                return cached
+            result = await asyncio.to_thread(self._probe_video, vid)
+            probe_cache.put(result)
+            return result
+
+        async def handle(result: ProbeResult) -> bool:
+            nonlocal processed_count
+            vid = result.video_id
+            if result.status == PROBE_MEMBERS_ONLY:
+                utils.logger.info(
+                    f"[YouTubeCrawler.get_creator_videos] skip members-only: {vid}{' (cached)' if result.cached else ''}"
+                )
+                creator_index.skip(vid)
+                return False
+            if result.status in (PROBE_UNAVAILABLE, PROBE_ERROR):
+                utils.logger.warning(
+                    f"[YouTubeCrawler.get_creator_videos] skip unavailable video: {vid} ({result.reason})"
+                    f"{' (cached)' if result.cached else ''}"
+                )
+                if result.status == PROBE_UNAVAILABLE:
+                    creator_index.skip(vid)
+                return False
+            await self._handle_video_entry(result.info)
+            creator_index.record(vid, result.info.get("timestamp"))
+            processed_count += 1
+            return processed_count >= max_count
+
+        try:
+            await run_ordered_probes(
+                [_extract_video_id_from_entry(entry) for entry in entries],
+                probe,
+                handle,
+                concurrency=config.YOUTUBE_PROBE_CONCURRENCY,
+            )
+        finally:
+            await probe_cache.save()
+        return processed_count
+
+    def _probe_video(self, vid: str) -> ProbeResult:
+        """
+        完整解析一个视频，判断是否为会员视频/不可用（在线程中运行）
+        """
+        capture_logger = _CapturingYtDlpLogger()
+        try:
+            # Fetch per-video info to detect members-only/private videos and avoid storing them.
+            full = self._ytdlp_extract(
+                f"https://www.youtube.com/watch?v={vid}",
+                download=False,
+                ignoreerrors=False,
+                logger=capture_logger,
+            )
+        except Exception as e:
+            joined = "\n".join(capture_logger.errors + capture_logger.warnings + [str(e)])
+            if _looks_like_members_only(joined):
+                return ProbeResult(vid, PROBE_MEMBERS_ONLY, reason=str(e), probed_at=time.time())
+            status = PROBE_UNAVAILABLE if _looks_like_unavailable(joined) else PROBE_ERROR
+            return ProbeResult(vid, status, reason=str(e), probed_at=time.time())
+
+        if not full:
+            joined = "\n".join(capture_logger.errors + capture_logger.warnings)
+            if _looks_like_members_only(joined):
+                status = PROBE_MEMBERS_ONLY
+            else:
+                status = PROBE_UNAVAILABLE if _looks_like_unavailable(joined) else PROBE_ERROR
+            return ProbeResult(vid, status, reason=joined[:200] or "empty result", probed_at=time.time())
+        if self._is_members_only_video(full):
+            return ProbeResult(vid, PROBE_MEMBERS_ONLY, info=full, reason=str(full.get("availability")), probed_at=time.time())
+        return ProbeResult(vid, PROBE_OK, info=full, probed_at=time.time())
+
     def _ytdlp_extract(self, url_or_search: str, download: bool, **kwargs) -> Dict:
         proxy = getattr(config, "YOUTUBE_PROXY", "") or None
         cookies_browser = getattr(config, "YOUTUBE_COOKIES_FROM_BROWSER", None)
@@ -340,8 +436,21 @@ class YouTubeCrawler(AbstractCrawler):
         if getattr(config, "YOUTUBE_ENABLE_TRANSCRIPT", True):
             transcription = await self._fetch_and_parse_transcript(entry)
 
-        if not transcription and getattr(config, "YOUTUBE_ENABLE_AUDIO_FALLBACK", False):
-            transcription = await self._fallback_audio_transcribe(url)
+        audio_job: Optional[TranscriptionJob] = None
+        if (
+            not transcription
+            and getattr(config, "YOUTUBE_ENABLE_AUDIO_FALLBACK", False)
+            and "yt" in config.ASR_ENABLED_PLATFORMS
+        ):
+            audio_path = await self._fallback_audio_download(url)
+            if audio_path:
+                audio_job = TranscriptionJob(platform="yt", content_id=video_id, media_path=audio_path)
+
+        # db/sqlite 模式下先入库，转写完成后由转写流水线回写；csv 无法事后回写，需要等待转写结果
+        if audio_job is not None and config.SAVE_DATA_OPTION not in ("db", "sqlite"):
+            transcribe_task = await submit_transcription(audio_job)
+            transcription = (await transcribe_task if transcribe_task else "") or ""
+            audio_job = None
 
         await youtube_store.upsert_youtube_video(
             {
@@ -362,6 +471,8 @@ class YouTubeCrawler(AbstractCrawler):
                 "last_modify_ts": utils.get_current_timestamp(),
             }
         )
+        if audio_job is not None:
+            await submit_transcription(audio_job)
 
     async def _fetch_and_parse_transcript(self, entry: Dict) -> str:
         """
@@ -406,29 +517,32 @@ class YouTubeCrawler(AbstractCrawler):
             return ""
 
         try:
-            async with httpx.AsyncClient(verify=False) as client:
-                resp = await client.get(target_url, timeout=10)
-                if resp.status_code != 200:
-                    utils.logger.warning(f"[YouTubeCrawler] Failed to fetch transcript url: {resp.status_code}")
-                    return ""
-                
-                data = resp.json()
-                # Parse json3 format
-                # Structure: { events: [ { segs: [ { utf8: "text" }, ... ] }, ... ] }
-                events = data.get("events", [])
-                text_parts = []
-                for event in events:
-                    segs = event.get("segs", [])
-                    for seg in segs:
-                        t = seg.get("utf8", "").strip()
-                        if t and t != "\n":
-                            text_parts.append(t)
-                return " ".join(text_parts)
+            resp = await self.http_pool.request("GET", target_url, verify=False, timeout=10)
+            if resp.status_code != 200:
+                utils.logger.warning(f"[YouTubeCrawler] Failed to fetch transcript url: {resp.status_code}")
+                return ""
+            
+            data = resp.json()
+            # Parse json3 format
+            # Structure: { events: [ { segs: [ { utf8: "text" }, ... ] }, ... ] }
+            events = data.get("events", [])
+            text_parts = []
+            for event in events:
+                segs = event.get("segs", [])
+                for seg in segs:
+                    t = seg.get("utf8", "").strip()
+                    if t and t != "\n":
+                        text_parts.append(t)
+            return " ".join(text_parts)
         except Exception as e:
             utils.logger.warning(f"[YouTubeCrawler] Error parsing transcript: {e}")
             return ""
 
-    async def _fallback_audio_transcribe(self, url: str) -> str:
+    async def _fallback_audio_download(self, url: str) -> str:
+        """
+        Download the audio track for local ASR; the transcription itself runs in the transcription pool.
+        Returns the downloaded audio path, or "" on failure.
+        """
         if YoutubeDL is None:  # pragma: no cover
             return ""
 
@@ -526,17 +640,8 @@ class YouTubeCrawler(AbstractCrawler):
             if not audio_path or not os.path.exists(audio_path):
                 return ""
                 
-            loop = asyncio.get_running_loop()
-            transcription = await loop.run_in_executor(None, VideoTranscriber.transcribe_video, audio_path)
-            
-            # Clean up the audio file after successful transcription
-            try:
-                os.remove(audio_path)
-            except Exception as e:
-                utils.logger.warning(f"[YouTubeCrawler] Failed to remove cached file {audio_path}: {e}")
-                
-            return transcription
-            
+            return audio_path
+
         except Exception as e:
             utils.logger.error(f"[YouTubeCrawler] Audio fallback failed: {e}")
             return ""
@@ -0,0 +1,192 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : YouTube 视频可访问性探测：有界并发探测 + 会员/不可用视频的磁盘缓存
+#
+# 创作者模式开启 YOUTUBE_SKIP_MEMBERS_ONLY 时需要对每个候选视频做一次完整的 yt-dlp 解析才能知道是否为会员视频，
+# 原来逐个串行解析。现在 run_ordered_probes 保持 YOUTUBE_PROBE_CONCURRENCY 个解析同时进行，按原顺序交给调用方处理，
+# 调用方拿到足够的可访问视频后不再发起新的探测，已经在线程中运行的解析无法取消，等它们结束后结果照常写入缓存；
+# 会员视频和不可用视频写入 VideoProbeCache，有效期内不再探测。
+# 可访问的视频不缓存：保存时需要最新的播放量和带签名的字幕地址，本来就要重新解析。
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional
+
+import config
+from tools import utils
+
+PROBE_OK = "ok"
+PROBE_MEMBERS_ONLY = "members_only"
+PROBE_UNAVAILABLE = "unavailable"
+# 网络错误、风控等暂时性失败，不缓存
+PROBE_ERROR = "error"
+
+# 缓存中保留的元数据字段
+_CACHED_INFO_FIELDS = ("title", "upload_date", "timestamp", "availability")
+
+
+@dataclass
+class ProbeResult:
+    video_id: str
+    status: str
+    # 解析结果；来自缓存时只有 _CACHED_INFO_FIELDS 中的字段
+    info: Dict[str, Any] = field(default_factory=dict)
+    reason: str = ""
+    probed_at: float = 0.0
+    cached: bool = False
+
+
+class VideoProbeCache:
+    """
+    会员视频/不可用视频的探测结果缓存，保存在 JSON 文件中：
+      - 会员视频 YOUTUBE_PROBE_CACHE_TTL 秒内不再探测
+      - 不可用视频（私享、已删除、未首播等）YOUTUBE_PROBE_UNAVAILABLE_TTL 秒内不再探测
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._dirty = False
+        self._file_lock = threading.Lock()
+
+    def _ttl(self, status: str) -> float:
+        if status == PROBE_MEMBERS_ONLY:
+            return config.YOUTUBE_PROBE_CACHE_TTL
+        if status == PROBE_UNAVAILABLE:
+            return config.YOUTUBE_PROBE_UNAVAILABLE_TTL
+        return 0
+
+    def _is_fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        return now - entry.get("probed_at", 0) < self._ttl(entry.get("status", ""))
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    utils.logger.warning(f"[VideoProbeCache] load {self.path} failed: {e}")
+        return self._entries
+
+    def get(self, video_id: str) -> Optional[ProbeResult]:
+        """
+        有效期内的探测结果，没有时返回 None
+        :param video_id:
+        :return:
+        """
+        entry = self._load().get(video_id)
+        if not entry or not self._is_fresh(entry, time.time()):
+            return None
+        return ProbeResult(video_id=video_id, cached=True, **entry)
+
+    def put(self, result: ProbeResult) -> None:
+        """
+        记录一次探测结果，可访问的视频不缓存
+        :param result:
+        :return:
+        """
+        if not self._ttl(result.status):
+            return
+        entry = asdict(result)
+        entry.pop("video_id")
+        entry.pop("cached")
+        entry["info"] = {key: result.info[key] for key in _CACHED_INFO_FIELDS if result.info.get(key) is not None}
+        entry["probed_at"] = result.probed_at or time.time()
+        self._load()[result.video_id] = entry
+        self._dirty = True
+
+    def _save_sync(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        with self._file_lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    async def save(self) -> None:
+        """
+        清理过期记录后写回磁盘，没有变化时不写
+        :return:
+        """
+        if not self._dirty:
+            return
+        now = time.time()
+        self._entries = {vid: entry for vid, entry in self._load().items() if self._is_fresh(entry, now)}
+        self._dirty = False
+        try:
+            await asyncio.to_thread(self._save_sync, dict(self._entries))
+        except Exception as e:
+            utils.logger.warning(f"[VideoProbeCache] save {self.path} failed: {e}")
+
+
+async def run_ordered_probes(
+    video_ids: Iterable[str],
+    probe: Callable[[str], Awaitable[ProbeResult]],
+    handle: Callable[[ProbeResult], Awaitable[bool]],
+    concurrency: int,
+) -> None:
+    """
+    有界并发探测：最多 concurrency 个探测同时进行，探测结果按 video_ids 的顺序依次交给 handle 处理，
+    handle 返回 True 时不再发起新的探测，并等待已开始的探测结束（最多 concurrency - 1 个），
+    让 probe 把结果写入缓存而不是丢弃已经在线程中完成的解析；出错或被取消时取消其余探测
+    :param video_ids: 候选视频ID（按发布时间倒序）
+    :param probe: 探测单个视频的协程函数
+    :param handle: 处理探测结果的协程函数，返回是否停止
+    :param concurrency: 并发数
+    :return:
+    """
+    video_ids = iter(video_ids)
+    pending: Deque[asyncio.Future] = deque()
+
+    def fill() -> None:
+        while len(pending) < max(1, concurrency):
+            video_id = next(video_ids, None)
+            if video_id is None:
+                return
+            pending.append(asyncio.ensure_future(probe(video_id)))
+
+    stopped = False
+    try:
+        fill()
+        while pending:
+            result = await pending.popleft()
+            if await handle(result):
+                stopped = True
+                return
+            fill()
+    finally:
+        if not stopped:
+            for task in pending:
+                task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+_probe_caches: Dict[str, VideoProbeCache] = {}
+
+
+def get_probe_cache() -> VideoProbeCache:
+    """
+    按 YOUTUBE_PROBE_CACHE_PATH 共享的探测缓存，定时任务的多次运行之间复用
+    :return:
+    """
+    path = config.YOUTUBE_PROBE_CACHE_PATH
+    if path not in _probe_caches:
+        _probe_caches[path] = VideoProbeCache(path)
+    return _probe_caches[path]
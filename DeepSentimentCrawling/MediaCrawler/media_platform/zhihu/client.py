@@ -9,7 +9,6 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 # -*- coding: utf-8 -*-
-import asyncio
 import json
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
@@ -24,13 +23,15 @@ from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
+from tools.comment_pipeline import CommentPipeline
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, async_sign
 
 
 class ZhiHuClient(AbstractApiClient):
+    platform = "zhihu"
 
     def __init__(
         self,
@@ -58,7 +59,7 @@ class ZhiHuClient(AbstractApiClient):
         d_c0 = self.cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
+        sign_res = await async_sign(url, self.default_headers["cookie"])
         headers = self.default_headers.copy()
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
@@ -79,29 +80,34 @@ class ZhiHuClient(AbstractApiClient):
         # return response.text
         return_response = kwargs.pop('return_response', False)
 
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        response = await self.http_pool.request(method, url, proxy=self.proxy, timeout=self.timeout, **kwargs)
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
             if response.status_code == 403:
                 raise ForbiddenError(response.text)
             elif response.status_code == 404:  # 如果一个content没有评论也是404
+                self.report_response(response, ok=True)
                 return {}
 
+            self.report_response(response, ok=False)
             raise DataFetchError(response.text)
 
         if return_response:
+            self.report_response(response, ok=True)
             return response.text
         try:
             data: Dict = response.json()
-            if data.get("error"):
-                utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
-                raise DataFetchError(data.get("error", {}).get("message"))
-            return data
         except json.JSONDecodeError:
             utils.logger.error(f"[ZhiHuClient.request] Request error: {response.text}")
+            self.report_response(response, ok=False)
             raise DataFetchError(response.text)
+        if data.get("error"):
+            utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
+            self.report_response(response, ok=False)
+            raise DataFetchError(data.get("error", {}).get("message"))
+        self.report_response(response, ok=True)
+        return data
 
     async def get(self, uri: str, params=None, **kwargs) -> Union[Response, Dict, str]:
         """
@@ -281,24 +287,28 @@ class ZhiHuClient(AbstractApiClient):
         is_end: bool = False
         offset: str = ""
         limit: int = 10
-        while not is_end:
-            root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
-            if not root_comment_res:
-                break
-            paging_info = root_comment_res.get("paging", {})
-            is_end = paging_info.get("is_end")
-            offset = self._extractor.extract_offset(paging_info)
-            comments = self._extractor.extract_comments(content, root_comment_res.get("data"))
+        # 翻页请求与评论入库并行，子评论按一级评论并发抓取
+        async with CommentPipeline(callback) as pipeline:
+            while not is_end:
+                root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
+                if not root_comment_res:
+                    break
+                paging_info = root_comment_res.get("paging", {})
+                is_end = paging_info.get("is_end")
+                offset = self._extractor.extract_offset(paging_info)
+                comments = self._extractor.extract_comments(content, root_comment_res.get("data"))
 
-            if not comments:
-                break
+                if not comments:
+                    break
 
-            if callback:
-                await callback(comments)
+                await pipeline.put(comments)
 
-            result.extend(comments)
-            await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+                result.extend(comments)
+                for comment in comments:
+                    pipeline.spawn(self.get_comments_all_sub_comments(
+                        content, [comment], crawl_interval=crawl_interval, callback=pipeline.put
+                    ))
+                await self.crawl_sleep(crawl_interval)
         return result
 
     async def get_comments_all_sub_comments(
@@ -346,7 +356,7 @@ class ZhiHuClient(AbstractApiClient):
                     await callback(sub_comments)
 
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
+                await self.crawl_sleep(crawl_interval)
         return all_sub_comments
 
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
@@ -452,7 +462,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
         return all_contents
 
     async def get_all_articles_by_creator(
@@ -486,7 +496,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
         return all_contents
 
     async def get_all_videos_by_creator(
@@ -520,7 +530,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await self.crawl_sleep(crawl_interval)
         return all_contents
 
     async def get_answer_info(
@@ -0,0 +1,78 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+
+class CrawlJobConfig(BaseModel):
+    """
+    单个平台爬取任务的配置，运行时作为该任务自己的配置覆盖(config.use_context_overrides)
+    """
+    platform: str = Field(..., description="平台，xhs | dy | ks | bili | wb | tieba | zhihu | xueqiu | reddit | yt")
+    keywords: str = Field(default="", description="关键词，以英文逗号分隔")
+    login_type: Optional[str] = Field(default=None, description="登录方式，为空时使用全局配置")
+    crawler_type: str = Field(default="search", description="爬取类型，search | detail | creator")
+    save_data_option: Optional[str] = Field(default=None, description="数据保存方式，为空时使用全局配置")
+    max_notes_count: Optional[int] = Field(default=None, description="最大爬取数量，为空时使用全局配置")
+    enable_get_comments: Optional[bool] = Field(default=None, description="是否爬取评论，为空时使用全局配置")
+    extra_config: Dict[str, Any] = Field(default_factory=dict, description="其他需要覆盖的配置项，例如 {'HEADLESS': True}")
+
+    def to_config_overrides(self) -> Dict[str, Any]:
+        overrides: Dict[str, Any] = {
+            "PLATFORM": self.platform,
+            "KEYWORDS": self.keywords,
+            "CRAWLER_TYPE": self.crawler_type,
+        }
+        if self.login_type is not None:
+            overrides["LOGIN_TYPE"] = self.login_type
+        if self.save_data_option is not None:
+            overrides["SAVE_DATA_OPTION"] = self.save_data_option
+        if self.max_notes_count is not None:
+            overrides["CRAWLER_MAX_NOTES_COUNT"] = self.max_notes_count
+        if self.enable_get_comments is not None:
+            overrides["ENABLE_GET_COMMENTS"] = self.enable_get_comments
+        overrides.update(self.extra_config)
+        return overrides
+
+
+class ScheduledJobConfig(CrawlJobConfig):
+    """
+    定时任务(scheduler.py)的配置：在单次爬取任务配置的基础上增加调度参数，
+    同一平台可以配置多个任务，例如不同的博主列表通过 extra_config 覆盖 DY_CREATOR_ID_LIST 并使用不同的间隔
+    """
+    name: str = Field(default="", description="任务名，为空时使用平台名；同名任务上一次未结束时跳过本次")
+    interval_seconds: Optional[float] = Field(default=None, description="运行间隔（秒），为空且未配置 cron 时使用 SCHEDULE_INTERVAL")
+    cron: Optional[str] = Field(default=None, description="cron 表达式（分 时 日 月 周），配置后优先于 interval_seconds")
+    jitter_seconds: float = Field(default=0, description="每次运行时间随机推迟 0~jitter_seconds 秒")
+    run_on_start: bool = Field(default=True, description="调度器启动后是否立即运行一次")
+    enabled: bool = Field(default=True, description="是否启用")
+
+    @property
+    def job_name(self) -> str:
+        return self.name or self.platform
+
+
+class CrawlJobResult(BaseModel):
+    """
+    单个平台爬取任务的结构化结果
+    """
+    platform: str = Field(..., description="平台")
+    keywords_count: int = Field(default=0, description="关键词数量")
+    success: bool = Field(default=False, description="是否成功")
+    error: Optional[str] = Field(default=None, description="失败原因")
+    notes_count: int = Field(default=0, description="保存的内容数")
+    comments_count: int = Field(default=0, description="保存的评论数")
+    errors_count: int = Field(default=0, description="ERROR 级别日志条数")
+    start_time: str = Field(default="", description="开始时间")
+    end_time: str = Field(default="", description="结束时间")
+    duration_seconds: float = Field(default=0, description="耗时（秒）")
@@ -16,7 +16,7 @@
 # @Url     : 快代理HTTP实现，官方文档：https://www.kuaidaili.com/?ref=ldwkjqipvz6c
 import json
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Tuple
 
 import config
 from cache.abs_cache import AbstractCache
@@ -43,33 +43,44 @@ class ProxyProvider(ABC):
 
 
 class IpCache:
-    def __init__(self):
-        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=config.CACHE_TYPE_MEMORY)
+    def __init__(self, cache_type: Optional[str] = None):
+        """
+        :param cache_type: 缓存类型，默认 config.IP_PROXY_CACHE_TYPE；多个爬虫进程共享代理 IP 时使用 async_redis
+        """
+        self.cache_client: AbstractCache = CacheFactory.create_cache(cache_type=cache_type or config.IP_PROXY_CACHE_TYPE)
 
-    def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
+    async def set_ip(self, ip_key: str, ip_value_info: str, ex: int):
         """
-        设置IP并带有过期时间，到期之后由 redis 负责删除
+        设置IP并带有过期时间，到期之后由缓存负责删除
         :param ip_key:
         :param ip_value_info:
         :param ex:
         :return:
         """
-        self.cache_client.set(key=ip_key, value=ip_value_info, expire_time=ex)
+        await self.cache_client.aset(key=ip_key, value=ip_value_info, expire_time=ex)
+
+    async def set_ips(self, items: List[Tuple[str, str, int]]):
+        """
+        批量设置IP，redis 缓存时一次往返写入
+        :param items: (ip_key, ip_value_info, ex) 列表
+        :return:
+        """
+        if items:
+            await self.cache_client.aset_many(items)
 
-    def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
+    async def load_all_ip(self, proxy_brand_name: str) -> List[IpInfoModel]:
         """
-        从 redis 中加载所有还未过期的 IP 信息
+        从缓存中加载所有还未过期的 IP 信息：SCAN 出所有 key 后一次批量读取
         :param proxy_brand_name: 代理商名称
         :return:
         """
         all_ip_list: List[IpInfoModel] = []
-        all_ip_keys: List[str] = self.cache_client.keys(pattern=f"{proxy_brand_name}_*")
         try:
-            for ip_key in all_ip_keys:
-                ip_value = self.cache_client.get(ip_key)
+            all_ip_keys: List[str] = await self.cache_client.akeys(pattern=f"{proxy_brand_name}_*")
+            for ip_value in await self.cache_client.amget(all_ip_keys):
                 if not ip_value:
                     continue
                 all_ip_list.append(IpInfoModel(**json.loads(ip_value)))
         except Exception as e:
-            utils.logger.error("[IpCache.load_all_ip] get ip err from redis db", e)
+            utils.logger.error(f"[IpCache.load_all_ip] get ip err from cache: {e}")
         return all_ip_list
@@ -51,7 +51,7 @@ class JiSuHttpProxy(ProxyProvider):
         """
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -59,6 +59,7 @@ class JiSuHttpProxy(ProxyProvider):
         need_get_count = num - len(ip_cache_list)
         self.params.update({"num": need_get_count})
         ip_infos = []
+        cache_items = []
         async with httpx.AsyncClient() as client:
             url = self.api_path + "/fetchips" + '?' + urlencode(self.params)
             utils.logger.info(f"[JiSuHttpProxy.get_proxy] get ip proxy url:{url}")
@@ -80,9 +81,10 @@ class JiSuHttpProxy(ProxyProvider):
                     ip_key = f"JISUHTTP_{ip_info_model.ip}_{ip_info_model.port}_{ip_info_model.user}_{ip_info_model.password}"
                     ip_value = ip_info_model.json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
+                    cache_items.append((ip_key, ip_value, ip_info_model.expired_time_ts - current_ts))
             else:
                 raise IpGetError(res_dict.get("msg", "unkown err"))
+        await self.ip_cache.set_ips(cache_items)
         return ip_cache_list + ip_infos
 
 
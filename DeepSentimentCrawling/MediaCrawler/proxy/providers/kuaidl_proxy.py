@@ -28,7 +28,7 @@ from tools import utils
 class KuaidailiProxyModel(BaseModel):
     ip: str = Field("ip")
     port: int = Field("端口")
-    expire_ts: int = Field("过期时间")
+    expire_ts: int = Field("剩余有效时间（秒）")
 
 
 def parse_kuaidaili_proxy(proxy_info: str) -> KuaidailiProxyModel:
@@ -92,7 +92,7 @@ class KuaiDaiLiProxy(ProxyProvider):
         uri = "/api/getdps/"
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -101,6 +101,8 @@ class KuaiDaiLiProxy(ProxyProvider):
         self.params.update({"num": need_get_count})
 
         ip_infos: List[IpInfoModel] = []
+        cache_items = []
+        current_ts = utils.get_unix_timestamp()
         async with httpx.AsyncClient() as client:
             response = await client.get(self.api_base + uri, params=self.params)
 
@@ -121,13 +123,15 @@ class KuaiDaiLiProxy(ProxyProvider):
                     port=proxy_model.port,
                     user=self.kdl_user_name,
                     password=self.kdl_user_pwd,
-                    expired_time_ts=proxy_model.expire_ts,
-
+                    # f_et=1 返回的是剩余秒数，换算成过期时间戳，代理池据此提前补充
+                    expired_time_ts=current_ts + proxy_model.expire_ts,
                 )
                 ip_key = f"{self.proxy_brand_name}_{ip_info_model.ip}_{ip_info_model.port}"
-                self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=ip_info_model.expired_time_ts)
+                cache_items.append((ip_key, ip_info_model.model_dump_json(), proxy_model.expire_ts))
                 ip_infos.append(ip_info_model)
 
+        await self.ip_cache.set_ips(cache_items)
+
         return ip_cache_list + ip_infos
 
 
@@ -46,7 +46,7 @@ class WanDouHttpProxy(ProxyProvider):
         """
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(
+        ip_cache_list = await self.ip_cache.load_all_ip(
             proxy_brand_name=self.proxy_brand_name
         )
         if len(ip_cache_list) >= num:
@@ -56,6 +56,7 @@ class WanDouHttpProxy(ProxyProvider):
         need_get_count = num - len(ip_cache_list)
         self.params.update({"num": min(need_get_count, 100)})  # 最大100
         ip_infos = []
+        cache_items = []
         async with httpx.AsyncClient() as client:
             url = self.api_path + "?" + urlencode(self.params)
             utils.logger.info(f"[WanDouHttpProxy.get_proxy] get ip proxy url:{url}")
@@ -82,9 +83,7 @@ class WanDouHttpProxy(ProxyProvider):
                     ip_key = f"WANDOUHTTP_{ip_info_model.ip}_{ip_info_model.port}"
                     ip_value = ip_info_model.model_dump_json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(
-                        ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts
-                    )
+                    cache_items.append((ip_key, ip_value, ip_info_model.expired_time_ts - current_ts))
             else:
                 error_msg = res_dict.get("msg", "unknown error")
                 # 处理具体错误码
@@ -94,6 +93,7 @@ class WanDouHttpProxy(ProxyProvider):
                 elif error_code == 10048:
                     error_msg = "没有可用套餐"
                 raise IpGetError(f"{error_msg} (code: {error_code})")
+        await self.ip_cache.set_ips(cache_items)
         return ip_cache_list + ip_infos
 
 
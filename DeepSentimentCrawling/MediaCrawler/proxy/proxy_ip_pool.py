@@ -12,11 +12,19 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
-import random
-from typing import Dict, List
+#
+# 原来 get_proxy 随机取出一个 IP，在请求路径上新建 httpx 客户端同步校验，失败后固定等待 1 秒重试。
+# 现在代理池在后台任务中定时并发校验所有候选 IP，为每个 IP 记录成功率和延迟评分：
+#   - get_proxy 只从已校验通过的 IP 中挑选评分最高、租用最少的一个，不在请求路径上校验
+#   - 同一个租用标识（平台:账号）固定使用同一个 IP，直到它失效、被剔除或即将过期，浏览器会话和登录态可以跨周期复用
+#   - 连续失败达到 IP_PROXY_MAX_FAILURES 次的 IP 立即剔除，可用 IP 不足或即将过期时提前向代理商补充
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 import config
 from proxy.providers import (
@@ -25,9 +33,67 @@ from proxy.providers import (
 )
 from tools import utils
 
-from .base_proxy import ProxyProvider
+from .base_proxy import IpGetError, ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
+# 延迟的指数移动平均系数
+LATENCY_EMA_ALPHA = 0.3
+
+
+def _proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+@dataclass
+class ProxyEntry:
+    """
+    代理池中的一个 IP 及其健康状态
+    """
+    proxy: IpInfoModel
+    successes: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    latency_ms: Optional[float] = None
+    # 最近一次校验的时间（time.monotonic），0 表示还没校验过
+    checked_at: float = 0.0
+    # 最近一次校验是否通过
+    validated: bool = False
+
+    @property
+    def score(self) -> float:
+        """
+        健康评分：平滑后的成功率除以延迟因子，越大越好
+        """
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return success_rate / (1 + (self.latency_ms or 0) / 1000)
+
+    def record(self, ok: bool, latency_ms: Optional[float] = None) -> None:
+        """
+        记录一次校验或使用结果
+        :param ok: 是否成功
+        :param latency_ms: 耗时（毫秒）
+        :return:
+        """
+        if ok:
+            self.successes += 1
+            self.consecutive_failures = 0
+            if latency_ms is not None:
+                self.latency_ms = latency_ms if self.latency_ms is None else \
+                    LATENCY_EMA_ALPHA * latency_ms + (1 - LATENCY_EMA_ALPHA) * self.latency_ms
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+
+    def seconds_left(self, now: float) -> Optional[float]:
+        """
+        距离过期的秒数，代理商没有给出过期时间时为 None
+        :param now: 当前 unix 时间戳
+        :return:
+        """
+        if not self.proxy.expired_time_ts:
+            return None
+        return self.proxy.expired_time_ts - now
+
 
 class ProxyIpPool:
 
@@ -37,23 +103,60 @@ class ProxyIpPool:
         """
 
         Args:
-            ip_pool_count:
-            enable_validate_ip:
-            ip_provider:
+            ip_pool_count: 保持可用的 IP 数量
+            enable_validate_ip: 是否校验 IP，关闭时代理商返回的 IP 直接视为可用
+            ip_provider: 代理商
         """
         self.valid_ip_url = "https://echo.apifox.cn/"  # 验证 IP 是否有效的地址
         self.ip_pool_count = ip_pool_count
         self.enable_validate_ip = enable_validate_ip
-        self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self._entries: Dict[str, ProxyEntry] = {}
+        # 租用标识 -> IP key
+        self._leases: Dict[str, str] = {}
+        # 因连续失败被剔除的 IP key -> 解禁时间（unix 时间戳），代理商缓存中再次返回时不重新加入
+        self._banned: Dict[str, float] = {}
+        self._maintain_task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def proxy_list(self) -> List[IpInfoModel]:
+        """
+        当前可以租用的 IP，按评分从高到低
+        """
+        return [entry.proxy for entry in sorted(self._usable_entries(), key=lambda entry: -entry.score)]
+
+    def _get_refresh_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._refresh_lock is None or self._refresh_lock_loop is not loop:
+            self._refresh_lock = asyncio.Lock()
+            self._refresh_lock_loop = loop
+        return self._refresh_lock
+
+    def _is_usable(self, entry: ProxyEntry, now: float) -> bool:
+        if entry.consecutive_failures >= config.IP_PROXY_MAX_FAILURES:
+            return False
+        seconds_left = entry.seconds_left(now)
+        if seconds_left is not None and seconds_left <= 0:
+            return False
+        return entry.validated or not self.enable_validate_ip
+
+    def _is_expiring(self, entry: ProxyEntry, now: float) -> bool:
+        seconds_left = entry.seconds_left(now)
+        return seconds_left is not None and seconds_left <= config.IP_PROXY_PREFETCH_BEFORE_EXPIRE
+
+    def _usable_entries(self) -> List[ProxyEntry]:
+        now = utils.get_unix_timestamp()
+        return [entry for entry in self._entries.values() if self._is_usable(entry, now)]
 
     async def load_proxies(self) -> None:
         """
-        加载IP代理
+        加载IP代理并完成首次校验
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxy(self.ip_pool_count)
+        await self.refresh()
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
@@ -61,53 +164,207 @@ class ProxyIpPool:
         :param proxy:
         :return:
         """
-        utils.logger.info(
-            f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} is it valid "
-        )
+        _, proxy_url = utils.format_proxy_info(proxy)
         try:
-            # httpx 0.28.1 需要直接传入代理URL字符串，而不是字典
-            if proxy.user and proxy.password:
-                proxy_url = f"http://{proxy.user}:{proxy.password}@{proxy.ip}:{proxy.port}"
-            else:
-                proxy_url = f"http://{proxy.ip}:{proxy.port}"
-            
-            async with httpx.AsyncClient(proxy=proxy_url) as client:
+            async with httpx.AsyncClient(proxy=proxy_url, timeout=config.IP_PROXY_VALIDATE_TIMEOUT) as client:
                 response = await client.get(self.valid_ip_url)
-            if response.status_code == 200:
-                return True
-            else:
-                return False
+            return response.status_code == 200
         except Exception as e:
             utils.logger.info(
                 f"[ProxyIpPool._is_valid_proxy] testing {proxy.ip} err: {e}"
             )
-            raise e
+            return False
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def get_proxy(self) -> IpInfoModel:
+    async def _validate(self, entry: ProxyEntry, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            ok = await self._is_valid_proxy(entry.proxy)
+            entry.record(ok, (time.perf_counter() - start) * 1000)
+            entry.validated = ok
+            entry.checked_at = time.monotonic()
+
+    def _evict(self) -> None:
+        """
+        剔除已过期和连续失败过多的 IP，并解除指向它们的租用
         """
-        从代理池中随机提取一个代理IP
+        now = utils.get_unix_timestamp()
+        for key, entry in list(self._entries.items()):
+            seconds_left = entry.seconds_left(now)
+            failed = entry.consecutive_failures >= config.IP_PROXY_MAX_FAILURES
+            if failed or (seconds_left is not None and seconds_left <= 0):
+                del self._entries[key]
+                if failed:
+                    self._banned[key] = now + config.IP_PROXY_REVALIDATE_SECONDS
+                utils.logger.info(
+                    f"[ProxyIpPool._evict] evict {key}, failures: {entry.consecutive_failures}, seconds left: {seconds_left}"
+                )
+        self._leases = {lease_key: key for lease_key, key in self._leases.items() if key in self._entries}
+        self._banned = {key: until for key, until in self._banned.items() if until > now}
+
+    async def _prefetch(self) -> None:
+        """
+        可用（或尚未校验）且不会很快过期的 IP 少于 ip_pool_count 时向代理商补充
+        """
+        now = utils.get_unix_timestamp()
+        fresh_count = sum(
+            1 for entry in self._entries.values()
+            if (self._is_usable(entry, now) or not entry.checked_at) and not self._is_expiring(entry, now)
+        )
+        missing = self.ip_pool_count - fresh_count
+        if missing <= 0:
+            return
+        # 只要还缺的数量，并过滤掉池中已有的和被剔除的 IP。代理商优先返回缓存中的 IP（可能是 async_redis 共享缓存），
+        # 过滤后不够且结果中有已知 IP 时，在上次的数量上加还缺的数量再要一次：上次的结果全部来自缓存，
+        # 代理商最多只为还缺的数量购买新 IP；已知 IP 最多 len(_entries) + len(_banned) 个，轮数有上限
+        requested = missing
+        added = 0
+        for _ in range(len(self._entries) + len(self._banned) + 1):
+            try:
+                proxies = await self.ip_provider.get_proxy(requested)
+            except Exception as e:
+                utils.logger.error(f"[ProxyIpPool._prefetch] get proxy from provider failed: {e}")
+                break
+            known = 0
+            for proxy in proxies:
+                key = _proxy_key(proxy)
+                if key in self._entries or key in self._banned:
+                    known += 1
+                    continue
+                self._entries[key] = ProxyEntry(proxy=proxy)
+                added += 1
+            if added >= missing or not known or len(proxies) < requested:
+                break
+            requested = len(proxies) + missing - added
+        utils.logger.info(f"[ProxyIpPool._prefetch] {added} new proxies, pool size: {len(self._entries)}")
+
+    async def refresh(self) -> None:
+        """
+        一轮维护：剔除失效 IP、提前补充、并发校验新 IP 和校验结果过期的 IP
         :return:
         """
-        if len(self.proxy_list) == 0:
-            await self._reload_proxies()
+        async with self._get_refresh_lock():
+            self._evict()
+            await self._prefetch()
+            if not self.enable_validate_ip:
+                return
+            now = time.monotonic()
+            stale = [
+                entry for entry in self._entries.values()
+                if not entry.checked_at or now - entry.checked_at >= config.IP_PROXY_REVALIDATE_SECONDS
+            ]
+            if stale:
+                semaphore = asyncio.Semaphore(max(1, config.IP_PROXY_VALIDATE_CONCURRENCY))
+                await asyncio.gather(*(self._validate(entry, semaphore) for entry in stale))
+            self._evict()
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy)  # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception(
-                    "[ProxyIpPool.get_proxy] current ip invalid and again get it"
-                )
-        return proxy
+    async def _maintain(self) -> None:
+        while True:
+            await asyncio.sleep(config.IP_PROXY_VALIDATE_INTERVAL)
+            try:
+                await self.refresh()
+            except Exception as e:
+                utils.logger.error(f"[ProxyIpPool._maintain] refresh proxies failed: {e}")
+
+    def _ensure_maintenance(self) -> None:
+        loop = asyncio.get_running_loop()
+        task = self._maintain_task
+        if task is None or task.done() or task.get_loop() is not loop:
+            self._maintain_task = loop.create_task(self._maintain())
+
+    def _pick(self, exclude: Optional[str] = None) -> Optional[Tuple[str, ProxyEntry]]:
+        now = utils.get_unix_timestamp()
+        candidates = [(key, entry) for key, entry in self._entries.items()
+                      if key != exclude and self._is_usable(entry, now)]
+        if not candidates:
+            return None
+        lease_counts: Dict[str, int] = {}
+        for key in self._leases.values():
+            lease_counts[key] = lease_counts.get(key, 0) + 1
+        # 优先不会很快过期的 IP，其次按评分和已租用数量分摊
+        return max(candidates, key=lambda item: (
+            not self._is_expiring(item[1], now), item[1].score / (1 + lease_counts.get(item[0], 0)),
+        ))
+
+    async def get_proxy(self, lease_key: str = "", rotate: bool = False) -> IpInfoModel:
+        """
+        租用一个代理IP
+        :param lease_key: 租用标识（例如 平台:账号），相同标识固定使用同一个 IP；为空时每次按评分挑选
+        :param rotate: 当前租用的 IP 不可用，记一次失败并换一个
+        :return:
+        """
+        self._ensure_maintenance()
+        exclude = None
+        if lease_key and rotate and lease_key in self._leases:
+            exclude = self._leases.pop(lease_key)
+            if exclude in self._entries:
+                self._entries[exclude].record(False)
+
+        current = self._entries.get(self._leases.get(lease_key, "")) if lease_key else None
+        now = utils.get_unix_timestamp()
+        if current is not None and self._is_usable(current, now):
+            if not self._is_expiring(current, now):
+                return current.proxy
+            # 即将过期：已经补充到新 IP 时换过去，否则继续使用到过期
+            picked = self._pick(exclude)
+            if picked is None or self._is_expiring(picked[1], now):
+                return current.proxy
+
+        for _ in range(3):
+            picked = self._pick(exclude)
+            if picked is not None:
+                key, entry = picked
+                if lease_key:
+                    self._leases[lease_key] = key
+                return entry.proxy
+            # 没有可用 IP（首次使用或全部失效），立即补充并校验，不再固定等待
+            await self.refresh()
+        raise IpGetError("[ProxyIpPool.get_proxy] no valid proxy available")
 
-    async def _reload_proxies(self):
+    def report(self, proxy: IpInfoModel, ok: bool, latency_ms: Optional[float] = None) -> None:
         """
-        # 重新加载代理池
+        爬虫反馈一次使用结果，计入评分；连续失败过多的 IP 会被剔除
+        :param proxy:
+        :param ok:
+        :param latency_ms:
+        :return:
+        """
+        entry = self._entries.get(_proxy_key(proxy))
+        if entry is None:
+            return
+        entry.record(ok, latency_ms)
+        if not ok:
+            self._evict()
+
+    def stats(self) -> List[Dict]:
+        """
+        每个 IP 的评分和租用情况
         :return:
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        now = utils.get_unix_timestamp()
+        leased = set(self._leases.values())
+        return [
+            {
+                "proxy": key,
+                "score": round(entry.score, 3),
+                "latency_ms": round(entry.latency_ms, 1) if entry.latency_ms is not None else None,
+                "successes": entry.successes,
+                "failures": entry.failures,
+                "usable": self._is_usable(entry, now),
+                "leased": key in leased,
+                "seconds_left": entry.seconds_left(now),
+            }
+            for key, entry in self._entries.items()
+        ]
+
+    async def close(self) -> None:
+        """
+        停止后台校验任务
+        :return:
+        """
+        task, self._maintain_task = self._maintain_task, None
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
@@ -115,22 +372,46 @@ IpProxyProvider: Dict[str, ProxyProvider] = {
     ProviderNameEnum.WANDOU_HTTP_PROVIDER.value: new_wandou_http_proxy(),
 }
 
+# 代理商名称 -> 共享的代理池，多个爬虫和定时任务的多次运行共用同一组已校验的 IP 和租用关系
+_ip_pools: Dict[str, ProxyIpPool] = {}
+
 
 async def create_ip_pool(ip_pool_count: int, enable_validate_ip: bool) -> ProxyIpPool:
     """
-     创建 IP 代理池
+     获取当前代理商的 IP 代理池，首次调用时创建并加载
     :param ip_pool_count: ip池子的数量
     :param enable_validate_ip: 是否开启验证IP代理
     :return:
     """
-    pool = ProxyIpPool(
-        ip_pool_count=ip_pool_count,
-        enable_validate_ip=enable_validate_ip,
-        ip_provider=IpProxyProvider.get(config.IP_PROXY_PROVIDER_NAME),
-    )
-    await pool.load_proxies()
+    provider_name = config.IP_PROXY_PROVIDER_NAME
+    pool = _ip_pools.get(provider_name)
+    if pool is None:
+        pool = ProxyIpPool(
+            ip_pool_count=ip_pool_count,
+            enable_validate_ip=enable_validate_ip,
+            ip_provider=IpProxyProvider.get(provider_name),
+        )
+        _ip_pools[provider_name] = pool
+    else:
+        pool.ip_pool_count = max(pool.ip_pool_count, ip_pool_count)
+        pool.enable_validate_ip = pool.enable_validate_ip or enable_validate_ip
+    if not pool.proxy_list:
+        await pool.load_proxies()
     return pool
 
 
+async def shutdown_ip_pools() -> None:
+    """
+    停止所有代理池的后台校验任务
+    """
+    pools = list(_ip_pools.values())
+    _ip_pools.clear()
+    for pool in pools:
+        stats = pool.stats()
+        if stats:
+            utils.logger.info(f"[ProxyIpPool] proxy stats: {stats}")
+        await pool.close()
+
+
 if __name__ == "__main__":
     pass
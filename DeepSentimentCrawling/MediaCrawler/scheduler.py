@@ -1,7 +1,5 @@
-
 import asyncio
 import os
-import time
 from typing import List
 
 from dotenv import load_dotenv
@@ -10,103 +8,53 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import config
-import db
-from main import CrawlerFactory
+from crawler_runner import MultiPlatformRunner
+from model.m_crawl_job import ScheduledJobConfig
 from tools import utils
-from cache.local_cache import shutdown_all_local_caches
+from tools.crawl_stats import CrawlStatsLogHandler
+from tools.job_scheduler import JobScheduler
 
 # 定时任务配置
 SLEEP_INTERVAL = int(os.getenv("SCHEDULE_INTERVAL", 3600))  # 默认 1 小时
 PLATFORMS_TO_CRAWL = ["dy", "yt"]
 
-async def run_crawler_task(platform: str):
-    """运行单个平台的爬取任务"""
-    utils.logger.info(f"[{platform}] >>> Starting periodic crawl task")
-    
-    # 临时备份原始配置（如果以后有需要恢复的话）
-    orig_platform = config.PLATFORM
-    orig_crawler_type = config.CRAWLER_TYPE
-    crawler = None  # Initialize to None so it's accessible in finally
-    
-    try:
-        # 设置平台特定的配置
-        config.PLATFORM = platform
-        config.CRAWLER_TYPE = "creator"  # 默认使用创作者模式进行定期更新
-        
-        # 初始化数据库连接
-        if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
-            utils.logger.info(f"[{platform}] Initializing database connection...")
-            await db.init_db()
-            
-        # 创建并启动爬虫
-        utils.logger.info(f"[{platform}] Creating crawler instance...")
-        crawler = CrawlerFactory.create_crawler(platform)
-        
-        utils.logger.info(f"[{platform}] Starting crawl...")
-        await crawler.start()
-        
-        utils.logger.info(f"[{platform}] Crawl task finished successfully")
-            
-    except Exception as e:
-        utils.logger.error(f"[{platform}] Crawl task failed: {e}")
-        import traceback
-        utils.logger.error(traceback.format_exc())
-    finally:
-        # 清理爬虫资源（浏览器等）
-        if crawler and hasattr(crawler, "close"):
-            try:
-                utils.logger.info(f"[{platform}] Closing crawler...")
-                await crawler.close()
-                utils.logger.info(f"[{platform}] Crawler closed successfully")
-            except Exception as e:
-                utils.logger.warning(f"[{platform}] Error closing crawler: {e}")
-        
-        # 关闭数据库连接
-        if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
-            try:
-                await db.close()
-                utils.logger.info(f"[{platform}] Database connection closed")
-            except Exception as e:
-                utils.logger.warning(f"[{platform}] Error closing database: {e}")
-        
-        # 清理缓存
-        try:
-            await shutdown_all_local_caches()
-        except:
-            pass
-            
-        # 恢复基础配置
-        config.PLATFORM = orig_platform
-        config.CRAWLER_TYPE = orig_crawler_type
-        
-        utils.logger.info(f"[{platform}] <<< Finished periodic crawl task")
+
+def load_schedule_jobs() -> List[ScheduledJobConfig]:
+    """
+    读取 SCHEDULE_JOBS；未配置时每个 PLATFORMS_TO_CRAWL 平台一个创作者任务（默认使用创作者模式进行定期更新）
+    """
+    if config.SCHEDULE_JOBS:
+        return [ScheduledJobConfig(**dict({"keywords": config.KEYWORDS}, **item)) for item in config.SCHEDULE_JOBS]
+    return [
+        ScheduledJobConfig(platform=platform, keywords=config.KEYWORDS, crawler_type="creator", interval_seconds=SLEEP_INTERVAL)
+        for platform in PLATFORMS_TO_CRAWL
+    ]
+
 
 async def main():
     """主循环"""
+    jobs = load_schedule_jobs()
     utils.logger.info("==================================================")
     utils.logger.info("  MediaCrawler Periodic Scheduler Server Started  ")
-    utils.logger.info(f"  Interval: {SLEEP_INTERVAL} seconds")
-    utils.logger.info(f"  Platforms: {PLATFORMS_TO_CRAWL}")
+    utils.logger.info(f"  Default interval: {SLEEP_INTERVAL} seconds, max concurrency: {config.SCHEDULE_MAX_CONCURRENCY}")
+    for job in jobs:
+        utils.logger.info(f"  Job {job.job_name}: {job.platform}/{job.crawler_type}, "
+                          f"{job.cron or job.interval_seconds or SLEEP_INTERVAL}, jitter: {job.jitter_seconds}s")
     utils.logger.info("==================================================")
-    
-    while True:
-        start_time = time.time()
-        
-        # 依次运行各个平台的任务
-        for platform in PLATFORMS_TO_CRAWL:
-            try:
-                await run_crawler_task(platform)
-            except Exception as e:
-                utils.logger.error(f"Critical error in scheduler loop for {platform}: {e}")
-            
-            # 平台任务之间稍微停顿一下，避免过于密集
-            await asyncio.sleep(5)
-            
-        elapsed = time.time() - start_time
-        sleep_time = max(0, SLEEP_INTERVAL - elapsed)
-        
-        utils.logger.info(f"Full cycle complete in {elapsed:.2f}s. Next cycle in {sleep_time:.2f}s...")
-        await asyncio.sleep(sleep_time)
+
+    # 浏览器会话跨周期复用，只在调度器退出时关闭
+    config.ENABLE_BROWSER_SESSION_POOL = True
+    # 每个任务在自己的 asyncio 任务中运行，平台/爬取类型等通过任务配置覆盖传入，不修改全局配置
+    runner = MultiPlatformRunner(max_concurrency=config.SCHEDULE_MAX_CONCURRENCY)
+    scheduler = JobScheduler(jobs, runner.run_job, default_interval=SLEEP_INTERVAL)
+    stats_handler = CrawlStatsLogHandler()
+    utils.logger.addHandler(stats_handler)
+    try:
+        await scheduler.run_forever()
+    finally:
+        utils.logger.removeHandler(stats_handler)
+        utils.logger.info(f"Scheduler stopped, job stats: {scheduler.stats()}")
+        await runner.shutdown_shared_resources(jobs)
 
 if __name__ == "__main__":
     try:
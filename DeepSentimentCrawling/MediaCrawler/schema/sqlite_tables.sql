@@ -17,20 +17,21 @@ CREATE TABLE bilibili_video (
     title TEXT DEFAULT NULL,
     desc TEXT,
     create_time INTEGER NOT NULL,
-    liked_count TEXT DEFAULT NULL,
-    disliked_count TEXT DEFAULT NULL,
-    video_play_count TEXT DEFAULT NULL,
-    video_favorite_count TEXT DEFAULT NULL,
-    video_share_count TEXT DEFAULT NULL,
-    video_coin_count TEXT DEFAULT NULL,
-    video_danmaku TEXT DEFAULT NULL,
-    video_comment TEXT DEFAULT NULL,
+    liked_count INTEGER DEFAULT NULL,
+    disliked_count INTEGER DEFAULT NULL,
+    video_play_count INTEGER DEFAULT NULL,
+    video_favorite_count INTEGER DEFAULT NULL,
+    video_share_count INTEGER DEFAULT NULL,
+    video_coin_count INTEGER DEFAULT NULL,
+    video_danmaku INTEGER DEFAULT NULL,
+    video_comment INTEGER DEFAULT NULL,
     video_url TEXT DEFAULT NULL,
     video_cover_url TEXT DEFAULT NULL,
-    source_keyword TEXT DEFAULT ''
+    source_keyword TEXT DEFAULT '',
+    transcription TEXT DEFAULT NULL
 );
 
-CREATE INDEX idx_bilibili_vi_video_i_31c36e ON bilibili_video(video_id);
+CREATE UNIQUE INDEX idx_bilibili_vi_video_i_31c36e ON bilibili_video(video_id);
 CREATE INDEX idx_bilibili_vi_create__73e0ec ON bilibili_video(create_time);
 
 -- ----------------------------
@@ -50,12 +51,12 @@ CREATE TABLE bilibili_video_comment (
     video_id TEXT NOT NULL,
     content TEXT,
     create_time INTEGER NOT NULL,
-    sub_comment_count TEXT NOT NULL,
+    sub_comment_count INTEGER NOT NULL,
     parent_comment_id TEXT DEFAULT NULL,
-    like_count TEXT NOT NULL DEFAULT '0'
+    like_count INTEGER NOT NULL DEFAULT 0
 );
 
-CREATE INDEX idx_bilibili_vi_comment_41c34e ON bilibili_video_comment(comment_id);
+CREATE UNIQUE INDEX idx_bilibili_vi_comment_41c34e ON bilibili_video_comment(comment_id);
 CREATE INDEX idx_bilibili_vi_video_i_f22873 ON bilibili_video_comment(video_id);
 
 -- ----------------------------
@@ -142,19 +143,20 @@ CREATE TABLE douyin_aweme (
     title TEXT DEFAULT NULL,
     desc TEXT,
     create_time INTEGER NOT NULL,
-    liked_count TEXT DEFAULT NULL,
-    comment_count TEXT DEFAULT NULL,
-    share_count TEXT DEFAULT NULL,
-    collected_count TEXT DEFAULT NULL,
+    liked_count INTEGER DEFAULT NULL,
+    comment_count INTEGER DEFAULT NULL,
+    share_count INTEGER DEFAULT NULL,
+    collected_count INTEGER DEFAULT NULL,
     aweme_url TEXT DEFAULT NULL,
     cover_url TEXT DEFAULT NULL,
     video_download_url TEXT DEFAULT NULL,
     music_download_url TEXT DEFAULT NULL,
     note_download_url TEXT DEFAULT NULL,
-    source_keyword TEXT DEFAULT ''
+    source_keyword TEXT DEFAULT '',
+    transcription TEXT DEFAULT NULL
 );
 
-CREATE INDEX idx_douyin_awem_aweme_i_6f7bc6 ON douyin_aweme(aweme_id);
+CREATE UNIQUE INDEX idx_douyin_awem_aweme_i_6f7bc6 ON douyin_aweme(aweme_id);
 CREATE INDEX idx_douyin_awem_create__299dfe ON douyin_aweme(create_time);
 
 -- ----------------------------
@@ -177,13 +179,13 @@ CREATE TABLE douyin_aweme_comment (
     aweme_id TEXT NOT NULL,
     content TEXT,
     create_time INTEGER NOT NULL,
-    sub_comment_count TEXT NOT NULL,
+    sub_comment_count INTEGER NOT NULL,
     parent_comment_id TEXT DEFAULT NULL,
-    like_count TEXT NOT NULL DEFAULT '0',
+    like_count INTEGER NOT NULL DEFAULT 0,
     pictures TEXT NOT NULL DEFAULT ''
 );
 
-CREATE INDEX idx_douyin_awem_comment_fcd7e4 ON douyin_aweme_comment(comment_id);
+CREATE UNIQUE INDEX idx_douyin_awem_comment_fcd7e4 ON douyin_aweme_comment(comment_id);
 CREATE INDEX idx_douyin_awem_aweme_i_c50049 ON douyin_aweme_comment(aweme_id);
 
 -- ----------------------------
@@ -222,15 +224,15 @@ CREATE TABLE kuaishou_video (
     title TEXT DEFAULT NULL,
     desc TEXT,
     create_time INTEGER NOT NULL,
-    liked_count TEXT DEFAULT NULL,
-    viewd_count TEXT DEFAULT NULL,
+    liked_count INTEGER DEFAULT NULL,
+    viewd_count INTEGER DEFAULT NULL,
     video_url TEXT DEFAULT NULL,
     video_cover_url TEXT DEFAULT NULL,
     video_play_url TEXT DEFAULT NULL,
     source_keyword TEXT DEFAULT ''
 );
 
-CREATE INDEX idx_kuaishou_vi_video_i_c5c6a6 ON kuaishou_video(video_id);
+CREATE UNIQUE INDEX idx_kuaishou_vi_video_i_c5c6a6 ON kuaishou_video(video_id);
 CREATE INDEX idx_kuaishou_vi_create__a10dee ON kuaishou_video(create_time);
 
 -- ----------------------------
@@ -248,10 +250,10 @@ CREATE TABLE kuaishou_video_comment (
     video_id TEXT NOT NULL,
     content TEXT,
     create_time INTEGER NOT NULL,
-    sub_comment_count TEXT NOT NULL
+    sub_comment_count INTEGER NOT NULL
 );
 
-CREATE INDEX idx_kuaishou_vi_comment_ed48fa ON kuaishou_video_comment(comment_id);
+CREATE UNIQUE INDEX idx_kuaishou_vi_comment_ed48fa ON kuaishou_video_comment(comment_id);
 CREATE INDEX idx_kuaishou_vi_video_i_e50914 ON kuaishou_video_comment(video_id);
 
 -- ----------------------------
@@ -272,14 +274,14 @@ CREATE TABLE weibo_note (
     content TEXT,
     create_time INTEGER NOT NULL,
     create_date_time TEXT NOT NULL,
-    liked_count TEXT DEFAULT NULL,
-    comments_count TEXT DEFAULT NULL,
-    shared_count TEXT DEFAULT NULL,
+    liked_count INTEGER DEFAULT NULL,
+    comments_count INTEGER DEFAULT NULL,
+    shared_count INTEGER DEFAULT NULL,
     note_url TEXT DEFAULT NULL,
     source_keyword TEXT DEFAULT ''
 );
 
-CREATE INDEX idx_weibo_note_note_id_f95b1a ON weibo_note(note_id);
+CREATE UNIQUE INDEX idx_weibo_note_note_id_f95b1a ON weibo_note(note_id);
 CREATE INDEX idx_weibo_note_create__692709 ON weibo_note(create_time);
 CREATE INDEX idx_weibo_note_create__d05ed2 ON weibo_note(create_date_time);
 
@@ -302,12 +304,12 @@ CREATE TABLE weibo_note_comment (
     content TEXT,
     create_time INTEGER NOT NULL,
     create_date_time TEXT NOT NULL,
-    comment_like_count TEXT NOT NULL,
-    sub_comment_count TEXT NOT NULL,
+    comment_like_count INTEGER NOT NULL,
+    sub_comment_count INTEGER NOT NULL,
     parent_comment_id TEXT DEFAULT NULL
 );
 
-CREATE INDEX idx_weibo_note__comment_c7611c ON weibo_note_comment(comment_id);
+CREATE UNIQUE INDEX idx_weibo_note__comment_c7611c ON weibo_note_comment(comment_id);
 CREATE INDEX idx_weibo_note__note_id_24f108 ON weibo_note_comment(note_id);
 CREATE INDEX idx_weibo_note__create__667fe3 ON weibo_note_comment(create_date_time);
 
@@ -369,10 +371,10 @@ CREATE TABLE xhs_note (
     video_url TEXT,
     time INTEGER NOT NULL,
     last_update_time INTEGER NOT NULL,
-    liked_count TEXT DEFAULT NULL,
-    collected_count TEXT DEFAULT NULL,
-    comment_count TEXT DEFAULT NULL,
-    share_count TEXT DEFAULT NULL,
+    liked_count INTEGER DEFAULT NULL,
+    collected_count INTEGER DEFAULT NULL,
+    comment_count INTEGER DEFAULT NULL,
+    share_count INTEGER DEFAULT NULL,
     image_list TEXT,
     tag_list TEXT,
     note_url TEXT DEFAULT NULL,
@@ -380,7 +382,7 @@ CREATE TABLE xhs_note (
     xsec_token TEXT DEFAULT NULL
 );
 
-CREATE INDEX idx_xhs_note_note_id_209457 ON xhs_note(note_id);
+CREATE UNIQUE INDEX idx_xhs_note_note_id_209457 ON xhs_note(note_id);
 CREATE INDEX idx_xhs_note_time_eaa910 ON xhs_note(time);
 
 -- ----------------------------
@@ -402,10 +404,10 @@ CREATE TABLE xhs_note_comment (
     sub_comment_count INTEGER NOT NULL,
     pictures TEXT DEFAULT NULL,
     parent_comment_id TEXT DEFAULT NULL,
-    like_count TEXT DEFAULT NULL
+    like_count INTEGER DEFAULT NULL
 );
 
-CREATE INDEX idx_xhs_note_co_comment_8e8349 ON xhs_note_comment(comment_id);
+CREATE UNIQUE INDEX idx_xhs_note_co_comment_8e8349 ON xhs_note_comment(comment_id);
 CREATE INDEX idx_xhs_note_co_create__204f8d ON xhs_note_comment(create_time);
 
 -- ----------------------------
@@ -433,7 +435,7 @@ CREATE TABLE tieba_note (
     source_keyword TEXT DEFAULT ''
 );
 
-CREATE INDEX idx_tieba_note_note_id ON tieba_note(note_id);
+CREATE UNIQUE INDEX idx_tieba_note_note_id ON tieba_note(note_id);
 CREATE INDEX idx_tieba_note_publish_time ON tieba_note(publish_time);
 
 -- ----------------------------
@@ -460,7 +462,7 @@ CREATE TABLE tieba_comment (
     last_modify_ts INTEGER NOT NULL
 );
 
-CREATE INDEX idx_tieba_comment_comment_id ON tieba_comment(comment_id);
+CREATE UNIQUE INDEX idx_tieba_comment_comment_id ON tieba_comment(comment_id);
 CREATE INDEX idx_tieba_comment_note_id ON tieba_comment(note_id);
 CREATE INDEX idx_tieba_comment_publish_time ON tieba_comment(publish_time);
 
@@ -510,7 +512,7 @@ CREATE TABLE zhihu_content (
     last_modify_ts INTEGER NOT NULL
 );
 
-CREATE INDEX idx_zhihu_content_content_id ON zhihu_content(content_id);
+CREATE UNIQUE INDEX idx_zhihu_content_content_id ON zhihu_content(content_id);
 CREATE INDEX idx_zhihu_content_created_time ON zhihu_content(created_time);
 
 -- ----------------------------
@@ -537,7 +539,7 @@ CREATE TABLE zhihu_comment (
     last_modify_ts INTEGER NOT NULL
 );
 
-CREATE INDEX idx_zhihu_comment_comment_id ON zhihu_comment(comment_id);
+CREATE UNIQUE INDEX idx_zhihu_comment_comment_id ON zhihu_comment(comment_id);
 CREATE INDEX idx_zhihu_comment_content_id ON zhihu_comment(content_id);
 CREATE INDEX idx_zhihu_comment_publish_time ON zhihu_comment(publish_time);
 
@@ -594,3 +596,28 @@ CREATE TABLE youtube_video (
 
 CREATE UNIQUE INDEX idx_youtube_video_video_id ON youtube_video(video_id);
 CREATE INDEX idx_youtube_video_publish_time ON youtube_video(publish_time);
+
+-- ----------------------------
+-- Table structure for creator_crawl_index
+-- ----------------------------
+DROP TABLE IF EXISTS creator_crawl_index;
+CREATE TABLE creator_crawl_index (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creator_key TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    creator_id TEXT NOT NULL,
+    high_water_mark INTEGER NOT NULL DEFAULT 0,
+    low_water_mark INTEGER NOT NULL DEFAULT 0,
+    known_ids TEXT DEFAULT NULL,
+    last_crawl_time INTEGER NOT NULL DEFAULT 0
+);
+
+-- 按搜索关键词 + 发布时间筛选的分析查询使用的组合索引
+CREATE INDEX idx_bilibili_video_keyword_time ON bilibili_video(source_keyword, create_time);
+CREATE INDEX idx_douyin_aweme_keyword_time ON douyin_aweme(source_keyword, create_time);
+CREATE INDEX idx_kuaishou_video_keyword_time ON kuaishou_video(source_keyword, create_time);
+CREATE INDEX idx_weibo_note_keyword_time ON weibo_note(source_keyword, create_time);
+CREATE INDEX idx_xhs_note_keyword_time ON xhs_note(source_keyword, time);
+CREATE INDEX idx_tieba_note_keyword_time ON tieba_note(source_keyword, publish_time);
+CREATE INDEX idx_zhihu_content_keyword_time ON zhihu_content(source_keyword, created_time);
+CREATE INDEX idx_youtube_video_keyword_time ON youtube_video(source_keyword, publish_time);
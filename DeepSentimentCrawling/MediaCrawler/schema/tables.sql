@@ -15,18 +15,19 @@ CREATE TABLE `bilibili_video`
     `title`            varchar(500) DEFAULT NULL COMMENT '视频标题',
     `desc`             longtext COMMENT '视频描述',
     `create_time`      bigint      NOT NULL COMMENT '视频发布时间戳',
-    `liked_count`      varchar(16)  DEFAULT NULL COMMENT '视频点赞数',
-    `disliked_count`   varchar(16) DEFAULT NULL COMMENT '视频点踩数',
-    `video_play_count` varchar(16)  DEFAULT NULL COMMENT '视频播放数量',
-    `video_favorite_count` varchar(16) DEFAULT NULL COMMENT '视频收藏数量',
-    `video_share_count` varchar(16) DEFAULT NULL COMMENT '视频分享数量',
-    `video_coin_count` varchar(16) DEFAULT NULL COMMENT '视频投币数量',
-    `video_danmaku`    varchar(16)  DEFAULT NULL COMMENT '视频弹幕数量',
-    `video_comment`    varchar(16)  DEFAULT NULL COMMENT '视频评论数量',
+    `liked_count`      bigint       DEFAULT NULL COMMENT '视频点赞数',
+    `disliked_count`   bigint      DEFAULT NULL COMMENT '视频点踩数',
+    `video_play_count` bigint       DEFAULT NULL COMMENT '视频播放数量',
+    `video_favorite_count` bigint      DEFAULT NULL COMMENT '视频收藏数量',
+    `video_share_count` bigint      DEFAULT NULL COMMENT '视频分享数量',
+    `video_coin_count` bigint      DEFAULT NULL COMMENT '视频投币数量',
+    `video_danmaku`    bigint       DEFAULT NULL COMMENT '视频弹幕数量',
+    `video_comment`    bigint       DEFAULT NULL COMMENT '视频评论数量',
     `video_url`        varchar(512) DEFAULT NULL COMMENT '视频详情URL',
     `video_cover_url`  varchar(512) DEFAULT NULL COMMENT '视频封面图 URL',
+    `transcription`    longtext COMMENT '视频转写文本',
     PRIMARY KEY (`id`),
-    KEY                `idx_bilibili_vi_video_i_31c36e` (`video_id`),
+    UNIQUE KEY         `idx_bilibili_vi_video_i_31c36e` (`video_id`),
     KEY                `idx_bilibili_vi_create__73e0ec` (`create_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B站视频';
 
@@ -48,9 +49,9 @@ CREATE TABLE `bilibili_video_comment`
     `video_id`          varchar(64) NOT NULL COMMENT '视频ID',
     `content`           longtext COMMENT '评论内容',
     `create_time`       bigint      NOT NULL COMMENT '评论时间戳',
-    `sub_comment_count` varchar(16) NOT NULL COMMENT '评论回复数',
+    `sub_comment_count` bigint      NOT NULL DEFAULT 0 COMMENT '评论回复数',
     PRIMARY KEY (`id`),
-    KEY                 `idx_bilibili_vi_comment_41c34e` (`comment_id`),
+    UNIQUE KEY          `idx_bilibili_vi_comment_41c34e` (`comment_id`),
     KEY                 `idx_bilibili_vi_video_i_f22873` (`video_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='B 站视频评论';
 
@@ -142,10 +143,10 @@ CREATE TABLE `douyin_aweme`
     `title`           varchar(1024) DEFAULT NULL COMMENT '视频标题',
     `desc`            longtext COMMENT '视频描述',
     `create_time`     bigint      NOT NULL COMMENT '视频发布时间戳',
-    `liked_count`     varchar(16)  DEFAULT NULL COMMENT '视频点赞数',
-    `comment_count`   varchar(16)  DEFAULT NULL COMMENT '视频评论数',
-    `share_count`     varchar(16)  DEFAULT NULL COMMENT '视频分享数',
-    `collected_count` varchar(16)  DEFAULT NULL COMMENT '视频收藏数',
+    `liked_count`     bigint       DEFAULT NULL COMMENT '视频点赞数',
+    `comment_count`   bigint       DEFAULT NULL COMMENT '视频评论数',
+    `share_count`     bigint       DEFAULT NULL COMMENT '视频分享数',
+    `collected_count` bigint       DEFAULT NULL COMMENT '视频收藏数',
     `aweme_url`       varchar(255) DEFAULT NULL COMMENT '视频详情页URL',
     `cover_url`       varchar(500) DEFAULT NULL COMMENT '视频封面图URL',
     `video_download_url`       longtext COMMENT '视频下载地址',
@@ -153,7 +154,7 @@ CREATE TABLE `douyin_aweme`
     `note_download_url`        longtext COMMENT '笔记下载地址',
     `transcription`            longtext COMMENT '视频转写文本',
     PRIMARY KEY (`id`),
-    KEY               `idx_douyin_awem_aweme_i_6f7bc6` (`aweme_id`),
+    UNIQUE KEY        `idx_douyin_awem_aweme_i_6f7bc6` (`aweme_id`),
     KEY               `idx_douyin_awem_create__299dfe` (`create_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='抖音视频';
 
@@ -178,9 +179,9 @@ CREATE TABLE `douyin_aweme_comment`
     `aweme_id`          varchar(64) NOT NULL COMMENT '视频ID',
     `content`           longtext COMMENT '评论内容',
     `create_time`       bigint      NOT NULL COMMENT '评论时间戳',
-    `sub_comment_count` varchar(16) NOT NULL COMMENT '评论回复数',
+    `sub_comment_count` bigint      NOT NULL DEFAULT 0 COMMENT '评论回复数',
     PRIMARY KEY (`id`),
-    KEY                 `idx_douyin_awem_comment_fcd7e4` (`comment_id`),
+    UNIQUE KEY          `idx_douyin_awem_comment_fcd7e4` (`comment_id`),
     KEY                 `idx_douyin_awem_aweme_i_c50049` (`aweme_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='抖音视频评论';
 
@@ -223,13 +224,13 @@ CREATE TABLE `kuaishou_video`
     `title`           varchar(500) DEFAULT NULL COMMENT '视频标题',
     `desc`            longtext COMMENT '视频描述',
     `create_time`     bigint      NOT NULL COMMENT '视频发布时间戳',
-    `liked_count`     varchar(16)  DEFAULT NULL COMMENT '视频点赞数',
-    `viewd_count`     varchar(16)  DEFAULT NULL COMMENT '视频浏览数量',
+    `liked_count`     bigint       DEFAULT NULL COMMENT '视频点赞数',
+    `viewd_count`     bigint       DEFAULT NULL COMMENT '视频浏览数量',
     `video_url`       varchar(512) DEFAULT NULL COMMENT '视频详情URL',
     `video_cover_url` varchar(512) DEFAULT NULL COMMENT '视频封面图 URL',
     `video_play_url`  varchar(512) DEFAULT NULL COMMENT '视频播放 URL',
     PRIMARY KEY (`id`),
-    KEY               `idx_kuaishou_vi_video_i_c5c6a6` (`video_id`),
+    UNIQUE KEY        `idx_kuaishou_vi_video_i_c5c6a6` (`video_id`),
     KEY               `idx_kuaishou_vi_create__a10dee` (`create_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='快手视频';
 
@@ -249,9 +250,9 @@ CREATE TABLE `kuaishou_video_comment`
     `video_id`          varchar(64) NOT NULL COMMENT '视频ID',
     `content`           longtext COMMENT '评论内容',
     `create_time`       bigint      NOT NULL COMMENT '评论时间戳',
-    `sub_comment_count` varchar(16) NOT NULL COMMENT '评论回复数',
+    `sub_comment_count` bigint      NOT NULL DEFAULT 0 COMMENT '评论回复数',
     PRIMARY KEY (`id`),
-    KEY                 `idx_kuaishou_vi_comment_ed48fa` (`comment_id`),
+    UNIQUE KEY          `idx_kuaishou_vi_comment_ed48fa` (`comment_id`),
     KEY                 `idx_kuaishou_vi_video_i_e50914` (`video_id`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='快手视频评论';
 
@@ -275,12 +276,12 @@ CREATE TABLE `weibo_note`
     `content`          longtext COMMENT '帖子正文内容',
     `create_time`      bigint      NOT NULL COMMENT '帖子发布时间戳',
     `create_date_time` varchar(32) NOT NULL COMMENT '帖子发布日期时间',
-    `liked_count`      varchar(16)  DEFAULT NULL COMMENT '帖子点赞数',
-    `comments_count`   varchar(16)  DEFAULT NULL COMMENT '帖子评论数量',
-    `shared_count`     varchar(16)  DEFAULT NULL COMMENT '帖子转发数量',
+    `liked_count`      bigint       DEFAULT NULL COMMENT '帖子点赞数',
+    `comments_count`   bigint       DEFAULT NULL COMMENT '帖子评论数量',
+    `shared_count`     bigint       DEFAULT NULL COMMENT '帖子转发数量',
     `note_url`         varchar(512) DEFAULT NULL COMMENT '帖子详情URL',
     PRIMARY KEY (`id`),
-    KEY                `idx_weibo_note_note_id_f95b1a` (`note_id`),
+    UNIQUE KEY         `idx_weibo_note_note_id_f95b1a` (`note_id`),
     KEY                `idx_weibo_note_create__692709` (`create_time`),
     KEY                `idx_weibo_note_create__d05ed2` (`create_date_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='微博帖子';
@@ -305,10 +306,10 @@ CREATE TABLE `weibo_note_comment`
     `content`            longtext COMMENT '评论内容',
     `create_time`        bigint      NOT NULL COMMENT '评论时间戳',
     `create_date_time`   varchar(32) NOT NULL COMMENT '评论日期时间',
-    `comment_like_count` varchar(16) NOT NULL COMMENT '评论点赞数量',
-    `sub_comment_count`  varchar(16) NOT NULL COMMENT '评论回复数',
+    `comment_like_count` bigint      NOT NULL DEFAULT 0 COMMENT '评论点赞数量',
+    `sub_comment_count`  bigint      NOT NULL DEFAULT 0 COMMENT '评论回复数',
     PRIMARY KEY (`id`),
-    KEY                  `idx_weibo_note__comment_c7611c` (`comment_id`),
+    UNIQUE KEY           `idx_weibo_note__comment_c7611c` (`comment_id`),
     KEY                  `idx_weibo_note__note_id_24f108` (`note_id`),
     KEY                  `idx_weibo_note__create__667fe3` (`create_date_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='微博帖子评论';
@@ -355,15 +356,15 @@ CREATE TABLE `xhs_note`
     `video_url`        longtext COMMENT '视频地址',
     `time`             bigint      NOT NULL COMMENT '笔记发布时间戳',
     `last_update_time` bigint      NOT NULL COMMENT '笔记最后更新时间戳',
-    `liked_count`      varchar(16)  DEFAULT NULL COMMENT '笔记点赞数',
-    `collected_count`  varchar(16)  DEFAULT NULL COMMENT '笔记收藏数',
-    `comment_count`    varchar(16)  DEFAULT NULL COMMENT '笔记评论数',
-    `share_count`      varchar(16)  DEFAULT NULL COMMENT '笔记分享数',
+    `liked_count`      bigint       DEFAULT NULL COMMENT '笔记点赞数',
+    `collected_count`  bigint       DEFAULT NULL COMMENT '笔记收藏数',
+    `comment_count`    bigint       DEFAULT NULL COMMENT '笔记评论数',
+    `share_count`      bigint       DEFAULT NULL COMMENT '笔记分享数',
     `image_list`       longtext COMMENT '笔记封面图片列表',
     `tag_list`         longtext COMMENT '标签列表',
     `note_url`         varchar(255) DEFAULT NULL COMMENT '笔记详情页的URL',
     PRIMARY KEY (`id`),
-    KEY                `idx_xhs_note_note_id_209457` (`note_id`),
+    UNIQUE KEY         `idx_xhs_note_note_id_209457` (`note_id`),
     KEY                `idx_xhs_note_time_eaa910` (`time`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='小红书笔记';
 
@@ -387,7 +388,7 @@ CREATE TABLE `xhs_note_comment`
     `sub_comment_count` int         NOT NULL COMMENT '子评论数量',
     `pictures`          varchar(512) DEFAULT NULL,
     PRIMARY KEY (`id`),
-    KEY                 `idx_xhs_note_co_comment_8e8349` (`comment_id`),
+    UNIQUE KEY          `idx_xhs_note_co_comment_8e8349` (`comment_id`),
     KEY                 `idx_xhs_note_co_create__204f8d` (`create_time`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='小红书笔记评论';
 
@@ -427,7 +428,7 @@ CREATE TABLE tieba_note
     ip_location       VARCHAR(255) DEFAULT '' COMMENT 'IP地理位置',
     add_ts            BIGINT       NOT NULL COMMENT '添加时间戳',
     last_modify_ts    BIGINT       NOT NULL COMMENT '最后修改时间戳',
-    KEY               `idx_tieba_note_note_id` (`note_id`),
+    UNIQUE KEY        `idx_tieba_note_note_id` (`note_id`),
     KEY               `idx_tieba_note_publish_time` (`publish_time`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧帖子表';
 
@@ -451,7 +452,7 @@ CREATE TABLE tieba_comment
     note_url          VARCHAR(255) NOT NULL COMMENT '帖子链接',
     add_ts            BIGINT       NOT NULL COMMENT '添加时间戳',
     last_modify_ts    BIGINT       NOT NULL COMMENT '最后修改时间戳',
-    KEY               `idx_tieba_comment_comment_id` (`note_id`),
+    UNIQUE KEY        `idx_tieba_comment_comment_id` (`comment_id`),
     KEY               `idx_tieba_comment_note_id` (`note_id`),
     KEY               `idx_tieba_comment_publish_time` (`publish_time`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='贴吧评论表';
@@ -491,7 +492,7 @@ CREATE TABLE `weibo_creator`
 
 
 ALTER TABLE `xhs_note_comment`
-    ADD COLUMN `like_count` VARCHAR(64) DEFAULT NULL COMMENT '评论点赞数量';
+    ADD COLUMN `like_count` BIGINT DEFAULT NULL COMMENT '评论点赞数量';
 
 
 DROP TABLE IF EXISTS `tieba_creator`;
@@ -535,7 +536,7 @@ CREATE TABLE `zhihu_content` (
     `add_ts` bigint NOT NULL COMMENT '记录添加时间戳',
     `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
     PRIMARY KEY (`id`),
-    KEY `idx_zhihu_content_content_id` (`content_id`),
+    UNIQUE KEY `idx_zhihu_content_content_id` (`content_id`),
     KEY `idx_zhihu_content_created_time` (`created_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎内容（回答、文章、视频）';
 
@@ -560,7 +561,7 @@ CREATE TABLE `zhihu_comment` (
     `add_ts` bigint NOT NULL COMMENT '记录添加时间戳',
     `last_modify_ts` bigint NOT NULL COMMENT '记录最后修改时间戳',
     PRIMARY KEY (`id`),
-    KEY `idx_zhihu_comment_comment_id` (`comment_id`),
+    UNIQUE KEY `idx_zhihu_comment_comment_id` (`comment_id`),
     KEY `idx_zhihu_comment_content_id` (`content_id`),
     KEY `idx_zhihu_comment_publish_time` (`publish_time`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='知乎评论';
@@ -615,9 +616,34 @@ CREATE TABLE `youtube_video` (
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='YouTube视频';
 
 
+DROP TABLE IF EXISTS `creator_crawl_index`;
+CREATE TABLE `creator_crawl_index` (
+    `id` int NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `creator_key` varchar(255) NOT NULL COMMENT '平台:创作者ID',
+    `platform` varchar(32) NOT NULL COMMENT '平台',
+    `creator_id` varchar(255) NOT NULL COMMENT '创作者ID',
+    `high_water_mark` bigint NOT NULL DEFAULT '0' COMMENT '已完整爬取范围的最新发布时间(秒)',
+    `low_water_mark` bigint NOT NULL DEFAULT '0' COMMENT '已完整爬取范围的最早发布时间(秒)，0 表示已爬到最早的内容',
+    `known_ids` longtext COMMENT '已爬取内容ID -> 发布时间(秒)，JSON',
+    `last_crawl_time` bigint NOT NULL DEFAULT '0' COMMENT '最近一次爬取时间(秒)',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_creator_crawl_index_key` (`creator_key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='创作者增量爬取索引';
+
+
 -- add column `like_count` to douyin_aweme_comment
-alter table douyin_aweme_comment add column `like_count` varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数';
+alter table douyin_aweme_comment add column `like_count` bigint NOT NULL DEFAULT 0 COMMENT '点赞数';
 
 alter table xhs_note add column xsec_token varchar(50) default null comment '签名算法';
 alter table douyin_aweme_comment add column `pictures` varchar(500) NOT NULL DEFAULT '' COMMENT '评论图片列表';
-alter table bilibili_video_comment add column `like_count` varchar(255) NOT NULL DEFAULT '0' COMMENT '点赞数';
+alter table bilibili_video_comment add column `like_count` bigint NOT NULL DEFAULT 0 COMMENT '点赞数';
+
+-- 按搜索关键词 + 发布时间筛选的分析查询使用的组合索引（已有数据库由 db_migration.py 自动迁移）
+alter table bilibili_video add index `idx_bilibili_video_keyword_time` (`source_keyword`, `create_time`);
+alter table douyin_aweme add index `idx_douyin_aweme_keyword_time` (`source_keyword`, `create_time`);
+alter table kuaishou_video add index `idx_kuaishou_video_keyword_time` (`source_keyword`, `create_time`);
+alter table weibo_note add index `idx_weibo_note_keyword_time` (`source_keyword`, `create_time`);
+alter table xhs_note add index `idx_xhs_note_keyword_time` (`source_keyword`, `time`);
+alter table tieba_note add index `idx_tieba_note_keyword_time` (`source_keyword`, `publish_time`);
+alter table zhihu_content add index `idx_zhihu_content_keyword_time` (`source_keyword`, `created_time`);
+alter table youtube_video add index `idx_youtube_video_keyword_time` (`source_keyword`, `publish_time`);
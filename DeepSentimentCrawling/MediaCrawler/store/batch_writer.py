@@ -0,0 +1,263 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : db/sqlite 存储的批量写入(write-behind)层
+
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import config
+from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
+from db_migration import normalize_counter_fields
+from tools import utils
+from var import media_crawler_db_var
+
+
+class BatchUpsertWriter:
+    """
+    按自然键缓冲待写入的记录，攒够 batch_size 条或距上次刷新超过 flush_interval 秒时批量写入。
+    后台任务每 flush_interval 秒检查一次，没有新记录加入时缓冲也会按时写入；写入失败的记录留在缓冲中等待下次刷新。
+
+    写入流程：
+      - 自然键上有唯一索引时，直接使用多行 INSERT ... ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE
+      - 否则一次 SELECT ... IN (...) 查出已存在的键，新记录多行插入，已有记录批量更新
+    insert_filter 返回 False 的记录只会更新已有行，不会被插入（例如抖音没有标题的视频）。
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        key_field: str,
+        insert_filter: Optional[Callable[[Dict], bool]] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+    ) -> None:
+        self.table_name = table_name
+        self.key_field = key_field
+        self.insert_filter = insert_filter
+        self.batch_size = batch_size or config.STORE_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else config.STORE_FLUSH_INTERVAL
+        self._buffer: Dict[str, Dict] = {}
+        self._last_flush = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._unique_index_cache: Dict[int, bool] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def add(self, item: Dict) -> None:
+        """
+        缓冲一条记录，必要时触发刷新
+        :param item:
+        :return:
+        """
+        normalize_counter_fields(self.table_name, item)
+        key = str(item.get(self.key_field))
+        if key in self._buffer:
+            self._buffer[key].update(item)
+        else:
+            self._buffer[key] = item
+        self._ensure_flush_task()
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            await self.flush()
+
+    async def write(self, items: List[Dict]) -> None:
+        """
+        立即写入(不经过缓冲)，用于写后立刻会被读取的内容记录
+        :param items:
+        :return:
+        """
+        if not items:
+            return
+        for item in items:
+            normalize_counter_fields(self.table_name, item)
+        async with self._get_lock():
+            await self._write_batch(items)
+
+    async def flush(self) -> None:
+        """
+        将缓冲中的记录全部写入数据库
+        :return:
+        """
+        async with self._get_lock():
+            items = self._buffer
+            self._buffer = {}
+            self._last_flush = time.monotonic()
+            if not items:
+                return
+            try:
+                await self._write_batch(list(items.values()))
+            except Exception:
+                # 写入失败时放回缓冲，写入期间新加入的同键记录覆盖旧字段
+                for key, item in self._buffer.items():
+                    if key in items:
+                        items[key].update(item)
+                    else:
+                        items[key] = item
+                self._buffer = items
+                raise
+
+    def _ensure_flush_task(self) -> None:
+        if self.flush_interval <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        if self._flush_task is None or self._flush_task.done() or self._flush_task.get_loop() is not loop:
+            self._flush_task = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        """
+        定时刷新缓冲，失败时记录日志，记录留在缓冲中下次重试
+        :return:
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    utils.logger.warning(f"[BatchUpsertWriter] periodic flush {self.table_name} failed, will retry: {e}")
+
+    async def aclose(self) -> None:
+        """
+        停止定时刷新任务并写入剩余缓冲
+        :return:
+        """
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self.flush()
+
+    async def _has_unique_index(self, async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB]) -> bool:
+        cache_key = id(async_db_conn)
+        if cache_key not in self._unique_index_cache:
+            try:
+                self._unique_index_cache[cache_key] = await async_db_conn.has_unique_index(self.table_name, self.key_field)
+            except Exception as e:
+                utils.logger.warning(f"[BatchUpsertWriter] check unique index on {self.table_name}.{self.key_field} failed: {e}")
+                self._unique_index_cache[cache_key] = False
+        return self._unique_index_cache[cache_key]
+
+    def _can_insert(self, item: Dict) -> bool:
+        return self.insert_filter is None or self.insert_filter(item)
+
+    async def _write_batch(self, items: List[Dict]) -> None:
+        async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
+        now_ts = utils.get_current_timestamp()
+
+        if await self._has_unique_index(async_db_conn):
+            new_items = [item for item in items if self._can_insert(item)]
+            update_only_items = [item for item in items if not self._can_insert(item)]
+        else:
+            existing_keys = await self._query_existing_keys(async_db_conn, [item.get(self.key_field) for item in items])
+            new_items = [item for item in items if str(item.get(self.key_field)) not in existing_keys and self._can_insert(item)]
+            update_only_items = [item for item in items if str(item.get(self.key_field)) in existing_keys]
+
+        for item in new_items:
+            item.setdefault("add_ts", now_ts)
+
+        if isinstance(async_db_conn, AsyncSqliteDB):
+            # sqlite 下整批写入放在一个事务里，只提交一次
+            async with async_db_conn.transaction():
+                await self._write_groups(async_db_conn, new_items, update_only_items)
+        else:
+            await self._write_groups(async_db_conn, new_items, update_only_items)
+        utils.logger.info(
+            f"[BatchUpsertWriter] {self.table_name}: wrote {len(new_items)} new/upserted, {len(update_only_items)} updated"
+        )
+
+    async def _write_groups(self, async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB], new_items: List[Dict],
+                            update_only_items: List[Dict]) -> None:
+        use_upsert = await self._has_unique_index(async_db_conn)
+        for group in _group_by_fields(new_items):
+            if use_upsert:
+                await async_db_conn.upsert_many(self.table_name, group, self.key_field, update_exclude=("add_ts",))
+            else:
+                await async_db_conn.insert_many(self.table_name, group)
+        for group in _group_by_fields(update_only_items):
+            await async_db_conn.update_many(self.table_name, group, self.key_field)
+
+    async def _query_existing_keys(self, async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB], keys: List) -> set:
+        placeholder = "%s" if isinstance(async_db_conn, AsyncMysqlDB) else "?"
+        placeholders = ",".join([placeholder] * len(keys))
+        sql = f"SELECT {self.key_field} FROM {self.table_name} WHERE {self.key_field} IN ({placeholders})"
+        rows = await async_db_conn.query(sql, *keys)
+        return {str(row[self.key_field]) for row in rows}
+
+
+def _group_by_fields(items: List[Dict]) -> List[List[Dict]]:
+    """
+    多行语句要求字段一致，按字段集合分组
+    """
+    groups: Dict[Tuple[str, ...], List[Dict]] = {}
+    for item in items:
+        groups.setdefault(tuple(item.keys()), []).append(item)
+    return list(groups.values())
+
+
+_BATCH_WRITERS: Dict[str, BatchUpsertWriter] = {}
+
+# 当前任务(asyncio 任务)独占的批量写入器，未设置时使用进程级的 _BATCH_WRITERS
+_job_batch_writers_var: ContextVar[Optional[Dict[str, BatchUpsertWriter]]] = ContextVar("job_batch_writers", default=None)
+
+
+def use_job_batch_writers() -> None:
+    """
+    让当前任务使用自己的一组批量写入器，应在任务协程内调用；
+    并发运行的多个爬虫任务各自缓冲、各自写入自己的数据库连接，刷新时互不影响
+    :return:
+    """
+    _job_batch_writers_var.set({})
+
+
+def _current_batch_writers() -> Dict[str, BatchUpsertWriter]:
+    writers = _job_batch_writers_var.get()
+    return _BATCH_WRITERS if writers is None else writers
+
+
+def get_batch_writer(table_name: str, key_field: str, insert_filter: Optional[Callable[[Dict], bool]] = None) -> BatchUpsertWriter:
+    """
+    获取(或创建)当前任务中某张表的批量写入器，同一张表的所有 store 实例共用一个缓冲
+    :param table_name: 表名
+    :param key_field: 自然键字段
+    :param insert_filter: 判断记录是否允许插入
+    :return:
+    """
+    writers = _current_batch_writers()
+    writer = writers.get(table_name)
+    if writer is None:
+        writer = BatchUpsertWriter(table_name, key_field, insert_filter=insert_filter)
+        writers[table_name] = writer
+    return writer
+
+
+async def flush_all_batch_writers() -> None:
+    """
+    刷新当前任务所有批量写入器的缓冲并停止定时刷新任务，需在关闭数据库连接前调用
+    """
+    for writer in list(_current_batch_writers().values()):
+        try:
+            await writer.aclose()
+        except Exception as e:
+            utils.logger.error(f"[flush_all_batch_writers] flush {writer.table_name} failed: {e}")
@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from .bilibili_store_impl import *
@@ -67,6 +68,7 @@ async def update_bilibili_video(video_item: Dict):
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video] bilibili video id:{video_id}, title:{save_content_item.get('title')}")
     await BiliStoreFactory.create_store().store_content(content_item=save_content_item)
+    record_crawl_stat("notes_count")
 
 
 async def update_up_info(video_item: Dict):
@@ -118,6 +120,7 @@ async def update_bilibili_video_comment(video_id: str, comment_item: Dict):
     }
     utils.logger.info(f"[store.bilibili.update_bilibili_video_comment] Bilibili video comment: {comment_id}, content: {save_comment_item.get('content')}")
     await BiliStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    record_crawl_stat("comments_count")
 
 
 async def store_video(aid, video_content, extension_file_name):
@@ -13,9 +13,7 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 19:34
 # @Desc    : B站存储实现类
-import asyncio
 import csv
-import json
 import os
 import pathlib
 from typing import Dict
@@ -24,7 +22,9 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
-from tools import utils, words
+from store.batch_writer import get_batch_writer
+from store.jsonl_writer import get_jsonl_writer
+from tools import utils
 from var import crawler_type_var
 
 
@@ -142,17 +142,7 @@ class BiliDbStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .bilibili_store_sql import (add_new_content,
-                                         query_content_by_content_id,
-                                         update_content_by_content_id)
-        video_id = content_item.get("video_id")
-        video_detail: Dict = await query_content_by_content_id(content_id=video_id)
-        if not video_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(video_id, content_item=content_item)
+        await get_batch_writer("bilibili_video", "video_id").write([content_item])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -163,17 +153,7 @@ class BiliDbStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .bilibili_store_sql import (add_new_comment,
-                                         query_comment_by_comment_id,
-                                         update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await get_batch_writer("bilibili_video_comment", "comment_id").add(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -246,9 +226,7 @@ class BiliDbStoreImplement(AbstractStore):
 class BiliJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/bilibili/json"
     words_store_path: str = "data/bilibili/words"
-    lock = asyncio.Lock()
     file_count:int=calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
 
 
     def make_save_file_name(self, store_type: str) -> (str,str):
@@ -262,13 +240,13 @@ class BiliJsonStoreImplement(AbstractStore):
         """
 
         return (
-            f"{self.json_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.json",
-            f"{self.words_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+            f"{self.json_store_path}/{crawler_type_var.get()}_{store_type}",
+            f"{self.words_store_path}/{crawler_type_var.get()}_{store_type}"
         )
 
     async def save_data_to_json(self, save_item: Dict, store_type: str):
         """
-        Below is a simple way to save it in json format.
+        Append the item to a JSON Lines file (see store/jsonl_writer.py), the JSON array file is exported on close.
         Args:
             save_item: save content dict info
             store_type: Save type contains content and comments（contents | comments）
@@ -276,25 +254,9 @@ class BiliJsonStoreImplement(AbstractStore):
         Returns:
 
         """
-        pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
-        pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
-        save_file_name,words_file_name_prefix = self.make_save_file_name(store_type=store_type)
-        save_data = []
-
-        async with self.lock:
-            if os.path.exists(save_file_name):
-                async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
-                    save_data = json.loads(await file.read())
-
-            save_data.append(save_item)
-            async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(save_data, ensure_ascii=False))
-
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+        save_file_prefix, words_file_prefix = self.make_save_file_name(store_type=store_type)
+        words_prefix = words_file_prefix if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD else None
+        await get_jsonl_writer(save_file_prefix, export_indent=None, words_prefix=words_prefix).write(save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -364,17 +326,7 @@ class BiliSqliteStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .bilibili_store_sql import (add_new_content,
-                                         query_content_by_content_id,
-                                         update_content_by_content_id)
-        video_id = content_item.get("video_id")
-        video_detail: Dict = await query_content_by_content_id(content_id=video_id)
-        if not video_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(video_id, content_item=content_item)
+        await get_batch_writer("bilibili_video", "video_id").write([content_item])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -385,17 +337,7 @@ class BiliSqliteStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .bilibili_store_sql import (add_new_comment,
-                                         query_comment_by_comment_id,
-                                         update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await get_batch_writer("bilibili_video_comment", "comment_id").add(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
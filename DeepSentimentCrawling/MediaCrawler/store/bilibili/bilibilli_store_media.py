@@ -13,12 +13,17 @@
 # @Time    : 2024/7/12 20:01
 # @Desc    : bilibili 媒体保存
 import pathlib
-from typing import Dict
+from typing import Dict, Union
 
 import aiofiles
 
+import config
+from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
 from tools import utils
+from tools.transcription_pool import TranscriptionJob, register_transcription_writer, submit_transcription
+from var import media_crawler_db_var
 
 
 class BilibiliVideo(AbstractStoreVideo):
@@ -34,7 +39,10 @@ class BilibiliVideo(AbstractStoreVideo):
         Returns:
 
         """
-        await self.save_video(video_content_item.get("aid"), video_content_item.get("video_content"), video_content_item.get("extension_file_name"))
+        aid = video_content_item.get("aid")
+        save_file_name = await self.save_video(aid, video_content_item.get("video_content"), video_content_item.get("extension_file_name"))
+        # 交给转写流水线，视频文件保留；待转写任务过多时在这里等待
+        await submit_transcription(TranscriptionJob(platform="bili", content_id=str(aid), media_path=save_file_name, delete_after=False))
 
     def make_save_file_name(self, aid: str, extension_file_name: str) -> str:
         """
@@ -66,3 +74,25 @@ class BilibiliVideo(AbstractStoreVideo):
         async with aiofiles.open(save_file_name, 'wb') as f:
             await f.write(video_content)
             utils.logger.info(f"[BilibiliVideoImplement.save_video] save save_video {save_file_name} success ...")
+        return save_file_name
+
+    @staticmethod
+    async def update_db_transcription(video_id: str, text: str):
+        """
+        update the transcription field in database
+
+        Args:
+            video_id: video id (aid)
+            text: transcription text
+
+        Returns:
+
+        """
+        if config.SAVE_DATA_OPTION not in ("db", "sqlite"):
+            utils.logger.info(f"[BilibiliVideoImplement.update_db_transcription] transcription for {video_id} not saved, SAVE_DATA_OPTION is {config.SAVE_DATA_OPTION}")
+            return
+        async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
+        await async_db_conn.update_table("bilibili_video", {"transcription": text}, "video_id", video_id)
+
+
+register_transcription_writer("bili", BilibiliVideo.update_db_transcription)
@@ -0,0 +1,365 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 创作者增量爬取索引：记录每个创作者已爬取的内容 ID 和已完整爬取的发布时间范围(低水位~高水位)
+#
+# 创作者模式原来每次都从第一页翻到最后一页（或翻到 CRAWLER_MAX_NOTES_COUNT），定时任务每小时重复抓取全部历史。
+# 现在各平台的创作者列表分页先经过 CreatorCrawlIndex.filter_page：
+#   - 新内容保留；
+#   - 已爬取但发布时间在 CREATOR_REFRESH_RECENT_SECONDS 内的内容保留，用于刷新点赞/评论等统计；
+#   - 已爬取的旧内容跳过；已经爬到过列表末尾（低水位为 0）时，连续遇到 CREATOR_INCREMENTAL_STOP_AFTER_KNOWN 条
+#     后停止翻页（容忍置顶内容）。之前的爬取中途结束（达到数量上限、请求失败）时继续翻页，补爬低水位之前的内容。
+# 内容保存成功后调用 record 记录，爬取结束后 save 持久化；db/sqlite 存储时保存在 creator_crawl_index 表，其他存储方式只保存在进程内存中。
+
+import json
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+from async_db import AsyncMysqlDB
+from tools import utils
+from var import media_crawler_db_var
+
+CREATOR_INDEX_TABLE = "creator_crawl_index"
+
+_MYSQL_DDL = f"""
+CREATE TABLE IF NOT EXISTS `{CREATOR_INDEX_TABLE}` (
+    `id` int NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `creator_key` varchar(255) NOT NULL COMMENT '平台:创作者ID',
+    `platform` varchar(32) NOT NULL COMMENT '平台',
+    `creator_id` varchar(255) NOT NULL COMMENT '创作者ID',
+    `high_water_mark` bigint NOT NULL DEFAULT '0' COMMENT '已完整爬取范围的最新发布时间(秒)',
+    `low_water_mark` bigint NOT NULL DEFAULT '0' COMMENT '已完整爬取范围的最早发布时间(秒)，0 表示已爬到最早的内容',
+    `known_ids` longtext COMMENT '已爬取内容ID -> 发布时间(秒)，JSON',
+    `last_crawl_time` bigint NOT NULL DEFAULT '0' COMMENT '最近一次爬取时间(秒)',
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `idx_creator_crawl_index_key` (`creator_key`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='创作者增量爬取索引'
+"""
+
+_SQLITE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {CREATOR_INDEX_TABLE} (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creator_key TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    creator_id TEXT NOT NULL,
+    high_water_mark INTEGER NOT NULL DEFAULT 0,
+    low_water_mark INTEGER NOT NULL DEFAULT 0,
+    known_ids TEXT DEFAULT NULL,
+    last_crawl_time INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# 已执行过建表语句的数据库对象（已有数据库升级时不需要重新初始化表结构）
+_table_ready = weakref.WeakSet()
+# 非 db/sqlite 存储时的进程内索引：creator_key -> 表记录
+_memory_store: Dict[str, Dict[str, Any]] = {}
+
+
+def _to_seconds(value: Any) -> int:
+    """
+    发布时间转换为秒级时间戳，兼容毫秒时间戳和数字字符串，无法识别时返回 0
+    """
+    try:
+        timestamp = int(float(value))
+    except (TypeError, ValueError):
+        return 0
+    if timestamp > 1000000000000:
+        timestamp //= 1000
+    return max(timestamp, 0)
+
+
+def _get_db():
+    """
+    db/sqlite 存储且数据库已初始化时返回数据库对象，否则返回 None
+    """
+    if config.SAVE_DATA_OPTION not in ("db", "sqlite"):
+        return None
+    return media_crawler_db_var.get(None)
+
+
+async def _ensure_table(async_db_conn) -> None:
+    if async_db_conn in _table_ready:
+        return
+    await async_db_conn.execute(_MYSQL_DDL if isinstance(async_db_conn, AsyncMysqlDB) else _SQLITE_DDL)
+    _table_ready.add(async_db_conn)
+
+
+class CreatorCrawlIndex:
+    """
+    单个创作者的增量爬取索引，用法：
+        creator_index = await load_creator_index("xhs", user_id)
+        try:
+            notes = creator_index.filter_page(notes, lambda note: note.get("note_id"), has_more=has_more)
+            ...  # 保存成功后 creator_index.record(note_id, publish_time)
+            if creator_index.stopped: break
+        finally:
+            await creator_index.save()
+
+    high_water_mark ~ low_water_mark 是已经完整爬取过的发布时间范围，范围内的旧内容即使不在 known_ids 中也视为已爬取。
+    本次爬取从列表第一页开始连续处理，保存时：翻到列表末尾则低水位记为 0；与已有范围衔接时合并；
+    有内容没有抓取成功（失败或被数量上限截断）时范围不变，下次重新检查这些内容。
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        creator_id: str,
+        high_water_mark: int = 0,
+        known_ids: Optional[Dict[str, int]] = None,
+        last_crawl_time: int = 0,
+        low_water_mark: int = 0,
+    ) -> None:
+        self.platform = platform
+        self.creator_id = str(creator_id)
+        self.high_water_mark = high_water_mark
+        self.low_water_mark = low_water_mark
+        self.known_ids: Dict[str, int] = dict(known_ids or {})
+        self.last_crawl_time = last_crawl_time
+        # 首次爬取该创作者（索引中没有任何记录）
+        self.is_new = not self.known_ids
+        self.stopped = False
+        # 本次爬取是否翻到了列表末尾
+        self.exhausted = False
+        self.new_count = 0
+        self.refresh_count = 0
+        self._known_streak = 0
+        # 本次爬取处理过的最新发布时间、最后处理到的发布时间，以及需要抓取但还没有 record 的内容
+        self._run_high = 0
+        self._run_last = 0
+        self._pending = set()
+
+    @property
+    def creator_key(self) -> str:
+        return f"{self.platform}:{self.creator_id}"
+
+    @property
+    def history_complete(self) -> bool:
+        """
+        之前的爬取是否已经从最新内容连续爬到了列表末尾，只有这时遇到旧内容才能停止翻页
+        """
+        return bool(self.high_water_mark) and self.low_water_mark == 0
+
+    def is_known(self, content_id: Any, publish_time: Any = None) -> bool:
+        """
+        内容是否已爬取过：在已知 ID 中，或发布时间在已完整爬取的范围内且早于高水位减去刷新窗口
+        :param content_id:
+        :param publish_time:
+        :return:
+        """
+        if str(content_id) in self.known_ids:
+            return True
+        timestamp = _to_seconds(publish_time)
+        return bool(
+            timestamp and self.high_water_mark
+            and self.low_water_mark <= timestamp < self.high_water_mark - config.CREATOR_REFRESH_RECENT_SECONDS
+        )
+
+    def _extend_run(self, timestamp: int) -> None:
+        if timestamp:
+            self._run_last = timestamp
+            self._run_high = max(self._run_high, timestamp)
+
+    def filter_page(
+        self,
+        items: Iterable[Any],
+        get_id: Callable[[Any], Any],
+        get_time: Optional[Callable[[Any], Any]] = None,
+        has_more: bool = True,
+    ) -> List[Any]:
+        """
+        过滤一页创作者内容列表（按发布时间倒序），返回需要抓取的新内容和需要刷新统计的近期内容；
+        之前已爬到列表末尾时，连续遇到足够多的已爬取旧内容后设置 stopped，调用方应停止翻页
+        :param items: 列表页内容
+        :param get_id: 取内容 ID 的函数
+        :param get_time: 取发布时间的函数，列表页没有发布时间时为空（使用 record 时记录的发布时间）
+        :param has_more: 这一页之后是否还有内容，为 False 时表示本次爬取翻到了列表末尾
+        :return:
+        """
+        items = list(items)
+        if not config.ENABLE_CREATOR_INCREMENTAL_CRAWL:
+            return items
+        refresh_since = time.time() - config.CREATOR_REFRESH_RECENT_SECONDS
+        kept = []
+        for item in items:
+            if self.stopped:
+                break
+            content_id = get_id(item)
+            if not content_id:
+                kept.append(item)
+                continue
+            publish_time = _to_seconds(get_time(item)) if get_time else 0
+            if not self.is_known(content_id, publish_time):
+                self._known_streak = 0
+                self.new_count += 1
+                self._pending.add(str(content_id))
+                self._extend_run(publish_time)
+                kept.append(item)
+                continue
+            publish_time = publish_time or self.known_ids.get(str(content_id), 0)
+            self._extend_run(publish_time)
+            if publish_time >= refresh_since:
+                self.refresh_count += 1
+                self._pending.add(str(content_id))
+                kept.append(item)
+                continue
+            # 之前的爬取没有到达列表末尾时不停止，继续翻页补爬更早的内容
+            if not self.history_complete or publish_time > self.high_water_mark:
+                continue
+            self._known_streak += 1
+            if self._known_streak >= config.CREATOR_INCREMENTAL_STOP_AFTER_KNOWN:
+                utils.logger.info(
+                    f"[CreatorCrawlIndex.filter_page] {self.creator_key} reached {self._known_streak} crawled items, stop paging"
+                )
+                self.stopped = True
+        if not has_more and not self.stopped:
+            self.exhausted = True
+        return kept
+
+    def record(self, content_id: Any, publish_time: Any = None) -> None:
+        """
+        内容保存成功后记录，发布时间未知时保留之前记录的发布时间
+        :param content_id:
+        :param publish_time:
+        :return:
+        """
+        if not content_id:
+            return
+        content_id = str(content_id)
+        timestamp = _to_seconds(publish_time) or self.known_ids.get(content_id, 0)
+        # 重新插入，保证发布时间相同时按记录顺序淘汰
+        self.known_ids.pop(content_id, None)
+        self.known_ids[content_id] = timestamp
+        self._pending.discard(content_id)
+        self._run_high = max(self._run_high, timestamp)
+
+    def skip(self, content_id: Any) -> None:
+        """
+        需要抓取的内容确认不用保存（会员视频、已删除等），不影响已完整爬取范围的更新
+        :param content_id:
+        :return:
+        """
+        self._pending.discard(str(content_id))
+
+    def _update_water_marks(self) -> None:
+        """
+        本次爬取结束后更新已完整爬取的范围：有内容未抓取成功时不更新（下次会重新检查），
+        翻到列表末尾时低水位记为 0，从第一页连续翻到已有范围内时与已有范围合并
+        """
+        if self._pending or not self._run_high:
+            return
+        if self.exhausted:
+            low_water_mark = 0
+        elif self.stopped:
+            low_water_mark = self.low_water_mark
+        elif self.high_water_mark and self._run_last and self._run_last <= self.high_water_mark:
+            low_water_mark = min(self.low_water_mark, self._run_last) if self.low_water_mark else 0
+        else:
+            # 本次没有翻到已有范围（首次爬取中途结束、请求失败），中间还有没检查过的内容，只依靠 known_ids
+            return
+        self.low_water_mark = low_water_mark
+        self.high_water_mark = max(self.high_water_mark, self._run_high)
+
+    async def seed_existing(
+        self,
+        content_ids: Iterable[Any],
+        lookup: Callable[[List[str]], Awaitable[List[str]]],
+    ) -> None:
+        """
+        首次建立索引时，把内容表中已存在的内容作为已爬取的旧内容加入索引，
+        用于升级前已经按内容表判断是否爬取过的平台，避免升级后第一次运行重新抓取历史内容
+        :param content_ids: 本页内容 ID
+        :param lookup: 查询已存在 ID 的函数，例如 douyin_store.get_existing_aweme_ids
+        :return:
+        """
+        if not self.is_new or _get_db() is None:
+            return
+        content_ids = [str(content_id) for content_id in content_ids if content_id]
+        for content_id in await lookup(content_ids):
+            self.known_ids.setdefault(str(content_id), 0)
+
+    def _trimmed_known_ids(self) -> Dict[str, int]:
+        max_ids = config.CREATOR_INDEX_MAX_IDS
+        if len(self.known_ids) <= max_ids:
+            return self.known_ids
+        ordered: List[Tuple[int, Tuple[str, int]]] = sorted(
+            enumerate(self.known_ids.items()), key=lambda pair: (pair[1][1], pair[0]), reverse=True
+        )
+        return dict(item for _, item in sorted(ordered[:max_ids]))
+
+    async def save(self) -> None:
+        """
+        持久化索引，只保留发布时间最新的 CREATOR_INDEX_MAX_IDS 条，失败时只记录日志不影响爬取结果
+        :return:
+        """
+        self._update_water_marks()
+        self.known_ids = self._trimmed_known_ids()
+        self.last_crawl_time = utils.get_unix_timestamp()
+        item = {
+            "creator_key": self.creator_key,
+            "platform": self.platform,
+            "creator_id": self.creator_id,
+            "high_water_mark": self.high_water_mark,
+            "low_water_mark": self.low_water_mark,
+            "known_ids": json.dumps(self.known_ids),
+            "last_crawl_time": self.last_crawl_time,
+        }
+        utils.logger.info(
+            f"[CreatorCrawlIndex.save] {self.creator_key}: new {self.new_count}, refreshed {self.refresh_count}, "
+            f"stopped early: {self.stopped}, crawled range: {self.low_water_mark}~{self.high_water_mark}, "
+            f"known ids: {len(self.known_ids)}"
+        )
+        async_db_conn = _get_db()
+        if async_db_conn is None:
+            _memory_store[self.creator_key] = item
+            return
+        try:
+            await _ensure_table(async_db_conn)
+            await async_db_conn.upsert_many(CREATOR_INDEX_TABLE, [item], "creator_key")
+        except Exception as e:
+            utils.logger.warning(f"[CreatorCrawlIndex.save] save {self.creator_key} failed, keep in memory: {e}")
+            _memory_store[self.creator_key] = item
+
+
+async def load_creator_index(platform: str, creator_id: Any) -> CreatorCrawlIndex:
+    """
+    读取创作者的增量爬取索引，不存在时返回空索引（首次爬取会按原来的方式翻页）
+    :param platform: 平台，例如 xhs
+    :param creator_id: 创作者ID
+    :return:
+    """
+    creator_key = f"{platform}:{creator_id}"
+    row: Optional[Dict[str, Any]] = _memory_store.get(creator_key)
+    async_db_conn = _get_db()
+    if async_db_conn is not None:
+        try:
+            await _ensure_table(async_db_conn)
+            placeholder = "%s" if isinstance(async_db_conn, AsyncMysqlDB) else "?"
+            row = await async_db_conn.get_first(
+                f"SELECT * FROM {CREATOR_INDEX_TABLE} WHERE creator_key = {placeholder}", creator_key
+            ) or row
+        except Exception as e:
+            utils.logger.warning(f"[load_creator_index] load {creator_key} failed, crawl without index: {e}")
+    if not row:
+        return CreatorCrawlIndex(platform, creator_id)
+    try:
+        known_ids = {str(k): int(v) for k, v in json.loads(row.get("known_ids") or "{}").items()}
+    except (TypeError, ValueError):
+        known_ids = {}
+    return CreatorCrawlIndex(
+        platform,
+        creator_id,
+        high_water_mark=int(row.get("high_water_mark") or 0),
+        known_ids=known_ids,
+        last_crawl_time=int(row.get("last_crawl_time") or 0),
+        low_water_mark=int(row.get("low_water_mark") or 0),
+    )
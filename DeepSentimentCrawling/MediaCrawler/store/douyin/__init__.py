@@ -15,6 +15,7 @@
 from typing import List
 
 import config
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from .douyin_store_impl import *
@@ -203,6 +204,7 @@ async def update_douyin_aweme(aweme_item: Dict):
     }
     utils.logger.info(f"[store.douyin.update_douyin_aweme] douyin aweme id:{aweme_id}, title:{save_content_item.get('title')}")
     await DouyinStoreFactory.create_store().store_content(content_item=save_content_item)
+    record_crawl_stat("notes_count")
 
 
 async def batch_update_dy_aweme_comments(aweme_id: str, comments: List[Dict]):
@@ -243,6 +245,7 @@ async def update_dy_aweme_comment(aweme_id: str, comment_item: Dict):
     utils.logger.info(f"[store.douyin.update_dy_aweme_comment] douyin aweme comment: {comment_id}, content: {save_comment_item.get('content')}")
 
     await DouyinStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    record_crawl_stat("comments_count")
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -295,3 +298,29 @@ async def update_dy_aweme_video(aweme_id, video_content, extension_file_name, ti
     """
 
     await DouYinVideo().store_video({"aweme_id": aweme_id, "video_content": video_content, "extension_file_name": extension_file_name, "title": title})
+
+
+def get_dy_aweme_video_path(aweme_id: str, title: str = "") -> str:
+    """
+    获取抖音短视频的保存路径，供流式下载直接写入
+    Args:
+        aweme_id:
+        title:
+
+    Returns:
+
+    """
+    return DouYinVideo().make_save_file_name(aweme_id, title, "video.mp4")
+
+
+async def update_dy_aweme_video_file(aweme_id: str, save_file_name: str):
+    """
+    抖音短视频已下载到磁盘
+    Args:
+        aweme_id:
+        save_file_name:
+
+    Returns:
+
+    """
+    await DouYinVideo().store_video_file(aweme_id, save_file_name)
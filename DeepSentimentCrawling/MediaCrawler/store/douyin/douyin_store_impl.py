@@ -13,9 +13,7 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2024/1/14 18:46
 # @Desc    : 抖音存储实现类
-import asyncio
 import csv
-import json
 import os
 import pathlib
 from typing import Dict
@@ -24,7 +22,9 @@ import aiofiles
 
 import config
 from base.base_crawler import AbstractStore
-from tools import utils, words
+from store.batch_writer import get_batch_writer
+from store.jsonl_writer import get_jsonl_writer
+from tools import utils
 from var import crawler_type_var
 
 
@@ -120,18 +120,8 @@ class DouyinDbStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .douyin_store_sql import (add_new_content,
-                                       query_content_by_content_id,
-                                       update_content_by_content_id)
-        aweme_id = content_item.get("aweme_id")
-        aweme_detail: Dict = await query_content_by_content_id(content_id=aweme_id)
-        if not aweme_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            if content_item.get("title"):
-                await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(aweme_id, content_item=content_item)
+        # 没有标题的视频只更新已有记录，不新增
+        await get_batch_writer("douyin_aweme", "aweme_id", insert_filter=lambda item: bool(item.get("title"))).write([content_item])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -142,16 +132,7 @@ class DouyinDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_comment,
-                                       query_comment_by_comment_id,
-                                       update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await get_batch_writer("douyin_aweme_comment", "comment_id").add(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
@@ -177,9 +158,7 @@ class DouyinJsonStoreImplement(AbstractStore):
     json_store_path: str = "data/douyin/json"
     words_store_path: str = "data/douyin/words"
 
-    lock = asyncio.Lock()
     file_count: int = calculate_number_of_files(json_store_path)
-    WordCloud = words.AsyncWordCloudGenerator()
 
     def make_save_file_name(self, store_type: str) -> (str,str):
         """
@@ -192,12 +171,12 @@ class DouyinJsonStoreImplement(AbstractStore):
         """
 
         return (
-            f"{self.json_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}.json",
-            f"{self.words_store_path}/{crawler_type_var.get()}_{store_type}_{utils.get_current_date()}"
+            f"{self.json_store_path}/{crawler_type_var.get()}_{store_type}",
+            f"{self.words_store_path}/{crawler_type_var.get()}_{store_type}"
         )
     async def save_data_to_json(self, save_item: Dict, store_type: str):
         """
-        Below is a simple way to save it in json format.
+        Append the item to a JSON Lines file (see store/jsonl_writer.py), the JSON array file is exported on close.
         Args:
             save_item: save content dict info
             store_type: Save type contains content and comments（contents | comments）
@@ -205,25 +184,9 @@ class DouyinJsonStoreImplement(AbstractStore):
         Returns:
 
         """
-        pathlib.Path(self.json_store_path).mkdir(parents=True, exist_ok=True)
-        pathlib.Path(self.words_store_path).mkdir(parents=True, exist_ok=True)
-        save_file_name,words_file_name_prefix = self.make_save_file_name(store_type=store_type)
-        save_data = []
-
-        async with self.lock:
-            if os.path.exists(save_file_name):
-                async with aiofiles.open(save_file_name, 'r', encoding='utf-8') as file:
-                    save_data = json.loads(await file.read())
-
-            save_data.append(save_item)
-            async with aiofiles.open(save_file_name, 'w', encoding='utf-8') as file:
-                await file.write(json.dumps(save_data, ensure_ascii=False, indent=4))
-
-            if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD:
-                try:
-                    await self.WordCloud.generate_word_frequency_and_cloud(save_data, words_file_name_prefix)
-                except:
-                    pass
+        save_file_prefix, words_file_prefix = self.make_save_file_name(store_type=store_type)
+        words_prefix = words_file_prefix if config.ENABLE_GET_COMMENTS and config.ENABLE_GET_WORDCLOUD else None
+        await get_jsonl_writer(save_file_prefix, words_prefix=words_prefix).write(save_item)
 
     async def store_content(self, content_item: Dict):
         """
@@ -270,18 +233,8 @@ class DouyinSqliteStoreImplement(AbstractStore):
         Returns:
 
         """
-
-        from .douyin_store_sql import (add_new_content,
-                                       query_content_by_content_id,
-                                       update_content_by_content_id)
-        aweme_id = content_item.get("aweme_id")
-        aweme_detail: Dict = await query_content_by_content_id(content_id=aweme_id)
-        if not aweme_detail:
-            content_item["add_ts"] = utils.get_current_timestamp()
-            if content_item.get("title"):
-                await add_new_content(content_item)
-        else:
-            await update_content_by_content_id(aweme_id, content_item=content_item)
+        # 没有标题的视频只更新已有记录，不新增
+        await get_batch_writer("douyin_aweme", "aweme_id", insert_filter=lambda item: bool(item.get("title"))).write([content_item])
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -292,16 +245,7 @@ class DouyinSqliteStoreImplement(AbstractStore):
         Returns:
 
         """
-        from .douyin_store_sql import (add_new_comment,
-                                       query_comment_by_comment_id,
-                                       update_comment_by_comment_id)
-        comment_id = comment_item.get("comment_id")
-        comment_detail: Dict = await query_comment_by_comment_id(comment_id=comment_id)
-        if not comment_detail:
-            comment_item["add_ts"] = utils.get_current_timestamp()
-            await add_new_comment(comment_item)
-        else:
-            await update_comment_by_comment_id(comment_id, comment_item=comment_item)
+        await get_batch_writer("douyin_aweme_comment", "comment_id").add(comment_item)
 
     async def store_creator(self, creator: Dict):
         """
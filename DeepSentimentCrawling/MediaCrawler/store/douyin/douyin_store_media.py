@@ -1,12 +1,14 @@
 import pathlib
-from typing import Dict
-import os
+from typing import Dict, Union
 import aiofiles
 
+import config
+from async_db import AsyncMysqlDB
+from async_sqlite_db import AsyncSqliteDB
 from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
 from tools import utils
-from tools.transcriber import VideoTranscriber
-from db import db_conn_pool_var
+from tools.transcription_pool import TranscriptionJob, register_transcription_writer, submit_transcription
+from var import media_crawler_db_var
 
 class DouYinImage(AbstractStoreImage):
     image_store_path: str = "data/douyin/images"
@@ -36,39 +38,17 @@ class DouYinVideo(AbstractStoreVideo):
         
         # 1. Save Video
         save_file_name = await self.save_video(aweme_id, title, video_content, extension_file_name)
-        
+
         # 2. Transcribe Video
         if save_file_name:
-            utils.logger.info(f"[DouYinVideo] Starting transcription for {save_file_name}")
-            import asyncio
-            loop = asyncio.get_running_loop()
-            try:
-                transcription = await loop.run_in_executor(
-                    None, 
-                    VideoTranscriber.transcribe_video, 
-                    save_file_name
-                )
-                
-                # 3. Update Database
-                if transcription:
-                    utils.logger.info(f"[DouYinVideo] Transcription success, length: {len(transcription)}")
-                    await self.update_db_transcription(aweme_id, transcription)
-                else:
-                    utils.logger.info(f"[DouYinVideo] No transcription generated (empty result)")
-                
-                # 4. Clean up video file
-                try:
-                    os.remove(save_file_name)
-                    utils.logger.info(f"[DouYinVideo] Deleted temporary video file: {save_file_name}")
-                    # Try to remove the directory if empty
-                    video_dir = os.path.dirname(save_file_name)
-                    os.rmdir(video_dir)
-                    utils.logger.info(f"[DouYinVideo] Deleted empty video directory: {video_dir}")
-                except Exception as e:
-                    utils.logger.warning(f"[DouYinVideo] Failed to cleanup video file: {e}")
-                    
-            except Exception as e:
-                utils.logger.error(f"[DouYinVideo] Transcription exception: {e}")
+            await self.store_video_file(aweme_id, save_file_name)
+
+    async def store_video_file(self, aweme_id: str, save_file_name: str):
+        """
+        视频已保存到磁盘（例如流式下载），交给转写流水线，转写完成后回写数据库并删除视频文件；
+        待转写任务过多时在这里等待
+        """
+        await submit_transcription(TranscriptionJob(platform="dy", content_id=aweme_id, media_path=save_file_name))
 
     def sanitize_filename(self, name: str) -> str:
         import re
@@ -106,15 +86,15 @@ class DouYinVideo(AbstractStoreVideo):
             utils.logger.error(f"[DouYinVideo] Save video failed: {e}")
             return ""
 
-    async def update_db_transcription(self, aweme_id: str, text: str):
+    @staticmethod
+    async def update_db_transcription(aweme_id: str, text: str):
         """Update the transcription field in database"""
-        try:
-            pool = db_conn_pool_var.get()
-            async with pool.acquire() as conn:
-                async with conn.cursor() as cursor:
-                    sql = "UPDATE douyin_aweme SET transcription = %s WHERE aweme_id = %s"
-                    await cursor.execute(sql, (text, aweme_id))
-                    await conn.commit()
-                    utils.logger.info(f"[DouYinVideo] DB Updated transcription for {aweme_id}")
-        except Exception as e:
-            utils.logger.error(f"[DouYinVideo] DB Update failed: {e}")
\ No newline at end of file
+        if config.SAVE_DATA_OPTION not in ("db", "sqlite"):
+            utils.logger.info(f"[DouYinVideo] Transcription for {aweme_id} not saved, SAVE_DATA_OPTION is {config.SAVE_DATA_OPTION}")
+            return
+        async_db_conn: Union[AsyncMysqlDB, AsyncSqliteDB] = media_crawler_db_var.get()
+        await async_db_conn.update_table("douyin_aweme", {"transcription": text}, "aweme_id", aweme_id)
+        utils.logger.info(f"[DouYinVideo] DB Updated transcription for {aweme_id}")
+
+
+register_transcription_writer("dy", DouYinVideo.update_db_transcription)
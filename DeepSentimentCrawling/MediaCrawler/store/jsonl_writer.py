@@ -0,0 +1,277 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : json 存储的追加写(JSON Lines)层，按日期/大小切分文件
+
+import asyncio
+import glob
+import json
+import os
+import pathlib
+import re
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+
+import config
+from tools import utils
+
+
+class JsonlStreamWriter:
+    """
+    以 JSON Lines 格式追加写入记录：保持一个打开的文件句柄，每条记录写一行，
+    不再每次读出整个文件再重写。
+
+    文件命名：{file_prefix}_{日期}.jsonl，超过 max_bytes 后切到 {file_prefix}_{日期}_1.jsonl、_2 ...
+    某天第一次写入时，如果只有旧版本直接写出的 {file_prefix}_{日期}.json 而没有 jsonl 分片，
+    先把其中的记录转存到第一个分片，导出时不会覆盖掉这部分数据。
+
+    设置了词云前缀时，每天维护一个词频计数：当天第一次打开时计入之前运行写入的分片，之后随 write() 累加，
+    关闭时按当天的全部数据生成一次词频和词云，不需要重新读取分片，也不在内存中保留当天的记录。
+    """
+
+    def __init__(self, file_prefix: str, max_bytes: Optional[int] = None, export_indent: Optional[int] = 4,
+                 words_prefix: Optional[str] = None) -> None:
+        """
+        :param file_prefix: 文件前缀，不含日期和扩展名
+        :param max_bytes: 单个分片的大小上限，0 表示不切分
+        :param export_indent: 导出 JSON 数组时的缩进
+        :param words_prefix: 词频/词云文件前缀（不含日期），为空时不生成词云
+        """
+        self.file_prefix = file_prefix
+        self.export_indent = export_indent
+        self.words_prefix = words_prefix
+        self.max_bytes = max_bytes if max_bytes is not None else config.JSONL_ROTATE_MAX_MB * 1024 * 1024
+        self._file = None
+        self._file_path: Optional[str] = None
+        self._file_date: Optional[str] = None
+        self._file_size = 0
+        self._part = 0
+        self._written_dates: List[str] = []
+        self._word_freq: Dict[str, Counter] = {}
+        self._word_generator = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def part_file_name(self, date: str, part: int) -> str:
+        if part == 0:
+            return f"{self.file_prefix}_{date}.jsonl"
+        return f"{self.file_prefix}_{date}_{part}.jsonl"
+
+    def _list_parts(self, date: str) -> List[Tuple[int, str]]:
+        pattern = re.compile(re.escape(os.path.basename(self.file_prefix)) + rf"_{re.escape(date)}(?:_(\d+))?\.jsonl$")
+        parts = []
+        for file_path in glob.glob(f"{glob.escape(self.file_prefix)}_{date}*.jsonl"):
+            match = pattern.match(os.path.basename(file_path))
+            if match:
+                parts.append((int(match.group(1) or 0), file_path))
+        return sorted(parts)
+
+    def list_part_files(self, date: str) -> List[str]:
+        """
+        某一天已有的全部分片文件，按分片序号排序
+        :param date:
+        :return:
+        """
+        return [file_path for _, file_path in self._list_parts(date)]
+
+    def json_file_name(self, date: str) -> str:
+        return f"{self.file_prefix}_{date}.json"
+
+    async def _seed_from_json(self, date: str) -> None:
+        """
+        把旧版本写出的 JSON 数组文件转存为第一个分片
+        :param date:
+        :return:
+        """
+        json_file = self.json_file_name(date)
+        if not os.path.exists(json_file):
+            return
+        try:
+            async with aiofiles.open(json_file, "r", encoding="utf-8") as f:
+                items = json.loads(await f.read() or "[]")
+            if not isinstance(items, list):
+                raise ValueError("not a JSON array")
+        except Exception as e:
+            backup_file = f"{json_file}.bak"
+            os.replace(json_file, backup_file)
+            utils.logger.warning(f"[JsonlStreamWriter] can not read {json_file}, moved to {backup_file}: {e}")
+            return
+        async with aiofiles.open(self.part_file_name(date, 0), "w", encoding="utf-8") as f:
+            for item in items:
+                await f.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    async def _open(self, date: str, part: Optional[int] = None) -> None:
+        await self._close_file()
+        pathlib.Path(self.file_prefix).parent.mkdir(parents=True, exist_ok=True)
+        if part is None:
+            # 同一天重复运行时接着最后一个分片继续写
+            existing = self._list_parts(date)
+            if not existing:
+                await self._seed_from_json(date)
+                existing = self._list_parts(date)
+            part = existing[-1][0] if existing else 0
+        self._part = part
+        self._file_date = date
+        self._file_path = self.part_file_name(date, part)
+        self._file_size = os.path.getsize(self._file_path) if os.path.exists(self._file_path) else 0
+        if date not in self._written_dates:
+            self._written_dates.append(date)
+            if self.words_prefix:
+                self._word_freq[date] = Counter()
+                async for item in iter_jsonl_items(self.list_part_files(date)):
+                    self._count_words(date, item)
+        # 行缓冲：每条记录写完即落盘，进程异常退出也不会丢掉已写入的记录
+        self._file = await aiofiles.open(self._file_path, "a", encoding="utf-8", buffering=1)
+
+    def _count_words(self, date: str, item: Dict) -> None:
+        if not item.get("content"):
+            return
+        if self._word_generator is None:
+            from tools.words import AsyncWordCloudGenerator
+
+            self._word_generator = AsyncWordCloudGenerator()
+        self._word_freq[date].update(self._word_generator.cut_words(item["content"]))
+
+    async def _close_file(self) -> None:
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+
+    async def write(self, item: Dict) -> None:
+        """
+        追加一条记录，日期变化或文件超过大小上限时切换文件
+        :param item:
+        :return:
+        """
+        line = json.dumps(item, ensure_ascii=False) + "\n"
+        async with self._get_lock():
+            date = utils.get_current_date()
+            if self._file is None or date != self._file_date:
+                await self._open(date)
+            elif self.max_bytes and self._file_size > 0 and self._file_size + len(line.encode("utf-8")) > self.max_bytes:
+                await self._open(date, self._part + 1)
+            await self._file.write(line)
+            self._file_size += len(line.encode("utf-8"))
+            if self.words_prefix:
+                self._count_words(date, item)
+
+    async def close(self) -> None:
+        async with self._get_lock():
+            await self._close_file()
+
+    async def export_json(self) -> List[str]:
+        """
+        将本次写入过的每一天的全部分片（包括当天之前运行写入的）合并导出为原来的 JSON 数组文件：{file_prefix}_{日期}.json
+        :return: 导出的文件列表
+        """
+        exported = []
+        async with self._get_lock():
+            for date in self._written_dates:
+                json_file = self.json_file_name(date)
+                await export_jsonl_to_json(self.list_part_files(date), json_file, indent=self.export_indent)
+                exported.append(json_file)
+        return exported
+
+    async def generate_word_cloud(self) -> None:
+        """
+        按本次写入过的每一天累计的词频生成一次词频和词云：{words_prefix}_{日期}_word_freq.json / _word_cloud.png
+        :return:
+        """
+        if not self.words_prefix:
+            return
+        pathlib.Path(self.words_prefix).parent.mkdir(parents=True, exist_ok=True)
+        async with self._get_lock():
+            for date, word_freq in self._word_freq.items():
+                if word_freq:
+                    await self._word_generator.save_word_frequency_and_cloud(word_freq, f"{self.words_prefix}_{date}")
+
+
+async def iter_jsonl_items(jsonl_files: List[str]) -> AsyncIterator[Dict]:
+    """
+    按顺序逐行读取 jsonl 文件中的记录，跳过空行和损坏的行
+    :param jsonl_files:
+    :return:
+    """
+    for jsonl_file in jsonl_files:
+        async with aiofiles.open(jsonl_file, "r", encoding="utf-8") as f:
+            async for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    utils.logger.warning(f"[iter_jsonl_items] skip broken line in {jsonl_file}")
+
+
+async def export_jsonl_to_json(jsonl_files: List[str], json_file: str, indent: Optional[int] = 4) -> None:
+    """
+    逐行读取 jsonl 并流式写出 JSON 数组，格式与 json.dumps(list, indent=indent) 一致，不需要把全部数据读进内存
+    :param jsonl_files: 按顺序合并的 jsonl 文件
+    :param json_file: 导出的 json 文件
+    :param indent: 缩进，None 表示不换行的紧凑格式
+    :return:
+    """
+    pad = " " * indent if indent is not None else ""
+    count = 0
+    async with aiofiles.open(json_file, "w", encoding="utf-8") as out:
+        await out.write("[")
+        async for item in iter_jsonl_items(jsonl_files):
+            text = json.dumps(item, ensure_ascii=False, indent=indent)
+            if indent is None:
+                await out.write((", " if count else "") + text)
+            else:
+                await out.write(("," if count else "") + "\n" + pad + text.replace("\n", "\n" + pad))
+            count += 1
+        await out.write("\n]" if count and indent is not None else "]")
+
+
+_JSONL_WRITERS: Dict[str, JsonlStreamWriter] = {}
+
+
+def get_jsonl_writer(file_prefix: str, export_indent: Optional[int] = 4,
+                     words_prefix: Optional[str] = None) -> JsonlStreamWriter:
+    """
+    获取(或创建)某个文件前缀共享的 jsonl 写入器，同一个文件的所有 store 实例共用一个句柄
+    :param file_prefix: 文件前缀，不含日期和扩展名
+    :param export_indent: 导出 JSON 数组时的缩进
+    :param words_prefix: 词频/词云文件前缀，不含日期，为空时不生成词云
+    :return:
+    """
+    writer = _JSONL_WRITERS.get(file_prefix)
+    if writer is None:
+        writer = JsonlStreamWriter(file_prefix, export_indent=export_indent, words_prefix=words_prefix)
+        _JSONL_WRITERS[file_prefix] = writer
+    return writer
+
+
+async def close_all_jsonl_writers() -> None:
+    """
+    关闭所有 jsonl 写入器；开启 JSONL_EXPORT_JSON_ON_CLOSE 时同时导出 JSON 数组文件，设置了词云前缀的写入器生成词云
+    """
+    for file_prefix, writer in list(_JSONL_WRITERS.items()):
+        try:
+            await writer.close()
+            if config.JSONL_EXPORT_JSON_ON_CLOSE:
+                await writer.export_json()
+            await writer.generate_word_cloud()
+        except Exception as e:
+            utils.logger.error(f"[close_all_jsonl_writers] close {file_prefix} failed: {e}")
+    _JSONL_WRITERS.clear()
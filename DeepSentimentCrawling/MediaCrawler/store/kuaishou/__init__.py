@@ -16,6 +16,7 @@
 from typing import List
 
 import config
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from .kuaishou_store_impl import *
@@ -64,6 +65,7 @@ async def update_kuaishou_video(video_item: Dict):
     utils.logger.info(
         f"[store.kuaishou.update_kuaishou_video] Kuaishou video id:{video_id}, title:{save_content_item.get('title')}")
     await KuaishouStoreFactory.create_store().store_content(content_item=save_content_item)
+    record_crawl_stat("notes_count")
 
 
 async def batch_update_ks_video_comments(video_id: str, comments: List[Dict]):
@@ -90,6 +92,7 @@ async def update_ks_video_comment(video_id: str, comment_item: Dict):
     utils.logger.info(
         f"[store.kuaishou.update_ks_video_comment] Kuaishou video comment: {comment_id}, content: {save_comment_item.get('content')}")
     await KuaishouStoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    record_crawl_stat("comments_count")
 
 async def save_creator(user_id: str, creator: Dict):
     ownerCount = creator.get('ownerCount', {})
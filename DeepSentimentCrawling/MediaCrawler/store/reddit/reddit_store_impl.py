@@ -5,6 +5,7 @@ import config
 from base.base_crawler import AbstractStore
 from db import db_conn_pool_var
 from tools import utils
+from tools.crawl_stats import record_crawl_stat
 
 class RedditStore(AbstractStore):
     async def store_content(self, content_item: Dict):
@@ -85,7 +86,9 @@ class RedditStore(AbstractStore):
 async def update_reddit_post(post_item: Dict):
     store = RedditStore()
     await store.store_content(post_item)
+    record_crawl_stat("notes_count")
 
 async def update_reddit_comment(comment_item: Dict):
     store = RedditStore()
     await store.store_comment(comment_item)
+    record_crawl_stat("comments_count")
@@ -13,6 +13,7 @@
 from typing import List
 
 from model.m_baidu_tieba import TiebaComment, TiebaCreator, TiebaNote
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from . import tieba_store_impl
@@ -66,6 +67,7 @@ async def update_tieba_note(note_item: TiebaNote):
     utils.logger.info(f"[store.tieba.update_tieba_note] tieba note: {save_note_item}")
 
     await TieBaStoreFactory.create_store().store_content(save_note_item)
+    record_crawl_stat("notes_count")
 
 
 async def batch_update_tieba_note_comments(note_id: str, comments: List[TiebaComment]):
@@ -98,6 +100,7 @@ async def update_tieba_note_comment(note_id: str, comment_item: TiebaComment):
     save_comment_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.tieba.update_tieba_note_comment] tieba note id: {note_id} comment:{save_comment_item}")
     await TieBaStoreFactory.create_store().store_comment(save_comment_item)
+    record_crawl_stat("comments_count")
 
 
 async def save_creator(user_info: TiebaCreator):
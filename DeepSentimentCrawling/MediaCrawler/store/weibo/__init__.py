@@ -16,6 +16,7 @@
 import re
 from typing import List
 
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from .weibo_store_media import *
@@ -93,6 +94,7 @@ async def update_weibo_note(note_item: Dict):
     }
     utils.logger.info(f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
     await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    record_crawl_stat("notes_count")
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -148,6 +150,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     }
     utils.logger.info(f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
     await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
+    record_crawl_stat("comments_count")
 
 
 async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
@@ -15,6 +15,7 @@
 from typing import List
 
 import config
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 from . import xhs_store_impl
@@ -111,6 +112,7 @@ async def update_xhs_note(note_item: Dict):
     }
     utils.logger.info(f"[store.xhs.update_xhs_note] xhs note: {local_db_item}")
     await XhsStoreFactory.create_store().store_content(local_db_item)
+    record_crawl_stat("notes_count")
 
 
 async def batch_update_xhs_note_comments(note_id: str, comments: List[Dict]):
@@ -160,6 +162,7 @@ async def update_xhs_note_comment(note_id: str, comment_item: Dict):
     }
     utils.logger.info(f"[store.xhs.update_xhs_note_comment] xhs note comment:{local_db_item}")
     await XhsStoreFactory.create_store().store_comment(local_db_item)
+    record_crawl_stat("comments_count")
 
 
 async def save_creator(user_id: str, creator: Dict):
@@ -5,6 +5,7 @@ import config
 from base.base_crawler import AbstractStore
 from db import db_conn_pool_var
 from tools import utils
+from tools.crawl_stats import record_crawl_stat
 
 class XueqiuStore(AbstractStore):
     async def store_content(self, content_item: Dict):
@@ -95,6 +96,7 @@ class XueqiuStore(AbstractStore):
 async def update_xueqiu_note(note_item: Dict):
     store = XueqiuStore()
     await store.store_content(note_item)
+    record_crawl_stat("notes_count")
 
 async def batch_update_xueqiu_note_comments(note_id: str, comments: list):
     if not comments:
@@ -105,3 +107,4 @@ async def batch_update_xueqiu_note_comments(note_id: str, comments: list):
         if "status_id" not in comment:
             comment["status_id"] = note_id
         await store.store_comment(comment)
+        record_crawl_stat("comments_count")
@@ -13,9 +13,11 @@ from typing import Dict
 import config
 from base.base_crawler import AbstractStore
 from tools import utils
+from tools.crawl_stats import record_crawl_stat
+from tools.transcription_pool import register_transcription_writer
 
 from .youtube_store_impl import YouTubeCsvStoreImplement, YouTubeDbStoreImplement, YouTubeSqliteStoreImplement
-from .youtube_store_sql import get_existing_video_ids
+from .youtube_store_sql import get_existing_video_ids, update_video_by_video_id
 
 
 class YouTubeStoreFactory:
@@ -36,4 +38,19 @@ class YouTubeStoreFactory:
 async def upsert_youtube_video(video_item: Dict) -> None:
     utils.logger.info(f"[store.youtube.upsert_youtube_video] video_id:{video_item.get('video_id')}, title:{video_item.get('title')}")
     await YouTubeStoreFactory.create_store().store_content(video_item)
+    record_crawl_stat("notes_count")
 
+
+async def update_youtube_transcription(video_id: str, transcription: str) -> None:
+    """
+    转写流水线完成音频转写后回写 transcription 字段，仅 db/sqlite 模式
+    """
+    if config.SAVE_DATA_OPTION not in ("db", "sqlite"):
+        return
+    await update_video_by_video_id(
+        video_id, {"transcription": transcription, "last_modify_ts": utils.get_current_timestamp()}
+    )
+    utils.logger.info(f"[store.youtube.update_youtube_transcription] video_id:{video_id}, length:{len(transcription)}")
+
+
+register_transcription_writer("yt", update_youtube_transcription)
@@ -20,6 +20,7 @@ from store.zhihu.zhihu_store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuJsonStoreImplement,
                                           ZhihuSqliteStoreImplement)
 from tools import utils
+from tools.crawl_stats import record_crawl_stat
 from var import source_keyword_var
 
 
@@ -67,6 +68,7 @@ async def update_zhihu_content(content_item: ZhihuContent):
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
     await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    record_crawl_stat("notes_count")
 
 
 
@@ -99,6 +101,7 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
     await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    record_crawl_stat("comments_count")
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -0,0 +1,70 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from async_sqlite_db import AsyncSqliteDB
+
+
+class TestAsyncSqliteDB(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "test.db")
+        self.db = AsyncSqliteDB(self.db_path)
+        await self.db.executescript("CREATE TABLE note (note_id TEXT PRIMARY KEY, title TEXT);")
+
+    async def test_wal_and_persistent_connection(self):
+        row = await self.db.get_first("PRAGMA journal_mode")
+        self.assertEqual(row["journal_mode"], "wal")
+        conn = self.db._conn
+        await self.db.item_to_table("note", {"note_id": "1", "title": "a"})
+        await self.db.update_table("note", {"title": "b"}, "note_id", "1")
+        self.assertIs(conn, self.db._conn)
+        self.assertEqual(await self.db.query("SELECT title FROM note"), [{"title": "b"}])
+
+    async def test_transaction_commit_and_rollback(self):
+        async with self.db.transaction():
+            await self.db.item_to_table("note", {"note_id": "1", "title": "a"})
+            await self.db.insert_many("note", [{"note_id": "2", "title": "b"}, {"note_id": "3", "title": "c"}])
+        with self.assertRaises(ValueError):
+            async with self.db.transaction():
+                await self.db.item_to_table("note", {"note_id": "4", "title": "d"})
+                raise ValueError()
+        rows = await self.db.query("SELECT note_id FROM note ORDER BY note_id")
+        self.assertEqual([row["note_id"] for row in rows], ["1", "2", "3"])
+
+    async def test_writes_wait_for_transaction(self):
+        async def writer():
+            await self.db.item_to_table("note", {"note_id": "2", "title": "b"})
+
+        async with self.db.transaction():
+            await self.db.item_to_table("note", {"note_id": "1", "title": "a"})
+            task = asyncio.ensure_future(writer())
+            await asyncio.sleep(0.05)
+            self.assertFalse(task.done())
+        await task
+        self.assertEqual(len(await self.db.query("SELECT * FROM note")), 2)
+
+    async def test_close(self):
+        await self.db.item_to_table("note", {"note_id": "1", "title": "a"})
+        await self.db.close()
+        self.assertIsNone(self.db._conn)
+        # 关闭后重新打开仍能读到已提交的数据
+        reopened = AsyncSqliteDB(self.db_path)
+        self.assertEqual(len(await reopened.query("SELECT * FROM note")), 1)
+        await reopened.close()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from async_sqlite_db import AsyncSqliteDB
+from store.batch_writer import BatchUpsertWriter, flush_all_batch_writers, get_batch_writer, use_job_batch_writers
+from var import media_crawler_db_var
+
+
+class TestBatchUpsertWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.executescript(
+            "CREATE TABLE comment (id INTEGER PRIMARY KEY AUTOINCREMENT, comment_id TEXT, content TEXT, add_ts INTEGER);"
+            "CREATE TABLE comment_uk (id INTEGER PRIMARY KEY AUTOINCREMENT, comment_id TEXT, content TEXT, add_ts INTEGER);"
+            "CREATE UNIQUE INDEX uk_comment_id ON comment_uk(comment_id);"
+        )
+        media_crawler_db_var.set(self.db)
+
+    async def _run_writer(self, table_name: str):
+        writer = BatchUpsertWriter(table_name, "comment_id", batch_size=3, flush_interval=3600)
+        await writer.add({"comment_id": "1", "content": "a"})
+        await writer.add({"comment_id": "2", "content": "b"})
+        self.assertEqual(await self.db.query(f"SELECT * FROM {table_name}"), [])
+        await writer.add({"comment_id": "1", "content": "a2"})
+        await writer.add({"comment_id": "3", "content": "c"})  # buffer full -> flush
+        await writer.add({"comment_id": "2", "content": "b2"})
+        await writer.flush()
+        rows = await self.db.query(f"SELECT comment_id, content, add_ts FROM {table_name} ORDER BY comment_id")
+        self.assertEqual([(r["comment_id"], r["content"]) for r in rows], [("1", "a2"), ("2", "b2"), ("3", "c")])
+        self.assertTrue(all(r["add_ts"] for r in rows))
+
+    async def test_without_unique_index(self):
+        await self._run_writer("comment")
+
+    async def test_with_unique_index(self):
+        self.assertTrue(await self.db.has_unique_index("comment_uk", "comment_id"))
+        await self._run_writer("comment_uk")
+
+    async def test_insert_filter_only_updates(self):
+        writer = BatchUpsertWriter("comment", "comment_id", insert_filter=lambda item: bool(item.get("content")))
+        await writer.write([{"comment_id": "1", "content": ""}])
+        self.assertEqual(await self.db.query("SELECT * FROM comment"), [])
+        await writer.write([{"comment_id": "1", "content": "a"}])
+        await writer.write([{"comment_id": "1", "content": ""}])
+        rows = await self.db.query("SELECT comment_id, content FROM comment")
+        self.assertEqual(rows, [{"comment_id": "1", "content": ""}])
+
+    async def test_failed_flush_keeps_items(self):
+        writer = BatchUpsertWriter("comment", "comment_id", batch_size=100, flush_interval=3600)
+        await writer.add({"comment_id": "1", "content": "a"})
+        await writer.add({"comment_id": "2", "content": "b"})
+        with patch.object(writer, "_write_batch", side_effect=RuntimeError("database is locked")):
+            with self.assertRaises(RuntimeError):
+                await writer.flush()
+        await writer.add({"comment_id": "1", "content": "a2"})
+        await writer.aclose()
+        rows = await self.db.query("SELECT comment_id, content FROM comment ORDER BY comment_id")
+        self.assertEqual(rows, [{"comment_id": "1", "content": "a2"}, {"comment_id": "2", "content": "b"}])
+
+    async def test_periodic_flush_without_new_items(self):
+        writer = BatchUpsertWriter("comment", "comment_id", batch_size=100, flush_interval=0.05)
+        await writer.add({"comment_id": "1", "content": "a"})
+        await asyncio.sleep(0.2)
+        self.assertEqual(len(await self.db.query("SELECT * FROM comment")), 1)
+        await writer.aclose()
+        self.assertIsNone(writer._flush_task)
+
+    async def test_job_scoped_writers(self):
+        flushed = asyncio.Event()
+
+        async def job(comment_id: str, flush_first: bool):
+            use_job_batch_writers()
+            writer = get_batch_writer("comment", "comment_id")
+            await writer.add({"comment_id": comment_id, "content": comment_id})
+            if flush_first:
+                await flush_all_batch_writers()
+                flushed.set()
+            else:
+                await flushed.wait()
+                # 另一个任务的刷新不会写入本任务的缓冲
+                self.assertEqual(len(writer._buffer), 1)
+                await flush_all_batch_writers()
+            return writer
+
+        first, second = await asyncio.gather(job("1", True), job("2", False))
+        self.assertIsNot(first, second)
+        rows = await self.db.query("SELECT comment_id FROM comment ORDER BY comment_id")
+        self.assertEqual([row["comment_id"] for row in rows], ["1", "2"])
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
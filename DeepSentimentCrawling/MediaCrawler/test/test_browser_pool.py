@@ -0,0 +1,133 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from tools.browser_pool import BrowserSessionPool
+
+
+class FakePage:
+
+    def __init__(self):
+        self.url = ""
+        self.closed = False
+        self.visits = []
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+        self.visits.append(url)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeContext:
+
+    def __init__(self):
+        self.browser = FakeBrowser()
+        self.closed = False
+
+    async def cookies(self):
+        return []
+
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+class TestBrowserSessionPool(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.launched = []
+        patcher = patch("tools.browser_pool.async_playwright", FakePlaywright)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def launch(self, playwright):
+        context = FakeContext()
+        page = await context.new_page()
+        await page.goto("https://www.example.com/?isHome=1")
+        self.launched.append(context)
+        return context, page, None
+
+    async def test_reuse_and_relaunch_unhealthy(self):
+        pool = BrowserSessionPool(refresh_interval=0)
+        async with pool.lease("dy", "", self.launch) as first:
+            pass
+        async with pool.lease("dy", "", self.launch) as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(len(self.launched), 1)
+        # 复用时重新打开启动时的首页
+        self.assertEqual(second.context_page.visits, ["https://www.example.com/?isHome=1"] * 2)
+
+        second.browser_context.browser.connected = False
+        async with pool.lease("dy", "", self.launch) as third:
+            pass
+        self.assertIsNot(third, second)
+        self.assertTrue(second.browser_context.closed)
+
+        async with pool.lease("dy", "", self.launch, fingerprint="proxy=1"):
+            pass
+        self.assertEqual(len(self.launched), 3)
+        stats = pool.stats()
+        self.assertEqual((stats["launches"], stats["reuses"], stats["discards"]), (3, 1, 2))
+
+        await pool.aclose()
+        self.assertTrue(all(context.closed for context in self.launched))
+
+    async def test_page_recycle_and_exclusive_lease(self):
+        pool = BrowserSessionPool(page_max_uses=2)
+        async with pool.lease("xhs", "", self.launch) as session:
+            first_page = session.context_page
+        async with pool.lease("xhs", "", self.launch):
+            pass
+        async with pool.lease("xhs", "", self.launch) as session:
+            self.assertTrue(first_page.closed)
+            self.assertIsNot(session.context_page, first_page)
+
+        running = 0
+        max_running = 0
+
+        async def use():
+            nonlocal running, max_running
+            async with pool.lease("xhs", "", self.launch):
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(use(), use(), use())
+        self.assertEqual(max_running, 1)
+        self.assertEqual(len(self.launched), 1)
+        self.assertEqual(pool.stats()["page_recycles"], 2)
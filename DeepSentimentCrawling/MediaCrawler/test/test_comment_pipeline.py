@@ -0,0 +1,108 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.comment_pipeline import CommentPipeline
+
+
+class TestCommentPipeline(IsolatedAsyncioTestCase):
+
+    async def test_fetch_overlaps_store(self):
+        events = []
+        stored = []
+
+        async def store(note_id, comments):
+            events.append(f"store-start-{comments[0]}")
+            await asyncio.sleep(0.02)
+            stored.append((note_id, comments))
+            events.append(f"store-end-{comments[0]}")
+
+        async with CommentPipeline(store, queue_size=2) as pipeline:
+            for page in range(3):
+                events.append(f"fetch-{page}")
+                await asyncio.sleep(0.005)
+                await pipeline.put("note", [page])
+
+        self.assertEqual(stored, [("note", [0]), ("note", [1]), ("note", [2])])
+        # 第 0 页入库完成之前已经开始请求第 1 页
+        self.assertLess(events.index("fetch-1"), events.index("store-end-0"))
+
+    async def test_sub_comments_concurrent_and_bounded(self):
+        stored = []
+        running = 0
+        max_running = 0
+
+        async def store(note_id, comments):
+            if comments == ["bad"]:
+                raise RuntimeError("store failed")
+            stored.extend(comments)
+
+        async def fetch_sub_comments(parent: int, callback):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            sub_comments = [f"{parent}-1", f"{parent}-2"]
+            await callback("note", sub_comments)
+            return sub_comments
+
+        async with CommentPipeline(store, sub_comment_concurrency=2) as pipeline:
+            await pipeline.put("note", ["bad"])
+            for parent in range(5):
+                pipeline.spawn(fetch_sub_comments(parent, pipeline.put))
+
+        # 入库失败只记录日志，不影响后续评论
+        self.assertEqual(max_running, 2)
+        self.assertEqual(len(stored), 10)
+        self.assertEqual(sum(pipeline.spawned_results(), []), sorted(stored))
+
+    async def _crawl_xhs_comments(self, enable_sub_comments: bool):
+        config.use_context_overrides({"ENABLE_GET_SUB_COMMENTS": enable_sub_comments})
+        client = XiaoHongShuClient(headers={}, playwright_page=None, cookie_dict={})
+        pages = []
+        sub_comment_calls = []
+
+        async def get_note_comments(note_id, xsec_token, cursor=""):
+            page = len(pages)
+            pages.append(cursor)
+            comments = [{"id": f"{page}-{i}", "note_id": note_id} for i in range(4)]
+            return {"comments": comments, "has_more": True, "cursor": str(page + 1)}
+
+        async def get_comments_all_sub_comments(comments, xsec_token, crawl_interval=1.0, callback=None):
+            sub_comment_calls.append(comments[0]["id"])
+            await asyncio.sleep(0.01)
+            return [{"id": f"{comments[0]['id']}-sub-{i}"} for i in range(2)]
+
+        async def store(note_id, comments):
+            pass
+
+        client.get_note_comments = get_note_comments
+        client.get_comments_all_sub_comments = get_comments_all_sub_comments
+        result = await client.get_note_all_comments("note", "token", crawl_interval=0, callback=store, max_count=10)
+        await client.close()
+        return pages, sub_comment_calls, result
+
+    async def test_sub_comments_count_toward_max_count(self):
+        pages, sub_comment_calls, result = await self._crawl_xhs_comments(enable_sub_comments=True)
+        # 第一页 4 条一级评论 + 8 条子评论已超过 max_count，与逐条抓取时一样不再翻页
+        self.assertEqual(pages, [""])
+        self.assertEqual(len(sub_comment_calls), 4)
+        self.assertEqual(len(result), 12)
+
+    async def test_sub_comments_disabled_not_spawned(self):
+        pages, sub_comment_calls, result = await self._crawl_xhs_comments(enable_sub_comments=False)
+        self.assertEqual(pages, ["", "1", "2"])
+        self.assertEqual(sub_comment_calls, [])
+        self.assertEqual(len(result), 10)
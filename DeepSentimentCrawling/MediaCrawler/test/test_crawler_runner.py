@@ -0,0 +1,79 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from base.base_crawler import AbstractCrawler
+from crawler_runner import MultiPlatformRunner
+from main import CrawlerFactory
+from model.m_crawl_job import CrawlJobConfig
+from tools import utils
+from tools.crawl_stats import CrawlStatsLogHandler, record_crawl_stat
+
+
+class FakeCrawler(AbstractCrawler):
+    seen = []
+
+    async def start(self):
+        await asyncio.sleep(0.2)
+        # 任务内修改配置只影响自己
+        config.CRAWLER_MAX_NOTES_COUNT = len(config.KEYWORDS)
+        await asyncio.sleep(0.01)
+        FakeCrawler.seen.append((config.PLATFORM, config.KEYWORDS, config.CRAWLER_MAX_NOTES_COUNT))
+        for _ in config.KEYWORDS.split(","):
+            record_crawl_stat("notes_count")
+            record_crawl_stat("comments_count", 2)
+        if config.PLATFORM == "wb":
+            raise RuntimeError("boom")
+
+    async def search(self):
+        pass
+
+    async def launch_browser(self, chromium, playwright_proxy, user_agent, headless=True):
+        pass
+
+
+class TestMultiPlatformRunner(IsolatedAsyncioTestCase):
+
+    async def test_run_concurrently_with_isolated_config(self):
+        FakeCrawler.seen = []
+        jobs = [
+            CrawlJobConfig(platform="dy", keywords="a,b", save_data_option="csv"),
+            CrawlJobConfig(platform="xhs", keywords="c", save_data_option="csv"),
+            CrawlJobConfig(platform="wb", keywords="d,e,f", save_data_option="csv"),
+        ]
+        fake_crawlers = {job.platform: FakeCrawler for job in jobs}
+        orig_platform = config.PLATFORM
+        with patch.dict(CrawlerFactory.CRAWLERS, fake_crawlers):
+            start = time.monotonic()
+            results = await MultiPlatformRunner(max_concurrency=3).run(jobs)
+            elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(sorted(FakeCrawler.seen), [("dy", "a,b", 3), ("wb", "d,e,f", 5), ("xhs", "c", 1)])
+        self.assertEqual(config.PLATFORM, orig_platform)
+        self.assertEqual([r.platform for r in results], ["dy", "xhs", "wb"])
+        self.assertEqual([(r.notes_count, r.comments_count) for r in results], [(2, 4), (1, 2), (3, 6)])
+        self.assertEqual([r.success for r in results], [True, True, False])
+        self.assertEqual(results[2].error, "boom")
+        self.assertEqual(results[2].errors_count, 1)
+        self.assertEqual(results[0].errors_count, 0)
+        self.assertFalse([h for h in utils.logger.handlers if isinstance(h, CrawlStatsLogHandler)])
+
+    async def test_platform_concurrency_limit(self):
+        jobs = [CrawlJobConfig(platform="dy", keywords="a", save_data_option="csv") for _ in range(2)]
+        with patch.dict(CrawlerFactory.CRAWLERS, {"dy": FakeCrawler}):
+            start = time.monotonic()
+            await MultiPlatformRunner(max_concurrency=4, platform_concurrency={"dy": 1}).run(jobs)
+            self.assertGreaterEqual(time.monotonic() - start, 0.4)
@@ -0,0 +1,136 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+
+import config
+from async_sqlite_db import AsyncSqliteDB
+from store.creator_index import load_creator_index
+from var import media_crawler_db_var
+
+DAY = 86400
+
+
+def _page(*items):
+    return [{"id": content_id, "ts": ts} for content_id, ts in items]
+
+
+class TestCreatorCrawlIndex(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        config.use_context_overrides({
+            "SAVE_DATA_OPTION": "json",
+            "ENABLE_CREATOR_INCREMENTAL_CRAWL": True,
+            "CREATOR_REFRESH_RECENT_SECONDS": 3 * DAY,
+            "CREATOR_INCREMENTAL_STOP_AFTER_KNOWN": 3,
+            "CREATOR_INDEX_MAX_IDS": 500,
+        })
+        self.now = int(time.time())
+
+    def _filter(self, creator_index, page, has_more=True):
+        return [
+            item["id"]
+            for item in creator_index.filter_page(page, lambda item: item["id"], lambda item: item["ts"], has_more=has_more)
+        ]
+
+    async def test_stop_at_known_and_refresh_recent(self):
+        now = self.now
+        creator_index = await load_creator_index("dy", "memory-creator")
+        self.assertTrue(creator_index.is_new)
+        first_page = _page(("a", now - DAY), ("b", now - 10 * DAY), ("c", now - 20 * DAY))
+        self.assertEqual(self._filter(creator_index, first_page, has_more=False), ["a", "b", "c"])
+        for item in first_page:
+            creator_index.record(item["id"], item["ts"] * 1000)  # 毫秒时间戳
+        await creator_index.save()
+
+        creator_index = await load_creator_index("dy", "memory-creator")
+        self.assertFalse(creator_index.is_new)
+        self.assertEqual((creator_index.low_water_mark, creator_index.high_water_mark), (0, now - DAY))
+        # 置顶的旧视频 c 在最前面；新视频 n 保留，近期的 a 保留用于刷新，连续 3 条旧内容后停止
+        page = _page(("c", now - 20 * DAY), ("n", now), ("a", now - DAY), ("b", now - 10 * DAY),
+                     ("x", now - 30 * DAY), ("y", now - 40 * DAY), ("z", now - 50 * DAY))
+        self.assertEqual(self._filter(creator_index, page), ["n", "a"])
+        self.assertTrue(creator_index.stopped)
+        self.assertEqual((creator_index.new_count, creator_index.refresh_count), (1, 1))
+
+    async def test_backfill_after_interrupted_crawl(self):
+        now = self.now
+        # 第一次爬取只抓了第一页就结束（数量上限），没有到达列表末尾
+        creator_index = await load_creator_index("ks", "backfill-creator")
+        first_page = _page(("a", now - 10 * DAY), ("b", now - 11 * DAY), ("c", now - 12 * DAY))
+        self.assertEqual(self._filter(creator_index, first_page), ["a", "b", "c"])
+        for item in first_page:
+            creator_index.record(item["id"], item["ts"])
+        await creator_index.save()
+
+        # 旧内容不能因为早于高水位就被当成已爬取，也不能因为连续遇到已爬取内容就停止翻页
+        creator_index = await load_creator_index("ks", "backfill-creator")
+        self.assertFalse(creator_index.history_complete)
+        older_page = _page(("x", now - 30 * DAY), ("y", now - 40 * DAY))
+        self.assertEqual(self._filter(creator_index, first_page), [])
+        self.assertEqual(self._filter(creator_index, older_page, has_more=False), ["x", "y"])
+        self.assertFalse(creator_index.stopped)
+        # y 抓取失败时范围不更新，下次仍会补爬
+        creator_index.record("x", now - 30 * DAY)
+        await creator_index.save()
+        creator_index = await load_creator_index("ks", "backfill-creator")
+        self.assertFalse(creator_index.history_complete)
+        self.assertEqual(self._filter(creator_index, first_page + older_page, has_more=False), ["y"])
+        creator_index.record("y", now - 40 * DAY)
+        await creator_index.save()
+
+        # 完整爬到列表末尾后，下次遇到已爬取的旧内容就停止翻页
+        creator_index = await load_creator_index("ks", "backfill-creator")
+        self.assertEqual((creator_index.low_water_mark, creator_index.high_water_mark), (0, now - 10 * DAY))
+        self.assertEqual(self._filter(creator_index, _page(("n", now)) + first_page + older_page), ["n"])
+        self.assertTrue(creator_index.stopped)
+
+    async def test_disabled_and_trim(self):
+        creator_index = await load_creator_index("xhs", "trim-creator")
+        for i in range(10):
+            creator_index.record(f"id{i}", self.now - i * DAY)
+        config.CREATOR_INDEX_MAX_IDS = 4
+        await creator_index.save()
+        creator_index = await load_creator_index("xhs", "trim-creator")
+        self.assertEqual(list(creator_index.known_ids), ["id0", "id1", "id2", "id3"])
+
+        config.ENABLE_CREATOR_INCREMENTAL_CRAWL = False
+        page = _page(*((f"id{i}", self.now - i * DAY) for i in range(10)))
+        self.assertEqual(len(self._filter(creator_index, page)), 10)
+        self.assertFalse(creator_index.stopped)
+
+    async def test_sqlite_persist_and_seed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = AsyncSqliteDB(os.path.join(tmp_dir, "test.db"))
+            await db.executescript("CREATE TABLE douyin_aweme (aweme_id TEXT);"
+                                   "INSERT INTO douyin_aweme VALUES ('old1'), ('old2');")
+            media_crawler_db_var.set(db)
+            config.SAVE_DATA_OPTION = "sqlite"
+
+            async def lookup(ids):
+                rows = await db.query(f"SELECT aweme_id FROM douyin_aweme WHERE aweme_id IN ({','.join('?' * len(ids))})", *ids)
+                return [row["aweme_id"] for row in rows]
+
+            creator_index = await load_creator_index("dy", "sqlite-creator")
+            await creator_index.seed_existing(["new1", "old1", "old2"], lookup)
+            self.assertEqual(
+                creator_index.filter_page(["new1", "old1", "old2"], lambda content_id: content_id, has_more=False), ["new1"]
+            )
+            creator_index.record("new1", self.now)
+            await creator_index.save()
+
+            creator_index = await load_creator_index("dy", "sqlite-creator")
+            self.assertEqual(creator_index.known_ids, {"old1": 0, "old2": 0, "new1": self.now})
+            rows = await db.query("SELECT creator_key, high_water_mark, low_water_mark FROM creator_crawl_index")
+            self.assertEqual(rows, [{"creator_key": "dy:sqlite-creator", "high_water_mark": self.now, "low_water_mark": 0}])
+            await db.close()
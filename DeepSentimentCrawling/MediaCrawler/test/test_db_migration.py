@@ -0,0 +1,150 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+import db
+
+from async_sqlite_db import AsyncSqliteDB
+from db_migration import migrate_platform_tables, migrate_sqlite_platform_tables
+from store.batch_writer import BatchUpsertWriter
+from tools.crawler_util import parse_count
+from var import media_crawler_db_var
+
+# 迁移前的旧表结构：自然键只有普通索引，计数字段是 TEXT
+OLD_SCHEMA = """
+CREATE TABLE douyin_aweme (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    add_ts INTEGER NOT NULL,
+    last_modify_ts INTEGER NOT NULL,
+    aweme_id TEXT NOT NULL,
+    title TEXT DEFAULT NULL,
+    create_time INTEGER NOT NULL,
+    liked_count TEXT DEFAULT NULL,
+    comment_count TEXT DEFAULT NULL,
+    share_count TEXT DEFAULT NULL,
+    collected_count TEXT DEFAULT NULL,
+    source_keyword TEXT DEFAULT ''
+);
+CREATE INDEX idx_douyin_awem_aweme_i_6f7bc6 ON douyin_aweme(aweme_id);
+CREATE INDEX idx_douyin_awem_create__299dfe ON douyin_aweme(create_time);
+"""
+
+
+class TestDbMigration(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db = AsyncSqliteDB(os.path.join(self.tmp_dir.name, "test.db"))
+        await self.db.executescript(OLD_SCHEMA)
+        media_crawler_db_var.set(self.db)
+
+    async def test_init_db_migrates_once(self):
+        calls = []
+
+        async def slow_migrate(db_type):
+            calls.append(db_type)
+            await asyncio.sleep(0.05)
+            return True
+
+        async def job():
+            config.use_context_overrides({
+                "SAVE_DATA_OPTION": "sqlite",
+                "SQLITE_DB_PATH": os.path.join(self.tmp_dir.name, "test.db"),
+                "DB_AUTO_MIGRATE_SCHEMA": True,
+            })
+            await db.init_db()
+            await db.close()
+
+        with patch("db.migrate_platform_tables", side_effect=slow_migrate), patch.object(db, "_MIGRATED_SCHEMAS", set()):
+            await asyncio.gather(job(), job(), job())
+            await job()
+        self.assertEqual(calls, ["sqlite"])
+
+    async def test_init_db_retries_failed_migration(self):
+        results = [False, True]
+        calls = []
+
+        async def flaky_migrate(db_type):
+            calls.append(db_type)
+            return results[len(calls) - 1]
+
+        async def job():
+            config.use_context_overrides({
+                "SAVE_DATA_OPTION": "sqlite",
+                "SQLITE_DB_PATH": os.path.join(self.tmp_dir.name, "test.db"),
+                "DB_AUTO_MIGRATE_SCHEMA": True,
+            })
+            await db.init_db()
+            await db.close()
+
+        with patch("db.migrate_platform_tables", side_effect=flaky_migrate), patch.object(db, "_MIGRATED_SCHEMAS", set()):
+            await job()
+            await job()
+            await job()
+        self.assertEqual(calls, ["sqlite", "sqlite"])
+
+    async def test_migrate_platform_tables_reports_failure(self):
+        with patch("db_migration.migrate_sqlite_platform_tables", side_effect=RuntimeError("disk I/O error")):
+            self.assertFalse(await migrate_platform_tables("sqlite"))
+        self.assertTrue(await migrate_platform_tables("sqlite"))
+
+    def test_parse_count(self):
+        self.assertEqual(parse_count("1.2万"), 12000)
+        self.assertEqual(parse_count("3亿"), 300000000)
+        self.assertEqual(parse_count("10+"), 10)
+        self.assertEqual(parse_count("1,234"), 1234)
+        self.assertEqual(parse_count(56), 56)
+        self.assertEqual(parse_count("None"), 0)
+        self.assertIsNone(parse_count(None))
+
+    async def test_migrate_sqlite(self):
+        rows = [
+            ("1", "old", "1.2万"),
+            ("2", "b", "10+"),
+            ("1", "new", "35"),
+            ("3", "c", None),
+        ]
+        for aweme_id, title, liked_count in rows:
+            await self.db.execute(
+                "INSERT INTO douyin_aweme (add_ts, last_modify_ts, aweme_id, title, create_time, liked_count) "
+                "VALUES (1, 1, ?, ?, 100, ?)",
+                aweme_id, title, liked_count,
+            )
+        await migrate_sqlite_platform_tables()
+        # 再次执行不会有任何变化
+        await migrate_sqlite_platform_tables()
+
+        self.assertTrue(await self.db.has_unique_index("douyin_aweme", "aweme_id"))
+        columns = {c["name"]: c["type"] for c in await self.db.query("PRAGMA table_info(douyin_aweme)")}
+        self.assertEqual(columns["liked_count"], "INTEGER")
+        indexes = {i["name"] for i in await self.db.query("PRAGMA index_list(douyin_aweme)")}
+        self.assertIn("idx_douyin_awem_create__299dfe", indexes)
+        self.assertIn("idx_douyin_aweme_keyword_time", indexes)
+
+        rows = await self.db.query("SELECT aweme_id, title, liked_count FROM douyin_aweme ORDER BY liked_count DESC")
+        self.assertEqual([(r["aweme_id"], r["title"], r["liked_count"]) for r in rows],
+                         [("1", "new", 35), ("2", "b", 10), ("3", "c", None)])
+
+        # 迁移后批量写入直接 upsert，计数字段写入前转为整数
+        writer = BatchUpsertWriter("douyin_aweme", "aweme_id")
+        await writer.write([{"aweme_id": "2", "title": "b2", "liked_count": "2.5万", "last_modify_ts": 2,
+                             "create_time": 100}])
+        row = await self.db.get_first("SELECT title, liked_count FROM douyin_aweme WHERE aweme_id = '2'")
+        self.assertEqual(row, {"title": "b2", "liked_count": 25000})
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.tmp_dir.cleanup()
@@ -0,0 +1,69 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+import httpx
+
+from tools.http_pool import HttpClientPool
+
+
+class TestHttpClientPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pool = HttpClientPool(http2=False)
+
+    async def test_client_reused_per_proxy(self):
+        direct = self.pool.get_client()
+        self.assertIs(direct, self.pool.get_client())
+        proxied = self.pool.get_client("http://127.0.0.1:8888")
+        self.assertIsNot(direct, proxied)
+        self.assertIs(proxied, self.pool.get_client("http://127.0.0.1:8888"))
+        self.assertEqual(self.pool.stats()["clients_created"], 2)
+
+    async def test_request_counts(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"ok": 1}))
+        self.pool._clients[(None, True)] = httpx.AsyncClient(transport=transport)
+        for _ in range(3):
+            response = await self.pool.request("GET", "https://example.com/api")
+            self.assertEqual(response.json(), {"ok": 1})
+        self.assertEqual(self.pool.stats()["requests"], 3)
+
+    async def test_aclose(self):
+        client = self.pool.get_client()
+        await self.pool.aclose()
+        self.assertTrue(client.is_closed)
+        self.assertEqual(self.pool.stats()["open_clients"], 0)
+
+    async def asyncTearDown(self):
+        await self.pool.aclose()
+
+
+class TestHttpClientPoolEventLoops(TestCase):
+
+    def test_host_semaphore_rebound_per_loop(self):
+        pool = HttpClientPool(http2=False, max_connections_per_host=1)
+
+        async def contend():
+            semaphore = pool._host_semaphore("https://example.com/a")
+            self.assertIs(semaphore, pool._host_semaphore("https://example.com/b"))
+
+            async def hold():
+                async with semaphore:
+                    await asyncio.sleep(0)
+
+            # 有竞争时才会在信号量上创建 future，跨事件循环复用会报错
+            await asyncio.gather(hold(), hold())
+            return semaphore
+
+        first = asyncio.run(contend())
+        second = asyncio.run(contend())
+        self.assertIsNot(first, second)
@@ -0,0 +1,105 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from datetime import datetime
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from base.base_crawler import AbstractCrawler
+from crawler_runner import MultiPlatformRunner
+from main import CrawlerFactory
+from model.m_crawl_job import ScheduledJobConfig
+from tools.job_scheduler import CronSpec, JobScheduler
+
+
+class RecordingCrawler(AbstractCrawler):
+    seen = []
+
+    async def start(self):
+        await asyncio.sleep(0.01)
+        RecordingCrawler.seen.append((config.PLATFORM, config.CRAWLER_TYPE, tuple(config.DY_CREATOR_ID_LIST)))
+
+    async def search(self):
+        pass
+
+    async def launch_browser(self, chromium, playwright_proxy, user_agent, headless=True):
+        pass
+
+
+class TestCronSpec(IsolatedAsyncioTestCase):
+
+    def test_next_after(self):
+        self.assertEqual(CronSpec("*/15 * * * *").next_after(datetime(2024, 5, 1, 10, 7, 30)), datetime(2024, 5, 1, 10, 15))
+        self.assertEqual(CronSpec("0 */3 * * *").next_after(datetime(2024, 5, 1, 22, 0)), datetime(2024, 5, 2, 0, 0))
+        # 2024-05-05 是周日，下一个周一 9 点
+        self.assertEqual(CronSpec("0 9 * * 1").next_after(datetime(2024, 5, 5, 12, 0)), datetime(2024, 5, 6, 9, 0))
+        self.assertEqual(CronSpec("30 2 1 * *").next_after(datetime(2024, 12, 15)), datetime(2025, 1, 1, 2, 30))
+        self.assertEqual(CronSpec("0 0 29 2 *").next_after(datetime(2025, 1, 1)), datetime(2028, 2, 29, 0, 0))
+        with self.assertRaises(ValueError):
+            CronSpec("61 * * * *")
+        with self.assertRaises(ValueError):
+            CronSpec("* * *")
+
+
+class TestJobScheduler(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_jobs_skip_overlapping_runs(self):
+        running = 0
+        max_running = 0
+        runs = []
+
+        async def run_job(job, index):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            runs.append(job.job_name)
+            await asyncio.sleep(0.12 if job.job_name == "slow" else 0.01)
+            running -= 1
+
+        jobs = [
+            ScheduledJobConfig(name="slow", platform="yt", interval_seconds=0.05),
+            ScheduledJobConfig(platform="dy", interval_seconds=0.05),
+            ScheduledJobConfig(name="disabled", platform="xhs", interval_seconds=0.05, enabled=False),
+        ]
+        scheduler = JobScheduler(jobs, run_job)
+        asyncio.get_running_loop().call_later(0.33, scheduler.stop)
+        await scheduler.run_forever()
+
+        stats = scheduler.stats()
+        self.assertEqual(set(stats), {"slow", "dy"})
+        # 慢任务不会推迟快任务，且上一次未结束时跳过
+        self.assertGreaterEqual(stats["dy"]["runs"], 5)
+        self.assertLessEqual(stats["slow"]["runs"], 3)
+        self.assertGreaterEqual(stats["slow"]["skipped"], 2)
+        self.assertEqual(max_running, 2)
+        self.assertNotIn("disabled", runs)
+
+        with self.assertRaises(ValueError):
+            JobScheduler([ScheduledJobConfig(platform="dy"), ScheduledJobConfig(platform="dy")], run_job)
+
+    async def test_runner_uses_per_job_config(self):
+        RecordingCrawler.seen = []
+        orig_platform = config.PLATFORM
+        jobs = [
+            ScheduledJobConfig(name="dy-a", platform="dy", crawler_type="creator", save_data_option="csv",
+                               interval_seconds=10, extra_config={"DY_CREATOR_ID_LIST": ["a"]}),
+            ScheduledJobConfig(name="dy-b", platform="dy", crawler_type="creator", save_data_option="csv",
+                               interval_seconds=10, extra_config={"DY_CREATOR_ID_LIST": ["b"]}),
+        ]
+        runner = MultiPlatformRunner(max_concurrency=2)
+        with patch.dict(CrawlerFactory.CRAWLERS, {"dy": RecordingCrawler}):
+            scheduler = JobScheduler(jobs, runner.run_job)
+            asyncio.get_running_loop().call_later(0.1, scheduler.stop)
+            await scheduler.run_forever()
+
+        self.assertEqual(sorted(RecordingCrawler.seen), [("dy", "creator", ("a",)), ("dy", "creator", ("b",))])
+        self.assertEqual(config.PLATFORM, orig_platform)
@@ -0,0 +1,95 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import json
+import os
+import tempfile
+from collections import Counter
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import AsyncMock, patch
+
+from store.jsonl_writer import JsonlStreamWriter
+from tools import utils
+from tools.words import AsyncWordCloudGenerator
+
+
+class TestJsonlStreamWriter(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.tmp_dir.name, "json", "search_comments")
+        self.items = [{"comment_id": str(i), "content": f"评论{i}", "sub": {"n": i}} for i in range(5)]
+
+    async def test_rotate_and_resume(self):
+        writer = JsonlStreamWriter(self.prefix, max_bytes=120)
+        for item in self.items[:3]:
+            await writer.write(item)
+        await writer.close()
+        # 同一天再次运行时接着最后一个分片写
+        writer = JsonlStreamWriter(self.prefix, max_bytes=120)
+        for item in self.items[3:]:
+            await writer.write(item)
+        await writer.close()
+
+        part_files = writer.list_part_files(utils.get_current_date())
+        self.assertGreater(len(part_files), 1)
+        lines = []
+        for part_file in part_files:
+            with open(part_file, encoding="utf-8") as f:
+                lines.extend(json.loads(line) for line in f)
+        self.assertEqual(lines, self.items)
+
+    async def test_export_json(self):
+        for indent in (4, None):
+            writer = JsonlStreamWriter(self.prefix, max_bytes=120, export_indent=indent)
+            for item in self.items:
+                await writer.write(item)
+            await writer.close()
+            json_file, = await writer.export_json()
+            with open(json_file, encoding="utf-8") as f:
+                content = f.read()
+            items = self.items * (2 if indent is None else 1)
+            self.assertEqual(content, json.dumps(items, ensure_ascii=False, indent=indent))
+
+    async def test_export_keeps_legacy_json(self):
+        # 旧版本当天直接写出的 JSON 数组，没有 jsonl 分片
+        os.makedirs(os.path.dirname(self.prefix))
+        json_file = f"{self.prefix}_{utils.get_current_date()}.json"
+        with open(json_file, "w", encoding="utf-8") as f:
+            json.dump(self.items[:2], f, ensure_ascii=False, indent=4)
+        writer = JsonlStreamWriter(self.prefix)
+        for item in self.items[2:]:
+            await writer.write(item)
+        await writer.close()
+        self.assertEqual(await writer.export_json(), [json_file])
+        with open(json_file, encoding="utf-8") as f:
+            self.assertEqual(json.load(f), self.items)
+
+    async def test_word_cloud_generated_once_from_all_parts(self):
+        words_prefix = os.path.join(self.tmp_dir.name, "words", "search_comments")
+        # 当天之前的运行写入的分片也计入词频
+        writer = JsonlStreamWriter(self.prefix, max_bytes=120)
+        for item in self.items[:2]:
+            await writer.write(item)
+        await writer.close()
+        writer = JsonlStreamWriter(self.prefix, max_bytes=120, words_prefix=words_prefix)
+        for item in self.items[2:] + [{"comment_id": "5", "content": ""}]:
+            await writer.write(item)
+        await writer.close()
+        expected = Counter(AsyncWordCloudGenerator().cut_words(" ".join(item["content"] for item in self.items)))
+        with patch.object(AsyncWordCloudGenerator, "save_word_frequency_and_cloud", new_callable=AsyncMock) as save, \
+                patch("store.jsonl_writer.iter_jsonl_items") as iter_items:
+            await writer.generate_word_cloud()
+        # 关闭时不再重新读取分片
+        iter_items.assert_not_called()
+        save.assert_awaited_once_with(expected, f"{words_prefix}_{utils.get_current_date()}")
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
@@ -0,0 +1,63 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.keyword_scheduler import KeywordScheduler, PagePipeline, split_keywords
+from var import source_keyword_var
+
+
+class TestKeywordScheduler(IsolatedAsyncioTestCase):
+
+    def test_split_keywords(self):
+        self.assertEqual(split_keywords("a, b,,c ,"), ["a", "b", "c"])
+
+    async def test_run_concurrently_with_isolated_keyword(self):
+        running = 0
+        max_running = 0
+        seen = []
+
+        async def search_keyword(keyword: str):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            # 并发执行时每个关键词任务看到的 source_keyword 仍是自己的
+            seen.append((keyword, source_keyword_var.get()))
+            running -= 1
+            if keyword == "bad":
+                raise RuntimeError("search failed")
+
+        await KeywordScheduler("test", max_concurrency=2).run(["a", "bad", "c", "d"], search_keyword)
+        self.assertEqual(max_running, 2)
+        self.assertEqual(sorted(seen), [("a", "a"), ("bad", "bad"), ("c", "c"), ("d", "d")])
+
+    async def test_page_pipeline_depth(self):
+        events = []
+
+        async def process(page: int):
+            events.append(f"process-start-{page}")
+            await asyncio.sleep(0.01)
+            events.append(f"process-end-{page}")
+
+        async with PagePipeline(depth=1) as pipeline:
+            for page in range(1, 4):
+                events.append(f"search-{page}")
+                await pipeline.submit(process(page))
+                await asyncio.sleep(0)
+
+        # 第 N+1 页的搜索与第 N 页的处理重叠，但同时只有一页在处理
+        self.assertEqual(events, [
+            "search-1", "process-start-1",
+            "search-2", "process-end-1", "process-start-2",
+            "search-3", "process-end-2", "process-start-3",
+            "process-end-3",
+        ])
@@ -0,0 +1,110 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import unittest
+from unittest.mock import patch
+
+from cache.local_cache import ExpiringLocalCache
+
+
+class TestLocalCacheBounds(unittest.TestCase):
+
+    def test_lru_eviction_by_entries(self):
+        cache = ExpiringLocalCache(max_entries=3, max_bytes=0)
+        for key in ("a", "b", "c"):
+            cache.set(key, key, 60)
+        self.assertEqual(cache.get("a"), "a")  # a 变为最近使用
+        cache.set("d", "d", 60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(sorted(cache.keys("*")), ["a", "c", "d"])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_eviction_by_bytes(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=1000)
+        for i in range(10):
+            cache.set(f"k{i}", "x" * 200, 60)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 1000)
+        self.assertGreater(stats["evictions"], 0)
+        self.assertEqual(stats["entries"] + stats["evictions"], 10)
+        self.assertIsNotNone(cache.get("k9"))
+
+    def test_oversized_entry_skipped(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=1000)
+        for i in range(3):
+            cache.set(f"k{i}", "x" * 200, 60)
+        cache.set("k0", "small", 60)
+        with self.assertLogs("MediaCrawler", level="WARNING"):
+            cache.set("big", "x" * 2000, 60)
+            cache.set("k0", "x" * 2000, 60)
+        # 超大的值不缓存，也不会把其他 key 淘汰掉；被超大值覆盖的旧值删除
+        self.assertIsNone(cache.get("big"))
+        self.assertIsNone(cache.get("k0"))
+        self.assertEqual(sorted(cache.keys("*")), ["k1", "k2"])
+        stats = cache.stats()
+        self.assertEqual((stats["evictions"], stats["rejections"]), (0, 2))
+
+    def test_clear_only_pops_expired(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=0)
+        with patch("cache.local_cache.time.time", return_value=1000.0):
+            cache.set("short", 1, 5)
+            cache.set("long", 2, 100)
+            cache.set("reset", 3, 5)
+            cache.set("reset", 4, 100)  # 重新 set 后旧的过期记录失效
+        with patch("cache.local_cache.time.time", return_value=1010.0):
+            cache._clear()
+            self.assertEqual(sorted(cache.keys("*")), ["long", "reset"])
+            self.assertEqual(cache.get("reset"), 4)
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertEqual(len(cache._expire_heap), 2)
+
+    def test_prefix_keys(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=0)
+        for key in ("kuaidaili_1", "kuaidaili_2", "kuaidaili", "wandou_1", "xkuaidaili_3"):
+            cache.set(key, 1, 60)
+        self.assertEqual(cache.keys("kuaidaili_*"), ["kuaidaili_1", "kuaidaili_2"])
+        self.assertEqual(cache.keys("*_1"), ["kuaidaili_1", "wandou_1"])
+        self.assertEqual(cache.keys("wandou_1"), ["wandou_1"])
+        with patch("cache.local_cache.time.time", return_value=10 ** 10):
+            self.assertEqual(cache.keys("kuaidaili_*"), [])
+
+    def test_prefix_index_after_churn(self):
+        cache = ExpiringLocalCache(max_entries=50, max_bytes=0)
+        cache.set("kuaidaili_a", 1, 60)
+        self.assertEqual(cache.keys("kuaidaili_*"), ["kuaidaili_a"])
+        # 淘汰和重新 set 之后索引里没有重复或已删除的 key，失效记录不会无限增长
+        for i in range(500):
+            cache.set(f"kuaidaili_{i:03d}", i, 60)
+            cache.set("kuaidaili_a", i, 60)
+        self.assertLessEqual(len(cache._sorted_keys), 2 * 50 + 64)
+        keys = cache.keys("kuaidaili_*")
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertEqual(len(keys), 50)
+        self.assertIn("kuaidaili_a", keys)
+        self.assertIn("kuaidaili_499", keys)
+
+    def test_hit_miss_counters(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=0)
+        cache.set("key", "value", 60)
+        cache.get("key")
+        cache.get("missing")
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_heap_compacted_on_repeated_set(self):
+        cache = ExpiringLocalCache(max_entries=0, max_bytes=0)
+        for i in range(1000):
+            cache.set("key", i, 60)
+        self.assertLessEqual(len(cache._expire_heap), 2 + 64 + 1)
+        self.assertEqual(cache.get("key"), 999)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.http_pool import HttpClientPool
+from tools.media_downloader import MediaDownloadBlocked, download_to_file
+
+VIDEO = bytes(range(256)) * 400
+
+
+class InterruptedStream(httpx.AsyncByteStream):
+    """
+    先返回一部分数据，然后连接中断
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    async def __aiter__(self):
+        yield self.content
+        raise httpx.ReadError("connection reset")
+
+
+class TestMediaDownloader(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.save_path = os.path.join(self.tmp_dir.name, "videos", "1", "video.mp4")
+        self.requests = []
+        self.http_pool = HttpClientPool()
+
+    def _mock(self, handler):
+        def record(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return handler(request)
+
+        self.http_pool._clients[(None, True)] = httpx.AsyncClient(transport=httpx.MockTransport(record))
+
+    async def test_resume_after_interrupt(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            range_header = request.headers.get("Range")
+            if range_header is None:
+                return httpx.Response(200, stream=InterruptedStream(VIDEO[:30000]))
+            offset = int(range_header[len("bytes="):-1])
+            return httpx.Response(206, content=VIDEO[offset:])
+
+        self._mock(handler)
+        await download_to_file(self.http_pool, "https://v.example.com/1.mp4", self.save_path,
+                               headers={"Cookie": "a=1"}, chunk_size=4096, max_retries=2)
+        with open(self.save_path, "rb") as f:
+            self.assertEqual(f.read(), VIDEO)
+        self.assertFalse(os.path.exists(self.save_path + ".part"))
+        # 中断前写入磁盘的完整分块不会重新下载
+        self.assertEqual([r.headers.get("Range") for r in self.requests], [None, f"bytes={30000 // 4096 * 4096}-"])
+        self.assertEqual(self.requests[0].headers["Cookie"], "a=1")
+
+        # 文件已存在时不再下载
+        await download_to_file(self.http_pool, "https://v.example.com/1.mp4", self.save_path)
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_range_not_supported_and_blocked(self):
+        os.makedirs(os.path.dirname(self.save_path))
+        with open(self.save_path + ".part", "wb") as f:
+            f.write(b"stale")
+        self._mock(lambda request: httpx.Response(200, content=VIDEO))
+        await download_to_file(self.http_pool, "https://v.example.com/1.mp4", self.save_path)
+        with open(self.save_path, "rb") as f:
+            self.assertEqual(f.read(), VIDEO)
+
+        self._mock(lambda request: httpx.Response(403, html="<html>verify</html>"))
+        with self.assertRaises(MediaDownloadBlocked):
+            await download_to_file(self.http_pool, "https://v.example.com/2.mp4", self.save_path + "2")
+
+    async def asyncTearDown(self):
+        await self.http_pool.aclose()
+        self.tmp_dir.cleanup()
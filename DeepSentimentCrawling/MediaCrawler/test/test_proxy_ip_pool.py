@@ -13,10 +13,20 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
+import asyncio
+import time
 from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
 
-from proxy.proxy_ip_pool import create_ip_pool
+import httpx
+
+import config
+from media_platform.kuaishou.client import KuaiShouClient
+from media_platform.kuaishou.exception import DataFetchError
+from proxy.base_proxy import IpGetError, ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool, create_ip_pool
 from proxy.types import IpInfoModel
+from tools import utils
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +38,136 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+
+class FakeProvider(ProxyProvider):
+
+    def __init__(self, batches):
+        self.batches = batches
+        self.calls = []
+
+    async def get_proxy(self, num: int):
+        # 和代理商实现一样优先返回缓存中的 IP，最多返回 num 个
+        self.calls.append(num)
+        return self.batches[min(len(self.calls), len(self.batches)) - 1][:num]
+
+
+def _ip(ip, seconds_left=3600):
+    return IpInfoModel(ip=ip, port=8000, user="", password="", expired_time_ts=utils.get_unix_timestamp() + seconds_left)
+
+
+class TestProxyIpPoolHealth(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        config.use_context_overrides({
+            "IP_PROXY_VALIDATE_INTERVAL": 3600,
+            "IP_PROXY_VALIDATE_CONCURRENCY": 4,
+            "IP_PROXY_REVALIDATE_SECONDS": 3600,
+            "IP_PROXY_PREFETCH_BEFORE_EXPIRE": 60,
+            "IP_PROXY_MAX_FAILURES": 2,
+        })
+        self.delays = {"1.1.1.1": 0.01, "2.2.2.2": 0.2, "3.3.3.3": None, "4.4.4.4": 0.01}
+        self.validated = []
+
+    async def fake_validate(self, proxy):
+        self.validated.append(proxy.ip)
+        delay = self.delays[proxy.ip]
+        await asyncio.sleep(delay or 0.01)
+        return delay is not None
+
+    async def test_score_lease_rotate_and_evict(self):
+        provider = FakeProvider([[_ip("1.1.1.1"), _ip("2.2.2.2"), _ip("3.3.3.3")]])
+        pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=True, ip_provider=provider)
+        with patch.object(pool, "_is_valid_proxy", side_effect=self.fake_validate):
+            start = time.monotonic()
+            await pool.load_proxies()
+            # 并发校验，总耗时接近最慢的一个而不是三者之和
+            self.assertLess(time.monotonic() - start, 0.4)
+            self.assertEqual([proxy.ip for proxy in pool.proxy_list], ["1.1.1.1", "2.2.2.2"])
+
+            # 同一个租用标识固定使用同一个 IP，其他标识分摊到其他 IP
+            first = await pool.get_proxy(lease_key="xhs:")
+            self.assertEqual(first.ip, "1.1.1.1")
+            self.assertEqual((await pool.get_proxy(lease_key="xhs:")).ip, "1.1.1.1")
+            self.assertEqual((await pool.get_proxy(lease_key="dy:")).ip, "2.2.2.2")
+
+            # 换代理时不会再拿到刚失败的 IP
+            self.assertEqual((await pool.get_proxy(lease_key="xhs:", rotate=True)).ip, "2.2.2.2")
+
+            # 连续失败达到上限后剔除，租用随之解除
+            pool.report(first, ok=False)
+            self.assertNotIn("1.1.1.1:8000", [item["proxy"] for item in pool.stats()])
+            pool.report(_ip("2.2.2.2"), ok=False)
+            pool.report(_ip("2.2.2.2"), ok=False)
+            with self.assertRaises(IpGetError):
+                await pool.get_proxy(lease_key="xhs:")
+            self.assertEqual(self.validated.count("1.1.1.1"), 1)
+        await pool.close()
+
+    async def test_prefetch_before_expiry(self):
+        expiring = _ip("1.1.1.1", seconds_left=30)
+        provider = FakeProvider([[expiring], [expiring, _ip("4.4.4.4")]])
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=True, ip_provider=provider)
+        with patch.object(pool, "_is_valid_proxy", side_effect=self.fake_validate):
+            # 只有即将过期的 IP 时仍然可以使用
+            self.assertEqual((await pool.get_proxy(lease_key="xhs:")).ip, "1.1.1.1")
+            # 后台维护时提前补充新 IP，租用换到新 IP 上
+            await pool.refresh()
+            # 缓存中的第一个是池中已有的 IP，只多要还缺的 1 个
+            self.assertEqual(provider.calls, [1, 1, 2])
+            self.assertEqual((await pool.get_proxy(lease_key="xhs:")).ip, "4.4.4.4")
+            self.assertEqual(sorted(self.validated), ["1.1.1.1", "4.4.4.4"])
+        await pool.close()
+
+    async def test_prefetch_requests_only_missing(self):
+        cached = [_ip("1.1.1.1"), _ip("2.2.2.2"), _ip("3.3.3.3"), _ip("4.4.4.4")]
+        provider = FakeProvider([cached])
+        pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=False, ip_provider=provider)
+        await pool.load_proxies()
+        self.assertEqual(provider.calls, [2])
+        pool.report(_ip("1.1.1.1"), ok=False)
+        pool.report(_ip("1.1.1.1"), ok=False)
+        # 被剔除的 1.1.1.1 和池中已有的 2.2.2.2 排在缓存前面，过滤后再要，而不是按池子大小 + 剔除数量多买
+        await pool.refresh()
+        self.assertEqual(provider.calls, [2, 1, 2, 3])
+        self.assertEqual(sorted(proxy.ip for proxy in pool.proxy_list), ["2.2.2.2", "3.3.3.3"])
+        await pool.close()
+
+    async def test_client_reports_to_pool(self):
+        provider = FakeProvider([[_ip("1.1.1.1")]])
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=False, ip_provider=provider)
+        await pool.load_proxies()
+        proxy = await pool.get_proxy(lease_key="ks:")
+        # 接口业务错误（需要登录、笔记已删除）与代理无关，只有成功、5xx、风控和网络错误计入代理评分
+        responses = iter([
+            (200, '{"errors": ["need login"]}'),
+            (200, '{"errors": ["photo deleted"]}'),
+            (200, '{"data": {}}'),
+            (503, "Service Unavailable"),
+        ])
+
+        def handler(request):
+            status, body = next(responses, (None, None))
+            if status is None:
+                raise httpx.ConnectError("proxy refused", request=request)
+            return httpx.Response(status, text=body)
+
+        client = KuaiShouClient(headers={}, playwright_page=None, cookie_dict={})
+        client.http_pool._clients[(None, True)] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client.use_ip_proxy(pool, proxy)
+        for _ in range(2):
+            with self.assertRaises(DataFetchError):
+                await client.post("", {})
+        self.assertEqual(pool.stats()[0]["failures"], 0)
+        self.assertTrue(pool.stats()[0]["leased"])
+        await client.post("", {})
+        self.assertEqual(pool.stats()[0]["successes"], 1)
+        with self.assertRaises(DataFetchError):
+            await client.post("", {})
+        self.assertEqual(pool.stats()[0]["failures"], 1)
+        with self.assertRaises(httpx.ConnectError):
+            await client.post("", {})
+        # 连续失败达到 IP_PROXY_MAX_FAILURES 后被剔除
+        self.assertEqual(pool.stats(), [])
+        await client.close()
+        await pool.close()
@@ -15,10 +15,18 @@
 # @Time    : 2024/6/2 19:54
 # @Desc    :
 
+import asyncio
+import fnmatch
+import json
+import pickle
 import time
 import unittest
+from unittest import IsolatedAsyncioTestCase
 
+from cache.async_redis_cache import AsyncRedisCache
+from cache.cache_factory import CacheFactory
 from cache.redis_cache import RedisCache
+from proxy.base_proxy import IpCache
 
 
 class TestRedisCache(unittest.TestCase):
@@ -47,5 +55,102 @@ class TestRedisCache(unittest.TestCase):
         pass
 
 
+class FakeAsyncRedis:
+    """
+    只实现 AsyncRedisCache 用到的命令，记录调用次数
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    async def get(self, key):
+        self.calls.append("get")
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.calls.append("set")
+        self.data[key] = value
+
+    async def mget(self, keys):
+        self.calls.append("mget")
+        return [self.data.get(key) for key in keys]
+
+    async def scan_iter(self, match, count):
+        self.calls.append("scan")
+        for key in list(self.data):
+            if fnmatch.fnmatch(key, match):
+                yield key.encode()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        self.redis.calls.append("pipeline")
+        self.redis.data.update(self.commands)
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    def _cache(self, **kwargs):
+        cache = CacheFactory.create_cache("async_redis", **kwargs)
+        cache._client = FakeAsyncRedis()
+        cache._client_loop = asyncio.get_running_loop()
+        return cache
+
+    async def test_batch_read_write_and_serializer(self):
+        cache = self._cache(serializer="json", batch_size=2)
+        self.assertIsInstance(cache, AsyncRedisCache)
+        await cache.aset_many([(f"k{i}", {"i": i, "名": "值"}, 10) for i in range(5)])
+        await cache.aset("other", [1, 2], 10)
+        fake = cache._client
+        self.assertEqual(fake.calls, ["pipeline"] * 3 + ["set"])
+        self.assertEqual(json.loads(fake.data["k1"]), {"i": 1, "名": "值"})
+
+        fake.calls.clear()
+        items = await cache.aitems("k*")
+        self.assertEqual(sorted(items), [(f"k{i}", {"i": i, "名": "值"}) for i in range(5)])
+        self.assertEqual(fake.calls, ["scan"] + ["mget"] * 3)
+
+        # 旧的 pickle 值按未命中处理
+        fake.data["old"] = pickle.dumps("value")
+        self.assertIsNone(await cache.aget("old"))
+        self.assertEqual(await cache.amget(["other", "missing"]), [[1, 2], None])
+        with self.assertRaises(ValueError):
+            AsyncRedisCache(serializer="pickle")
+
+    async def test_ip_cache_batch_load(self):
+        ip_cache = IpCache(cache_type="async_redis")
+        ip_cache.cache_client._client = FakeAsyncRedis()
+        ip_cache.cache_client._client_loop = asyncio.get_running_loop()
+        value = {"ip": "1.1.1.1", "port": 80, "user": "", "password": "", "expired_time_ts": 1}
+        await ip_cache.set_ips([(f"kuaidaili_1.1.1.{i}_80", json.dumps({**value, "ip": f"1.1.1.{i}"}), 60)
+                                for i in range(3)])
+        proxies = await ip_cache.load_all_ip("kuaidaili")
+        self.assertEqual(sorted(proxy.ip for proxy in proxies), ["1.1.1.0", "1.1.1.1", "1.1.1.2"])
+        self.assertEqual(ip_cache.cache_client._client.calls, ["pipeline", "scan", "mget"])
+
+        # 内存缓存走 AbstractCache 的默认异步实现
+        memory_cache = IpCache(cache_type="memory")
+        await memory_cache.set_ip("wandou_1.1.1.1_80", json.dumps(value), ex=60)
+        self.assertEqual([proxy.ip for proxy in await memory_cache.load_all_ip("wandou")], ["1.1.1.1"])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.bilibili.help import BilibiliSign
+from tools.session_params import SessionParamCache
+
+
+class TestSessionParamCache(IsolatedAsyncioTestCase):
+
+    async def test_load_once_and_invalidate(self):
+        cache = SessionParamCache(ttl=60)
+        loads = 0
+
+        async def loader():
+            nonlocal loads
+            loads += 1
+            await asyncio.sleep(0.01)
+            return f"value-{loads}"
+
+        # 并发获取同一个 key 只加载一次
+        values = await asyncio.gather(*[cache.get("key", loader) for _ in range(5)])
+        self.assertEqual(values, ["value-1"] * 5)
+        self.assertEqual(await cache.get("key", loader), "value-1")
+
+        cache.invalidate("key")
+        self.assertEqual(await cache.get("key", loader), "value-2")
+        self.assertEqual(cache.stats(), {"hits": 5, "loads": 2, "invalidations": 1})
+
+    async def test_ttl_expired(self):
+        cache = SessionParamCache()
+
+        async def loader():
+            return object()
+
+        first = await cache.get("key", loader, ttl=0)
+        self.assertIsNot(await cache.get("key", loader), first)
+
+    def test_bilibili_sign_salt(self):
+        signer = BilibiliSign("7cd084941338484aae1ad9425b84077c", "4932caff0ff746eab6f01bf08b70ac45")
+        self.assertEqual(signer.salt, "ea1db124af3c7062474693fa704f4ff8")
+        signed = signer.sign({"aid": 170001})
+        self.assertEqual(len(signed["w_rid"]), 32)
@@ -0,0 +1,98 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import itertools
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.xhs.client import XiaoHongShuClient
+from tools.sign_page_pool import SignPagePool
+
+
+class FakeContext:
+
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+
+class FakePage:
+    _ids = itertools.count()
+
+    def __init__(self, context, url=""):
+        self.context = context
+        self.url = url
+        self.id = next(self._ids)
+        self.closed = False
+        self.calls = 0
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def wait_for_function(self, expression, **kwargs):
+        pass
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+    async def evaluate(self, expression, arg=None):
+        if self.closed:
+            raise RuntimeError("Target page, context or browser has been closed")
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if "localStorage" in expression:
+            return {"b1": "b1" * 40}
+        return {"X-s": f"XYW_{self.id}_{arg[0]}".ljust(64, "x"), "X-t": 1700000000000}
+
+
+class TestSignPagePool(IsolatedAsyncioTestCase):
+
+    async def test_least_loaded_dispatch_and_close(self):
+        context = FakeContext()
+        primary = FakePage(context, url="https://www.xiaohongshu.com/explore")
+        pool = SignPagePool(primary, size=3)
+        await asyncio.gather(*(pool.evaluate("([url, data]) => window._webmsxyw(url,data)", [str(i), None]) for i in range(9)))
+        self.assertEqual(len(context.pages), 2)
+        self.assertTrue(all(page.url == primary.url for page in context.pages))
+        self.assertEqual([page.calls for page in [primary] + context.pages], [3, 3, 3])
+
+        # 额外页面被关闭后移出页面池
+        context.pages[0].closed = True
+        with self.assertRaises(RuntimeError):
+            for i in range(3):
+                await pool.evaluate("() => 1", [str(i), None])
+        self.assertEqual(len(pool.stats()), 2)
+
+        await pool.close()
+        self.assertFalse(primary.closed)
+        self.assertTrue(context.pages[1].closed)
+        self.assertEqual(pool.stats(), [{"primary": True, "in_flight": 0, "calls": 3 + 1}])
+
+    async def test_xhs_headers_per_request(self):
+        context = FakeContext()
+        primary = FakePage(context, url="https://www.xiaohongshu.com/explore")
+        client = XiaoHongShuClient(
+            headers={"Cookie": "a1=abc"}, playwright_page=primary, cookie_dict={"a1": "abc"},
+        )
+        client.sign_pages = SignPagePool(primary, size=2)
+        headers_list = await asyncio.gather(*(client._pre_headers(f"/api/{i}") for i in range(4)))
+        self.assertEqual(client.headers, {"Cookie": "a1=abc"})
+        self.assertEqual(len({id(headers) for headers in headers_list}), 4)
+        self.assertTrue(all(headers["Cookie"] == "a1=abc" and headers["X-S"] for headers in headers_list))
+        self.assertEqual(len({headers["X-B3-Traceid"] for headers in headers_list}), 4)
+        await client.close()
+        self.assertTrue(context.pages[0].closed)
@@ -0,0 +1,62 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import shutil
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from media_platform.zhihu.help import sign as zhihu_sign
+from tools.sign_service import LIBS_DIR, SignService
+
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+ZHIHU_COOKIE = "d_c0=AKCTeJ7rxBmPTuZb0NXmAu8hAmBp-5Hb6Ek=|1735015473"
+
+
+@unittest.skipIf(shutil.which("node") is None, "node is not installed")
+class TestSignService(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.service = SignService(pool_size=2)
+        self.service.register_js("zhihu.get_sign", LIBS_DIR / "zhihu.js", "get_sign")
+        self.service.register_js("douyin.sign_datail", LIBS_DIR / "douyin.js", "sign_datail")
+        self.service.register_python("echo", lambda *args: list(args))
+
+    async def test_matches_execjs(self):
+        # x-zse-96 带随机数，只比较确定部分和格式
+        expected = zhihu_sign(ZHIHU_URL, ZHIHU_COOKIE)
+        results = await asyncio.gather(*[self.service.sign("zhihu.get_sign", ZHIHU_URL, ZHIHU_COOKIE) for _ in range(6)])
+        results += await self.service.sign_batch("zhihu.get_sign", [(ZHIHU_URL, ZHIHU_COOKIE)] * 3)
+        self.assertEqual(len(results), 9)
+        for result in results:
+            self.assertEqual(result.keys(), expected.keys())
+            self.assertEqual(result["x-zst-81"], expected["x-zst-81"])
+            self.assertTrue(result["x-zse-96"].startswith("2.0_"))
+            self.assertEqual(len(result["x-zse-96"]), len(expected["x-zse-96"]))
+        # 并发请求分摊到了多个常驻进程
+        pool = self.service._js_pools[LIBS_DIR / "zhihu.js"]
+        self.assertTrue(all(process.alive for process in pool))
+
+        a_bogus = await self.service.sign("douyin.sign_datail", "aweme_id=1&device_platform=webapp", "Mozilla/5.0")
+        self.assertIsInstance(a_bogus, str)
+        self.assertTrue(a_bogus)
+
+    async def test_stats_and_errors(self):
+        self.assertEqual(await self.service.sign("echo", 1, "a"), [1, "a"])
+        with self.assertRaises(ValueError):
+            await self.service.sign("unknown")
+        await self.service.sign_batch("zhihu.get_sign", [(ZHIHU_URL, ZHIHU_COOKIE)] * 4)
+        stats = self.service.stats()
+        self.assertEqual(stats["echo"]["count"], 1)
+        self.assertEqual(stats["zhihu.get_sign"]["count"], 4)
+        self.assertEqual(sum(stats["zhihu.get_sign"]["buckets"].values()), 4)
+
+    async def asyncTearDown(self):
+        await self.service.aclose()
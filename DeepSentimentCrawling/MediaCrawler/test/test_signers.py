@@ -0,0 +1,142 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import random
+import unittest
+import urllib.parse
+from unittest.mock import patch
+
+from media_platform.bilibili.help import BilibiliSign
+from media_platform.douyin.help import get_a_bogus_from_js
+from media_platform.xhs import help as xhs_help
+from media_platform.zhihu.help import sign as zhihu_sign
+from tools import sign_benchmark
+from tools.sign_benchmark import (
+    BILI_IMG_KEY,
+    BILI_SUB_KEY,
+    XHS_A1,
+    XHS_B1,
+    XHS_X_S,
+    XHS_X_T,
+    ZHIHU_COOKIE,
+    ZHIHU_URL,
+)
+
+# 固定向量由改写前的实现（ctypes 逐字符 CRC、逐组查表 base64、quote 后还原 %XX）生成
+XHS_MRC = -3565390821
+XHS_X_S_COMMON = (
+    "2UQAPsHCPUIjqArjwjHjNsQhPsHCH0rjNsQhPaHCH0P1+UhhN/HjNsQhPjHCHDMYGUmOLUHVHdWAH0ij2BYANgm0Ng4SGjHVHdWFH0ij+shU"
+    "+UhUHjIj2eLjwjHlwe4DPfzS8fpYwBzCPn8d47SDJf+k+em34AH9+nS3yeSfq7Y1+08lqALIPeZI+AH9PecAHjIj2eGjwjHl+AZIPeZIPeZI"
+    "PeZIHjIj2eqjwjQGnp4K8gSt2fbg8oppPMkMank6yLELznSPcFkCGp4D4p8HJo4yLFD9anEd2rSk49S8nrQ7LM4zyLRka0zYarMFGF4+4Bc"
+    "UpfSQyg4kGAQVJfQVnfl0JDEIG0HFyLRkagYQyg4kGF4B+nQownYycFD9ankmHjIj2eWjwjQQPAYUaBzdq9k6qB4Q4fpA8b878FSet9RQzL"
+    "lTcSiM8/+n4MYP8F8LagY/P9Ql4FpUzfpS2BcI8nT1GFbC/L88JdbFyrSiafp/cDMra7pFLDDAaMrjNsQhwaHCN/PM+0LAw/ZhP0rVHdWl"
+    "PsHCP/LFKc=="
+)
+XHS_B64_VECTORS = {
+    b"": "",
+    b"a": "Gc==",
+    b"ab": "GnH=",
+    b"abc": "GnQ0",
+}
+
+
+def legacy_mrc(e):
+    # 逐位计算的 CRC32，与原来的查表 + 无符号右移写法等价
+    o = 0xFFFFFFFF
+    for ch in e[:57]:
+        o ^= ord(ch)
+        for _ in range(8):
+            o = (o >> 1) ^ (0xEDB88320 if o & 1 else 0)
+    return o ^ -1 ^ 3988292384
+
+
+def legacy_encode_utf8(e):
+    quoted = urllib.parse.quote(e, safe="~()*!.'")
+    result = []
+    i = 0
+    while i < len(quoted):
+        if quoted[i] == "%":
+            result.append(int(quoted[i + 1:i + 3], 16))
+            i += 3
+        else:
+            result.append(ord(quoted[i]))
+            i += 1
+    return result
+
+
+def legacy_b64_encode(e):
+    bits = "".join(f"{byte:08b}" for byte in e)
+    bits += "0" * (-len(bits) % 6)
+    encoded = "".join(xhs_help.lookup[int(bits[i:i + 6], 2)] for i in range(0, len(bits), 6))
+    return encoded + "=" * (-len(encoded) % 4)
+
+
+class TestSigners(unittest.TestCase):
+
+    def test_xhs_golden_vectors(self):
+        self.assertEqual(xhs_help.mrc(XHS_X_T + XHS_X_S + XHS_B1), XHS_MRC)
+        signed = xhs_help.sign(XHS_A1, XHS_B1, XHS_X_S, XHS_X_T)
+        self.assertEqual(signed["x-s-common"], XHS_X_S_COMMON)
+        self.assertRegex(signed["x-b3-traceid"], r"^[0-9a-f]{16}$")
+        for data, expected in XHS_B64_VECTORS.items():
+            self.assertEqual(xhs_help.b64Encode(list(data)), expected)
+            self.assertEqual(xhs_help.b64Encode(data), expected)
+        self.assertEqual(
+            xhs_help.encodeUtf8("签名 a+b/c~()*!.'é"),
+            [231, 173, 190, 229, 144, 141, 32, 97, 43, 98, 47, 99, 126, 40, 41, 42, 33, 46, 39, 195, 169],
+        )
+        with self.assertRaises(IndexError):
+            xhs_help.mrc("too short")
+
+    def test_xhs_matches_reference_on_random_inputs(self):
+        rng = random.Random(20240610)
+        alphabet = "".join(chr(i) for i in range(32, 127)) + "éü签名😀"
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 120)))
+            self.assertEqual(xhs_help.encodeUtf8(text), legacy_encode_utf8(text))
+            data = xhs_help.encodeUtf8(text)
+            self.assertEqual(xhs_help.b64Encode(data), legacy_b64_encode(data))
+            latin = "".join(chr(rng.randint(0, 255)) for _ in range(rng.randint(57, 90)))
+            self.assertEqual(xhs_help.mrc(latin), legacy_mrc(latin))
+
+    def test_bilibili_golden_vector(self):
+        signer = BilibiliSign(BILI_IMG_KEY, BILI_SUB_KEY)
+        with patch("tools.utils.get_unix_timestamp", return_value=1700000000):
+            signed = signer.sign({"aid": 170001, "keyword": "python (教程)!*", "page": 1})
+        self.assertEqual(signed, {
+            "aid": "170001", "keyword": "python 教程", "page": "1", "wts": "1700000000",
+            "w_rid": "f7f56243d625558ef54ace4fccc5ea14",
+        })
+
+    @unittest.skipUnless(sign_benchmark.js_runtime_available(), "node or PyExecJS is not installed")
+    def test_js_signers(self):
+        # x-zse-96 和 a_bogus 带随机数，只比较确定部分和格式
+        signed = zhihu_sign(ZHIHU_URL, ZHIHU_COOKIE)
+        self.assertTrue(signed["x-zst-81"].startswith("3_2.0"))
+        self.assertRegex(signed["x-zse-96"], r"^2\.0_\S{64}$")
+        self.assertTrue(get_a_bogus_from_js("/aweme/v1/web/aweme/detail/", "aweme_id=1", "Mozilla/5.0"))
+
+    def test_benchmark_reports(self):
+        cases = sign_benchmark.build_cases(include_js=False)
+        results = [sign_benchmark.run_benchmark(name, func, iterations=50, warmup=1) for name, func in cases.items()]
+        self.assertEqual([result.name for result in results], list(cases))
+        for result in results:
+            self.assertGreater(result.ops_per_sec, 0)
+            self.assertLessEqual(result.p50_us, result.p99_us)
+            self.assertLessEqual(result.p99_us, result.max_us)
+
+        baseline = {"xhs.mrc": {"ops_per_sec": results[2].ops_per_sec * 10}, "xhs.sign": {"ops_per_sec": 0}}
+        regressions = sign_benchmark.find_regressions(results, baseline, max_regression=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("xhs.mrc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
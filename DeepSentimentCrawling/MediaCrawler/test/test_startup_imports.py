@@ -0,0 +1,39 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import unittest
+
+from tools.import_benchmark import measure_import
+
+# 冷启动导入耗时上限（毫秒），留足余量避免机器负载导致误报，只用于发现重依赖被提前导入这类明显回退
+STARTUP_BUDGET_MS = 3000
+
+PLATFORMS = ("bilibili", "douyin", "kuaishou", "tieba", "weibo", "xhs", "zhihu", "xueqiu", "reddit", "youtube")
+
+
+class TestStartupImports(unittest.TestCase):
+
+    def test_main_does_not_import_platforms(self):
+        report = measure_import("main")
+        self.assertGreater(report.total_ms, 0)
+        self.assertLess(report.total_ms, STARTUP_BUDGET_MS)
+        self.assertEqual(report.heavy_modules, [])
+        self.assertFalse([name for name in report.cumulative_ms if name.startswith("media_platform.")])
+
+    def test_platforms_defer_heavy_imports(self):
+        for platform in PLATFORMS:
+            with self.subTest(platform=platform):
+                report = measure_import(f"media_platform.{platform}")
+                self.assertEqual(report.heavy_modules, [])
+                self.assertLess(report.total_ms, STARTUP_BUDGET_MS)
+
+
+if __name__ == "__main__":
+    unittest.main()
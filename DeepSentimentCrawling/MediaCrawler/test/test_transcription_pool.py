@@ -0,0 +1,124 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from tools.transcription_pool import TranscriptionJob, TranscriptionPool, register_transcription_writer
+
+release_event = threading.Event()
+
+
+def fake_transcribe(media_path: str) -> str:
+    release_event.wait(5)
+    with open(media_path, encoding="utf-8") as f:
+        return f"text of {f.read()}"
+
+
+def failing_transcribe(media_path: str) -> str:
+    raise RuntimeError("interrupted")
+
+
+class TestTranscriptionPool(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        release_event.clear()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmp_dir.name, "asr", "pending_jobs.json")
+        self.written = {}
+
+        async def writer(content_id: str, text: str):
+            self.written[content_id] = text
+
+        register_transcription_writer("test", writer)
+
+    def _make_job(self, content_id: str) -> TranscriptionJob:
+        media_dir = os.path.join(self.tmp_dir.name, content_id)
+        os.makedirs(media_dir)
+        media_path = os.path.join(media_dir, "video.mp4")
+        with open(media_path, "w", encoding="utf-8") as f:
+            f.write(content_id)
+        return TranscriptionJob(platform="test", content_id=content_id, media_path=media_path)
+
+    def _make_pool(self) -> TranscriptionPool:
+        return TranscriptionPool(max_workers=2, max_pending=2, journal_path=self.journal_path,
+                                 transcribe_func=fake_transcribe, use_processes=False)
+
+    async def test_backpressure_and_write_back(self):
+        pool = self._make_pool()
+        jobs = [self._make_job(str(i)) for i in range(3)]
+        await pool.submit(jobs[0])
+        await pool.submit(jobs[1])
+        # 在途任务已满，第三个任务需要等待
+        third = asyncio.ensure_future(pool.submit(jobs[2]))
+        await asyncio.sleep(0.1)
+        self.assertFalse(third.done())
+        self.assertEqual(len(pool.pending_jobs), 2)
+
+        release_event.set()
+        await third
+        await pool.drain()
+        self.assertEqual(self.written, {str(i): f"text of {i}" for i in range(3)})
+        self.assertEqual(pool.pending_jobs, [])
+        self.assertFalse(any(os.path.exists(job.media_path) for job in jobs))
+        await pool.aclose()
+
+    async def test_resume_after_restart(self):
+        # 第一次运行转写失败（例如进程被中断），任务保留在任务日志中
+        pool = TranscriptionPool(max_workers=1, max_pending=2, journal_path=self.journal_path,
+                                 transcribe_func=failing_transcribe, use_processes=False)
+        jobs = [self._make_job("1"), self._make_job("2")]
+        for job in jobs:
+            await pool.submit(job)
+        await pool.aclose()
+        self.assertEqual(self.written, {})
+        os.remove(jobs[1].media_path)
+
+        release_event.set()
+        restarted = self._make_pool()
+        self.assertEqual([job.key for job in restarted.pending_jobs], ["test:1", "test:2"])
+        # 媒体文件已不存在的任务直接丢弃
+        self.assertEqual(await restarted.resume("other"), 0)
+        self.assertEqual(await restarted.resume("test"), 1)
+        await restarted.drain()
+        self.assertEqual(self.written, {"1": "text of 1"})
+        self.assertEqual(restarted.pending_jobs, [])
+        await restarted.aclose()
+        self.assertEqual(self._make_pool().pending_jobs, [])
+
+    async def test_dead_letter_after_max_attempts(self):
+        dead_letter_path = os.path.join(self.tmp_dir.name, "asr", "failed_jobs.json")
+        job = self._make_job("1")
+        for attempt in range(1, 3):
+            pool = TranscriptionPool(max_workers=1, max_pending=1, journal_path=self.journal_path,
+                                     transcribe_func=failing_transcribe, use_processes=False,
+                                     max_attempts=2, dead_letter_path=dead_letter_path)
+            if attempt == 1:
+                await pool.submit(job)
+            else:
+                self.assertEqual(pool.pending_jobs[0].attempts, 1)
+                self.assertEqual(await pool.resume("test"), 1)
+            await pool.aclose()
+
+        restarted = TranscriptionPool(journal_path=self.journal_path, dead_letter_path=dead_letter_path,
+                                      transcribe_func=failing_transcribe, use_processes=False)
+        self.assertEqual(restarted.pending_jobs, [])
+        dead_job, = restarted.dead_jobs
+        self.assertEqual((dead_job.key, dead_job.attempts, dead_job.last_error), ("test:1", 2, "interrupted"))
+        self.assertEqual(await restarted.resume("test"), 0)
+        # 失败任务的媒体文件保留，便于排查
+        self.assertTrue(os.path.exists(job.media_path))
+
+    async def asyncTearDown(self):
+        release_event.set()
+        self.tmp_dir.cleanup()
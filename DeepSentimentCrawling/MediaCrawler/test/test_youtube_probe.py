@@ -0,0 +1,135 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from media_platform.youtube.core import YouTubeCrawler
+from media_platform.youtube.probe import (
+    PROBE_ERROR,
+    PROBE_MEMBERS_ONLY,
+    PROBE_OK,
+    PROBE_UNAVAILABLE,
+    ProbeResult,
+    VideoProbeCache,
+    get_probe_cache,
+    run_ordered_probes,
+)
+from store.creator_index import CreatorCrawlIndex
+
+
+class TestYouTubeProbe(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        config.use_context_overrides({
+            "YOUTUBE_PROBE_CACHE_PATH": os.path.join(self.tmp_dir.name, "probe_cache.json"),
+            "YOUTUBE_PROBE_CONCURRENCY": 3,
+            "YOUTUBE_PROBE_CACHE_TTL": 3600,
+            "YOUTUBE_PROBE_UNAVAILABLE_TTL": 60,
+        })
+
+    async def test_ordered_probes_bounded_and_drained(self):
+        running = 0
+        max_running = 0
+        started = []
+        cancelled = []
+        handled = []
+
+        async def probe(vid):
+            nonlocal running, max_running
+            started.append(vid)
+            running += 1
+            max_running = max(max_running, running)
+            try:
+                # 越靠前的视频越慢，结果仍按原顺序处理
+                await asyncio.sleep(0.05 - int(vid) * 0.004)
+            except asyncio.CancelledError:
+                cancelled.append(vid)
+                raise
+            finally:
+                running -= 1
+            return ProbeResult(vid, PROBE_OK)
+
+        async def handle(result):
+            handled.append(result.video_id)
+            return len(handled) >= 4
+
+        await run_ordered_probes([str(i) for i in range(10)], probe, handle, concurrency=3)
+        self.assertEqual(handled, ["0", "1", "2", "3"])
+        self.assertEqual(max_running, 3)
+        # 停止时最多多启动 concurrency - 1 个探测，已开始的探测等它们完成而不是取消
+        self.assertLessEqual(len(started), 6)
+        self.assertEqual(running, 0)
+        self.assertEqual(cancelled, [])
+
+    async def test_cache_ttl_and_persistence(self):
+        cache = VideoProbeCache(config.YOUTUBE_PROBE_CACHE_PATH)
+        cache.put(ProbeResult("m", PROBE_MEMBERS_ONLY, info={"title": "t", "formats": [1]}, probed_at=time.time()))
+        cache.put(ProbeResult("u", PROBE_UNAVAILABLE, probed_at=time.time() - 120))
+        cache.put(ProbeResult("e", PROBE_ERROR))
+        cache.put(ProbeResult("ok", PROBE_OK))
+        await cache.save()
+
+        cache = VideoProbeCache(config.YOUTUBE_PROBE_CACHE_PATH)
+        cached = cache.get("m")
+        self.assertTrue(cached.cached)
+        self.assertEqual((cached.status, cached.info), (PROBE_MEMBERS_ONLY, {"title": "t"}))
+        # 不可用视频已过期；暂时性失败和可访问视频不缓存
+        self.assertIsNone(cache.get("u"))
+        self.assertIsNone(cache.get("e"))
+        self.assertIsNone(cache.get("ok"))
+
+    async def test_creator_entries_skip_cached_members_only(self):
+        statuses = {"a": PROBE_MEMBERS_ONLY, "b": PROBE_OK, "c": PROBE_ERROR, "d": PROBE_OK, "e": PROBE_OK}
+        probed = []
+        stored = []
+        lock = threading.Lock()
+
+        def fake_probe(vid):
+            with lock:
+                probed.append(vid)
+            return ProbeResult(vid, statuses[vid], info={"id": vid, "timestamp": 1700000000}, probed_at=time.time())
+
+        async def fake_handle(entry):
+            stored.append(entry["id"])
+
+        crawler = YouTubeCrawler()
+        entries = [{"id": vid} for vid in statuses]
+        with patch.object(crawler, "_probe_video", side_effect=fake_probe), \
+                patch.object(crawler, "_handle_video_entry", side_effect=fake_handle):
+            creator_index = CreatorCrawlIndex("yt", "channel")
+            self.assertEqual(await crawler._crawl_creator_entries(entries, 2, True, creator_index), 2)
+            self.assertEqual(stored, ["b", "d"])
+            self.assertEqual(set(creator_index.known_ids), {"b", "d"})
+
+            # 停止后仍在进行的探测结果也写入了缓存（e 之前的 c 是暂时性失败，不缓存）
+            statuses["e"] = PROBE_UNAVAILABLE
+            probed.clear()
+            stored.clear()
+            await crawler._crawl_creator_entries(entries, 2, True, CreatorCrawlIndex("yt", "channel"))
+            self.assertIn("e", probed)
+            self.assertEqual(get_probe_cache().get("e").status, PROBE_UNAVAILABLE)
+
+            # 第二次运行不再探测缓存中的会员视频
+            probed.clear()
+            stored.clear()
+            await crawler._crawl_creator_entries(entries, 2, True, CreatorCrawlIndex("yt", "channel"))
+            self.assertNotIn("a", probed)
+            self.assertEqual(stored, ["b", "d"])
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
@@ -0,0 +1,281 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 浏览器会话池：按 平台/账号 保留已登录的浏览器上下文，跨定时任务周期复用
+#
+# 原来每次运行爬虫都要启动浏览器（或通过 CDP 连接）、注入反检测脚本、打开首页、检查登录，结束时全部关闭；
+# 定时任务每小时跑一次时，启动和登录往往比实际抓取还慢。
+# 会话池持有 playwright 实例和浏览器上下文，同一个 key 同一时间只租给一个爬虫，
+# 复用前做健康检查，页面使用次数过多时换新页面，空闲一段时间后重新打开首页刷新 cookie。
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from playwright.async_api import BrowserContext, Page, Playwright, async_playwright
+
+import config
+from tools import utils
+
+SessionKey = Tuple[str, str]
+# 启动回调：在给定的 playwright 实例上启动浏览器并打开首页，返回 (浏览器上下文, 页面, CDP 管理器)
+LaunchFunc = Callable[[Playwright], Awaitable[Tuple[BrowserContext, Page, Any]]]
+
+
+class BrowserSession:
+    """
+    一个平台/账号的浏览器会话
+    """
+
+    def __init__(self, key: SessionKey, playwright: Playwright, browser_context: BrowserContext, context_page: Page,
+                 cdp_manager: Any = None, index_url: str = "", fingerprint: str = "") -> None:
+        """
+        :param key: (平台, 账号)
+        :param playwright: 会话独占的 playwright 实例
+        :param browser_context: 浏览器上下文
+        :param context_page: 打开首页的页面
+        :param cdp_manager: CDP 模式下的 CDPBrowserManager
+        :param index_url: 平台首页，换页面和刷新 cookie 时打开
+        :param fingerprint: 启动参数（代理等）的标识，变化后会话不能复用
+        """
+        self.key = key
+        self.playwright = playwright
+        self.browser_context = browser_context
+        self.context_page = context_page
+        self.cdp_manager = cdp_manager
+        self.index_url = index_url
+        self.fingerprint = fingerprint
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+        self.page_uses = 0
+
+    async def is_healthy(self, timeout: float) -> bool:
+        """
+        浏览器仍然连接，且上下文能正常响应
+        :param timeout: 超时时间（秒）
+        :return:
+        """
+        browser = self.browser_context.browser
+        if browser is not None and not browser.is_connected():
+            return False
+        try:
+            await asyncio.wait_for(self.browser_context.cookies(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def recycle_page(self) -> None:
+        """
+        新开页面打开首页，替换当前页面
+        :return:
+        """
+        old_page = self.context_page
+        page = await self.browser_context.new_page()
+        if self.index_url:
+            await page.goto(self.index_url)
+        self.context_page = page
+        self.page_uses = 0
+        if not old_page.is_closed():
+            await old_page.close()
+
+    async def refresh(self) -> None:
+        """
+        重新打开首页，让站点刷新 cookie 和本地存储中的签名参数
+        :return:
+        """
+        if self.index_url:
+            await self.context_page.goto(self.index_url)
+
+    async def close(self) -> None:
+        try:
+            if self.cdp_manager is not None:
+                await self.cdp_manager.cleanup()
+            else:
+                await self.browser_context.close()
+        except Exception as e:
+            utils.logger.warning(f"[BrowserSession.close] close browser {self.key} error: {e}")
+        try:
+            await self.playwright.stop()
+        except Exception:
+            pass
+
+
+class BrowserSessionPool:
+    """
+    用法：
+        async with pool.lease("xhs", "", launch, index_url=...) as session:
+            session.browser_context / session.context_page
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        page_max_uses: Optional[int] = None,
+        refresh_interval: Optional[float] = None,
+        health_check_timeout: Optional[float] = None,
+    ) -> None:
+        """
+        参数默认取 BROWSER_SESSION_* 配置
+        :param max_age: 会话最长存活时间（秒）
+        :param idle_timeout: 会话空闲多久后关闭（秒）
+        :param page_max_uses: 页面复用次数上限
+        :param refresh_interval: 复用时距上次使用超过该时间则重新打开首页（秒）
+        :param health_check_timeout: 健康检查超时（秒）
+        """
+        self.max_age = config.BROWSER_SESSION_MAX_AGE if max_age is None else max_age
+        self.idle_timeout = config.BROWSER_SESSION_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.page_max_uses = config.BROWSER_SESSION_PAGE_MAX_USES if page_max_uses is None else page_max_uses
+        self.refresh_interval = config.BROWSER_SESSION_REFRESH_INTERVAL if refresh_interval is None else refresh_interval
+        self.health_check_timeout = (
+            config.BROWSER_SESSION_HEALTH_CHECK_TIMEOUT if health_check_timeout is None else health_check_timeout
+        )
+        self._sessions: Dict[SessionKey, BrowserSession] = {}
+        self._locks: Dict[SessionKey, asyncio.Lock] = {}
+        self._stats: Dict[str, int] = {"launches": 0, "reuses": 0, "page_recycles": 0, "refreshes": 0, "discards": 0}
+
+    @asynccontextmanager
+    async def lease(self, platform: str, account: str, launch: LaunchFunc, index_url: str = "",
+                    fingerprint: str = "") -> AsyncIterator[BrowserSession]:
+        """
+        租用一个会话，不存在或不可用时调用 launch 启动；同一个 key 同一时间只租给一个调用方
+        :param platform: 平台
+        :param account: 账号
+        :param launch: 启动回调
+        :param index_url: 平台首页，默认为启动后页面所在的地址
+        :param fingerprint: 启动参数标识，与已有会话不一致时重新启动
+        :return:
+        """
+        key = (platform, account)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            await self.close_idle()
+            session = await self._checkout(key, launch, index_url, fingerprint)
+            session.uses += 1
+            session.page_uses += 1
+            try:
+                yield session
+            finally:
+                session.last_used_at = time.monotonic()
+
+    async def _checkout(self, key: SessionKey, launch: LaunchFunc, index_url: str, fingerprint: str) -> BrowserSession:
+        session = self._sessions.get(key)
+        if session is not None:
+            reason = await self._stale_reason(session, fingerprint)
+            if reason is None:
+                try:
+                    await self._prepare_reuse(session)
+                    self._stats["reuses"] += 1
+                    utils.logger.info(f"[BrowserSessionPool] reuse browser session {key}, uses: {session.uses + 1}")
+                    return session
+                except Exception as e:
+                    reason = f"prepare failed: {e}"
+            utils.logger.info(f"[BrowserSessionPool] discard browser session {key}: {reason}")
+            await self._discard(key)
+
+        playwright = await async_playwright().start()
+        try:
+            browser_context, context_page, cdp_manager = await launch(playwright)
+        except Exception:
+            await playwright.stop()
+            raise
+        # 未指定首页时使用启动后页面所在的地址
+        session = BrowserSession(key, playwright, browser_context, context_page, cdp_manager,
+                                 index_url or context_page.url, fingerprint)
+        self._sessions[key] = session
+        self._stats["launches"] += 1
+        utils.logger.info(f"[BrowserSessionPool] launched browser session {key}")
+        return session
+
+    async def _stale_reason(self, session: BrowserSession, fingerprint: str) -> Optional[str]:
+        if session.fingerprint != fingerprint:
+            return "launch options changed"
+        now = time.monotonic()
+        if now - session.created_at > self.max_age:
+            return "max age reached"
+        if now - session.last_used_at > self.idle_timeout:
+            return "idle timeout"
+        if not await session.is_healthy(self.health_check_timeout):
+            return "health check failed"
+        return None
+
+    async def _prepare_reuse(self, session: BrowserSession) -> None:
+        if session.context_page.is_closed() or session.page_uses >= self.page_max_uses:
+            await session.recycle_page()
+            self._stats["page_recycles"] += 1
+        elif time.monotonic() - session.last_used_at > self.refresh_interval:
+            await session.refresh()
+            self._stats["refreshes"] += 1
+
+    async def _discard(self, key: SessionKey) -> None:
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            self._stats["discards"] += 1
+            await session.close()
+
+    async def close_idle(self) -> None:
+        """
+        关闭空闲超时且未被租用的会话
+        :return:
+        """
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            lock = self._locks.get(key)
+            if lock is not None and lock.locked():
+                # 正在被租用（或正在租用），由租用方自己判断是否过期
+                continue
+            if now - session.last_used_at > self.idle_timeout:
+                utils.logger.info(f"[BrowserSessionPool] close idle browser session {key}")
+                await self._discard(key)
+
+    async def aclose(self) -> None:
+        """
+        关闭所有会话
+        :return:
+        """
+        for key in list(self._sessions):
+            await self._discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        启动/复用/换页/刷新/丢弃次数，以及当前会话数
+        :return:
+        """
+        return dict(self._stats, sessions=len(self._sessions))
+
+
+_browser_session_pool: Optional[BrowserSessionPool] = None
+
+
+def get_browser_session_pool() -> BrowserSessionPool:
+    """
+    进程内共享的浏览器会话池
+    """
+    global _browser_session_pool
+    if _browser_session_pool is None:
+        _browser_session_pool = BrowserSessionPool()
+    return _browser_session_pool
+
+
+async def shutdown_browser_session_pool() -> None:
+    """
+    关闭会话池中的全部浏览器，进程退出前调用
+    """
+    global _browser_session_pool
+    if _browser_session_pool is None:
+        return
+    pool, _browser_session_pool = _browser_session_pool, None
+    utils.logger.info(f"[BrowserSessionPool] shutdown, stats: {pool.stats()}")
+    await pool.aclose()
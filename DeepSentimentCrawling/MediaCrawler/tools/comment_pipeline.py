@@ -0,0 +1,132 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论抓取流水线：翻页请求与评论入库并行，子评论并发抓取
+#
+# 生产者（get_*_all_comments 的翻页循环）把每页评论放进有界队列后立即请求下一页，
+# 消费者任务按顺序执行 callback 入库；队列满时生产者等待，内存占用有上限。
+# 子评论抓取通过 spawn() 以任务形式并发执行，数量受 SUB_COMMENT_CONCURRENCY 限制，
+# 请求总量仍受 HttpClientPool 的平台请求预算与限速器控制。
+# 翻页循环在请求下一页前通过 spawned_count() 等待本页子评论抓完并计入 max_count，
+# 与原来逐条抓取时的翻页次数一致；并发只发生在同一页的一级评论之间。
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+import config
+from tools import utils
+
+_STOP = object()
+
+
+class CommentPipeline:
+    """
+    用法：
+        async with CommentPipeline(callback) as pipeline:
+            while has_more and len(result) + await pipeline.spawned_count() < max_count:
+                comments = await fetch_page()
+                await pipeline.put(note_id, comments)
+                pipeline.spawn(self.get_sub_comments(..., callback=pipeline.put))
+        sub_comments = pipeline.spawned_results()
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[..., Awaitable[Any]]],
+        queue_size: Optional[int] = None,
+        sub_comment_concurrency: Optional[int] = None,
+    ) -> None:
+        """
+        :param callback: 评论入库回调，None 时 put 不做任何事
+        :param queue_size: 等待入库的页数上限，默认 COMMENT_PIPELINE_QUEUE_SIZE
+        :param sub_comment_concurrency: 同时抓取子评论的任务数，默认 SUB_COMMENT_CONCURRENCY
+        """
+        self._callback = callback
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size or config.COMMENT_PIPELINE_QUEUE_SIZE))
+        self._semaphore = asyncio.Semaphore(max(1, sub_comment_concurrency or config.SUB_COMMENT_CONCURRENCY))
+        self._spawned: List[asyncio.Task] = []
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def put(self, *args: Any) -> None:
+        """
+        提交一页评论，参数原样传给 callback；队列满时等待
+        :param args:
+        :return:
+        """
+        if self._callback is None:
+            return
+        await self._queue.put(args)
+
+    def spawn(self, coro: Awaitable[Any]) -> asyncio.Task:
+        """
+        以并发任务执行子评论抓取
+        :param coro:
+        :return:
+        """
+
+        async def run() -> Any:
+            async with self._semaphore:
+                return await coro
+
+        task = asyncio.ensure_future(run())
+        self._spawned.append(task)
+        return task
+
+    async def spawned_count(self) -> int:
+        """
+        等待已提交的子评论任务结束，返回成功抓取的子评论总数；失败的任务在流水线结束时记录日志
+        :return:
+        """
+        pending = [task for task in self._spawned if not task.done()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return sum(len(result) for result in self.spawned_results() if result)
+
+    def spawned_results(self) -> List[Any]:
+        """
+        成功完成的子评论任务的返回值，流水线结束后调用
+        :return:
+        """
+        return [task.result() for task in self._spawned if task.done() and not task.cancelled() and task.exception() is None]
+
+    async def _consume(self) -> None:
+        while True:
+            args = await self._queue.get()
+            if args is _STOP:
+                return
+            try:
+                await self._callback(*args)
+            except Exception as e:
+                # 入库失败不能让消费者退出，否则生产者会一直阻塞在 put 上
+                utils.logger.error(f"[CommentPipeline] store comments failed, err: {e}")
+
+    async def __aenter__(self) -> "CommentPipeline":
+        if self._callback is not None:
+            self._consumer = asyncio.ensure_future(self._consume())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is not None:
+                # 翻页出错或任务被取消：不再抓取子评论，已抓到的评论仍然入库
+                for task in self._spawned:
+                    task.cancel()
+            for result in await asyncio.gather(*self._spawned, return_exceptions=True):
+                if isinstance(result, Exception):
+                    utils.logger.error(f"[CommentPipeline] fetch sub comments failed, err: {result}")
+        finally:
+            if self._consumer is not None:
+                try:
+                    await self._queue.put(_STOP)
+                    await self._consumer
+                except asyncio.CancelledError:
+                    self._consumer.cancel()
+                    raise
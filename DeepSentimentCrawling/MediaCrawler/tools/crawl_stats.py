@@ -0,0 +1,51 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 按任务统计爬取结果（内容数/评论数/错误数），替代解析日志输出
+
+import logging
+from typing import Dict
+
+from var import crawl_stats_var
+
+
+def new_crawl_stats() -> Dict[str, int]:
+    """
+    为当前上下文(asyncio 任务)开启一份新的统计
+    :return: 统计字典，任务结束后直接读取
+    """
+    stats = {"notes_count": 0, "comments_count": 0, "errors_count": 0}
+    crawl_stats_var.set(stats)
+    return stats
+
+
+def record_crawl_stat(name: str, count: int = 1) -> None:
+    """
+    累加当前上下文的统计项，未开启统计时忽略
+    :param name: notes_count | comments_count | errors_count
+    :param count:
+    :return:
+    """
+    stats = crawl_stats_var.get()
+    if stats is not None:
+        stats[name] = stats.get(name, 0) + count
+
+
+class CrawlStatsLogHandler(logging.Handler):
+    """
+    统计 ERROR 及以上级别的日志条数，计入当前任务的 errors_count
+    """
+
+    def __init__(self) -> None:
+        super().__init__(level=logging.ERROR)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        record_crawl_stat("errors_count")
@@ -21,7 +21,7 @@ import re
 import urllib
 import urllib.parse
 from io import BytesIO
-from typing import Dict, List, Optional, Tuple, cast
+from typing import Dict, List, Optional, Tuple, Union, cast
 
 import httpx
 from PIL import Image, ImageDraw, ImageShow
@@ -173,6 +173,27 @@ def match_interact_info_count(count_str: str) -> int:
         return 0
 
 
+_COUNT_UNITS = {"万": 10_000, "w": 10_000, "W": 10_000, "亿": 100_000_000, "k": 1_000, "K": 1_000}
+
+
+def parse_count(value: Union[str, int, float, None]) -> Optional[int]:
+    """
+    将平台返回的计数转换为整数，支持 "1.2万"、"3亿"、"10+"、"1,234" 等格式
+    :param value: 原始计数
+    :return: None 保持为 None，无法解析的内容返回 0
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r'(\d+(?:\.\d+)?)\s*([万wW亿kK]?)', str(value).replace(",", ""))
+    if not match:
+        return 0
+    return int(float(match.group(1)) * _COUNT_UNITS.get(match.group(2), 1))
+
+
 def format_proxy_info(ip_proxy_info) -> Tuple[Optional[Dict], Optional[str]]:
     """format proxy info for playwright and httpx"""
     # fix circular import issue
@@ -0,0 +1,239 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 复用连接的 httpx 客户端池（keep-alive / HTTP2 / 按代理复用）
+
+import asyncio
+import importlib.util
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+import config
+from tools.rate_limiter import AdaptiveRateLimiter, get_rate_limiter
+
+# HTTP/2 依赖 h2 包，未安装时自动回退到 HTTP/1.1
+_H2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# 平台 -> (事件循环, 信号量)，同一平台所有客户端（所有关键词、所有任务）共享的在途请求预算
+_PLATFORM_REQUEST_BUDGETS: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+
+def get_platform_request_budget(platform: str) -> asyncio.Semaphore:
+    """
+    获取某个平台共享的在途请求数上限（PLATFORM_REQUEST_BUDGET），与当前事件循环绑定
+    :param platform: 平台名，例如 dy / bili / wb
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    entry = _PLATFORM_REQUEST_BUDGETS.get(platform)
+    if entry is None or entry[0] is not loop:
+        limit = config.PLATFORM_REQUEST_BUDGET.get(platform, config.DEFAULT_PLATFORM_REQUEST_BUDGET)
+        entry = (loop, asyncio.Semaphore(limit))
+        _PLATFORM_REQUEST_BUDGETS[platform] = entry
+    return entry[1]
+
+
+class HttpClientPool:
+    """
+    按 (proxy, verify) 缓存长连接的 httpx.AsyncClient，供同一个爬虫的所有请求复用。
+    代理轮换时每个代理各自持有一个 client，切回旧代理时直接复用已有连接。
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        max_connections_per_host: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        platform: Optional[str] = None,
+        account: str = "",
+    ) -> None:
+        self._limits = httpx.Limits(
+            max_connections=max_connections or config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or config.HTTP_KEEPALIVE_EXPIRY,
+        )
+        self._max_per_host = max_connections_per_host or config.HTTP_MAX_CONNECTIONS_PER_HOST
+        enable_http2 = config.ENABLE_HTTP2 if http2 is None else http2
+        self._http2 = bool(enable_http2 and _H2_AVAILABLE)
+        self._clients: Dict[Tuple[Optional[str], bool], httpx.AsyncClient] = {}
+        # host -> (事件循环, 信号量)，信号量只能在创建它的事件循环中使用
+        self._host_semaphores: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+        # 设置平台后，request() 额外受该平台共享的请求预算与自适应限速控制（流式下载不计入）
+        self._platform = platform
+        self._account = account
+        self._stats: Dict[str, int] = {
+            "requests": 0,
+            "new_connections": 0,
+            "tls_handshakes": 0,
+            "clients_created": 0,
+        }
+        _ALL_HTTP_POOLS.add(self)
+
+    def get_client(self, proxy: Optional[str] = None, verify: bool = True) -> httpx.AsyncClient:
+        """
+        获取(或创建)与代理绑定的长连接 client
+        :param proxy: httpx 代理 URL，None 表示直连
+        :param verify: 是否校验证书
+        :return:
+        """
+        key = (proxy, verify)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                proxy=proxy,
+                verify=verify,
+                http2=self._http2,
+                limits=self._limits,
+            )
+            self._clients[key] = client
+            self._stats["clients_created"] += 1
+        return client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        loop = asyncio.get_running_loop()
+        entry = self._host_semaphores.get(host)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Semaphore(self._max_per_host))
+            self._host_semaphores[host] = entry
+        return entry[1]
+
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """
+        httpcore trace 回调，统计新建连接与 TLS 握手次数
+        """
+        if event_name.endswith("connect_tcp.complete"):
+            self._stats["new_connections"] += 1
+        elif event_name.endswith("start_tls.complete"):
+            self._stats["tls_handshakes"] += 1
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        proxy: Optional[str] = None,
+        verify: bool = True,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        通过池化 client 发送请求，参数与 httpx.AsyncClient.request 一致
+        :param method: 请求方法
+        :param url: 请求 URL
+        :param proxy: 代理 URL
+        :param verify: 是否校验证书
+        :param kwargs: 透传给 httpx 的其他参数
+        :return:
+        """
+        client = self.get_client(proxy, verify)
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        if not self._platform:
+            async with self._host_semaphore(url):
+                self._stats["requests"] += 1
+                return await client.request(method, url, extensions=extensions, **kwargs)
+
+        limiter = self.rate_limiter(proxy)
+        if limiter is not None:
+            # 先等到限速器允许的时间点再占用并发名额，冷却期间不占着平台预算和 host 连接
+            await limiter.acquire()
+        async with get_platform_request_budget(self._platform), self._host_semaphore(url):
+            self._stats["requests"] += 1
+            try:
+                response = await client.request(method, url, extensions=extensions, **kwargs)
+            except httpx.TransportError:
+                if limiter is not None:
+                    limiter.on_failure()
+                raise
+            if limiter is not None:
+                # 这里只处理风控和 5xx；HTTP 200 的接口是否成功由平台客户端通过 report_response 上报
+                limiter.on_http_response(response.status_code, response.content, response.headers.get("content-type", ""))
+            return response
+
+    def rate_limiter(self, proxy: Optional[str] = None) -> Optional[AdaptiveRateLimiter]:
+        """
+        当前平台/账号与指定代理对应的自适应限速器，未设置平台或未开启限速时返回 None
+        :param proxy: 代理 URL
+        :return:
+        """
+        if not self._platform or not config.ENABLE_ADAPTIVE_RATE_LIMIT:
+            return None
+        return get_rate_limiter(self._platform, self._account, proxy)
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        url: str,
+        *,
+        proxy: Optional[str] = None,
+        verify: bool = True,
+        **kwargs,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        通过池化 client 发送流式请求，响应体需在 async with 内用 aiter_bytes 等方法读取
+        :param method: 请求方法
+        :param url: 请求 URL
+        :param proxy: 代理 URL
+        :param verify: 是否校验证书
+        :param kwargs: 透传给 httpx 的其他参数
+        :return:
+        """
+        client = self.get_client(proxy, verify)
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+        async with self._host_semaphore(url):
+            self._stats["requests"] += 1
+            async with client.stream(method, url, extensions=extensions, **kwargs) as response:
+                yield response
+
+    def stats(self) -> Dict[str, int]:
+        """
+        连接复用统计：reused_connections = 请求数 - 新建连接数
+        :return:
+        """
+        stats = dict(self._stats)
+        stats["reused_connections"] = max(stats["requests"] - stats["new_connections"], 0)
+        stats["open_clients"] = sum(1 for c in self._clients.values() if not c.is_closed)
+        return stats
+
+    async def aclose(self) -> None:
+        """
+        关闭所有持有的 client 及其连接
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+_ALL_HTTP_POOLS: "weakref.WeakSet[HttpClientPool]" = weakref.WeakSet()
+
+
+async def shutdown_all_http_pools() -> None:
+    """
+    Best-effort shutdown for all in-process HttpClientPool instances.
+    """
+    for pool in list(_ALL_HTTP_POOLS):
+        try:
+            await pool.aclose()
+        except Exception:
+            pass
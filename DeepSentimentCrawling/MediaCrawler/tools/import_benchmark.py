@@ -0,0 +1,101 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 冷启动导入耗时基准：在子进程中用 python -X importtime 导入模块，统计耗时并检查重依赖是否被提前加载
+#
+# 用法：python -m tools.import_benchmark main media_platform.douyin --max-ms 1500
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+# 只应在真正用到时才导入的重依赖
+HEAVY_MODULES = ("cv2", "numpy", "pandas", "matplotlib", "wordcloud", "jieba", "execjs", "funasr", "torch")
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+@dataclass
+class ImportReport:
+    module: str
+    total_ms: float = 0.0
+    # 模块名 -> 累计耗时（毫秒，包含其依赖）
+    cumulative_ms: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def heavy_modules(self) -> List[str]:
+        """
+        被导入的重依赖（只看顶层包名）
+        """
+        imported = {name.split(".")[0] for name in self.cumulative_ms}
+        return [name for name in HEAVY_MODULES if name in imported]
+
+    def top(self, n: int = 10) -> List[tuple]:
+        return sorted(self.cumulative_ms.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+def measure_import(module: str, python: Optional[str] = None) -> ImportReport:
+    """
+    在新的解释器进程中导入模块，解析 -X importtime 输出
+    :param module: 模块名，例如 main
+    :param python: 解释器路径，默认当前解释器
+    :return:
+    """
+    proc = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {proc.stderr.strip().splitlines()[-1:]}")
+    report = ImportReport(module=module)
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, name = int(match.group(2)), match.group(4)
+        report.cumulative_ms[name] = cumulative_us / 1000
+        if name == module:
+            report.total_ms = cumulative_us / 1000
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MediaCrawler cold-start import benchmark")
+    parser.add_argument("modules", nargs="*", default=["main"], help="要测量的模块")
+    parser.add_argument("--max-ms", type=float, default=None, help="单个模块导入耗时上限（毫秒），超过时返回非 0")
+    parser.add_argument("--top", type=int, default=10, help="输出耗时最多的前 N 个模块")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        report = measure_import(module)
+        print(f"{module}: {report.total_ms:.1f} ms")
+        for name, cost in report.top(args.top):
+            print(f"    {cost:9.1f} ms  {name}")
+        if report.heavy_modules:
+            print(f"    heavy modules imported at startup: {', '.join(report.heavy_modules)}")
+            failed = True
+        if args.max_ms is not None and report.total_ms > args.max_ms:
+            print(f"    exceeds budget {args.max_ms:.0f} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
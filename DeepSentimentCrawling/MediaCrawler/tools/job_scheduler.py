@@ -0,0 +1,213 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 定时任务调度：每个任务按自己的间隔或 cron 表达式触发，任务之间并发运行
+#
+# 原来的 scheduler.py 依次运行各平台，共用一个间隔，慢的平台会推迟其他平台的下一次运行。
+# 现在每个任务有独立的调度循环：到点后如果该任务上一次还没结束则跳过本次，否则启动一次运行，
+# 运行本身由调用方传入的 run_job 执行（scheduler.py 中为 MultiPlatformRunner.run_job，负责总并发上限和按任务的配置覆盖）。
+
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from model.m_crawl_job import ScheduledJobConfig
+from tools import utils
+
+
+class CronSpec:
+    """
+    5 段 cron 表达式：分 时 日 月 周，支持 *、数字、a-b、a,b 和 /n 步长，周日为 0 或 7；
+    日和周都不是 * 时，满足其一即可（与 crontab 一致）
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr: str) -> None:
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"invalid cron expression: {expr!r}")
+        self.expr = expr
+        minutes, hours, days, months, weekdays = (
+            self._parse_field(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        self.weekdays = {0 if day == 7 else day for day in weekdays}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse_field(field: str, low: int, high: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            value_range, _, step = part.partition("/")
+            if value_range == "*":
+                start, end = low, high
+            elif "-" in value_range:
+                start, end = (int(v) for v in value_range.split("-", 1))
+            else:
+                start = int(value_range)
+                end = high if step else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"cron field out of range: {field!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> datetime:
+        """
+        after 之后（不含）第一个满足表达式的时间
+        :param after:
+        :return:
+        """
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = after + timedelta(days=366 * 5)
+        while dt <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"cron expression never matches: {self.expr!r}")
+
+
+class JobScheduler:
+    """
+    用法：
+        scheduler = JobScheduler(jobs, runner.run_job, default_interval=3600)
+        await scheduler.run_forever()   # 另一个任务中调用 scheduler.stop() 结束
+    """
+
+    def __init__(
+        self,
+        jobs: List[ScheduledJobConfig],
+        run_job: Callable[[ScheduledJobConfig, int], Awaitable[Any]],
+        default_interval: float = 3600,
+    ) -> None:
+        """
+        :param jobs: 定时任务，未启用的任务会被忽略
+        :param run_job: 执行一次任务的协程函数，参数为 (任务配置, 任务序号)，返回值有 success 属性时用于统计失败次数
+        :param default_interval: 任务未配置间隔和 cron 时使用的间隔（秒）
+        """
+        self.jobs = [job for job in jobs if job.enabled]
+        names = [job.job_name for job in self.jobs]
+        duplicated = {name for name in names if names.count(name) > 1}
+        if duplicated:
+            raise ValueError(f"duplicated schedule job names: {sorted(duplicated)}, set a unique name for each job")
+        self.run_job = run_job
+        self.default_interval = default_interval
+        self._crons: Dict[str, CronSpec] = {job.job_name: CronSpec(job.cron) for job in self.jobs if job.cron}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {
+            job.job_name: {"runs": 0, "skipped": 0, "failures": 0, "last_duration": 0.0} for job in self.jobs
+        }
+        self._stopped: Optional[asyncio.Event] = None
+
+    def next_scheduled_at(self, job: ScheduledJobConfig, after: float) -> float:
+        """
+        after 之后的下一次计划运行时间（不含抖动）
+        :param job:
+        :param after: 时间戳
+        :return:
+        """
+        cron = self._crons.get(job.job_name)
+        if cron is not None:
+            return cron.next_after(datetime.fromtimestamp(after)).timestamp()
+        return after + (job.interval_seconds or self.default_interval)
+
+    async def run_forever(self) -> None:
+        """
+        运行全部任务的调度循环，直到 stop() 被调用或被取消；退出前等待正在运行的任务结束
+        :return:
+        """
+        self._stopped = asyncio.Event()
+        loops = [asyncio.ensure_future(self._job_loop(job, index)) for index, job in enumerate(self.jobs)]
+        try:
+            await asyncio.gather(*loops)
+        finally:
+            for loop in loops:
+                loop.cancel()
+            running = [task for task in self._running.values() if not task.done()]
+            if running:
+                utils.logger.info(f"[JobScheduler] waiting {len(running)} running jobs ...")
+                await asyncio.gather(*running, return_exceptions=True)
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def _wait_until(self, timestamp: float) -> bool:
+        """
+        等待到指定时间，返回 False 表示调度器已停止
+        """
+        try:
+            await asyncio.wait_for(self._stopped.wait(), max(0.0, timestamp - time.time()))
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    async def _job_loop(self, job: ScheduledJobConfig, index: int) -> None:
+        name = job.job_name
+        now = time.time()
+        scheduled_at = now if job.run_on_start else self.next_scheduled_at(job, now)
+        while True:
+            fire_at = scheduled_at + random.uniform(0, job.jitter_seconds)
+            if not await self._wait_until(fire_at):
+                return
+            previous = self._running.get(name)
+            if previous is not None and not previous.done():
+                self._stats[name]["skipped"] += 1
+                utils.logger.warning(f"[JobScheduler] job {name} is still running, skip this run")
+            else:
+                self._running[name] = asyncio.ensure_future(self._execute(job, index))
+            # 按计划时间推进（抖动不累积），落后（例如系统休眠）时从当前时间重新计算，不补跑错过的次数
+            scheduled_at = self.next_scheduled_at(job, scheduled_at)
+            if scheduled_at < time.time():
+                scheduled_at = self.next_scheduled_at(job, time.time())
+
+    async def _execute(self, job: ScheduledJobConfig, index: int) -> None:
+        name = job.job_name
+        stats = self._stats[name]
+        stats["runs"] += 1
+        start = time.monotonic()
+        utils.logger.info(f"[JobScheduler] >>> start job {name} ({job.platform}, {job.crawler_type})")
+        try:
+            result = await self.run_job(job, index)
+            if getattr(result, "success", True) is False:
+                stats["failures"] += 1
+        except Exception as e:
+            stats["failures"] += 1
+            utils.logger.error(f"[JobScheduler] job {name} failed: {e}")
+        finally:
+            stats["last_duration"] = time.monotonic() - start
+            utils.logger.info(f"[JobScheduler] <<< job {name} finished in {stats['last_duration']:.1f}s, stats: {stats}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        每个任务的运行/跳过/失败次数和最近一次耗时
+        :return:
+        """
+        return {name: dict(stats) for name, stats in self._stats.items()}
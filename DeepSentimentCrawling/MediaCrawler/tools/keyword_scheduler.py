@@ -0,0 +1,120 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 关键词搜索调度：多个关键词并发搜索，翻页与详情/评论抓取流水线并行
+#
+# 并发关键词共享的请求总量由 HttpClientPool 的平台请求预算（PLATFORM_REQUEST_BUDGET）限制，
+# 关键词并发只决定同时推进多少条翻页链。
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
+import config
+from tools import utils
+from var import source_keyword_var
+
+
+def split_keywords(keywords: Optional[str] = None) -> List[str]:
+    """
+    拆分以英文逗号分隔的关键词配置，去掉空白项
+    :param keywords: 关键词配置，默认使用 config.KEYWORDS
+    :return:
+    """
+    keywords = config.KEYWORDS if keywords is None else keywords
+    return [keyword.strip() for keyword in keywords.split(",") if keyword.strip()]
+
+
+class KeywordScheduler:
+    """
+    同一平台内多个关键词并发搜索，每个关键词在独立任务中执行（source_keyword_var 互不影响），
+    单个关键词失败不影响其他关键词
+    """
+
+    def __init__(self, platform: str, max_concurrency: Optional[int] = None) -> None:
+        """
+        :param platform: 平台名，用于日志
+        :param max_concurrency: 同时搜索的关键词数，默认 SEARCH_KEYWORD_CONCURRENCY
+        """
+        self.platform = platform
+        self.max_concurrency = max(1, max_concurrency or config.SEARCH_KEYWORD_CONCURRENCY)
+
+    async def run(self, keywords: Iterable[str], search_keyword: Callable[[str], Awaitable[None]]) -> None:
+        """
+        并发执行所有关键词的搜索
+        :param keywords: 关键词列表
+        :param search_keyword: 单个关键词的搜索协程函数
+        :return:
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_keyword(keyword: str) -> None:
+            async with semaphore:
+                source_keyword_var.set(keyword)
+                utils.logger.info(f"[KeywordScheduler.run] {self.platform} begin keyword: {keyword}")
+                try:
+                    await search_keyword(keyword)
+                except Exception as e:
+                    utils.logger.error(f"[KeywordScheduler.run] {self.platform} keyword: {keyword} failed, err: {e}")
+
+        await asyncio.gather(*[asyncio.create_task(run_keyword(keyword)) for keyword in keywords])
+
+
+class PagePipeline:
+    """
+    搜索翻页流水线：当前页的详情/评论抓取提交到后台执行，同时继续请求下一页搜索结果。
+    后台处理中的页数达到 depth 时，submit 会等待最早的一页处理完成。
+    用法：
+        async with PagePipeline() as pipeline:
+            while ...:
+                page_items = await search(page)
+                await pipeline.submit(process(page_items))
+    """
+
+    def __init__(self, depth: Optional[int] = None) -> None:
+        """
+        :param depth: 同时在后台处理的页数，默认 SEARCH_PAGE_PIPELINE_DEPTH
+        """
+        self.depth = max(1, depth or config.SEARCH_PAGE_PIPELINE_DEPTH)
+        self._pending: Set[asyncio.Task] = set()
+
+    async def submit(self, coro: Awaitable[None]) -> None:
+        """
+        提交一页的处理协程
+        :param coro:
+        :return:
+        """
+        while len(self._pending) >= self.depth:
+            done, self._pending = await asyncio.wait(self._pending, return_when=asyncio.FIRST_COMPLETED)
+            self._log_failures(done)
+        self._pending.add(asyncio.ensure_future(coro))
+
+    async def join(self) -> None:
+        """
+        等待所有已提交的页处理完成
+        :return:
+        """
+        if self._pending:
+            done, _ = await asyncio.wait(self._pending)
+            self._pending = set()
+            self._log_failures(done)
+
+    @staticmethod
+    def _log_failures(done: Set[asyncio.Task]) -> None:
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                utils.logger.error(f"[PagePipeline] process page failed, err: {task.exception()}")
+
+    async def __aenter__(self) -> "PagePipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # 翻页出错时已经提交的页仍然处理完，避免丢数据
+        await self.join()
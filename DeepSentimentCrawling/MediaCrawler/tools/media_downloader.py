@@ -0,0 +1,127 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体文件流式下载：分块写入磁盘、Range 断点续传、全局并发上限
+
+import asyncio
+import os
+import pathlib
+from typing import Dict, Optional
+
+import aiofiles
+import httpx
+
+import config
+from tools import utils
+from tools.http_pool import HttpClientPool
+
+# 这些状态码或返回 HTML 页面时，说明被 WAF 拦截，需要回退到浏览器内下载
+WAF_BLOCKED_STATUS_CODES = (401, 403, 412, 444)
+
+
+class MediaDownloadBlocked(Exception):
+    """
+    媒体地址拒绝直接下载（WAF 拦截）
+    """
+
+
+_download_semaphore: Optional[asyncio.Semaphore] = None
+_download_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_download_semaphore() -> asyncio.Semaphore:
+    global _download_semaphore, _download_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _download_semaphore is None or _download_semaphore_loop is not loop:
+        _download_semaphore = asyncio.Semaphore(config.MEDIA_DOWNLOAD_CONCURRENCY)
+        _download_semaphore_loop = loop
+    return _download_semaphore
+
+
+def _part_path(save_path: str) -> str:
+    return f"{save_path}.part"
+
+
+async def _download_once(http_pool: HttpClientPool, url: str, part_path: str, headers: Dict[str, str],
+                         proxy: Optional[str], timeout: float, chunk_size: int) -> None:
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request_headers = dict(headers)
+    if offset:
+        request_headers["Range"] = f"bytes={offset}-"
+    async with http_pool.stream("GET", url, proxy=proxy, timeout=timeout, headers=request_headers,
+                                follow_redirects=True) as response:
+        if response.status_code == 416 and offset:
+            # 已下载完整
+            return
+        if response.status_code in WAF_BLOCKED_STATUS_CODES or \
+                response.headers.get("content-type", "").startswith("text/html"):
+            raise MediaDownloadBlocked(f"status: {response.status_code}, content-type: {response.headers.get('content-type')}")
+        if response.status_code not in (200, 206):
+            raise httpx.HTTPStatusError(f"unexpected status {response.status_code}", request=response.request, response=response)
+        # 服务端不支持 Range 时返回 200 全量内容，需要从头写
+        mode = "ab" if response.status_code == 206 else "wb"
+        async with aiofiles.open(part_path, mode) as f:
+            async for chunk in response.aiter_bytes(chunk_size):
+                await f.write(chunk)
+
+
+async def download_to_file(http_pool: HttpClientPool, url: str, save_path: str, *,
+                           headers: Optional[Dict[str, str]] = None, proxy: Optional[str] = None,
+                           timeout: float = 60, chunk_size: Optional[int] = None,
+                           max_retries: Optional[int] = None) -> str:
+    """
+    流式下载媒体文件到磁盘，先写入 .part 临时文件，完成后重命名
+    中断后重试或下次下载同一文件时，通过 Range 请求从已下载的位置继续
+    :param http_pool: 复用连接的 httpx 客户端池
+    :param url: 媒体地址
+    :param save_path: 保存路径
+    :param headers: 请求头（浏览器的 Cookie / User-Agent / Referer）
+    :param proxy: 代理
+    :param timeout: 超时时间（秒）
+    :param chunk_size: 分块大小
+    :param max_retries: 中断后续传的重试次数
+    :return: 保存路径
+    :raises MediaDownloadBlocked: 被 WAF 拦截，调用方可回退到浏览器内下载
+    """
+    if os.path.exists(save_path):
+        return save_path
+    pathlib.Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+    part_path = _part_path(save_path)
+    chunk_size = chunk_size or config.MEDIA_DOWNLOAD_CHUNK_SIZE
+    max_retries = config.MEDIA_DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    async with _get_download_semaphore():
+        for attempt in range(max_retries + 1):
+            try:
+                await _download_once(http_pool, url, part_path, headers or {}, proxy, timeout, chunk_size)
+                break
+            except httpx.TransportError as e:
+                if attempt >= max_retries:
+                    raise
+                utils.logger.warning(f"[download_to_file] download {save_path} interrupted ({e!r}), resuming ...")
+                await asyncio.sleep(attempt + 1)
+    os.replace(part_path, save_path)
+    utils.logger.info(f"[download_to_file] save media {save_path} success, size: {os.path.getsize(save_path)}")
+    return save_path
+
+
+async def write_bytes_to_file(save_path: str, content: bytes) -> str:
+    """
+    将已在内存中的媒体内容写入磁盘（浏览器内下载的回退路径）
+    :param save_path: 保存路径
+    :param content: 媒体内容
+    :return: 保存路径
+    """
+    pathlib.Path(save_path).parent.mkdir(parents=True, exist_ok=True)
+    part_path = _part_path(save_path)
+    async with aiofiles.open(part_path, "wb") as f:
+        await f.write(content)
+    os.replace(part_path, save_path)
+    return save_path
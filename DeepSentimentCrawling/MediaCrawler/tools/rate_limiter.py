@@ -0,0 +1,245 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 按 平台/账号/代理 自适应限速（AIMD），替代各处固定的 sleep
+#
+# 请求健康时速率按 RATE_LIMIT_INCREASE_STEP 线性增加，遇到错误时按 RATE_LIMIT_DECREASE_FACTOR 成倍降低；
+# 命中风控（403/429、验证码、WAF 页面等）时额外冷却 RATE_LIMIT_BLOCK_COOLDOWN 秒。
+# 等待全部使用 asyncio.sleep，不会阻塞事件循环。
+
+import asyncio
+import random
+import re
+import time
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import config
+
+# 风控/限流常见的 HTTP 状态码（461/471 为小红书验证码）
+BLOCK_STATUS_CODES = frozenset({403, 412, 418, 429, 461, 471})
+
+# 风控页面（WAF/验证码页等 HTML 或纯文本响应）中常见的标记，只检查响应体开头部分。
+# JSON 响应不做子串匹配：搜索关键词、笔记和评论中本来就可能出现“验证码”“captcha”等字样
+BLOCK_MARKERS = (
+    "aliyun_waf",
+    "访问频次异常",
+    "请求过于频繁",
+    "操作太频繁",
+    "请求被拦截",
+    "安全验证",
+    "验证码",
+    "captcha",
+)
+
+# JSON 响应只按顶层的风控错误码判断（B站 -412 请求被拦截、-352 风控校验失败）
+_JSON_BLOCK_CODE = re.compile(r'^\{"code":-(?:412|352)[,}]')
+
+# HTTP 2xx 但响应体只有这些内容时视为风控（抖音/贴吧被风控时返回空响应体或 "blocked"）
+BLOCK_BODIES = frozenset({"", "blocked"})
+
+_BODY_CHECK_BYTES = 512
+
+
+def is_blocked_response(status_code: int, body: Union[str, bytes, None] = None, content_type: str = "") -> bool:
+    """
+    判断响应是否命中了平台风控：风控状态码、空响应体/"blocked"、JSON 顶层风控错误码，
+    或非 JSON 响应（WAF/验证码页面）中的风控标记
+    :param status_code: HTTP 状态码
+    :param body: 响应体（只检查开头部分）
+    :param content_type: 响应的 Content-Type，为空时按响应体开头判断是否为 JSON
+    :return:
+    """
+    if status_code in BLOCK_STATUS_CODES:
+        return True
+    if body is None:
+        return False
+    if isinstance(body, bytes):
+        body = body[:_BODY_CHECK_BYTES].decode("utf-8", "ignore")
+    head = body[:_BODY_CHECK_BYTES].strip()
+    if 200 <= status_code < 300 and status_code != 204 and head in BLOCK_BODIES:
+        return True
+    if "json" in content_type.lower() or head[:1] in ("{", "["):
+        return bool(_JSON_BLOCK_CODE.match(head.replace(" ", "")))
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+def is_http_failure(status_code: int, body: Union[str, bytes, None] = None, content_type: str = "") -> bool:
+    """
+    只看 HTTP 层面就能判断失败的响应：命中风控或 5xx
+    :param status_code: HTTP 状态码
+    :param body: 响应体（只检查开头部分）
+    :param content_type: 响应的 Content-Type
+    :return:
+    """
+    return status_code >= 500 or is_blocked_response(status_code, body, content_type)
+
+
+class AdaptiveRateLimiter:
+    """
+    单个 平台/账号/代理 的请求节奏控制：
+    acquire() 为每个请求预约一个发送时间点，两次请求之间至少间隔 interval 秒（带少量随机抖动）；
+    on_success/on_failure/on_block 根据请求结果调整 interval。
+    """
+
+    def __init__(
+        self,
+        key: str,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        initial_interval: Optional[float] = None,
+        increase_step: Optional[float] = None,
+        decrease_factor: Optional[float] = None,
+        block_cooldown: Optional[float] = None,
+        jitter: Optional[float] = None,
+    ) -> None:
+        """
+        :param key: 限速器标识，用于日志和指标
+        :param min_interval: 最小请求间隔（秒），即最大速率
+        :param max_interval: 最大请求间隔（秒）
+        :param initial_interval: 初始请求间隔（秒）
+        :param increase_step: 每次成功后速率增加量（次/秒）
+        :param decrease_factor: 失败后速率乘以该系数
+        :param block_cooldown: 命中风控后暂停的秒数
+        :param jitter: 间隔的随机抖动比例
+        """
+        self.key = key
+        self.min_interval = config.RATE_LIMIT_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = config.RATE_LIMIT_MAX_INTERVAL if max_interval is None else max_interval
+        self.increase_step = config.RATE_LIMIT_INCREASE_STEP if increase_step is None else increase_step
+        self.decrease_factor = config.RATE_LIMIT_DECREASE_FACTOR if decrease_factor is None else decrease_factor
+        self.block_cooldown = config.RATE_LIMIT_BLOCK_COOLDOWN if block_cooldown is None else block_cooldown
+        self.jitter = config.RATE_LIMIT_JITTER if jitter is None else jitter
+        initial_interval = config.RATE_LIMIT_INITIAL_INTERVAL if initial_interval is None else initial_interval
+        self.interval = self._clamp(initial_interval)
+        self._next_slot = 0.0
+        self._metrics: Dict[str, float] = {
+            "requests": 0,
+            "successes": 0,
+            "failures": 0,
+            "blocks": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    async def acquire(self) -> None:
+        """
+        等待到下一个允许发送请求的时间点
+        :return:
+        """
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        interval = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+        # 先预约时间点再等待，并发请求依次排开而不是同时醒来
+        self._next_slot = slot + interval
+        self._metrics["requests"] += 1
+        wait = slot - now
+        if wait > 0:
+            self._metrics["wait_seconds"] += wait
+            await asyncio.sleep(wait)
+
+    def on_success(self) -> None:
+        """
+        请求正常：速率线性增加
+        """
+        self._metrics["successes"] += 1
+        rate = 1 / self.interval + self.increase_step
+        self.interval = self._clamp(1 / rate)
+
+    def on_failure(self) -> None:
+        """
+        请求失败（网络错误、接口返回错误）：速率成倍降低
+        """
+        self._metrics["failures"] += 1
+        self.interval = self._clamp(self.interval / self.decrease_factor)
+
+    def on_block(self, cooldown: Optional[float] = None) -> None:
+        """
+        命中风控：速率成倍降低，并在 cooldown 秒内不再发送请求
+        :param cooldown: 冷却时间，默认 RATE_LIMIT_BLOCK_COOLDOWN
+        """
+        self._metrics["blocks"] += 1
+        self.on_failure()
+        cooldown = self.block_cooldown if cooldown is None else cooldown
+        self._next_slot = max(self._next_slot, time.monotonic() + cooldown)
+
+    def on_http_response(self, status_code: int, body: Union[str, bytes, None] = None, content_type: str = "") -> bool:
+        """
+        传输层使用：只处理风控和 5xx，HTTP 200 是否成功由平台客户端解析接口返回后再上报
+        :param status_code:
+        :param body: 响应体开头部分
+        :param content_type: 响应的 Content-Type
+        :return: 是否已按失败处理
+        """
+        if is_blocked_response(status_code, body, content_type):
+            self.on_block()
+        elif status_code >= 500:
+            self.on_failure()
+        else:
+            return False
+        return True
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        当前速率与累计指标
+        :return:
+        """
+        metrics = dict(self._metrics)
+        metrics["interval"] = round(self.interval, 3)
+        metrics["rate_per_second"] = round(1 / self.interval, 3)
+        metrics["wait_seconds"] = round(metrics["wait_seconds"], 3)
+        metrics["cooldown_remaining"] = round(max(self._next_slot - time.monotonic(), 0.0), 3)
+        return metrics
+
+
+# (平台, 账号, 代理) -> 限速器
+_RATE_LIMITERS: Dict[Tuple[str, str, str], AdaptiveRateLimiter] = {}
+
+
+def get_rate_limiter(platform: str, account: str = "", proxy: Optional[str] = None) -> AdaptiveRateLimiter:
+    """
+    获取 平台/账号/代理 对应的限速器，同一组合在进程内共享
+    :param platform: 平台名，例如 dy / bili / wb
+    :param account: 账号标识，单账号时为空
+    :param proxy: 代理 URL，直连时为空
+    :return:
+    """
+    key = (platform, account or "", proxy or "")
+    limiter = _RATE_LIMITERS.get(key)
+    if limiter is None:
+        overrides = config.PLATFORM_RATE_LIMIT.get(platform, {})
+        # 指标里只保留代理的 host:port，不输出账号密码
+        proxy_host = urlsplit(proxy).netloc.rpartition("@")[2] if proxy else ""
+        limiter = AdaptiveRateLimiter(f"{platform}|{account or ''}|{proxy_host}", **overrides)
+        _RATE_LIMITERS[key] = limiter
+    return limiter
+
+
+def get_rate_limiter_metrics(platform: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    导出限速器指标，key 为 平台|账号|代理
+    :param platform: 只导出该平台，默认全部
+    :return:
+    """
+    return {
+        limiter.key: limiter.metrics()
+        for (limiter_platform, _, _), limiter in _RATE_LIMITERS.items()
+        if platform is None or limiter_platform == platform
+    }
+
+
+def reset_rate_limiters() -> None:
+    """
+    清空所有限速器（配置变更后重新按配置创建）
+    """
+    _RATE_LIMITERS.clear()
@@ -0,0 +1,88 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 会话参数缓存：签名密钥、公共参数等从浏览器读取的值带 TTL 缓存，签名失败时失效
+#
+# 例如 B 站的 wbi img_key/sub_key、抖音的 webid/msToken、小红书的 b1，
+# 原来每个请求都要通过 CDP 执行一次 window.localStorage，现在只在缓存过期或失效后读取一次。
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import config
+
+
+class SessionParamCache:
+    """
+    按 key 缓存会话参数，同一个 key 并发加载时只执行一次 loader
+    """
+
+    def __init__(self, ttl: Optional[float] = None) -> None:
+        """
+        :param ttl: 默认过期时间（秒），默认 SESSION_PARAM_TTL
+        """
+        self.ttl = config.SESSION_PARAM_TTL if ttl is None else ttl
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._stats: Dict[str, int] = {"hits": 0, "loads": 0, "invalidations": 0}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> Any:
+        """
+        获取缓存值，过期或不存在时调用 loader 加载
+        :param key: 参数名
+        :param loader: 加载参数的协程函数
+        :param ttl: 该参数的过期时间（秒），默认使用实例的 ttl
+        :return:
+        """
+        value = self._get_fresh(key)
+        if value is not None:
+            self._stats["hits"] += 1
+            return value
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        async with lock:
+            # 等锁期间其他任务可能已经加载完成
+            value = self._get_fresh(key)
+            if value is not None:
+                self._stats["hits"] += 1
+                return value
+            value = await loader()
+            self._stats["loads"] += 1
+            self._values[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            return value
+
+    def _get_fresh(self, key: str) -> Any:
+        item = self._values.get(key)
+        if item is None or item[1] <= time.monotonic():
+            return None
+        return item[0]
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        使缓存失效（签名失败、cookie 更新后调用）
+        :param key: 参数名，None 表示全部
+        :return:
+        """
+        if key is None:
+            removed = len(self._values)
+            self._values.clear()
+        else:
+            removed = 1 if self._values.pop(key, None) is not None else 0
+        self._stats["invalidations"] += removed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        命中/加载/失效次数
+        :return:
+        """
+        return dict(self._stats)
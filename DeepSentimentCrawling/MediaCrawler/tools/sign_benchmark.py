@@ -0,0 +1,206 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 签名算法微基准：逐次计时，输出每个签名算法的 ops/sec 和 p50/p99 耗时，可与上次保存的结果对比
+#
+# 签名结果的正确性由 test/test_signers.py 中的固定向量保证，这里只关心耗时。
+# 用法：python -m tools.sign_benchmark --iterations 20000 --json data/sign_benchmark.json
+#      python -m tools.sign_benchmark --baseline data/sign_benchmark.json --max-regression 0.2
+
+import argparse
+import json
+import shutil
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# 固定的基准输入，与 test/test_signers.py 中的固定向量使用同一组数据
+XHS_A1 = "187d2defea8dz1fgwydnci40kw265ikh9fsxn66qs50000726043"
+XHS_B1 = "I38rHdgsjopgIvesdVwgIC+oIELmBZ5e3VwXLgFTIxS3bqwErFeexd0ekncAzMFYnqthIhJeSBMDKutRI3KQ"
+XHS_X_S = ("XYW_eyJzaWduU3ZuIjoiNTEiLCJzaWduVHlwZSI6IngxIiwiYXBwSWQiOiJ4aHMtcGMtd2ViIiwic2lnblZlcnNpb24iOiIxIiwi"
+           "cGF5bG9hZCI6IjA")
+XHS_X_T = "1700000000000"
+BILI_IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+BILI_SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+ZHIHU_URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+ZHIHU_COOKIE = "d_c0=AKCTeJ7rxBmPTuZb0NXmAu8hAmBp-5Hb6Ek=|1735015473"
+DOUYIN_PARAMS = "device_platform=webapp&aid=6383&channel=channel_pc_web&aweme_id=7300000000000000000"
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+
+# JS 签名每次调用都要经过 execjs 启动 node，默认迭代次数按此比例缩减
+JS_ITERATIONS_RATIO = 0.01
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    max_us: float
+
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(percent / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(name: str, func: Callable[[], Any], iterations: int, warmup: int = 10) -> BenchmarkResult:
+    """
+    逐次计时执行 func
+    :param name: 签名算法名称
+    :param func: 无参数的签名调用
+    :param iterations: 计时的调用次数
+    :param warmup: 不计时的预热次数（第一次调用会编译 JS、建查找表）
+    :return:
+    """
+    iterations = max(1, iterations)
+    for _ in range(warmup):
+        func()
+    elapsed_ns = []
+    perf_counter_ns = time.perf_counter_ns
+    for _ in range(iterations):
+        start = perf_counter_ns()
+        func()
+        elapsed_ns.append(perf_counter_ns() - start)
+    total_ns = sum(elapsed_ns) or 1
+    elapsed_ns.sort()
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        ops_per_sec=round(iterations * 1e9 / total_ns, 1),
+        p50_us=round(_percentile(elapsed_ns, 50) / 1000, 2),
+        p99_us=round(_percentile(elapsed_ns, 99) / 1000, 2),
+        max_us=round(elapsed_ns[-1] / 1000, 2),
+    )
+
+
+def js_runtime_available() -> bool:
+    """
+    本机是否能执行 JS 签名（需要 node 和 PyExecJS）
+    :return:
+    """
+    if shutil.which("node") is None:
+        return False
+    try:
+        import execjs  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_cases(include_js: bool = True) -> Dict[str, Callable[[], Any]]:
+    """
+    各签名算法的基准调用，输入固定
+    :param include_js: 是否包含需要 JS 运行时的签名
+    :return: 名称 -> 无参数调用
+    """
+    from media_platform.bilibili.help import BilibiliSign
+    from media_platform.xhs import help as xhs_help
+
+    bili_signer = BilibiliSign(BILI_IMG_KEY, BILI_SUB_KEY)
+    mrc_input = XHS_X_T + XHS_X_S + XHS_B1
+    common_json = json.dumps({"x5": XHS_A1, "x6": XHS_X_T, "x7": XHS_X_S, "x8": XHS_B1}, separators=(",", ":"))
+    common_bytes = xhs_help.encodeUtf8(common_json)
+
+    cases: Dict[str, Callable[[], Any]] = {
+        "bilibili.sign": lambda: bili_signer.sign({"mid": 1, "ps": 30, "pn": 1, "keyword": "python (教程)"}),
+        "xhs.sign": lambda: xhs_help.sign(XHS_A1, XHS_B1, XHS_X_S, XHS_X_T),
+        "xhs.mrc": lambda: xhs_help.mrc(mrc_input),
+        "xhs.b64Encode": lambda: xhs_help.b64Encode(common_bytes),
+        "xhs.encodeUtf8": lambda: xhs_help.encodeUtf8(common_json),
+    }
+    if include_js:
+        from media_platform.douyin.help import get_a_bogus_from_js
+        from media_platform.zhihu.help import sign as zhihu_sign
+
+        cases["douyin.get_a_bogus_from_js"] = lambda: get_a_bogus_from_js(
+            "/aweme/v1/web/aweme/detail/", DOUYIN_PARAMS, USER_AGENT
+        )
+        cases["zhihu.sign"] = lambda: zhihu_sign(ZHIHU_URL, ZHIHU_COOKIE)
+    return cases
+
+
+def find_regressions(
+    results: Sequence[BenchmarkResult], baseline: Dict[str, Dict[str, Any]], max_regression: float
+) -> List[str]:
+    """
+    与基线对比，ops/sec 下降超过 max_regression 的算法
+    :param results: 本次结果
+    :param baseline: 上次保存的结果，名称 -> BenchmarkResult 字典
+    :param max_regression: 允许的下降比例，例如 0.2 表示 20%
+    :return: 说明文字列表
+    """
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous or not previous.get("ops_per_sec"):
+            continue
+        ratio = result.ops_per_sec / previous["ops_per_sec"]
+        if ratio < 1 - max_regression:
+            regressions.append(
+                f"{result.name}: {previous['ops_per_sec']:.0f} -> {result.ops_per_sec:.0f} ops/sec ({ratio - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="MediaCrawler signature micro-benchmark")
+    parser.add_argument("names", nargs="*", help="只测这些签名算法，默认全部")
+    parser.add_argument("--iterations", type=int, default=20000, help="纯 Python 签名的计时次数")
+    parser.add_argument("--js-iterations", type=int, default=None, help="JS 签名的计时次数，默认按比例缩减")
+    parser.add_argument("--no-js", action="store_true", help="跳过需要 node 的签名")
+    parser.add_argument("--json", dest="json_path", default=None, help="把结果写入 JSON 文件，作为之后对比的基线")
+    parser.add_argument("--baseline", default=None, help="上次保存的 JSON 结果")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="相对基线允许的 ops/sec 下降比例")
+    args = parser.parse_args(argv)
+
+    include_js = not args.no_js and js_runtime_available()
+    if not args.no_js and not include_js:
+        print("node or PyExecJS not available, skip JS signers")
+    cases = build_cases(include_js=include_js)
+    unknown = [name for name in args.names if name not in cases]
+    if unknown:
+        print(f"unknown signers: {', '.join(unknown)}; available: {', '.join(cases)}")
+        return 2
+
+    js_iterations = args.js_iterations or max(10, int(args.iterations * JS_ITERATIONS_RATIO))
+    results = []
+    print(f"{'signer':<30}{'iterations':>12}{'ops/sec':>14}{'p50(us)':>12}{'p99(us)':>12}{'max(us)':>12}")
+    for name, func in cases.items():
+        if args.names and name not in args.names:
+            continue
+        is_js = name.startswith(("douyin.", "zhihu."))
+        result = run_benchmark(name, func, js_iterations if is_js else args.iterations, warmup=2 if is_js else 10)
+        results.append(result)
+        print(f"{name:<30}{result.iterations:>12}{result.ops_per_sec:>14.1f}"
+              f"{result.p50_us:>12.2f}{result.p99_us:>12.2f}{result.max_us:>12.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({result.name: asdict(result) for result in results}, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.max_regression)
+        for line in regressions:
+            print(f"regression: {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 页面内签名的页面池
+#
+# 小红书的 X-s 签名要在已登录页面中调用 window._webmsxyw 生成，原来所有请求都在同一个页面里 evaluate，
+# 并发的笔记/评论请求排队等待同一个渲染进程。页面池在同一个浏览器上下文（共享 cookie 和 localStorage）中
+# 额外打开若干个页面，每次签名交给当前在途调用最少的页面执行。额外页面在第一次签名时才打开，
+# 打开或初始化失败时只使用已有页面；额外页面关闭后自动移出页面池，爬虫结束时只关闭额外页面，原页面不受影响。
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from playwright.async_api import Page
+
+from tools import utils
+
+
+class _PageSlot:
+
+    def __init__(self, page: Page, primary: bool = False) -> None:
+        self.page = page
+        self.primary = primary
+        self.in_flight = 0
+        self.calls = 0
+
+
+class SignPagePool:
+    """
+    用法：
+        pool = SignPagePool(context_page, size=4, ready_expression="() => typeof window._webmsxyw === 'function'")
+        sign = await pool.evaluate("([url, data]) => window._webmsxyw(url, data)", [url, data])
+        await pool.close()
+    """
+
+    def __init__(self, primary_page: Page, size: int = 1, ready_expression: str = "", ready_timeout: float = 30) -> None:
+        """
+        :param primary_page: 爬虫已打开并登录的页面，始终在池中且不会被关闭
+        :param size: 页面总数（含 primary_page）
+        :param ready_expression: 判断新页面可以签名的 JS 函数，为空时页面加载完成即可使用
+        :param ready_timeout: 新页面加载和初始化的超时时间（秒）
+        """
+        self.size = max(1, size)
+        self.ready_expression = ready_expression
+        self.ready_timeout = ready_timeout
+        self._slots: List[_PageSlot] = [_PageSlot(primary_page, primary=True)]
+        self._primary_page = primary_page
+        self._opened = self.size == 1
+        self._open_lock: Optional[asyncio.Lock] = None
+        self._open_lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_open_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._open_lock is None or self._open_lock_loop is not loop:
+            self._open_lock = asyncio.Lock()
+            self._open_lock_loop = loop
+        return self._open_lock
+
+    async def _open_page(self) -> Optional[Page]:
+        page = await self._primary_page.context.new_page()
+        try:
+            await page.goto(self._primary_page.url, timeout=self.ready_timeout * 1000)
+            if self.ready_expression:
+                await page.wait_for_function(self.ready_expression, timeout=self.ready_timeout * 1000)
+            return page
+        except Exception as e:
+            utils.logger.warning(f"[SignPagePool] open sign page failed, use fewer pages: {e}")
+            await page.close()
+            return None
+
+    async def _ensure_opened(self) -> None:
+        if self._opened:
+            return
+        async with self._get_open_lock():
+            if self._opened:
+                return
+            pages = await asyncio.gather(*(self._open_page() for _ in range(self.size - 1)), return_exceptions=True)
+            for page in pages:
+                if isinstance(page, Exception):
+                    utils.logger.warning(f"[SignPagePool] open sign page failed, use fewer pages: {page}")
+                elif page is not None:
+                    self._slots.append(_PageSlot(page))
+            self._opened = True
+            utils.logger.info(f"[SignPagePool] {len(self._slots)} sign pages ready")
+
+    def _pick_slot(self) -> _PageSlot:
+        # 在途调用数相同时选累计调用最少的页面，串行请求也会轮流使用各页面
+        return min(self._slots, key=lambda slot: (slot.in_flight, slot.calls))
+
+    async def evaluate(self, expression: str, arg: Any = None) -> Any:
+        """
+        在当前最空闲的页面上执行 JS
+        :param expression: JS 函数
+        :param arg: 参数
+        :return:
+        """
+        await self._ensure_opened()
+        slot = self._pick_slot()
+        slot.in_flight += 1
+        slot.calls += 1
+        try:
+            return await slot.page.evaluate(expression, arg)
+        except Exception:
+            if not slot.primary and slot.page.is_closed() and slot in self._slots:
+                # 额外页面被关闭（例如渲染进程崩溃），移出页面池，之后的签名由其他页面执行
+                self._slots.remove(slot)
+                utils.logger.warning(f"[SignPagePool] sign page closed, {len(self._slots)} pages left")
+            raise
+        finally:
+            slot.in_flight -= 1
+
+    async def close(self) -> None:
+        """
+        关闭额外打开的页面，原页面由爬虫自己管理
+        :return:
+        """
+        extra_slots = [slot for slot in self._slots if not slot.primary]
+        self._slots = [slot for slot in self._slots if slot.primary]
+        self._opened = self.size == 1
+        for slot in extra_slots:
+            try:
+                if not slot.page.is_closed():
+                    await slot.page.close()
+            except Exception as e:
+                utils.logger.warning(f"[SignPagePool] close sign page failed: {e}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        每个页面的在途调用数和累计调用数
+        :return:
+        """
+        return [{"primary": slot.primary, "in_flight": slot.in_flight, "calls": slot.calls} for slot in self._slots]
@@ -0,0 +1,347 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 签名服务：常驻 JS 运行时进程池 + 异步 sign() 接口 + 按算法统计耗时分布
+
+import asyncio
+import bisect
+import itertools
+import json
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config
+from tools import utils
+
+LIBS_DIR = Path(__file__).resolve().parent.parent / "libs"
+JS_WORKER_PATH = LIBS_DIR / "js_sign_worker.js"
+
+# 耗时分布的桶上界（毫秒），最后一个桶为 +Inf
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+class LatencyHistogram:
+    """
+    固定桶的耗时直方图
+    """
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets_ms = tuple(buckets_ms)
+        self.counts = [0] * (len(self.buckets_ms) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"<={b}ms" for b in self.buckets_ms] + ["+Inf"]
+        return {
+            "count": self.total,
+            "avg_ms": round(self.sum_ms / self.total, 3) if self.total else 0,
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class JsRuntimeProcess:
+    """
+    一个常驻的 node 进程（libs/js_sign_worker.js），加载签名脚本后复用，
+    请求按 id 流水线发送，不再每次签名都启动一个新的 JS 运行时
+    """
+
+    def __init__(self, script_path: Path) -> None:
+        self.script_path = script_path
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._start_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def _ensure_started(self) -> None:
+        if self.alive:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.alive:
+                return
+            self._process = await asyncio.create_subprocess_exec(
+                shutil.which("node") or "node", str(JS_WORKER_PATH), str(self.script_path),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=2 ** 22,
+            )
+            self._reader_task = asyncio.ensure_future(self._read_responses(self._process))
+
+    async def _read_responses(self, process: asyncio.subprocess.Process) -> None:
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    response = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                future = self._pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(RuntimeError(response["error"]))
+                else:
+                    future.set_result(response.get("results", response.get("result")))
+        finally:
+            # 进程退出：让所有等待中的请求失败，下次调用时重启进程
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(f"js runtime for {self.script_path.name} exited"))
+            self._pending.clear()
+
+    async def call(self, fn: str, args: Sequence[Any] = (), batch: Optional[List[Sequence[Any]]] = None,
+                   timeout: Optional[float] = None) -> Any:
+        """
+        调用脚本中的全局函数
+        :param fn: 函数名
+        :param args: 参数
+        :param batch: 批量参数列表，传入时一次请求返回所有结果
+        :param timeout: 超时时间（秒）
+        :return:
+        """
+        request_id = next(self._ids)
+        request: Dict[str, Any] = {"id": request_id, "fn": fn}
+        if batch is not None:
+            request["batch"] = [list(a) for a in batch]
+        else:
+            request["args"] = list(args)
+        # 先登记再启动进程，保证进程启动期间的请求也计入在途数，派发时能均摊到各进程
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._ensure_started()
+            self._process.stdin.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+            await self._process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def aclose(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), 2)
+            except Exception:
+                process.kill()
+                await process.wait()
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+
+class SignService:
+    """
+    签名服务：
+      - JS 算法：每个脚本维护 pool_size 个常驻 node 进程，请求派发给在途请求最少的进程，签名不再阻塞事件循环；
+        没有 node 时回退为线程池中执行 execjs
+      - Python 算法：计算量很小，直接在事件循环内执行，只统计耗时
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, timeout: Optional[float] = None) -> None:
+        self.pool_size = pool_size or config.SIGN_JS_POOL_SIZE
+        self.timeout = timeout or config.SIGN_TIMEOUT
+        self._js_algorithms: Dict[str, Tuple[Path, str]] = {}
+        self._py_algorithms: Dict[str, Callable[..., Any]] = {}
+        self._js_pools: Dict[Path, List[JsRuntimeProcess]] = {}
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._use_node = shutil.which("node") is not None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread_local = threading.local()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def register_js(self, name: str, script_path: Path, function: str) -> None:
+        """
+        注册 JS 签名算法
+        :param name: 算法名，例如 douyin.sign_reply
+        :param script_path: 签名脚本
+        :param function: 脚本中的全局函数名
+        :return:
+        """
+        self._js_algorithms[name] = (Path(script_path), function)
+
+    def register_python(self, name: str, func: Callable[..., Any]) -> None:
+        """
+        注册 Python 签名算法
+        :param name: 算法名，例如 xhs.sign
+        :param func: 签名函数
+        :return:
+        """
+        self._py_algorithms[name] = func
+
+    def _observe(self, name: str, started: float, count: int = 1) -> None:
+        histogram = self._histograms.setdefault(name, LatencyHistogram())
+        elapsed_ms = (time.perf_counter() - started) * 1000 / count
+        for _ in range(count):
+            histogram.observe(elapsed_ms)
+
+    async def _bind_loop(self) -> None:
+        # 进程管道绑定在创建它的事件循环上，换了事件循环（例如调度器每轮新建）需要重建进程池
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None and not self._loop.is_closed():
+                await self._close_pools()
+            self._js_pools = {}
+            self._loop = loop
+
+    def _pick_process(self, script_path: Path) -> JsRuntimeProcess:
+        pool = self._js_pools.get(script_path)
+        if pool is None:
+            pool = [JsRuntimeProcess(script_path) for _ in range(self.pool_size)]
+            self._js_pools[script_path] = pool
+        return min(pool, key=lambda p: p.in_flight)
+
+    def _call_execjs(self, script_path: Path, function: str, args_list: List[Sequence[Any]]) -> List[Any]:
+        import execjs
+
+        contexts = getattr(self._thread_local, "contexts", None)
+        if contexts is None:
+            contexts = self._thread_local.contexts = {}
+        ctx = contexts.get(script_path)
+        if ctx is None:
+            ctx = contexts[script_path] = execjs.compile(script_path.read_text(encoding="utf-8-sig"))
+        return [ctx.call(function, *args) for args in args_list]
+
+    async def _run_js(self, name: str, args_list: List[Sequence[Any]], batch: bool) -> List[Any]:
+        script_path, function = self._js_algorithms[name]
+        if self._use_node:
+            await self._bind_loop()
+            process = self._pick_process(script_path)
+            if batch:
+                return await process.call(function, batch=args_list, timeout=self.timeout)
+            return [await process.call(function, args_list[0], timeout=self.timeout)]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="sign")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call_execjs, script_path, function, args_list)
+
+    async def sign(self, name: str, *args: Any) -> Any:
+        """
+        执行一次签名
+        :param name: 算法名
+        :param args: 算法参数
+        :return:
+        """
+        started = time.perf_counter()
+        if name in self._py_algorithms:
+            result = self._py_algorithms[name](*args)
+        elif name in self._js_algorithms:
+            result = (await self._run_js(name, [args], batch=False))[0]
+        else:
+            raise ValueError(f"unknown sign algorithm: {name}")
+        self._observe(name, started)
+        return result
+
+    async def sign_batch(self, name: str, args_list: List[Sequence[Any]]) -> List[Any]:
+        """
+        批量签名：JS 算法一次进程往返完成整批签名
+        :param name: 算法名
+        :param args_list: 每次签名的参数列表
+        :return: 与 args_list 顺序一致的结果
+        """
+        if not args_list:
+            return []
+        started = time.perf_counter()
+        if name in self._py_algorithms:
+            results = [self._py_algorithms[name](*args) for args in args_list]
+        elif name in self._js_algorithms:
+            results = await self._run_js(name, list(args_list), batch=True)
+        else:
+            raise ValueError(f"unknown sign algorithm: {name}")
+        self._observe(name, started, len(args_list))
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        按算法的耗时分布
+        :return:
+        """
+        return {name: histogram.snapshot() for name, histogram in self._histograms.items()}
+
+    async def _close_pools(self) -> None:
+        for pool in self._js_pools.values():
+            for process in pool:
+                try:
+                    await process.aclose()
+                except Exception:
+                    pass
+
+    async def aclose(self) -> None:
+        """
+        关闭常驻 JS 进程和线程池
+        """
+        await self._close_pools()
+        self._js_pools = {}
+        self._loop = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_sign_service: Optional[SignService] = None
+
+
+def get_sign_service() -> SignService:
+    """
+    获取进程内共享的签名服务，首次调用时注册抖音/知乎/小红书签名算法
+    :return:
+    """
+    global _sign_service
+    if _sign_service is None:
+        from media_platform.xhs.help import sign as xhs_sign
+
+        service = SignService()
+        service.register_js("douyin.sign_datail", LIBS_DIR / "douyin.js", "sign_datail")
+        service.register_js("douyin.sign_reply", LIBS_DIR / "douyin.js", "sign_reply")
+        service.register_js("zhihu.get_sign", LIBS_DIR / "zhihu.js", "get_sign")
+        service.register_python("xhs.sign", xhs_sign)
+        _sign_service = service
+    return _sign_service
+
+
+async def shutdown_sign_service() -> None:
+    """
+    关闭共享签名服务，打印各算法的耗时统计
+    """
+    if _sign_service is None:
+        return
+    stats = _sign_service.stats()
+    if stats:
+        utils.logger.info(f"[SignService] latency stats: {stats}")
+    await _sign_service.aclose()
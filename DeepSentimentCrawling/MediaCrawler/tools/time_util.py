@@ -16,6 +16,7 @@
 
 import time
 from datetime import datetime, timedelta, timezone
+from typing import Iterator
 
 
 def get_current_timestamp() -> int:
@@ -111,6 +112,20 @@ def rfc2822_to_timestamp(rfc2822_time):
     return timestamp
 
 
+def iter_days(start_day: str, end_day: str) -> Iterator[datetime]:
+    """
+    按天遍历日期区间（包含首尾两天）
+    :param start_day: 开始日期，格式 2024-01-01
+    :param end_day: 结束日期，格式 2024-01-01
+    :return:
+    """
+    day = datetime.strptime(start_day, "%Y-%m-%d")
+    end = datetime.strptime(end_day, "%Y-%m-%d")
+    while day <= end:
+        yield day
+        day += timedelta(days=1)
+
+
 if __name__ == '__main__':
     # 示例用法
     _rfc2822_time = "Sat Dec 23 17:12:54 +0800 2023"
@@ -1,3 +1,4 @@
+import importlib.util
 import os
 import logging
 import shutil
@@ -7,12 +8,8 @@ from typing import Optional
 
 logger = logging.getLogger("Transcriber")
 
-# Check for FunASR
-try:
-    from funasr import AutoModel
-    FUNASR_AVAILABLE = True
-except ImportError:
-    FUNASR_AVAILABLE = False
+# Check for FunASR without importing it, funasr/torch are imported only when the model is loaded
+FUNASR_AVAILABLE = importlib.util.find_spec("funasr") is not None
 
 class VideoTranscriber:
     _model = None
@@ -58,6 +55,8 @@ class VideoTranscriber:
                      # Fallback to ID if local path doesn't exist (though we just verified it does)
                     model_path = "iic/SenseVoiceSmall"
 
+                from funasr import AutoModel
+
                 cls._model = AutoModel(
                     model=model_path,
                     trust_remote_code=True,
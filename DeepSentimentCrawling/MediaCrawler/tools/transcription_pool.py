@@ -0,0 +1,354 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 音视频转写流水线：独立的 ASR 进程池 + 有界待转写队列 + 可恢复的任务日志
+
+import asyncio
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import config
+from tools import utils
+from var import media_crawler_db_var
+
+# 转写结果回写函数：writer(content_id, text)
+TranscriptionWriter = Callable[[str, str], Awaitable[None]]
+
+_TRANSCRIPTION_WRITERS: Dict[str, TranscriptionWriter] = {}
+
+
+@dataclass
+class TranscriptionJob:
+    platform: str  # 平台简称，与 config.PLATFORM 一致，例如 dy / bili / yt
+    content_id: str
+    media_path: str
+    delete_after: bool = True  # 转写完成后删除媒体文件
+    attempts: int = 0  # 已失败的次数
+    last_error: str = ""
+
+    @property
+    def key(self) -> str:
+        return f"{self.platform}:{self.content_id}"
+
+
+def register_transcription_writer(platform: str, writer: TranscriptionWriter) -> None:
+    """
+    注册平台的转写结果回写函数，由各平台 store 模块在导入时注册
+    :param platform: 平台简称
+    :param writer: 回写函数 writer(content_id, text)
+    :return:
+    """
+    _TRANSCRIPTION_WRITERS[platform] = writer
+
+
+def _init_transcribe_worker() -> None:
+    # 每个工作进程启动时加载一次模型，之后的任务复用
+    from tools.transcriber import VideoTranscriber
+
+    VideoTranscriber.get_model()
+
+
+def _transcribe_file(media_path: str) -> str:
+    from tools.transcriber import VideoTranscriber
+
+    return VideoTranscriber.transcribe_video(media_path)
+
+
+class TranscriptionPool:
+    """
+    转写流水线：
+      - 转写在独立的进程池中执行（每个进程只加载一次模型），不占用默认线程池，也不阻塞爬取协程
+      - 在途任务数有上限，超过时 submit 会等待，对下载形成反压
+      - 未完成的任务记录在任务日志中，重启后可以恢复继续转写
+      - 失败达到 max_attempts 次的任务移入失败任务文件（dead letter），不再自动重试
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 journal_path: Optional[str] = None,
+                 transcribe_func: Callable[[str], str] = _transcribe_file,
+                 use_processes: bool = True, max_attempts: Optional[int] = None,
+                 dead_letter_path: Optional[str] = None) -> None:
+        """
+        :param max_workers: 转写工作进程数
+        :param max_pending: 在途任务数上限
+        :param journal_path: 任务日志文件路径
+        :param max_attempts: 单个任务最多尝试的次数
+        :param dead_letter_path: 失败任务文件路径
+        :param transcribe_func: 转写函数，使用进程池时需要能被 pickle
+        :param use_processes: 是否使用进程池，False 时使用独立的线程池
+        """
+        self.max_workers = max(1, max_workers or config.ASR_WORKER_PROCESSES)
+        self.max_pending = max(1, max_pending or config.ASR_MAX_PENDING_JOBS)
+        self.journal_path = journal_path or config.ASR_JOURNAL_PATH
+        self.max_attempts = max(1, max_attempts or config.ASR_MAX_ATTEMPTS)
+        self.dead_letter_path = dead_letter_path or config.ASR_DEAD_LETTER_PATH
+        self.transcribe_func = transcribe_func
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._pending_jobs: Dict[str, TranscriptionJob] = self._load_jobs(self.journal_path)
+        self._dead_jobs: Dict[str, TranscriptionJob] = self._load_jobs(self.dead_letter_path)
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._task_dbs: Dict[str, object] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._journal_lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._journal_lock = asyncio.Lock()
+            self._tasks = {}
+            self._task_dbs = {}
+            self._loop = loop
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # spawn 启动的工作进程不继承父进程的线程和事件循环，加载 torch 更安全
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_transcribe_worker,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="asr")
+        return self._executor
+
+    @staticmethod
+    def _load_jobs(path: str) -> Dict[str, TranscriptionJob]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                jobs = [TranscriptionJob(**item) for item in json.load(f)]
+        except Exception as e:
+            utils.logger.warning(f"[TranscriptionPool] load journal {path} failed: {e}")
+            return {}
+        return {job.key: job for job in jobs}
+
+    @staticmethod
+    def _save_jobs_sync(path: str, jobs: List[TranscriptionJob]) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump([asdict(job) for job in jobs], f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    async def _save_journal(self, dead_letter: bool = False) -> None:
+        async with self._journal_lock:
+            await asyncio.to_thread(self._save_jobs_sync, self.journal_path, list(self._pending_jobs.values()))
+            if dead_letter:
+                await asyncio.to_thread(self._save_jobs_sync, self.dead_letter_path, list(self._dead_jobs.values()))
+
+    @property
+    def pending_jobs(self) -> List[TranscriptionJob]:
+        return list(self._pending_jobs.values())
+
+    @property
+    def dead_jobs(self) -> List[TranscriptionJob]:
+        return list(self._dead_jobs.values())
+
+    async def _record_failure(self, job: TranscriptionJob, error: Exception) -> None:
+        """
+        记录一次失败；达到 max_attempts 次后移出任务日志，写入失败任务文件
+        :param job:
+        :param error:
+        :return:
+        """
+        job.attempts += 1
+        job.last_error = str(error)[:500]
+        dead_letter = job.attempts >= self.max_attempts
+        if dead_letter:
+            self._pending_jobs.pop(job.key, None)
+            self._dead_jobs[job.key] = job
+            utils.logger.error(
+                f"[TranscriptionPool] {job.key} failed {job.attempts} times, moved to {self.dead_letter_path}"
+            )
+        try:
+            await self._save_journal(dead_letter=dead_letter)
+        except Exception as e:
+            utils.logger.warning(f"[TranscriptionPool] save journal failed: {e}")
+
+    async def submit(self, job: TranscriptionJob) -> "asyncio.Task[str]":
+        """
+        提交转写任务，在途任务已满时等待
+        任务在调用方的上下文中回写结果（数据库连接、配置覆盖与调用方一致）
+        :param job: 转写任务
+        :return: 转写任务的 Task，结果为转写文本，需要立即使用转写结果时可以 await
+        """
+        self._bind_loop()
+        task = self._tasks.get(job.key)
+        if task is not None:
+            return task
+        await self._slots.acquire()
+        self._pending_jobs[job.key] = job
+        try:
+            await self._save_journal()
+        except Exception as e:
+            utils.logger.warning(f"[TranscriptionPool] save journal failed: {e}")
+        task = asyncio.ensure_future(self._run(job))
+        self._tasks[job.key] = task
+        self._task_dbs[job.key] = media_crawler_db_var.get(None)
+        return task
+
+    async def _run(self, job: TranscriptionJob) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                text = await loop.run_in_executor(self._get_executor(), self.transcribe_func, job.media_path)
+            except BrokenProcessPool as e:
+                # 工作进程异常退出，重建进程池；任务保留在日志中，下次恢复时重试
+                utils.logger.error(f"[TranscriptionPool] worker process died while transcribing {job.key}: {e}")
+                self._executor = None
+                await self._record_failure(job, e)
+                return ""
+            except Exception as e:
+                utils.logger.error(f"[TranscriptionPool] transcribe {job.key} failed: {e}")
+                await self._record_failure(job, e)
+                return ""
+
+            writer = _TRANSCRIPTION_WRITERS.get(job.platform)
+            if text and writer is not None:
+                try:
+                    await writer(job.content_id, text)
+                except Exception as e:
+                    utils.logger.error(f"[TranscriptionPool] write back {job.key} failed: {e}")
+                    await self._record_failure(job, e)
+                    return text
+            utils.logger.info(f"[TranscriptionPool] {job.key} transcribed, length: {len(text or '')}")
+            if job.delete_after:
+                self._remove_media(job.media_path)
+            self._pending_jobs.pop(job.key, None)
+            try:
+                await self._save_journal()
+            except Exception as e:
+                utils.logger.warning(f"[TranscriptionPool] save journal failed: {e}")
+            return text
+        finally:
+            self._tasks.pop(job.key, None)
+            self._task_dbs.pop(job.key, None)
+            self._slots.release()
+
+    @staticmethod
+    def _remove_media(media_path: str) -> None:
+        try:
+            os.remove(media_path)
+            # 目录为空时一并删除
+            os.rmdir(os.path.dirname(media_path))
+        except OSError:
+            pass
+
+    async def resume(self, platform: Optional[str] = None) -> int:
+        """
+        重新提交任务日志中上次未完成的转写任务
+        :param platform: 只恢复该平台的任务，为空时恢复全部
+        :return: 恢复的任务数
+        """
+        self._bind_loop()
+        resumed = 0
+        for job in self.pending_jobs:
+            if platform and job.platform != platform or job.key in self._tasks:
+                continue
+            if not os.path.exists(job.media_path):
+                self._pending_jobs.pop(job.key, None)
+                continue
+            await self.submit(job)
+            resumed += 1
+        if resumed:
+            utils.logger.info(f"[TranscriptionPool] resumed {resumed} pending transcription jobs")
+        return resumed
+
+    async def drain(self) -> None:
+        """
+        等待在途任务完成；只等待与当前上下文使用同一数据库连接的任务，以便随后关闭数据库连接
+        """
+        if self._loop is not asyncio.get_running_loop():
+            return
+        current_db = media_crawler_db_var.get(None)
+        tasks = [
+            task for key, task in list(self._tasks.items())
+            if current_db is None or self._task_dbs.get(key) is current_db
+        ]
+        if tasks:
+            utils.logger.info(f"[TranscriptionPool] waiting for {len(tasks)} transcription jobs ...")
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        """
+        等待所有在途任务完成并关闭进程池
+        """
+        if self._loop is asyncio.get_running_loop() and self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._loop = None
+
+
+_transcription_pool: Optional[TranscriptionPool] = None
+
+
+def get_transcription_pool() -> TranscriptionPool:
+    """
+    获取进程内共享的转写流水线
+    :return:
+    """
+    global _transcription_pool
+    if _transcription_pool is None:
+        _transcription_pool = TranscriptionPool()
+    return _transcription_pool
+
+
+async def submit_transcription(job: TranscriptionJob) -> Optional["asyncio.Task[str]"]:
+    """
+    提交转写任务，平台未在 ASR_ENABLED_PLATFORMS 中时忽略
+    :param job: 转写任务
+    :return:
+    """
+    if job.platform not in config.ASR_ENABLED_PLATFORMS:
+        return None
+    return await get_transcription_pool().submit(job)
+
+
+async def resume_transcription_jobs(platform: str) -> None:
+    """
+    按配置恢复上次未完成的转写任务
+    :param platform: 平台简称
+    :return:
+    """
+    if not config.ASR_RESUME_PENDING_JOBS or platform not in config.ASR_ENABLED_PLATFORMS:
+        return
+    await get_transcription_pool().resume(platform)
+
+
+async def drain_transcription_jobs() -> None:
+    """
+    等待当前数据库连接上的转写任务完成，关闭数据库连接前调用
+    """
+    if _transcription_pool is not None:
+        await _transcription_pool.drain()
+
+
+async def shutdown_transcription_pool() -> None:
+    """
+    关闭共享转写流水线
+    """
+    global _transcription_pool
+    if _transcription_pool is None:
+        return
+    await _transcription_pool.aclose()
+    _transcription_pool = None
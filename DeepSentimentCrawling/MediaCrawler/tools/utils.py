@@ -13,10 +13,20 @@ import argparse
 import logging
 
 from .crawler_util import *
-from .slider_util import *
 from .time_util import *
 
 
+# 滑块工具依赖 OpenCV/NumPy，只在第一次使用时导入 slider_util
+_SLIDER_UTIL_NAMES = ("Slide", "get_track_simple", "get_tracks")
+
+
+def __getattr__(name: str):
+    if name in _SLIDER_UTIL_NAMES:
+        from . import slider_util
+        return getattr(slider_util, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def init_loging_config():
     level = logging.INFO
     logging.basicConfig(
@@ -15,9 +15,6 @@ import logging
 from collections import Counter
 
 import aiofiles
-import jieba
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
 
 import config
 from tools import utils
@@ -26,23 +23,42 @@ plot_lock = asyncio.Lock()
 
 class AsyncWordCloudGenerator:
     def __init__(self):
-        logging.getLogger('jieba').setLevel(logging.WARNING)
+        # 各平台存储类在导入时就会创建本对象，jieba 词典、停用词、matplotlib 都推迟到第一次分词/画图时加载
         self.stop_words_file = config.STOP_WORDS_FILE
         self.lock = asyncio.Lock()
-        self.stop_words = self.load_stop_words()
+        self._stop_words = None
+        self._jieba = None
         self.custom_words = config.CUSTOM_WORDS
-        for word, group in self.custom_words.items():
-            jieba.add_word(word)
+
+    @property
+    def stop_words(self) -> set:
+        if self._stop_words is None:
+            self._stop_words = self.load_stop_words()
+        return self._stop_words
+
+    @property
+    def jieba(self):
+        if self._jieba is None:
+            import jieba
+            logging.getLogger('jieba').setLevel(logging.WARNING)
+            for word, group in self.custom_words.items():
+                jieba.add_word(word)
+            self._jieba = jieba
+        return self._jieba
 
     def load_stop_words(self):
         with open(self.stop_words_file, 'r', encoding='utf-8') as f:
             return set(f.read().strip().split('\n'))
 
+    def cut_words(self, text: str) -> list:
+        return [word for word in self.jieba.lcut(text) if word not in self.stop_words and len(word.strip()) > 0]
+
     async def generate_word_frequency_and_cloud(self, data, save_words_prefix):
         all_text = ' '.join(item['content'] for item in data)
-        words = [word for word in jieba.lcut(all_text) if word not in self.stop_words and len(word.strip()) > 0]
-        word_freq = Counter(words)
+        word_freq = Counter(self.cut_words(all_text))
+        await self.save_word_frequency_and_cloud(word_freq, save_words_prefix)
 
+    async def save_word_frequency_and_cloud(self, word_freq, save_words_prefix):
         # Save word frequency to file
         freq_file = f"{save_words_prefix}_word_freq.json"
         async with aiofiles.open(freq_file, 'w', encoding='utf-8') as file:
@@ -56,6 +72,9 @@ class AsyncWordCloudGenerator:
         await self.generate_word_cloud(word_freq, save_words_prefix)
 
     async def generate_word_cloud(self, word_freq, save_words_prefix):
+        import matplotlib.pyplot as plt
+        from wordcloud import WordCloud
+
         await plot_lock.acquire()
         top_20_word_freq = {word: freq for word, freq in
                             sorted(word_freq.items(), key=lambda item: item[1], reverse=True)[:20]}
@@ -13,7 +13,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
 import json
-import re
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -39,61 +38,59 @@ class PlatformCrawler:
         
         print(f"初始化平台爬虫管理器，MediaCrawler路径: {self.mediacrawler_path}")
     
-    def configure_mediacrawler_db(self):
-        """配置MediaCrawler使用我们的MySQL数据库"""
+    def build_mediacrawler_env(self) -> Dict[str, str]:
+        """构建MediaCrawler子进程的环境变量，通过环境变量传入MindSpider的数据库配置（不再改写config/db_config.py）"""
+        env = dict(os.environ)
+        env.update({
+            "MYSQL_DB_PWD": str(config.DB_PASSWORD),
+            "MYSQL_DB_USER": str(config.DB_USER),
+            "MYSQL_DB_HOST": str(config.DB_HOST),
+            "MYSQL_DB_PORT": str(config.DB_PORT),
+            "MYSQL_DB_NAME": str(config.DB_NAME),
+        })
+        return env
+    
+    def _run_mediacrawler(self, platforms: List[str], keywords: List[str], login_type: str) -> List[Dict]:
+        """
+        在一个MediaCrawler进程内并发爬取多个平台（crawler_runner.py），返回每个平台的结构化结果
+        
+        Args:
+            platforms: 平台列表
+            keywords: 关键词列表
+            login_type: 登录方式
+        
+        Returns:
+            每个平台的爬取结果（与platforms顺序一致）
+        """
+        fd, result_file = tempfile.mkstemp(prefix="crawl_result_", suffix=".json")
+        os.close(fd)
         try:
-            # 修改MediaCrawler的数据库配置
-            db_config_path = self.mediacrawler_path / "config" / "db_config.py"
-            
-            # 读取原始配置
-            with open(db_config_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 替换数据库配置
-            new_config = f'''# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：  
-# 1. 不得用于任何商业用途。  
-# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。  
-# 3. 不得进行大规模爬取或对平台造成运营干扰。  
-# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。   
-# 5. 不得用于任何非法或不当的用途。
-#   
-# 详细许可条款请参阅项目根目录下的LICENSE文件。  
-# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。  
-
-
-import os
-
-# mysql config - 使用MindSpider的数据库配置
-MYSQL_DB_PWD = "{config.DB_PASSWORD}"
-MYSQL_DB_USER = "{config.DB_USER}"
-MYSQL_DB_HOST = "{config.DB_HOST}"
-MYSQL_DB_PORT = {config.DB_PORT}
-MYSQL_DB_NAME = "{config.DB_NAME}"
-
-
-# redis config
-REDIS_DB_HOST = "127.0.0.1"  # your redis host
-REDIS_DB_PWD = os.getenv("REDIS_DB_PWD", "123456")  # your redis password
-REDIS_DB_PORT = os.getenv("REDIS_DB_PORT", 6379)  # your redis port
-REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
-
-# cache type
-CACHE_TYPE_REDIS = "redis"
-CACHE_TYPE_MEMORY = "memory"
-
-# sqlite config
-SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schema", "sqlite_tables.db")'''
-            
-            # 写入新配置
-            with open(db_config_path, 'w', encoding='utf-8') as f:
-                f.write(new_config)
-            
-            print("已配置MediaCrawler使用MindSpider数据库")
-            return True
+            cmd = [
+                sys.executable, "crawler_runner.py",
+                "--platforms", ",".join(platforms),
+                "--lt", login_type,
+                "--type", "search",
+                "--save_data_option", "db",
+                "--keywords", ",".join(keywords),
+                "--result_file", result_file,
+            ]
+            print(f"执行命令: {' '.join(cmd)}")
+            # 输出直接透传到控制台，统计信息从结果文件读取
+            process = subprocess.run(cmd, cwd=self.mediacrawler_path, env=self.build_mediacrawler_env())
             
-        except Exception as e:
-            print(f"配置MediaCrawler数据库失败: {e}")
-            return False
+            results = []
+            if os.path.getsize(result_file) > 0:
+                with open(result_file, 'r', encoding='utf-8') as f:
+                    results = json.load(f)
+            if len(results) != len(platforms):
+                error = f"爬虫进程异常退出，返回码: {process.returncode}"
+                return [{"platform": platform, "success": False, "error": error, "return_code": process.returncode}
+                        for platform in platforms]
+            for result in results:
+                result["return_code"] = process.returncode
+            return results
+        finally:
+            os.remove(result_file)
     
     def create_base_config(self, platform: str, keywords: List[str], 
                           crawler_type: str = "search", max_notes: int = 50) -> bool:
@@ -176,144 +173,23 @@ SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schem
         print(f"\n开始爬取平台: {platform}")
         print(f"关键词: {keywords[:5]}{'...' if len(keywords) > 5 else ''} (共{len(keywords)}个)")
         
-        start_time = datetime.now()
-        
         try:
-            # 配置数据库
-            if not self.configure_mediacrawler_db():
-                return {"success": False, "error": "数据库配置失败"}
-            
-            # 不再修改base_config.py，遵循用户意愿
-            # if not self.create_base_config(platform, keywords, "search", max_notes):
-            #     return {"success": False, "error": "基础配置创建失败"}
-            
-            # 将关键词列表转换为逗号分隔的字符串
-            keywords_str = ",".join(keywords)
-            
-            # 构建命令
-            cmd = [
-                sys.executable, "main.py",
-                "--platform", platform,
-                "--lt", login_type,
-                "--type", "search",
-                "--save_data_option", "db",
-                "--keywords", keywords_str
-            ]
-            
-            print(f"执行命令: {' '.join(cmd)}")
-            
-            # 切换到MediaCrawler目录并执行
-            # 修改：使用Popen实时流式输出，同时捕获用于解析
-            process = subprocess.Popen(
-                cmd,
-                cwd=self.mediacrawler_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1  # 行缓冲
-            )
-            
-            captured_stdout = []
-            captured_stderr = []
-            
-            # 实时读取输出
-            import select
-            
-            while True:
-                reads = [process.stdout.fileno(), process.stderr.fileno()]
-                ret = select.select(reads, [], [])
-                
-                for fd in ret[0]:
-                    if fd == process.stdout.fileno():
-                        line = process.stdout.readline()
-                        if line:
-                            print(line, end='')
-                            captured_stdout.append(line)
-                    if fd == process.stderr.fileno():
-                        line = process.stderr.readline()
-                        if line:
-                            print(line, end='', file=sys.stderr)
-                            captured_stderr.append(line)
-                
-                if process.poll() is not None:
-                    # 读取剩余内容
-                    for line in process.stdout:
-                        print(line, end='')
-                        captured_stdout.append(line)
-                    for line in process.stderr:
-                        print(line, end='', file=sys.stderr)
-                        captured_stderr.append(line)
-                    break
-            
-            returncode = process.returncode
-            result_stdout = "".join(captured_stdout)
-            result_stderr = "".join(captured_stderr)
-            
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            
-            # 解析输出提取统计信息
-            parsed_stats = self._parse_crawl_output(captured_stdout)
-            
-            # 创建统计信息
-            crawl_stats = {
-                "platform": platform,
-                "keywords_count": len(keywords),
-                "duration_seconds": duration,
-                "start_time": start_time.isoformat(),
-                "end_time": end_time.isoformat(),
-                "return_code": returncode,
-                "success": returncode == 0,
-                "notes_count": parsed_stats.get("notes_count", 0),
-                "comments_count": parsed_stats.get("comments_count", 0),
-                "errors_count": parsed_stats.get("errors_count", 0)
-            }
+            crawl_stats = self._run_mediacrawler([platform], keywords, login_type)[0]
             
             # 保存统计信息
             self.crawl_stats[platform] = crawl_stats
             
-            if returncode == 0:
-                print(f"✅ {platform} 爬取完成，耗时: {duration:.1f}秒")
+            if crawl_stats.get("success"):
+                print(f"✅ {platform} 爬取完成，耗时: {crawl_stats.get('duration_seconds', 0):.1f}秒")
             else:
-                print(f"❌ {platform} 爬取失败，返回码: {returncode}")
+                print(f"❌ {platform} 爬取失败: {crawl_stats.get('error')}")
             
             return crawl_stats
             
-        except subprocess.TimeoutExpired:
-            print(f"❌ {platform} 爬取超时")
-            return {"success": False, "error": "爬取超时", "platform": platform}
         except Exception as e:
             print(f"❌ {platform} 爬取异常: {e}")
             return {"success": False, "error": str(e), "platform": platform}
     
-    def _parse_crawl_output(self, output_lines: List[str]) -> Dict:
-        """解析爬取输出，提取统计信息"""
-        stats = {
-            "notes_count": 0,
-            "comments_count": 0,
-            "errors_count": 0
-        }
-        
-        for line in output_lines:
-            # 查找标准化的总结行: [Summary] Notes: 10, Comments: 5
-            if "[Summary]" in line:
-                try:
-                    notes_match = re.search(r'Notes:\s*(\d+)', line)
-                    comments_match = re.search(r'Comments:\s*(\d+)', line)
-                    
-                    if notes_match:
-                        stats["notes_count"] = int(notes_match.group(1))
-                    if comments_match:
-                        stats["comments_count"] = int(comments_match.group(1))
-                except Exception as e:
-                    print(f"解析总结行失败: {e}")
-            
-            # 也可以保留之前的解析逻辑作为fallback，或者用于计算错误
-            if "error" in line.lower() or "异常" in line:
-                stats["errors_count"] += 1
-        
-        return stats
-    
     def run_multi_platform_crawl_by_keywords(self, keywords: List[str], platforms: List[str],
                                             login_type: str = "qrcode", max_notes_per_keyword: int = 50) -> Dict:
         """
@@ -354,58 +230,44 @@ SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "schem
                 "total_comments": 0
             }
         
-        # 对每个平台一次性爬取所有关键词
-        for platform in platforms:
-            print(f"\n📝 在 {platform} 平台爬取所有关键词")
-            print(f"   关键词: {', '.join(keywords[:5])}{'...' if len(keywords) > 5 else ''}")
+        # 所有平台在同一个MediaCrawler进程内并发爬取，总耗时约等于最慢的平台
+        print(f"\n📝 在 {', '.join(platforms)} 平台并发爬取所有关键词")
+        print(f"   关键词: {', '.join(keywords[:5])}{'...' if len(keywords) > 5 else ''}")
+        
+        try:
+            platform_results = self._run_mediacrawler(platforms, keywords, login_type)
+        except Exception as e:
+            print(f"   ❌ 异常: {e}")
+            platform_results = [{"platform": platform, "success": False, "error": str(e)} for platform in platforms]
+        
+        for platform, result in zip(platforms, platform_results):
+            self.crawl_stats[platform] = result
             
-            try:
-                # 一次性传递所有关键词给平台
-                result = self.run_crawler(platform, keywords, login_type, max_notes_per_keyword)
-                
-                if result.get("success"):
-                    total_stats["successful_tasks"] += len(keywords)
-                    total_stats["platform_summary"][platform]["successful_keywords"] = len(keywords)
-                    
-                    notes_count = result.get("notes_count", 0)
-                    comments_count = result.get("comments_count", 0)
-                    
-                    total_stats["total_notes"] += notes_count
-                    total_stats["total_comments"] += comments_count
-                    total_stats["platform_summary"][platform]["total_notes"] = notes_count
-                    total_stats["platform_summary"][platform]["total_comments"] = comments_count
-                    
-                    # 为每个关键词记录结果
-                    for keyword in keywords:
-                        if keyword not in total_stats["keyword_results"]:
-                            total_stats["keyword_results"][keyword] = {}
-                        total_stats["keyword_results"][keyword][platform] = result
-                    
-                    print(f"   ✅ 成功: {notes_count} 条内容, {comments_count} 条评论")
-                else:
-                    total_stats["failed_tasks"] += len(keywords)
-                    total_stats["platform_summary"][platform]["failed_keywords"] = len(keywords)
-                    
-                    # 为每个关键词记录失败结果
-                    for keyword in keywords:
-                        if keyword not in total_stats["keyword_results"]:
-                            total_stats["keyword_results"][keyword] = {}
-                        total_stats["keyword_results"][keyword][platform] = result
-                    
-                    print(f"   ❌ 失败: {result.get('error', '未知错误')}")
+            # 为每个关键词记录结果
+            for keyword in keywords:
+                if keyword not in total_stats["keyword_results"]:
+                    total_stats["keyword_results"][keyword] = {}
+                total_stats["keyword_results"][keyword][platform] = result
             
-            except Exception as e:
+            if result.get("success"):
+                total_stats["successful_tasks"] += len(keywords)
+                total_stats["platform_summary"][platform]["successful_keywords"] = len(keywords)
+                
+                notes_count = result.get("notes_count", 0)
+                comments_count = result.get("comments_count", 0)
+                
+                total_stats["total_notes"] += notes_count
+                total_stats["total_comments"] += comments_count
+                total_stats["platform_summary"][platform]["total_notes"] = notes_count
+                total_stats["platform_summary"][platform]["total_comments"] = comments_count
+                
+                print(f"   ✅ {platform} 成功: {notes_count} 条内容, {comments_count} 条评论, "
+                      f"耗时 {result.get('duration_seconds', 0):.1f}秒")
+            else:
                 total_stats["failed_tasks"] += len(keywords)
                 total_stats["platform_summary"][platform]["failed_keywords"] = len(keywords)
-                error_result = {"success": False, "error": str(e)}
-                
-                # 为每个关键词记录异常结果
-                for keyword in keywords:
-                    if keyword not in total_stats["keyword_results"]:
-                        total_stats["keyword_results"][keyword] = {}
-                    total_stats["keyword_results"][keyword][platform] = error_result
                 
-                print(f"   ❌ 异常: {e}")
+                print(f"   ❌ {platform} 失败: {result.get('error', '未知错误')}")
         
         # 打印详细统计
         print(f"\n📊 全平台关键词爬取完成!")
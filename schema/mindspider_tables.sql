@@ -29,6 +29,23 @@ CREATE TABLE `daily_news` (
     KEY `idx_daily_news_rank` (`rank_position`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='每日热点新闻表';
 
+-- ----------------------------
+-- Table structure for daily_news_rank_snapshot
+-- 热榜排名快照表：每次采集时记录新上榜或排名变化的新闻，用于"最近一小时上升最快"等日内趋势查询
+-- ----------------------------
+DROP TABLE IF EXISTS `daily_news_rank_snapshot`;
+CREATE TABLE `daily_news_rank_snapshot` (
+    `id` bigint NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `news_id` varchar(128) NOT NULL COMMENT '新闻唯一ID',
+    `source_platform` varchar(32) NOT NULL COMMENT '新闻源平台',
+    `rank_position` int DEFAULT NULL COMMENT '快照时的排名位置',
+    `crawl_date` date NOT NULL COMMENT '爬取日期',
+    `snapshot_ts` bigint NOT NULL COMMENT '快照时间戳',
+    PRIMARY KEY (`id`),
+    KEY `idx_rank_snapshot_ts` (`snapshot_ts`, `source_platform`),
+    KEY `idx_rank_snapshot_news_ts` (`news_id`, `source_platform`, `snapshot_ts`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='热榜排名快照表';
+
 -- ----------------------------
 -- Table structure for daily_topics
 -- 每日话题表：存储TopicGPT提取的话题信息